@@ -0,0 +1,68 @@
+"""Add running rating totals to marketplace_rating_summaries
+
+Revision ID: n0o1p2q3r4s5
+Revises: m9n0o1p2q3r4
+Create Date: 2026-01-12
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'n0o1p2q3r4s5'
+down_revision = 'm9n0o1p2q3r4'
+branch_labels = None
+depends_on = None
+
+DETAIL_RATINGS = ('ease_of_use', 'features', 'documentation', 'support', 'value')
+
+TOTAL_COLUMNS = ['rating_sum'] + [
+    f'{name}_{suffix}' for name in DETAIL_RATINGS for suffix in ('sum', 'count')
+]
+
+
+def upgrade():
+    for column in TOTAL_COLUMNS:
+        op.add_column(
+            'marketplace_rating_summaries',
+            sa.Column(column, sa.Integer(), nullable=False, server_default='0'),
+        )
+
+    # Backfill from the published reviews, counts included so the
+    # running totals start consistent
+    detail_totals = ',\n                   '.join(
+        f"COALESCE(SUM(rating_{name}) FILTER (WHERE rating_{name} > 0), 0) AS {name}_sum, "
+        f"COUNT(*) FILTER (WHERE rating_{name} > 0) AS {name}_count"
+        for name in DETAIL_RATINGS
+    )
+    detail_assignments = ',\n            '.join(
+        f"{name}_sum = totals.{name}_sum, {name}_count = totals.{name}_count"
+        for name in DETAIL_RATINGS
+    )
+    bucket_totals = ', '.join(f"COUNT(*) FILTER (WHERE rating = {n}) AS rating_{n}" for n in range(1, 6))
+    bucket_assignments = ', '.join(f"rating_{n} = totals.rating_{n}" for n in range(1, 6))
+    op.execute(f"""
+        UPDATE marketplace_rating_summaries AS s
+        SET total_reviews = totals.total_reviews,
+            verified_reviews = totals.verified_reviews,
+            rating_sum = totals.rating_sum,
+            {bucket_assignments},
+            {detail_assignments}
+        FROM (
+            SELECT module_id,
+                   COUNT(*) AS total_reviews,
+                   COUNT(*) FILTER (WHERE verified_purchase) AS verified_reviews,
+                   SUM(rating) AS rating_sum,
+                   {bucket_totals},
+                   {detail_totals}
+            FROM marketplace_reviews
+            WHERE status = 'published'
+            GROUP BY module_id
+        ) AS totals
+        WHERE s.module_id = totals.module_id
+    """)
+
+
+def downgrade():
+    for column in reversed(TOTAL_COLUMNS):
+        op.drop_column('marketplace_rating_summaries', column)
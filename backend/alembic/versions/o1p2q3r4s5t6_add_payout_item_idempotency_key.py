@@ -0,0 +1,36 @@
+"""Add idempotency key to marketplace_payout_items
+
+Revision ID: o1p2q3r4s5t6
+Revises: n0o1p2q3r4s5
+Create Date: 2026-01-13
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'o1p2q3r4s5t6'
+down_revision = 'n0o1p2q3r4s5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'marketplace_payout_items',
+        sa.Column('idempotency_key', sa.String(100), nullable=True),
+    )
+    op.create_unique_constraint(
+        'uq_marketplace_payout_items_idempotency_key',
+        'marketplace_payout_items',
+        ['idempotency_key'],
+    )
+
+
+def downgrade():
+    op.drop_constraint(
+        'uq_marketplace_payout_items_idempotency_key',
+        'marketplace_payout_items',
+        type_='unique',
+    )
+    op.drop_column('marketplace_payout_items', 'idempotency_key')
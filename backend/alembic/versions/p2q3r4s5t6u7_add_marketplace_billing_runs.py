@@ -0,0 +1,52 @@
+"""Add marketplace_billing_runs
+
+Revision ID: p2q3r4s5t6u7
+Revises: o1p2q3r4s5t6
+Create Date: 2026-01-14
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'p2q3r4s5t6u7'
+down_revision = 'o1p2q3r4s5t6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'marketplace_billing_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('run_id', sa.String(50), nullable=False),
+        sa.Column('kind', sa.String(20), nullable=False),
+        sa.Column('run_date', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(20), default='running'),
+        sa.Column('cursor', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('chunk_size', sa.Integer(), nullable=False),
+        sa.Column('workers', sa.Integer(), default=1),
+        sa.Column('processed_count', sa.Integer(), default=0),
+        sa.Column('failed_count', sa.Integer(), default=0),
+        sa.Column('invoice_count', sa.Integer(), default=0),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('duration_seconds', sa.Numeric(12, 3), default=0),
+        sa.Column('error_summary', postgresql.JSONB(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_marketplace_billing_runs_id', 'marketplace_billing_runs', ['id'])
+    op.create_index('ix_marketplace_billing_runs_run_id', 'marketplace_billing_runs', ['run_id'], unique=True)
+    op.create_index('ix_marketplace_billing_runs_status', 'marketplace_billing_runs', ['status'])
+    op.create_index('ix_billing_runs_kind_date', 'marketplace_billing_runs', ['kind', 'run_date'])
+
+
+def downgrade():
+    op.drop_index('ix_billing_runs_kind_date', table_name='marketplace_billing_runs')
+    op.drop_index('ix_marketplace_billing_runs_status', table_name='marketplace_billing_runs')
+    op.drop_index('ix_marketplace_billing_runs_run_id', table_name='marketplace_billing_runs')
+    op.drop_index('ix_marketplace_billing_runs_id', table_name='marketplace_billing_runs')
+    op.drop_table('marketplace_billing_runs')
@@ -0,0 +1,32 @@
+"""Add marketplace_usage_event_keys
+
+Revision ID: q3r4s5t6u7v8
+Revises: p2q3r4s5t6u7
+Create Date: 2026-01-15
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'q3r4s5t6u7v8'
+down_revision = 'p2q3r4s5t6u7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'marketplace_usage_event_keys',
+        sa.Column('subscription_id', sa.Integer(), nullable=False),
+        sa.Column('idempotency_key', sa.String(100), nullable=False),
+        sa.Column('received_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['subscription_id'], ['marketplace_subscriptions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('subscription_id', 'idempotency_key'),
+    )
+    op.create_index('ix_usage_event_keys_received', 'marketplace_usage_event_keys', ['received_at'])
+
+
+def downgrade():
+    op.drop_index('ix_usage_event_keys_received', table_name='marketplace_usage_event_keys')
+    op.drop_table('marketplace_usage_event_keys')
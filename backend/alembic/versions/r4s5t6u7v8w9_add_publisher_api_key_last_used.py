@@ -0,0 +1,32 @@
+"""Add api_key_last_used_at and api_key_hash index to marketplace_publishers
+
+Revision ID: r4s5t6u7v8w9
+Revises: q3r4s5t6u7v8
+Create Date: 2026-01-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'r4s5t6u7v8w9'
+down_revision = 'q3r4s5t6u7v8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'marketplace_publishers',
+        sa.Column('api_key_last_used_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(
+        'ix_marketplace_publishers_api_key_hash',
+        'marketplace_publishers',
+        ['api_key_hash'],
+    )
+
+
+def downgrade():
+    op.drop_index('ix_marketplace_publishers_api_key_hash', table_name='marketplace_publishers')
+    op.drop_column('marketplace_publishers', 'api_key_last_used_at')
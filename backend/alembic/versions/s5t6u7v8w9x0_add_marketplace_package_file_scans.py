@@ -0,0 +1,37 @@
+"""Add marketplace_package_file_scans and stored package columns to marketplace_security_scans
+
+Revision ID: s5t6u7v8w9x0
+Revises: r4s5t6u7v8w9
+Create Date: 2026-01-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 's5t6u7v8w9x0'
+down_revision = 'r4s5t6u7v8w9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'marketplace_package_file_scans',
+        sa.Column('content_hash', sa.String(64), nullable=False),
+        sa.Column('scanner_version', sa.String(50), nullable=False),
+        sa.Column('findings', postgresql.JSONB(), nullable=True),
+        sa.Column('scanned_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('content_hash', 'scanner_version'),
+    )
+    op.add_column('marketplace_security_scans', sa.Column('package_path', sa.String(500), nullable=True))
+    op.add_column('marketplace_security_scans', sa.Column('package_sha256', sa.String(64), nullable=True))
+    op.add_column('marketplace_security_scans', sa.Column('package_size', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('marketplace_security_scans', 'package_size')
+    op.drop_column('marketplace_security_scans', 'package_sha256')
+    op.drop_column('marketplace_security_scans', 'package_path')
+    op.drop_table('marketplace_package_file_scans')
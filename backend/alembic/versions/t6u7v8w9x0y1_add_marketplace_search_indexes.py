@@ -0,0 +1,54 @@
+"""Generated weighted search_vector and trigram indexes on marketplace_modules
+
+Revision ID: t6u7v8w9x0y1
+Revises: s5t6u7v8w9x0
+Create Date: 2026-01-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 't6u7v8w9x0y1'
+down_revision = 's5t6u7v8w9x0'
+branch_labels = None
+depends_on = None
+
+# Weights: name A; summary, tags and keywords B; description C
+SEARCH_VECTOR = """
+    setweight(to_tsvector('english', coalesce(display_name, '') || ' ' || replace(technical_name, '_', ' ')), 'A')
+    || setweight(to_tsvector('english', coalesce(short_description, '')), 'B')
+    || setweight(jsonb_to_tsvector('english', coalesce(tags, '[]') || coalesce(keywords, '[]'), '["string"]'), 'B')
+    || setweight(to_tsvector('english', coalesce(description, '')), 'C')
+"""
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    # The old text column was never populated
+    op.drop_column('marketplace_modules', 'search_vector')
+    op.execute(
+        f'ALTER TABLE marketplace_modules ADD COLUMN search_vector tsvector '
+        f'GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED'
+    )
+    op.create_index(
+        'ix_modules_search_vector', 'marketplace_modules', ['search_vector'],
+        postgresql_using='gin',
+    )
+    op.create_index(
+        'ix_modules_display_name_trgm', 'marketplace_modules', ['display_name'],
+        postgresql_using='gin', postgresql_ops={'display_name': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_modules_technical_name_trgm', 'marketplace_modules', ['technical_name'],
+        postgresql_using='gin', postgresql_ops={'technical_name': 'gin_trgm_ops'},
+    )
+
+
+def downgrade():
+    op.drop_index('ix_modules_technical_name_trgm', table_name='marketplace_modules')
+    op.drop_index('ix_modules_display_name_trgm', table_name='marketplace_modules')
+    op.drop_index('ix_modules_search_vector', table_name='marketplace_modules')
+    op.drop_column('marketplace_modules', 'search_vector')
+    op.add_column('marketplace_modules', sa.Column('search_vector', sa.Text(), nullable=True))
@@ -0,0 +1,26 @@
+"""Add heartbeat_at to marketplace_billing_runs
+
+Revision ID: u7v8w9x0y1z2
+Revises: t6u7v8w9x0y1
+Create Date: 2026-01-20
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'u7v8w9x0y1z2'
+down_revision = 't6u7v8w9x0y1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'marketplace_billing_runs',
+        sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_column('marketplace_billing_runs', 'heartbeat_at')
@@ -66,6 +66,7 @@ class BackgroundTask:
     scheduled_at: Optional[datetime] = None
     metadata: dict = field(default_factory=dict)
     is_async: bool = False
+    on_failure: Optional[Callable] = None
 
 
 class TaskResultStore:
@@ -153,8 +154,14 @@ class BackgroundTaskManager:
         timeout: int = 300,
         scheduled_at: Optional[datetime] = None,
         metadata: Optional[dict] = None,
+        on_failure: Optional[Callable] = None,
     ) -> str:
-        """Submit a task for execution"""
+        """Submit a task for execution
+
+        ``on_failure`` is called with the task's args followed by the error
+        message once the task has failed for good (timed out, or raised with
+        no retries left), so callers can record the failure on their own rows.
+        """
         if kwargs is None:
             kwargs = {}
         if metadata is None:
@@ -173,6 +180,7 @@ class BackgroundTaskManager:
             scheduled_at=scheduled_at,
             metadata=metadata,
             is_async=is_async,
+            on_failure=on_failure,
         )
 
         with self._lock:
@@ -230,6 +238,7 @@ class BackgroundTaskManager:
             task_result.error = f"Task timed out after {task.timeout} seconds"
             task_result.completed_at = datetime.utcnow()
             logger.error(f"Task {task.task_id} timed out")
+            await self._notify_failure(task, task_result)
 
         except Exception as e:
             task_result.status = TaskStatus.FAILED
@@ -241,6 +250,8 @@ class BackgroundTaskManager:
             # Schedule retry if applicable
             if task_result.retry_count < task.max_retries:
                 await self._schedule_retry(task, task_result)
+            else:
+                await self._notify_failure(task, task_result)
 
         finally:
             self.result_store.store_result(task_result)
@@ -248,6 +259,17 @@ class BackgroundTaskManager:
             with self._lock:
                 self._pending_tasks.pop(task.task_id, None)
 
+    async def _notify_failure(self, task: BackgroundTask, task_result: TaskResult) -> None:
+        """Run the task's failure callback off the event loop"""
+        if task.on_failure is None:
+            return
+        try:
+            await asyncio.get_event_loop().run_in_executor(
+                None, lambda: task.on_failure(*task.args, task_result.error)
+            )
+        except Exception as e:
+            logger.error(f"Failure callback for task {task.task_id} failed: {e}")
+
     async def _schedule_retry(self, task: BackgroundTask, task_result: TaskResult) -> None:
         """Schedule task for retry"""
         task_result.retry_count += 1
@@ -266,6 +288,7 @@ class BackgroundTaskManager:
             scheduled_at=datetime.utcnow() + timedelta(seconds=task.retry_delay),
             metadata={**task.metadata, "retry_count": task_result.retry_count},
             is_async=task.is_async,
+            on_failure=task.on_failure,
         )
 
         logger.info(
@@ -290,6 +313,11 @@ class BackgroundTaskManager:
         """Get result of a task"""
         return self.result_store.get_result(task_id)
 
+    def get_queue_depth(self) -> int:
+        """Number of submitted tasks that have not finished yet"""
+        with self._lock:
+            return len(self._pending_tasks)
+
     def get_statistics(self) -> Dict[str, Any]:
         """Get task processing statistics"""
         all_results = list(self.result_store._results.values())
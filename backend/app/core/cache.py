@@ -2,11 +2,16 @@
 
 import json
 import logging
-from typing import Any, Optional
+import threading
+import time
+from typing import Any, Callable, Optional, Set, Tuple, Type
 
 import redis
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
 
 from app.core.config import settings
+from app.core.metrics import cache_operations_total
 
 logger = logging.getLogger(__name__)
 
@@ -37,9 +42,12 @@ class RedisCache:
         try:
             value = self.client.get(key)
             if value:
+                cache_operations_total.inc(result="hit")
                 return json.loads(value)
+            cache_operations_total.inc(result="miss")
             return None
         except Exception as e:
+            cache_operations_total.inc(result="error")
             logger.warning(f"Cache get error for key {key}: {e}")
             return None
 
@@ -103,6 +111,142 @@ class RedisCache:
             self._client = None
 
 
+class CacheGeneration:
+    """
+    Cluster-wide generation counter for an in-process cache.
+
+    Processes build their local cache, remember token(), and rebuild when
+    it changes. bump() invalidates the local process immediately and other
+    processes within check_interval (via a Redis counter). When Redis is
+    unavailable only local invalidation applies.
+
+    Usage:
+        rules_generation = CacheGeneration("automation_rules")
+
+        if self._token != rules_generation.token():
+            self._rebuild()
+            self._token = rules_generation.token()
+    """
+
+    def __init__(self, name: str, check_interval: Optional[float] = None):
+        self.key = f"cache_generation:{name}"
+        self.check_interval = (
+            settings.CACHE_GENERATION_CHECK_INTERVAL if check_interval is None else check_interval
+        )
+        self._lock = threading.Lock()
+        self._local = 0
+        self._remote: Optional[str] = None
+        self._checked_at = float("-inf")
+
+    def token(self) -> Tuple[int, Optional[str]]:
+        """Current generation; compare with the token a cache was built at."""
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            remote = self._read_remote()
+            with self._lock:
+                self._remote = remote
+        return (self._local, self._remote)
+
+    def bump(self) -> None:
+        """Invalidate caches built at earlier generations."""
+        with self._lock:
+            self._local += 1
+        if not settings.CACHE_ENABLED:
+            return
+        try:
+            cache.client.incr(self.key)
+        except Exception as e:
+            logger.warning(f"Cache generation bump failed for {self.key}: {e}")
+
+    def _read_remote(self) -> Optional[str]:
+        if not settings.CACHE_ENABLED:
+            return None
+        try:
+            return cache.client.get(self.key)
+        except Exception as e:
+            logger.debug(f"Cache generation read failed for {self.key}: {e}")
+            return self._remote
+
+
+class CommitInvalidation:
+    """
+    Invalidate an in-process cache once a session that changed its source
+    rows commits.
+
+    Changes are recorded in session.info, by mapper events for watched
+    models or by mark() for bulk query updates/deletes (which don't emit
+    mapper events). A commit runs on_commit(session, keys) once; a rollback
+    forgets the changes, so only committed changes invalidate.
+
+    Usage:
+        rules_invalidation = CommitInvalidation(
+            "automation_rules", lambda session, keys: index.invalidate()
+        )
+        rules_invalidation.watch(AutomationRule)
+    """
+
+    def __init__(self, name: str, on_commit: Callable[[Session, Set[Any]], None]):
+        self.key = f"commit_invalidation:{name}"
+        self.on_commit = on_commit
+
+        def after_commit(session: Session) -> None:
+            changed = session.info.pop(self.key, None)
+            if changed:
+                self.on_commit(session, changed)
+
+        def after_rollback(session: Session) -> None:
+            session.info.pop(self.key, None)
+
+        # Kept referenced for as long as the invalidation exists
+        self._listeners = (after_commit, after_rollback)
+        event.listen(Session, "after_commit", after_commit)
+        event.listen(Session, "after_rollback", after_rollback)
+
+    def mark(self, session: Session, key: Any = None) -> None:
+        """Invalidate key (everything if None) when the session commits."""
+        session.info.setdefault(self.key, set()).add(key)
+
+    def has_pending(self, session: Session) -> bool:
+        """Whether the session made changes that aren't committed yet."""
+        return bool(session.info.get(self.key))
+
+    def watch(
+        self,
+        model: Type,
+        key: Optional[Callable[[Any], Any]] = None,
+        updated: Optional[Callable[[Any], bool]] = None,
+    ) -> None:
+        """
+        Mark inserts, updates and deletes of a model's rows.
+
+        Args:
+            model: Mapped class
+            key: Cache key of a row (None marks everything)
+            updated: Whether an update matters (all updates if None)
+        """
+        def changed(mapper, connection, target) -> None:
+            session = object_session(target)
+            if session is not None:
+                self.mark(session, key(target) if key else None)
+
+        def on_update(mapper, connection, target) -> None:
+            if updated is None or updated(target):
+                changed(mapper, connection, target)
+
+        event.listen(model, "after_insert", changed)
+        event.listen(model, "after_update", on_update)
+        event.listen(model, "after_delete", changed)
+
+
+def invalidate_on_commit(name: str, invalidate: Callable[[], None], *models: Type) -> CommitInvalidation:
+    """Call invalidate() after a commit that changed rows of any of the models."""
+    invalidation = CommitInvalidation(name, lambda session, keys: invalidate())
+    for model in models:
+        invalidation.watch(model)
+    return invalidation
+
+
 # Global cache instance
 cache = RedisCache()
 
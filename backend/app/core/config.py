@@ -45,6 +45,7 @@ class Settings(BaseSettings):
     # Cache
     CACHE_ENABLED: bool = True
     CACHE_DEFAULT_TTL: int = 300  # 5 minutes
+    CACHE_GENERATION_CHECK_INTERVAL: float = 1.0  # Seconds between cross-process invalidation checks
 
     # CORS - stored as comma-separated string, parsed to list
     BACKEND_CORS_ORIGINS: str = "http://localhost:3000,http://localhost:5173,http://localhost:5175,http://localhost:5176,http://127.0.0.1:3000,http://127.0.0.1:5173,http://127.0.0.1:5175,http://127.0.0.1:5176"
@@ -89,6 +90,13 @@ class Settings(BaseSettings):
 
     # Logging
     LOG_LEVEL: str = "INFO"
+    LOG_DIR: str = "logs"
+    LOG_JSON: bool = True  # JSON records in log files
+    LOG_MAX_BYTES: int = 10 * 1024 * 1024  # Rotate log files at 10MB
+    LOG_BACKUP_COUNT: int = 5
+    LOG_QUEUE_SIZE: int = 10000  # Pending records before new ones are dropped
+    LOG_SUCCESS_SAMPLE_RATE: float = 1.0  # Fraction of 2xx/3xx request logs kept
+    LOG_SAMPLE_ROUTES: str = ""  # Per-route overrides, e.g. "/api/v1/inbox=0.1,/api/v1/notifications=0.05"
     ACTIVITY_LOGGING_ENABLED: bool = True
     AUDIT_TRAIL_ENABLED: bool = True
 
@@ -142,6 +150,10 @@ class Settings(BaseSettings):
     NOTIFICATION_SOUND_ENABLED: bool = True
     NOTIFICATION_DESKTOP_ENABLED: bool = True
 
+    # Metrics (Prometheus)
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: Optional[str] = None  # Scraper "Authorization: Bearer <token>" for /metrics (else superusers only)
+
     # Performance
     WORKERS: int = 1
     MAX_CONNECTIONS: int = 1000
@@ -159,6 +171,58 @@ class Settings(BaseSettings):
     AUTO_DISCOVER_MODULES: bool = True  # Auto-discover modules on startup
     MODULE_UPLOAD_DIR: str = "uploads/modules"  # Directory for uploaded module ZIPs
     MODULES_ENABLED: bool = True  # Enable/disable module system
+    MODULE_INDEX_PATH: str = ".cache/module_manifest_index.json"  # Parsed manifest cache ("" disables)
+    MODULE_LOAD_WORKERS: int = 1  # Threads importing independent modules concurrently (1 = sequential)
+    REMOTE_MODULE_SYNC_WORKERS: int = 8  # Concurrent file transfers when syncing remote modules
+    MODULE_UPLOAD_MAX_SIZE: int = 100 * 1024 * 1024  # Largest accepted module package (bytes)
+    PACKAGE_SCAN_WORKERS: int = 2  # Package scan processes (0 = scan in the calling thread)
+    PACKAGE_SCAN_TIMEOUT: int = 600  # Seconds before a queued package scan is abandoned
+
+    # Reports
+    REPORT_RENDER_WORKERS: int = 2  # PDF render processes (0 = render in the calling thread)
+    REPORT_RENDER_TIMEOUT: int = 120  # Seconds before a PDF render is abandoned
+    REPORT_OUTPUT_DIR: str = ".cache/reports"  # Rendered report files and output cache
+    REPORT_CACHE_TTL: int = 3600  # Seconds a rendered output is reused (0 disables)
+    REPORT_OUTPUT_RETENTION: int = 86400  # Minimum seconds a rendered file is kept for download
+    REPORT_TEMPLATE_CACHE_SIZE: int = 256  # Compiled templates kept in memory
+
+    # Sequences
+    SEQUENCE_ALLOCATION_MODE: str = "strict"  # "strict" (gap-less, row lock until commit) or "fast" (per-worker blocks)
+    SEQUENCE_BLOCK_SIZE: int = 50  # Numbers reserved per worker in fast mode
+
+    # Model hooks
+    HOOK_SLOW_THRESHOLD_MS: float = 100.0  # Hook calls slower than this are logged and reported
+
+    # Marketplace licensing
+    LICENSE_CACHE_TTL: int = 300  # Max seconds a cached license snapshot is served
+    LICENSE_CACHE_SIZE: int = 100000  # License snapshots kept per process
+    LICENSE_HEARTBEAT_FLUSH_INTERVAL: float = 10.0  # Seconds between batched verification bookkeeping writes
+    LICENSE_TOKEN_PRIVATE_KEY: Optional[str] = None  # PEM key signing offline license tokens (unset disables them)
+    LICENSE_TOKEN_ALGORITHM: str = "RS256"
+    LICENSE_TOKEN_TTL: int = 7 * 24 * 3600  # Offline token lifetime, capped at the license expiry
+
+    # Marketplace payouts
+    PAYOUT_PROCESS_WORKERS: int = 4  # Payout items processed concurrently, each in its own transaction
+
+    # Marketplace billing runs
+    BILLING_RUN_CHUNK_SIZE: int = 500  # Subscriptions or invoices per chunk transaction (run checkpoint)
+    BILLING_RUN_WORKERS: int = 4  # Chunks processed concurrently
+    BILLING_RUN_LEASE: int = 600  # Seconds without a checkpoint before a running billing run may be taken over
+
+    # Marketplace metered usage ingestion
+    USAGE_FLUSH_INTERVAL: float = 1.0  # Seconds between buffered usage flushes
+    USAGE_FLUSH_SIZE: int = 5000  # Pending events that trigger an early flush
+    USAGE_EVENT_KEY_RETENTION_DAYS: int = 30  # Idempotency keys kept; older retries count again
+
+    # Marketplace publisher API keys
+    PUBLISHER_API_KEY_CACHE_TTL: int = 300  # Max seconds a cached key -> publisher entry is served
+    PUBLISHER_API_KEY_NEGATIVE_TTL: int = 30  # Seconds an unknown key is remembered as invalid
+    PUBLISHER_API_KEY_CACHE_SIZE: int = 10000  # Keys kept per process (valid and invalid each)
+    PUBLISHER_API_KEY_RATE_LIMIT: int = 600  # Requests per minute per key (0 disables)
+    PUBLISHER_API_KEY_USAGE_FLUSH_INTERVAL: float = 30.0  # Seconds between batched last-used writes
+
+    # Marketplace search
+    MARKETPLACE_SUGGESTION_TTL: int = 300  # Max seconds the autocomplete suggestion index is served
 
     @property
     def addon_paths_list(self) -> List[str]:
@@ -4,17 +4,39 @@ Logging utilities for the FastVue Framework.
 Provides centralized logging configuration with:
 - Named loggers for different components
 - Security event logging
-- Structured logging support
+- Structured (JSON) logging support
+- Non-blocking queue-based pipeline with rotation and drop counters
+- Per-route sampling of successful request logs
 """
 
+import copy
 import json
 import logging
-from datetime import datetime
-from typing import Any, Dict, Optional
+import queue
+import random
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.context import get_request_context
 
 
 # Configure default logging format
-LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+
+# Attributes present on every LogRecord; anything else was passed via ``extra``
+_RESERVED_ATTRS = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", (), None)).keys()
+) | {"message", "asctime", "request_id", "user_id", "company_id"}
+
+# Formatter used only to render tracebacks on the calling thread
+_EXC_FORMATTER = logging.Formatter()
+
+# Active pipeline state (set by setup_logging)
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional["NonBlockingQueueHandler"] = None
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -28,14 +50,334 @@ def get_logger(name: str) -> logging.Logger:
         Configured logger instance
     """
     logger = logging.getLogger(name)
-    if not logger.handlers:
+    if not logger.handlers and _queue_handler is None:
         handler = logging.StreamHandler()
-        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handler.setFormatter(TextFormatter(LOG_FORMAT))
+        handler.addFilter(RequestContextFilter())
+        # Marked so setup_logging can route this logger through the queue instead
+        handler._fastvue_default = True
         logger.addHandler(handler)
         logger.setLevel(logging.INFO)
     return logger
 
 
+# =============================================================================
+# FILTERS AND FORMATTERS
+# =============================================================================
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Attach request correlation fields from the current RequestContext.
+
+    Must run on the thread that emitted the record: context variables are
+    not visible from the queue listener thread.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        ctx = get_request_context()
+        if not hasattr(record, "request_id"):
+            record.request_id = ctx.request_id if ctx and ctx.request_id else "-"
+        if not hasattr(record, "user_id"):
+            record.user_id = ctx.user_id if ctx else None
+        if not hasattr(record, "company_id"):
+            record.company_id = ctx.company_id if ctx else None
+        return True
+
+
+class TextFormatter(logging.Formatter):
+    """Plain-text formatter tolerant of records without correlation fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not hasattr(record, "request_id"):
+            record.request_id = "-"
+        return super().format(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """Render log records as single-line JSON documents."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+
+        user_id = getattr(record, "user_id", None)
+        if user_id is not None:
+            payload["user_id"] = user_id
+        company_id = getattr(record, "company_id", None)
+        if company_id is not None:
+            payload["company_id"] = company_id
+
+        # Structured fields passed via ``extra=``
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                payload[key] = value
+
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exception"] = record.exc_text
+
+        return json.dumps(payload, default=str)
+
+
+class _LoggerNameFilter(logging.Filter):
+    """Accept or reject records by logger name prefix."""
+
+    def __init__(self, prefix: str, exclude: bool = False):
+        super().__init__()
+        self.prefix = prefix
+        self.exclude = exclude
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        matches = record.name == self.prefix or record.name.startswith(self.prefix + ".")
+        return not matches if self.exclude else matches
+
+
+# =============================================================================
+# NON-BLOCKING QUEUE PIPELINE
+# =============================================================================
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks the caller.
+
+    Records are enqueued with ``put_nowait`` into a bounded queue; when the
+    queue is full the record is dropped and counted instead of stalling the
+    event loop on disk I/O.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self._lock = threading.Lock()
+        self.dropped = 0
+        self.dropped_by_level: Dict[str, int] = {}
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                self.dropped_by_level[record.levelname] = (
+                    self.dropped_by_level.get(record.levelname, 0) + 1
+                )
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Make the record safe to hand to another thread.
+
+        The message is interpolated and any traceback rendered here, but
+        formatting is left to the listener's handlers.
+        """
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _EXC_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "queued": self.queue.qsize(),
+                "capacity": self.queue.maxsize,
+                "dropped": self.dropped,
+                "dropped_by_level": dict(self.dropped_by_level),
+            }
+
+
+def setup_logging(
+    level: str = "INFO",
+    log_dir: str = "logs",
+    json_format: bool = True,
+    max_bytes: int = 10 * 1024 * 1024,
+    backup_count: int = 5,
+    queue_size: int = 10000,
+    console: bool = True,
+) -> QueueListener:
+    """
+    Configure the application-wide logging pipeline.
+
+    All loggers write into a single bounded queue through a
+    NonBlockingQueueHandler on the root logger. A background QueueListener
+    drains it into the console, a rotating application log and a rotating
+    security log. Calling this again replaces the previous pipeline.
+
+    Args:
+        level: Root log level name
+        log_dir: Directory for log files (created if missing)
+        json_format: Write JSON records to the log files
+        max_bytes: Rotate log files after this many bytes
+        backup_count: Number of rotated files to keep
+        queue_size: Maximum number of pending records before dropping
+        console: Also log to stderr
+
+    Returns:
+        The started QueueListener
+    """
+    global _listener, _queue_handler
+
+    shutdown_logging()
+
+    log_path = Path(log_dir)
+    log_path.mkdir(parents=True, exist_ok=True)
+
+    file_formatter: logging.Formatter = (
+        JsonFormatter() if json_format else TextFormatter(LOG_FORMAT)
+    )
+
+    handlers: List[logging.Handler] = []
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(TextFormatter(LOG_FORMAT))
+        handlers.append(console_handler)
+
+    app_handler = RotatingFileHandler(
+        log_path / "fastvue.log",
+        maxBytes=max_bytes,
+        backupCount=backup_count,
+        encoding="utf-8",
+        delay=True,
+    )
+    app_handler.setFormatter(file_formatter)
+    handlers.append(app_handler)
+
+    security_handler = RotatingFileHandler(
+        log_path / "security.log",
+        maxBytes=max_bytes,
+        backupCount=backup_count,
+        encoding="utf-8",
+        delay=True,
+    )
+    security_handler.setFormatter(file_formatter)
+    security_handler.addFilter(_LoggerNameFilter("security"))
+    handlers.append(security_handler)
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(getattr(logging, level.upper(), logging.INFO))
+
+    # Drop the synchronous stream handlers attached by get_logger(); those
+    # loggers propagate to the root queue handler instead.
+    for existing in list(logging.root.manager.loggerDict.values()):
+        if isinstance(existing, logging.Logger):
+            for handler in list(existing.handlers):
+                if getattr(handler, "_fastvue_default", False):
+                    existing.removeHandler(handler)
+
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+
+    _listener = listener
+    _queue_handler = queue_handler
+    return listener
+
+
+def shutdown_logging() -> None:
+    """Flush pending records and stop the queue listener, if running."""
+    global _listener, _queue_handler
+
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+
+
+def get_logging_stats() -> Dict[str, Any]:
+    """Return queue depth and drop counters for the active pipeline."""
+    if _queue_handler is None:
+        return {"enabled": False}
+    return {"enabled": True, **_queue_handler.stats()}
+
+
+# =============================================================================
+# SAMPLING
+# =============================================================================
+
+
+class LogSampler:
+    """
+    Per-route sampling of successful request logs.
+
+    Errors, client errors and slow requests are always logged; successful
+    requests are kept with the probability configured for the longest
+    matching path prefix (or the default rate).
+    """
+
+    def __init__(
+        self,
+        default_rate: float = 1.0,
+        route_rates: Optional[Dict[str, float]] = None,
+    ):
+        self.default_rate = self._clamp(default_rate)
+        # Longest prefix first so the most specific route wins
+        self.route_rates: List[Tuple[str, float]] = sorted(
+            ((prefix, self._clamp(rate)) for prefix, rate in (route_rates or {}).items()),
+            key=lambda item: len(item[0]),
+            reverse=True,
+        )
+        self.sampled_out = 0
+
+    @staticmethod
+    def _clamp(rate: float) -> float:
+        return max(0.0, min(1.0, float(rate)))
+
+    @classmethod
+    def from_config(cls, default_rate: float, route_rates: str) -> "LogSampler":
+        """
+        Build a sampler from a "prefix=rate,prefix=rate" string.
+
+        Malformed entries are ignored.
+        """
+        rates: Dict[str, float] = {}
+        for entry in (route_rates or "").split(","):
+            prefix, sep, rate = entry.strip().partition("=")
+            if not sep or not prefix.strip():
+                continue
+            try:
+                rates[prefix.strip()] = float(rate)
+            except ValueError:
+                continue
+        return cls(default_rate=default_rate, route_rates=rates)
+
+    def rate_for(self, path: str) -> float:
+        for prefix, rate in self.route_rates:
+            if path.startswith(prefix):
+                return rate
+        return self.default_rate
+
+    def should_log(self, path: str, status_code: int, slow: bool = False) -> bool:
+        if status_code >= 400 or slow:
+            return True
+        rate = self.rate_for(path)
+        if rate >= 1.0:
+            return True
+        if rate > 0.0 and random.random() < rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+
 # Pre-configured security logger
 security_logger = get_logger("security")
 
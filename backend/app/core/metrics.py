@@ -0,0 +1,537 @@
+"""
+Prometheus metrics for the FastVue Framework.
+
+Provides a dependency-free metrics registry with Prometheus text exposition:
+- Counters, gauges and histograms with labels
+- ASGI middleware for per-route latency/size histograms and in-flight gauge
+- Per-request SQL statement count and time via engine events
+- Scrape-time collectors for DB pool, WebSocket and background task gauges
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+# Default buckets (seconds) for request latency
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Default buckets (bytes) for request/response sizes
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+# Default buckets for per-request SQL statement counts
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+# =============================================================================
+# METRIC TYPES
+# =============================================================================
+
+
+class _Metric:
+    """Base class for labelled metrics."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"Metric {self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            state[index] += 1
+            state[-1] += value
+
+    def count(self, **labels: str) -> int:
+        state = self._values.get(self._key(labels))
+        return int(sum(state[:-1])) if state else 0
+
+    def sum(self, **labels: str) -> float:
+        state = self._values.get(self._key(labels))
+        return state[-1] if state else 0.0
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+        for key, state in items:
+            cumulative = 0.0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} "
+                    f"{_format_value(cumulative)}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_count{labels} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-1])}")
+        return lines
+
+
+# =============================================================================
+# REGISTRY
+# =============================================================================
+
+
+# A collector returns (name, help, kind, [(labels, value), ...]) samples at scrape time
+CollectorSample = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+Collector = Callable[[], Iterable[CollectorSample]]
+
+
+class MetricsRegistry:
+    """Registry of metrics and scrape-time collectors."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Collector] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric):
+                    raise ValueError(f"Metric {metric.name} already registered as {existing.kind}")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Collector) -> None:
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        for metric in metrics:
+            lines.extend(metric.render())
+
+        for collector in collectors:
+            try:
+                for name, documentation, kind, samples in collector():
+                    lines.append(f"# HELP {name} {documentation}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    for labels, value in samples:
+                        label_str = _format_labels(list(labels), list(labels.values()))
+                        lines.append(f"{name}{label_str} {_format_value(value)}")
+            except Exception as e:
+                logger.warning("Metrics collector %r failed: %s", collector, e)
+
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+# =============================================================================
+# APPLICATION METRICS
+# =============================================================================
+
+http_requests_total = registry.counter(
+    "fastvue_http_requests_total",
+    "Total HTTP requests",
+    ("method", "route", "status"),
+)
+http_request_duration = registry.histogram(
+    "fastvue_http_request_duration_seconds",
+    "HTTP request latency in seconds",
+    ("method", "route"),
+)
+http_request_size = registry.histogram(
+    "fastvue_http_request_size_bytes",
+    "HTTP request body size in bytes",
+    ("method", "route"),
+    buckets=SIZE_BUCKETS,
+)
+http_response_size = registry.histogram(
+    "fastvue_http_response_size_bytes",
+    "HTTP response body size in bytes",
+    ("method", "route"),
+    buckets=SIZE_BUCKETS,
+)
+http_requests_in_flight = registry.gauge(
+    "fastvue_http_requests_in_flight",
+    "HTTP requests currently being served",
+)
+
+db_statements_total = registry.counter(
+    "fastvue_db_statements_total",
+    "SQL statements executed",
+)
+db_statement_duration = registry.histogram(
+    "fastvue_db_statement_duration_seconds",
+    "SQL statement execution time in seconds",
+)
+db_statements_per_request = registry.histogram(
+    "fastvue_db_statements_per_request",
+    "SQL statements executed per HTTP request",
+    ("route",),
+    buckets=QUERY_COUNT_BUCKETS,
+)
+db_time_per_request = registry.histogram(
+    "fastvue_db_time_per_request_seconds",
+    "Total SQL execution time per HTTP request in seconds",
+    ("route",),
+)
+
+cache_operations_total = registry.counter(
+    "fastvue_cache_operations_total",
+    "Cache lookups by result",
+    ("result",),
+)
+
+
+# =============================================================================
+# PER-REQUEST DB INSTRUMENTATION
+# =============================================================================
+
+
+@dataclass
+class RequestDBStats:
+    """SQL statistics accumulated for the current request."""
+
+    statements: int = 0
+    duration: float = 0.0
+
+
+_request_db_stats: ContextVar[Optional[RequestDBStats]] = ContextVar(
+    "request_db_stats", default=None
+)
+
+
+def get_request_db_stats() -> Optional[RequestDBStats]:
+    """Get SQL statistics for the current request, if tracking is active."""
+    return _request_db_stats.get()
+
+
+_instrumented_engines: "set[int]" = set()
+
+
+def instrument_engine(engine) -> None:
+    """
+    Attach statement timing listeners to a SQLAlchemy engine.
+
+    Statement counts and durations are recorded globally and added to the
+    RequestDBStats of the request being served (if any). Safe to call more
+    than once per engine.
+    """
+    from sqlalchemy import event
+
+    if id(engine) in _instrumented_engines:
+        return
+    _instrumented_engines.add(id(engine))
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_metrics_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("_metrics_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        db_statements_total.inc()
+        db_statement_duration.observe(elapsed)
+        stats = _request_db_stats.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.duration += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None:
+            starts = conn.info.get("_metrics_start")
+            if starts:
+                starts.pop()
+
+    def _collect_pool():
+        pool = engine.pool
+        samples = []
+        for name, attr in (
+            ("size", "size"),
+            ("checked_out", "checkedout"),
+            ("checked_in", "checkedin"),
+            ("overflow", "overflow"),
+        ):
+            getter = getattr(pool, attr, None)
+            if callable(getter):
+                samples.append(({"state": name}, float(getter())))
+        if samples:
+            yield (
+                "fastvue_db_pool_connections",
+                "Database connection pool state",
+                "gauge",
+                samples,
+            )
+
+    registry.register_collector(_collect_pool)
+
+
+# =============================================================================
+# SCRAPE-TIME COLLECTORS
+# =============================================================================
+
+
+def _collect_websockets():
+    from app.core.websocket import manager
+
+    yield (
+        "fastvue_websocket_connections",
+        "Open WebSocket connections",
+        "gauge",
+        [({}, float(manager.get_total_connections()))],
+    )
+    yield (
+        "fastvue_websocket_users",
+        "Users with at least one open WebSocket connection",
+        "gauge",
+        [({}, float(len(manager.active_connections)))],
+    )
+
+
+def _collect_background_tasks():
+    from app.core.background_tasks import task_manager
+
+    yield (
+        "fastvue_background_tasks_pending",
+        "Background tasks submitted but not yet finished",
+        "gauge",
+        [({}, float(task_manager.get_queue_depth()))],
+    )
+
+
+def _collect_logging():
+    from app.core.logging import get_logging_stats
+
+    stats = get_logging_stats()
+    if not stats.get("enabled"):
+        return
+    yield ("fastvue_log_queue_depth", "Log records waiting to be written", "gauge",
+           [({}, float(stats["queued"]))])
+    yield ("fastvue_log_records_dropped_total", "Log records dropped because the queue was full",
+           "counter", [({}, float(stats["dropped"]))])
+
+
+registry.register_collector(_collect_websockets)
+registry.register_collector(_collect_background_tasks)
+registry.register_collector(_collect_logging)
+
+
+# =============================================================================
+# MIDDLEWARE
+# =============================================================================
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording per-route HTTP metrics.
+
+    Routes are labelled by their path template (e.g. ``/api/v1/users/{user_id}``)
+    to keep cardinality bounded; unmatched paths share a single label.
+    """
+
+    def __init__(self, app: ASGIApp, excluded_paths: Optional[Sequence[str]] = None):
+        self.app = app
+        self.excluded_paths = set(excluded_paths or ["/metrics"])
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        response_size = 0
+        request_size = 0
+
+        async def receive_wrapper() -> Message:
+            nonlocal request_size
+            message = await receive()
+            if message["type"] == "http.request":
+                request_size += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        stats = RequestDBStats()
+        token = _request_db_stats.set(stats)
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            _request_db_stats.reset(token)
+
+            route = scope.get("route")
+            route_label = getattr(route, "path", None) or "unmatched"
+
+            http_requests_total.inc(method=method, route=route_label, status=str(status_code))
+            http_request_duration.observe(elapsed, method=method, route=route_label)
+            http_request_size.observe(request_size, method=method, route=route_label)
+            http_response_size.observe(response_size, method=method, route=route_label)
+            db_statements_per_request.observe(stats.statements, route=route_label)
+            db_time_per_request.observe(stats.duration, route=route_label)
+
+
+def render_metrics() -> str:
+    """Render the global registry in Prometheus text format."""
+    return registry.render()
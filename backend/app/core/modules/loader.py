@@ -9,6 +9,7 @@ import ast
 import hashlib
 import importlib
 import importlib.util
+import json
 import logging
 import os
 import re
@@ -16,6 +17,9 @@ import shutil
 import sys
 import tempfile
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Set, Type
 from zipfile import ZipFile, is_zipfile
@@ -40,6 +44,35 @@ MAX_ZIP_FILES = 1000  # Max files in ZIP
 MAX_FILENAME_LENGTH = 255
 MODULE_NAME_PATTERN = re.compile(r'^[a-zA-Z][a-zA-Z0-9_]*$')  # Valid Python identifier
 
+# Bump when the on-disk manifest index layout changes
+MANIFEST_INDEX_VERSION = 1
+
+
+@dataclass
+class ModuleLoadTiming:
+    """Boot timings for a single module, in seconds."""
+
+    name: str
+    level: int = 0
+    manifest: float = 0.0
+    import_time: float = 0.0
+    models: float = 0.0
+    routers: float = 0.0
+    services: float = 0.0
+    mount: float = 0.0
+
+    @property
+    def total(self) -> float:
+        return (
+            self.manifest + self.import_time + self.models
+            + self.routers + self.services + self.mount
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["total"] = self.total
+        return data
+
 
 class ModuleLoader:
     """
@@ -53,6 +86,8 @@ class ModuleLoader:
         self,
         addon_paths: List[Path],
         registry: Optional[ModuleRegistry] = None,
+        index_path: Optional[Path] = None,
+        max_workers: int = 1,
     ):
         """
         Initialize the module loader.
@@ -60,6 +95,10 @@ class ModuleLoader:
         Args:
             addon_paths: List of paths to search for modules
             registry: Module registry to use (creates new if None)
+            index_path: JSON file persisting parsed manifests between boots
+                        (keyed by manifest mtime, size and hash); None disables it
+            max_workers: Threads used to import modules of the same dependency
+                         level concurrently (1 keeps loading sequential)
         """
         self.addon_paths = [Path(p) for p in addon_paths]
         self.registry = registry or ModuleRegistry.get_registry()
@@ -68,6 +107,13 @@ class ModuleLoader:
         self._cache_lock = threading.RLock()
         self._discovery_done = False
 
+        self.index_path = Path(index_path) if index_path else None
+        self.max_workers = max(1, max_workers)
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None  # manifest path -> entry
+        self._index_dirty = False
+        self.index_stats = {"hits": 0, "misses": 0}
+        self.timings: Dict[str, ModuleLoadTiming] = {}
+
         logger.info(f"Module loader initialized with paths: {self.addon_paths}")
 
     def _validate_module_name(self, name: str) -> bool:
@@ -191,9 +237,32 @@ class ModuleLoader:
                 module_name
             )
 
+        # Unchanged manifests (same mtime and size) come straight from the index
+        stat = manifest_file.stat()
+        index_key = str(manifest_file.resolve())
+        entry = self._get_index_entry(index_key)
+        if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            manifest = entry["manifest"]
+            with self._cache_lock:
+                self.index_stats["hits"] += 1
+                self._manifest_cache[module_name] = manifest
+            return manifest
+
+        with self._cache_lock:
+            self.index_stats["misses"] += 1
+
         try:
             # Read and parse the manifest file safely
             content = manifest_file.read_text(encoding='utf-8')
+            digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+            # Touched but identical file: reuse the parsed manifest, refresh the stat
+            if entry and entry["sha256"] == digest:
+                manifest = entry["manifest"]
+                self._put_index_entry(index_key, stat, digest, manifest)
+                with self._cache_lock:
+                    self._manifest_cache[module_name] = manifest
+                return manifest
 
             # Security: Limit manifest file size (max 100KB)
             if len(content) > 100 * 1024:
@@ -218,6 +287,7 @@ class ModuleLoader:
             # Cache the manifest
             with self._cache_lock:
                 self._manifest_cache[module_name] = manifest
+            self._put_index_entry(index_key, stat, digest, manifest)
 
             return manifest
 
@@ -232,6 +302,96 @@ class ModuleLoader:
                 module_name
             )
 
+    def _get_index_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the persisted index entry for a manifest file, if any."""
+        if self.index_path is None:
+            return None
+
+        with self._cache_lock:
+            if self._index is None:
+                self._index = self._read_index()
+            return self._index.get(key)
+
+    def _read_index(self) -> Dict[str, Dict[str, Any]]:
+        """Read the manifest index from disk, ignoring stale or corrupt files."""
+        try:
+            data = json.loads(self.index_path.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable manifest index {self.index_path}: {e}")
+            return {}
+
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_INDEX_VERSION:
+            return {}
+        entries = data.get("entries")
+        return entries if isinstance(entries, dict) else {}
+
+    def _put_index_entry(
+        self,
+        key: str,
+        stat: os.stat_result,
+        digest: str,
+        manifest: Dict[str, Any],
+    ) -> None:
+        """Record a parsed manifest in the index (skipped if not JSON-safe)."""
+        if self.index_path is None:
+            return
+
+        try:
+            # Round-trip so cached manifests look exactly like ones read back later
+            manifest_copy = json.loads(json.dumps(manifest))
+        except (TypeError, ValueError):
+            return
+
+        with self._cache_lock:
+            if self._index is None:
+                self._index = self._read_index()
+            self._index[key] = {
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "sha256": digest,
+                "manifest": manifest_copy,
+            }
+            self._index_dirty = True
+
+    def save_manifest_index(self) -> bool:
+        """
+        Persist the manifest index if it changed.
+
+        Entries for manifests that no longer exist are dropped. The file is
+        written atomically so concurrent workers never read a partial index.
+
+        Returns:
+            True if the index file was written
+        """
+        if self.index_path is None:
+            return False
+
+        with self._cache_lock:
+            if not self._index_dirty or self._index is None:
+                return False
+            entries = {
+                key: entry for key, entry in self._index.items()
+                if Path(key).exists()
+            }
+            payload = {"version": MANIFEST_INDEX_VERSION, "entries": entries}
+            self._index_dirty = False
+
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(
+                dir=self.index_path.parent, prefix=".manifest_index", suffix=".tmp"
+            )
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(payload, fh)
+            os.replace(tmp_name, self.index_path)
+        except OSError as e:
+            logger.warning(f"Could not write manifest index {self.index_path}: {e}")
+            return False
+
+        return True
+
     def validate_manifest(self, manifest: Dict[str, Any]) -> ManifestSchema:
         """
         Validate a manifest dictionary.
@@ -334,9 +494,13 @@ class ModuleLoader:
             logger.debug(f"Module '{name}' already loaded, skipping")
             return existing
 
+        timing = self.get_timing(name)
+
         # Load and validate manifest
+        started = time.perf_counter()
         manifest_dict = self.load_manifest(path)
         manifest = self.validate_manifest(manifest_dict)
+        timing.manifest = time.perf_counter() - started
 
         # Check dependencies
         missing_deps = self.check_dependencies(manifest)
@@ -356,18 +520,28 @@ class ModuleLoader:
 
         try:
             # Import the Python module (only if not already done)
+            started = time.perf_counter()
             if module_info.python_module is None:
                 module_info.python_module = self._import_module(name, path)
+            timing.import_time = time.perf_counter() - started
 
             # Load components (only if not already loaded)
+            started = time.perf_counter()
             if module_info.models is None:
                 module_info.models = self._import_models(name, path, manifest)
             if module_info.association_tables is None:
                 module_info.association_tables = self._import_association_tables(name, path, manifest)
+            timing.models = time.perf_counter() - started
+
+            started = time.perf_counter()
             if module_info.routers is None:
                 module_info.routers = self._import_routers(name, path, manifest)
+            timing.routers = time.perf_counter() - started
+
+            started = time.perf_counter()
             if module_info.services is None:
                 module_info.services = self._import_services(name, path, manifest)
+            timing.services = time.perf_counter() - started
 
             logger.info(f"Loaded module: {name}")
 
@@ -377,10 +551,30 @@ class ModuleLoader:
 
         return module_info
 
+    def get_timing(self, name: str) -> ModuleLoadTiming:
+        """Get (creating if needed) the boot timing record for a module."""
+        with self._cache_lock:
+            timing = self.timings.get(name)
+            if timing is None:
+                timing = self.timings[name] = ModuleLoadTiming(name=name)
+            return timing
+
+    def _load_module_safe(self, name: str) -> Optional[ModuleInfo]:
+        """Load a module, logging failures instead of raising."""
+        try:
+            return self.load_module(name)
+        except Exception as e:
+            logger.error(f"Failed to load module '{name}': {e}")
+            return None
+
     def load_all_modules(self) -> List[ModuleInfo]:
         """
         Load all discovered modules in dependency order.
 
+        Modules are grouped into dependency levels; with max_workers > 1 the
+        modules of one level are imported concurrently, and each level starts
+        only after the previous one finished.
+
         Returns:
             List of loaded ModuleInfo objects
         """
@@ -396,24 +590,33 @@ class ModuleLoader:
             except Exception as e:
                 logger.error(f"Failed to register module '{name}': {e}")
 
-        # Resolve load order
+        # Resolve the dependency graph once, as independent levels
         try:
-            load_order = self.registry.resolve_load_order()
+            levels = self.registry.resolve_load_levels()
         except Exception as e:
             logger.error(f"Failed to resolve load order: {e}")
-            load_order = list(self._discovered.keys())
+            levels = [[name] for name in self._discovered]
 
-        # Second pass: actually load modules in order
+        # Second pass: actually load modules level by level
         loaded = []
-        for name in load_order:
-            if name not in self._discovered:
-                continue
+        for level_no, level in enumerate(levels):
+            names = [name for name in level if name in self._discovered]
+
+            if self.max_workers > 1 and len(names) > 1:
+                with ThreadPoolExecutor(
+                    max_workers=min(self.max_workers, len(names)),
+                    thread_name_prefix="module-loader",
+                ) as pool:
+                    results = list(pool.map(self._load_module_safe, names))
+            else:
+                results = [self._load_module_safe(name) for name in names]
 
-            try:
-                module_info = self.load_module(name)
-                loaded.append(module_info)
-            except Exception as e:
-                logger.error(f"Failed to load module '{name}': {e}")
+            for name, module_info in zip(names, results):
+                self.get_timing(name).level = level_no
+                if module_info is not None:
+                    loaded.append(module_info)
+
+        self.save_manifest_index()
 
         logger.info(f"Loaded {len(loaded)} modules")
         return loaded
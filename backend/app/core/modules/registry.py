@@ -329,6 +329,54 @@ class ModuleRegistry:
         self._load_order = result
         return result
 
+    def resolve_load_levels(self) -> List[List[str]]:
+        """
+        Group modules into dependency levels.
+
+        Every module in a level depends only on modules from earlier levels,
+        so the modules within one level can be loaded independently of each
+        other.
+
+        Returns:
+            List of levels, each a sorted list of module names
+
+        Raises:
+            CircularDependencyError: If circular dependencies detected
+        """
+        from .exceptions import CircularDependencyError
+
+        in_degree: Dict[str, int] = {name: 0 for name in self._modules}
+        graph: Dict[str, List[str]] = {name: [] for name in self._modules}
+
+        for name, module in self._modules.items():
+            for dep in module.manifest.depends:
+                if dep in self._modules and dep != name:
+                    graph[dep].append(name)
+                    in_degree[name] += 1
+
+        levels: List[List[str]] = []
+        current = sorted(name for name, degree in in_degree.items() if degree == 0)
+        resolved = 0
+
+        while current:
+            levels.append(current)
+            resolved += len(current)
+            ready = []
+            for node in current:
+                for dependent in graph[node]:
+                    in_degree[dependent] -= 1
+                    if in_degree[dependent] == 0:
+                        ready.append(dependent)
+            current = sorted(ready)
+
+        if resolved != len(self._modules):
+            placed = {name for level in levels for name in level}
+            remaining = set(self._modules.keys()) - placed
+            raise CircularDependencyError(sorted(remaining)[:5])
+
+        self._load_order = [name for level in levels for name in level]
+        return levels
+
     # -------------------------------------------------------------------------
     # Hook System
     # -------------------------------------------------------------------------
@@ -0,0 +1,486 @@
+"""
+Threat signature engine for the FastVue Framework.
+
+Compiles a set of threat signatures (XSS, SQL injection, path traversal,
+command injection, ...) once per process and scans inputs without running
+every pattern against every string. Provides:
+- Literal-anchor prefilter so only candidate signatures run their regex
+- Cached verdicts for repeated inputs (query strings, header values)
+- Budgeted scanning of nested JSON payloads
+- Incremental (chunked) scanning of bodies with a size cap
+
+Shared by SecurityMiddleware, ValidationMiddleware and ThreatDetection.
+"""
+
+import re
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+
+@dataclass(frozen=True)
+class ThreatSignature:
+    """A single named detection pattern."""
+
+    name: str
+    category: str
+    pattern: str
+
+
+@dataclass(frozen=True)
+class ThreatMatch:
+    """First signature matched in an input."""
+
+    name: str
+    category: str
+    pattern: str
+    start: int
+    end: int
+    value: str
+
+
+def _required_literals(pattern: str) -> Optional[FrozenSet[str]]:
+    """
+    Derive literal anchors from a regex: any match must contain at least one.
+
+    Returns casefolded literals, or None when no anchor can be proven (the
+    signature is then always evaluated).
+    """
+    try:
+        parsed = sre_parse.parse(pattern, re.IGNORECASE)
+    except re.error:
+        return None
+    return _sequence_literals(list(parsed))
+
+
+def _sequence_literals(items: list) -> Optional[FrozenSet[str]]:
+    best: Optional[FrozenSet[str]] = None
+    run: List[str] = []
+
+    def consider(candidates: Optional[FrozenSet[str]]) -> None:
+        nonlocal best
+        if not candidates:
+            return
+        # Prefer the candidate set whose shortest literal is longest
+        if best is None or min(map(len, candidates)) > min(map(len, best)):
+            best = candidates
+
+    def flush() -> None:
+        if run:
+            consider(frozenset(["".join(run).casefold()]))
+            run.clear()
+
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            run.append(chr(av))
+            continue
+        flush()
+        if op is sre_constants.SUBPATTERN:
+            consider(_sequence_literals(list(av[-1])))
+        elif op is sre_constants.BRANCH:
+            alternatives = [_sequence_literals(list(branch)) for branch in av[1]]
+            if all(alternatives):
+                consider(frozenset().union(*alternatives))
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and av[0] >= 1:
+            consider(_sequence_literals(list(av[2])))
+        elif op is sre_constants.IN and av and all(k is sre_constants.LITERAL for k, _ in av):
+            consider(frozenset(chr(v).casefold() for _, v in av))
+    flush()
+    return best
+
+
+class ThreatMatcher:
+    """
+    Matcher over a set of signatures compiled once.
+
+    Each signature is reduced to literal anchors that every match must
+    contain. A scan casefolds the input once, checks the anchors with
+    C-level substring search and only runs the regexes of signatures whose
+    anchors are present, so benign input rarely touches the regex engine.
+    Signatures are evaluated in definition order; the first match wins.
+    """
+
+    def __init__(
+        self,
+        signatures: Sequence[ThreatSignature],
+        cache_size: int = 4096,
+        max_cached_length: int = 2048,
+    ):
+        self.signatures: Tuple[ThreatSignature, ...] = tuple(signatures)
+        self._regexes = [re.compile(sig.pattern, re.IGNORECASE) for sig in self.signatures]
+
+        anchors: Dict[str, List[int]] = {}
+        always: List[int] = []
+        for index, signature in enumerate(self.signatures):
+            literals = _required_literals(signature.pattern)
+            if not literals:
+                always.append(index)
+                continue
+            for literal in literals:
+                anchors.setdefault(literal, []).append(index)
+
+        self._anchors: Tuple[Tuple[str, Tuple[int, ...]], ...] = tuple(
+            (literal, tuple(indexes)) for literal, indexes in anchors.items()
+        )
+        self._always: FrozenSet[int] = frozenset(always)
+        self.max_cached_length = max_cached_length
+        self._cached_scan = lru_cache(maxsize=cache_size)(self._scan_uncached)
+
+    # -------------------------------------------------------------------------
+    # Scanning
+    # -------------------------------------------------------------------------
+
+    def _candidates(self, text: str) -> List[int]:
+        folded = text.casefold()
+        indexes = set(self._always)
+        for literal, signature_indexes in self._anchors:
+            if literal in folded:
+                indexes.update(signature_indexes)
+        return sorted(indexes)
+
+    def _search(self, text: str, offset: int = 0) -> Optional[ThreatMatch]:
+        for index in self._candidates(text):
+            m = self._regexes[index].search(text)
+            if m:
+                signature = self.signatures[index]
+                return ThreatMatch(
+                    name=signature.name,
+                    category=signature.category,
+                    pattern=signature.pattern,
+                    start=m.start() + offset,
+                    end=m.end() + offset,
+                    value=m.group(),
+                )
+        return None
+
+    def _scan_uncached(self, text: str) -> Optional[ThreatMatch]:
+        return self._search(text)
+
+    def scan(self, text: Any) -> Optional[ThreatMatch]:
+        """Return the first signature found in ``text``, or None."""
+        if isinstance(text, bytes):
+            text = text.decode("utf-8", errors="ignore")
+        elif not isinstance(text, str):
+            text = str(text)
+        if not text:
+            return None
+        if len(text) <= self.max_cached_length:
+            return self._cached_scan(text)
+        return self._scan_uncached(text)
+
+    def is_malicious(self, text: Any) -> bool:
+        return self.scan(text) is not None
+
+    def count_matches(self, text: str) -> Dict[ThreatSignature, int]:
+        """Count non-overlapping matches per signature (candidates only)."""
+        counts: Dict[ThreatSignature, int] = {}
+        for index in self._candidates(text):
+            found = sum(1 for _ in self._regexes[index].finditer(text))
+            if found:
+                counts[self.signatures[index]] = found
+        return counts
+
+    def scan_json(
+        self,
+        data: Any,
+        max_bytes: int = 64 * 1024,
+        scan_keys: bool = True,
+    ) -> Tuple[Optional[ThreatMatch], Optional[str]]:
+        """
+        Scan every string in a decoded JSON document.
+
+        Walks the document iteratively and stops once ``max_bytes`` of
+        string content has been inspected.
+
+        Returns:
+            (match, path) of the first malicious string, or (None, None)
+        """
+        budget = max_bytes
+        stack: List[Tuple[Any, str]] = [(data, "")]
+        while stack and budget > 0:
+            value, path = stack.pop()
+            if isinstance(value, str):
+                budget -= len(value)
+                match = self.scan(value)
+                if match:
+                    return match, path
+            elif isinstance(value, dict):
+                for key, item in value.items():
+                    child = f"{path}.{key}" if path else str(key)
+                    if scan_keys and isinstance(key, str):
+                        budget -= len(key)
+                        match = self.scan(key)
+                        if match:
+                            return match, child
+                    stack.append((item, child))
+            elif isinstance(value, list):
+                for index, item in enumerate(value):
+                    stack.append((item, f"{path}[{index}]" if path else f"[{index}]"))
+        return None, None
+
+    def stream_scanner(self, max_bytes: int = 1024 * 1024, overlap: int = 256) -> "StreamScanner":
+        """Create an incremental scanner bound to this matcher."""
+        return StreamScanner(self, max_bytes=max_bytes, overlap=overlap)
+
+    def cache_info(self):
+        return self._cached_scan.cache_info()
+
+    def clear_cache(self) -> None:
+        self._cached_scan.cache_clear()
+
+
+class StreamScanner:
+    """
+    Incremental scanner for request bodies.
+
+    Chunks are scanned as they arrive; the last ``overlap`` characters of
+    the previous chunk are carried over so signatures spanning a chunk
+    boundary are still detected. Scanning stops after ``max_bytes``.
+    """
+
+    def __init__(self, matcher: ThreatMatcher, max_bytes: int, overlap: int = 256):
+        self.matcher = matcher
+        self.max_bytes = max_bytes
+        self.overlap = overlap
+        self.scanned = 0
+        self.truncated = False
+        self.match: Optional[ThreatMatch] = None
+        self._tail = ""
+
+    def feed(self, chunk: bytes) -> Optional[ThreatMatch]:
+        """Scan the next chunk; returns the first match once found."""
+        if self.match or self.truncated:
+            return self.match
+
+        remaining = self.max_bytes - self.scanned
+        if len(chunk) > remaining:
+            chunk = chunk[:remaining]
+            self.truncated = True
+        self.scanned += len(chunk)
+
+        text = chunk.decode("latin-1")
+        window = self._tail + text
+        offset = self.scanned - len(chunk) - len(self._tail)
+        self.match = self.matcher._search(window, offset)
+        self._tail = window[-self.overlap:] if self.overlap else ""
+        return self.match
+
+    def feed_all(self, data: bytes, chunk_size: int = 64 * 1024) -> Optional[ThreatMatch]:
+        """Feed an in-memory buffer in chunks."""
+        view = memoryview(data)
+        for start in range(0, len(view), chunk_size):
+            if self.feed(bytes(view[start:start + chunk_size])) or self.truncated:
+                break
+        return self.match
+
+
+# =============================================================================
+# SIGNATURE SETS
+# =============================================================================
+
+
+def _signatures(category: str, patterns: Iterable[str]) -> List[ThreatSignature]:
+    return [
+        ThreatSignature(name=f"{category}_{index}", category=category, pattern=pattern)
+        for index, pattern in enumerate(patterns)
+    ]
+
+
+# Lightweight request-line signatures (path and query string)
+REQUEST_PATTERNS: Dict[str, List[str]] = {
+    "xss": [
+        r"<script[^>]*>",  # XSS attempts
+        r"javascript:",  # JavaScript injection
+        r"on\w+\s*=",  # Event handler injection
+    ],
+    "sql_injection": [
+        r"union\s+select",  # SQL injection
+        r";\s*drop\s+",  # SQL injection
+        r"--\s*$",  # SQL comment injection
+    ],
+    "path_traversal": [
+        r"\.\./",  # Path traversal
+        r"\.\.\\",  # Windows path traversal
+        r"%2e%2e",  # Encoded path traversal
+    ],
+    "code_injection": [
+        r"eval\s*\(",  # Code injection
+        r"exec\s*\(",  # Code injection
+    ],
+}
+
+# Strict input-validation signatures (header values, query params, JSON strings)
+INPUT_PATTERNS: Dict[str, List[str]] = {
+    "xss": [
+        r"<script[^>]*>.*?</script>",
+        r"javascript:",
+        r"vbscript:",
+        r"onload\s*=",
+        r"onerror\s*=",
+        r"onclick\s*=",
+        r"onmouseover\s*=",
+        r"onfocus\s*=",
+        r"onblur\s*=",
+        r"<iframe[^>]*>",
+        r"<object[^>]*>",
+        r"<embed[^>]*>",
+        r"<link[^>]*>",
+        r"<meta[^>]*>",
+        r"expression\(",
+        r"url\(",
+        r"@import",
+        r"<svg[^>]*>.*?</svg>",
+        r"<img[^>]*onerror[^>]*>",
+        r"document\.cookie",
+        r"document\.write",
+        r"eval\(",
+        r"setTimeout\(",
+        r"setInterval\(",
+        r"Function\(",
+        r"alert\(",
+        r"confirm\(",
+        r"prompt\(",
+    ],
+    "sql_injection": [
+        r"(\b(select|insert|update|delete|drop|create|alter|exec|execute|union|declare)\b)",
+        r'(\b(or|and)\s+[\w\'"]+\s*=\s*[\w\'"]+)',
+        r'([\'"]\s*(or|and)\s*[\'"]\s*[\w\'"])',
+        r'(\bwhere\s+[\w\'"]+\s*=\s*[\w\'"]+)',
+        r"(--|\#|\/\*|\*\/)",
+        r"(\bxp_cmdshell\b)",
+        r"(\bsp_executesql\b)",
+        r"(\bdbms_pipe\b)",
+        r"(\butl_file\b)",
+        r"(\bload_file\b)",
+        r"(\binto\s+outfile\b)",
+        r"(\binto\s+dumpfile\b)",
+        r"(\bwaitfor\s+delay\b)",
+        r"(\bbenchmark\b)",
+        r"(\bsleep\s*\()",
+        r"(\bpg_sleep\b)",
+        r"(\bconvert\s*\()",
+        r"(\bcast\s*\()",
+        r"(\bchar\s*\()",
+        r"(\bascii\s*\()",
+        r"(\border\s+by\b)",
+        r"(\bgroup\s+by\b)",
+        r"(\bhaving\b)",
+        r"(\blimit\b)",
+        r"(\boffset\b)",
+    ],
+    "path_traversal": [
+        r"\.\./",
+        r"\.\.\\",
+        r"%2e%2e%2f",
+        r"%2e%2e\\",
+        r"%252e%252e%252f",
+        r"%c0%af",
+        r"%c1%9c",
+        r"\/\.\.\/\.\.\/",
+        r"\\\.\.\\\.\.\\",
+        r"\.\.%2f",
+        r"\.\.%5c",
+    ],
+    "command_injection": [
+        r"[\s]*\|[\s]*",
+        r"[\s]*;[\s]*",
+        r"[\s]*&[\s]*",
+        r"[\s]*\$\(",
+        r"[\s]*`",
+        r"\$\{[^}]*\}",
+        r"<%[^%>]*%>",
+        r"exec\s*\(",
+        r"system\s*\(",
+        r"shell_exec\s*\(",
+        r"passthru\s*\(",
+        r"popen\s*\(",
+        r"proc_open\s*\(",
+        r"file_get_contents\s*\(",
+        r"readfile\s*\(",
+        r"include\s*\(",
+        r"require\s*\(",
+        r"nc\s+-",
+        r"netcat\s+-",
+        r"wget\s+",
+        r"curl\s+",
+        r"bash\s+-",
+        r"sh\s+-",
+        r"python\s+-",
+        r"perl\s+-",
+        r"ruby\s+-",
+        r"php\s+-",
+    ],
+}
+
+# Suspicious content in multipart uploads
+UPLOAD_PATTERNS: Dict[str, List[str]] = {
+    "dangerous_extension": [
+        r"\.exe", r"\.bat", r"\.cmd", r"\.scr", r"\.pif", r"\.com", r"\.vbs", r"\.jar",
+    ],
+    "script_content": [
+        r"<%", r"<\?php", r"<script", r"javascript:", r"vbscript:", r"onload=", r"onerror=",
+    ],
+}
+
+# Threat analytics signatures (ThreatDetection)
+ANALYTICS_PATTERNS: Dict[str, List[str]] = {
+    "sql_injection": [
+        r"(\%27)|(\')|(\-\-)|(\%23)|(#)",  # Basic SQL injection
+        r"(\%22)|(\")",  # Double quotes
+        r"((\%3D)|(=))[^\n]*((\%27)|(\')|(\-\-)|(\%3B)|(;))",  # Union-based
+        r"((\%27)|(\'))(\s)*((\%6F)|o|(\%4F))((\%72)|r|(\%52))",  # OR statements
+        r"((\%27)|(\'))union",  # Union select
+    ],
+    "xss": [
+        r"<script[^>]*>.*?</script>",  # Script tags
+        r"javascript:",  # JavaScript protocol
+        r"on\w+\s*=",  # Event handlers
+        r"<iframe[^>]*>",  # Iframes
+        r"<object[^>]*>",  # Objects
+    ],
+}
+
+SIGNATURE_SETS: Dict[str, Dict[str, List[str]]] = {
+    "request": REQUEST_PATTERNS,
+    "input": INPUT_PATTERNS,
+    "upload": UPLOAD_PATTERNS,
+    "analytics": ANALYTICS_PATTERNS,
+}
+
+_matchers: Dict[Tuple[str, Optional[str]], ThreatMatcher] = {}
+_matchers_lock = threading.Lock()
+
+
+def get_threat_matcher(signature_set: str, category: Optional[str] = None) -> ThreatMatcher:
+    """
+    Get the process-wide compiled matcher for a signature set.
+
+    Args:
+        signature_set: One of "request", "input", "upload", "analytics"
+        category: Restrict to a single category within the set
+
+    Raises:
+        KeyError: If the set or category is unknown
+    """
+    key = (signature_set, category)
+    matcher = _matchers.get(key)
+    if matcher is not None:
+        return matcher
+
+    with _matchers_lock:
+        matcher = _matchers.get(key)
+        if matcher is None:
+            patterns = SIGNATURE_SETS[signature_set]
+            categories = [category] if category else list(patterns)
+            signatures: List[ThreatSignature] = []
+            for name in categories:
+                signatures.extend(_signatures(name, patterns[name]))
+            matcher = _matchers[key] = ThreatMatcher(signatures)
+    return matcher
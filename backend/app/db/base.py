@@ -6,6 +6,7 @@ from sqlalchemy import create_engine, event, pool
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
 from app.core.config import settings
+from app.core.metrics import instrument_engine
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +39,11 @@ def receive_checkout(dbapi_conn, connection_record, connection_proxy):
     logger.debug(f"Connection retrieved from pool: {id(dbapi_conn)}")
 
 
+# Statement count/time metrics (global and per request)
+if settings.METRICS_ENABLED:
+    instrument_engine(engine)
+
+
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
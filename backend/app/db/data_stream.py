@@ -0,0 +1,621 @@
+"""
+Streaming Data Transfer
+
+Bounded-memory table dump/load shared by module data export, backup and restore.
+
+Dumps are NDJSON (optionally gzip-compressed, ``.ndjson.gz``):
+- one header object describing the dump
+- per table: a ``{"kind": "table", ...}`` object listing the columns,
+  one JSON array of values per row (in column order), and a
+  ``{"kind": "end", ...}`` object with the row count
+
+Rows are read with server-side cursors (``yield_per``) and written chunk by
+chunk, so memory stays proportional to the chunk size, not the table size.
+Loading inserts rows in batches: one key lookup per batch plus a single
+``INSERT ... ON CONFLICT`` (PostgreSQL/SQLite) or executemany statement,
+instead of a query per record.
+
+Plain ``{"name": [...], ...}`` JSON documents (seed data) can be read and
+written incrementally as well (iter_json_items, write_json_sections).
+"""
+
+import base64
+import gzip
+import json
+import logging
+import uuid
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Enum as SAEnum
+from sqlalchemy import String, Table, bindparam, delete, func, insert, select, text, tuple_, type_coerce, update
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+DEFAULT_CHUNK_SIZE = 1000
+
+# Conflict strategies (values match ConflictResolution)
+CONFLICT_SKIP = "skip"
+CONFLICT_UPDATE = "update"
+CONFLICT_ERROR = "error"
+CONFLICT_REPLACE = "replace"
+
+# Called as progress(table_name, rows_done) after every chunk/batch
+ProgressCallback = Callable[[str, int], None]
+
+
+# -------------------------------------------------------------------------
+# Value encoding
+# -------------------------------------------------------------------------
+
+def encode_value(value: Any) -> Any:
+    """Convert a database value to a JSON-compatible value (lossless for round-trips)."""
+    if value is None or isinstance(value, (bool, int, float, str)) and not isinstance(value, Enum):
+        return value
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(value)).decode("ascii")
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, dict):
+        return {k: encode_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [encode_value(v) for v in value]
+    return str(value)
+
+
+def _python_type(column) -> Optional[type]:
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return None
+
+
+def _decoder_for(column) -> Optional[Callable[[Any], Any]]:
+    """Build a decoder turning encoded JSON values back into bind values."""
+    if isinstance(column.type, SAEnum):
+        return None  # Enum columns are dumped as raw database values
+
+    py_type = _python_type(column)
+    if py_type is datetime:
+        return lambda v: datetime.fromisoformat(v) if isinstance(v, str) else v
+    if py_type is date:
+        return lambda v: date.fromisoformat(v) if isinstance(v, str) else v
+    if py_type is time:
+        return lambda v: time.fromisoformat(v) if isinstance(v, str) else v
+    if py_type is Decimal:
+        return lambda v: Decimal(str(v)) if isinstance(v, (str, int, float)) else v
+    if py_type is uuid.UUID:
+        return lambda v: uuid.UUID(v) if isinstance(v, str) else v
+    if py_type is bytes:
+        return lambda v: base64.b64decode(v) if isinstance(v, str) else v
+    return None
+
+
+class RowDecoder:
+    """Per-table decoder that coerces encoded rows to bind-ready values."""
+
+    def __init__(self, table: Table):
+        self.table = table
+        self.columns = {c.name for c in table.columns}
+        self._decoders = {
+            c.name: decoder for c in table.columns
+            if (decoder := _decoder_for(c)) is not None
+        }
+
+    def __call__(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        decoded = {}
+        for key, value in row.items():
+            if key not in self.columns:
+                continue  # Column dropped since the dump was taken
+            decoder = self._decoders.get(key)
+            decoded[key] = decoder(value) if decoder and value is not None else value
+        return decoded
+
+
+# -------------------------------------------------------------------------
+# Dump
+# -------------------------------------------------------------------------
+
+def open_dump(path: Path, mode: str = "r") -> IO[str]:
+    """Open a dump file as text, transparently (de)compressing ``.gz`` files."""
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def iter_row_chunks(
+    conn: Connection,
+    table: Table,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[List[Tuple]]:
+    """Yield table rows in chunks using a server-side cursor."""
+    columns = [
+        type_coerce(c, String()).label(c.name) if isinstance(c.type, SAEnum) else c
+        for c in table.columns
+    ]
+    stmt = select(*columns)
+    if table.primary_key.columns:
+        stmt = stmt.order_by(*table.primary_key.columns)
+
+    result = conn.execution_options(yield_per=chunk_size).execute(stmt)
+    for partition in result.partitions():
+        yield [tuple(row) for row in partition]
+
+
+def dump_tables(
+    conn: Connection,
+    tables: Iterable[Table],
+    fh: IO[str],
+    header: Optional[Dict[str, Any]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress: Optional[ProgressCallback] = None,
+) -> Dict[str, int]:
+    """
+    Stream tables to an open text file as NDJSON.
+
+    Args:
+        conn: Connection to read from
+        tables: Tables to dump (in order)
+        fh: Writable text file
+        header: Extra fields for the header line (module name, timestamp, ...)
+        chunk_size: Rows fetched and written per chunk
+        progress: Optional callback receiving (table_name, rows_done)
+
+    Returns:
+        Row count per table name
+    """
+    dumps = json.dumps
+    fh.write(dumps({"kind": "header", "format_version": FORMAT_VERSION, **(header or {})}) + "\n")
+
+    counts: Dict[str, int] = {}
+    for table in tables:
+        column_names = [c.name for c in table.columns]
+        fh.write(dumps({"kind": "table", "table": table.name, "columns": column_names}) + "\n")
+
+        done = 0
+        for chunk in iter_row_chunks(conn, table, chunk_size):
+            fh.writelines(
+                dumps([encode_value(v) for v in row], separators=(",", ":")) + "\n"
+                for row in chunk
+            )
+            done += len(chunk)
+            if progress:
+                progress(table.name, done)
+
+        fh.write(dumps({"kind": "end", "table": table.name, "row_count": done}) + "\n")
+        counts[table.name] = done
+
+    return counts
+
+
+def read_header(fh: IO[str]) -> Dict[str, Any]:
+    """Read and validate the header line of a dump."""
+    line = fh.readline()
+    try:
+        header = json.loads(line)
+    except ValueError:
+        raise ValueError("Not an NDJSON data dump")
+    if not isinstance(header, dict) or header.get("kind") != "header":
+        raise ValueError("Not an NDJSON data dump")
+    if header.get("format_version", 0) > FORMAT_VERSION:
+        raise ValueError(f"Unsupported dump format version: {header.get('format_version')}")
+    return header
+
+
+def iter_dump_batches(
+    fh: IO[str],
+    batch_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    Yield (table_name, rows) batches from a dump positioned after its header.
+
+    Rows are dicts keyed by column name (values still JSON-encoded).
+    """
+    table_name: Optional[str] = None
+    columns: List[str] = []
+    batch: List[Dict[str, Any]] = []
+
+    for line_no, line in enumerate(fh, start=2):
+        if not line.strip():
+            continue
+        item = json.loads(line)
+
+        if isinstance(item, list):
+            if table_name is None:
+                raise ValueError(f"Row before table header on line {line_no}")
+            batch.append(dict(zip(columns, item)))
+            if len(batch) >= batch_size:
+                yield table_name, batch
+                batch = []
+            continue
+
+        kind = item.get("kind")
+        if kind == "table":
+            table_name, columns = item["table"], item["columns"]
+        elif kind == "end":
+            if batch:
+                yield table_name, batch
+                batch = []
+            table_name = None
+
+    if table_name is not None and batch:
+        yield table_name, batch
+
+
+# -------------------------------------------------------------------------
+# JSON documents
+# -------------------------------------------------------------------------
+
+class _JSONScanner:
+    """Incremental JSON value reader over a text stream."""
+
+    def __init__(self, fh: IO[str], buffer_size: int):
+        self.fh = fh
+        self.buffer_size = buffer_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.fh.read(self.buffer_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ("" at end of input)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise json.JSONDecodeError(f"Expected one of {chars!r}", self.buf, self.pos)
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number may continue in the next chunk ("3" of "3.5")
+            truncated = end == len(self.buf) or (
+                isinstance(value, (int, float)) and self.buf[end] not in " \t\r\n,]}"
+            )
+            if truncated and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_items(fh: IO[str], buffer_size: int = 1 << 16) -> Iterator[Tuple[str, Any]]:
+    """
+    Stream the elements of the arrays in a ``{"name": [...], ...}`` document.
+
+    Yields (name, element) in document order, holding one element in
+    memory at a time. Top-level values that aren't arrays are skipped.
+    """
+    scanner = _JSONScanner(fh, buffer_size)
+    scanner.expect("{")
+    if scanner.peek() == "}":
+        return
+
+    while True:
+        name = scanner.value()
+        scanner.expect(":")
+        if scanner.peek() == "[":
+            scanner.expect("[")
+            if scanner.peek() == "]":
+                scanner.expect("]")
+            else:
+                while True:
+                    yield name, scanner.value()
+                    if scanner.expect(",]") == "]":
+                        break
+        else:
+            scanner.value()
+
+        if scanner.expect(",}") == "}":
+            return
+
+
+def write_json_sections(fh: IO[str], sections: Iterable[Tuple[str, Any]]) -> Dict[str, int]:
+    """
+    Write a ``{"name": value, ...}`` document, streaming array sections.
+
+    Dict values are written whole; any other iterable is consumed and
+    written element by element. The output matches ``json.dump(..., indent=2)``.
+
+    Returns:
+        Element count per streamed section
+    """
+    counts: Dict[str, int] = {}
+    written = 0
+    fh.write("{")
+    for name, value in sections:
+        fh.write(("," if written else "") + "\n  " + json.dumps(name) + ": ")
+        written += 1
+        if isinstance(value, dict):
+            fh.write(json.dumps(value, indent=2, default=str).replace("\n", "\n  "))
+            continue
+
+        count = 0
+        fh.write("[")
+        for item in value:
+            fh.write(("," if count else "") + "\n    ")
+            fh.write(json.dumps(item, indent=2, default=str).replace("\n", "\n    "))
+            count += 1
+        fh.write("\n  ]" if count else "]")
+        counts[name] = count
+    fh.write("\n}" if written else "}")
+    return counts
+
+
+# -------------------------------------------------------------------------
+# Load
+# -------------------------------------------------------------------------
+
+def _supports_on_conflict(conn: Connection) -> bool:
+    return conn.dialect.name in ("postgresql", "sqlite")
+
+
+def _dialect_insert(conn: Connection, table: Table):
+    if conn.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        return pg_insert(table)
+    from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+    return sqlite_insert(table)
+
+
+def _group_by_columns(rows: Sequence[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+    """Group rows sharing the same column set (executemany needs uniform params)."""
+    groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+    return iter(groups.values())
+
+
+def _existing_keys(
+    conn: Connection,
+    table: Table,
+    key_columns: List[str],
+    keys: List[Tuple],
+) -> set:
+    if not keys:
+        return set()
+    cols = [table.c[k] for k in key_columns]
+    if len(cols) == 1:
+        stmt = select(cols[0]).where(cols[0].in_([k[0] for k in keys]))
+    else:
+        stmt = select(*cols).where(tuple_(*cols).in_(keys))
+    return {tuple(row) for row in conn.execute(stmt)}
+
+
+def _insert_rows(conn: Connection, table: Table, rows: List[Dict[str, Any]], key_columns: List[str]) -> None:
+    is_pk = set(key_columns) == {c.name for c in table.primary_key.columns}
+    for group in _group_by_columns(rows):
+        if key_columns and is_pk and _supports_on_conflict(conn):
+            # Idempotent even if another writer inserted the same keys meanwhile
+            stmt = _dialect_insert(conn, table).on_conflict_do_nothing(index_elements=key_columns)
+        else:
+            stmt = insert(table)
+        conn.execute(stmt, group)
+
+
+def _update_rows(conn: Connection, table: Table, rows: List[Dict[str, Any]], key_columns: List[str]) -> None:
+    is_pk = set(key_columns) == {c.name for c in table.primary_key.columns}
+    for group in _group_by_columns(rows):
+        value_columns = [c for c in group[0] if c not in key_columns]
+        if not value_columns:
+            continue
+
+        if is_pk and _supports_on_conflict(conn):
+            stmt = _dialect_insert(conn, table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=key_columns,
+                set_={c: stmt.excluded[c] for c in value_columns},
+            )
+            conn.execute(stmt, group)
+        else:
+            stmt = (
+                update(table)
+                .where(*[table.c[k] == bindparam(f"_key_{k}") for k in key_columns])
+                .values({c: bindparam(c) for c in value_columns})
+            )
+            params = [
+                {**{c: row[c] for c in value_columns}, **{f"_key_{k}": row[k] for k in key_columns}}
+                for row in group
+            ]
+            conn.execute(stmt, params)
+
+
+def upsert_rows(
+    conn: Connection,
+    table: Table,
+    rows: List[Dict[str, Any]],
+    conflict_resolution: str = CONFLICT_SKIP,
+    key_columns: Optional[List[str]] = None,
+) -> Tuple[int, int, int]:
+    """
+    Insert a batch of decoded rows, resolving key conflicts in bulk.
+
+    Args:
+        conn: Connection (inside the caller's transaction)
+        table: Target table
+        rows: Bind-ready row dicts
+        conflict_resolution: skip, update, error or replace
+        key_columns: Columns identifying a record (defaults to the primary key)
+
+    Returns:
+        (imported, skipped, updated) counts
+
+    Raises:
+        ValueError: If a record exists and conflict_resolution is "error"
+    """
+    if not rows:
+        return 0, 0, 0
+
+    key_columns = key_columns or [c.name for c in table.primary_key.columns]
+    if not key_columns:
+        for group in _group_by_columns(rows):
+            conn.execute(insert(table), group)
+        return len(rows), 0, 0
+
+    # Later rows win when a batch repeats a key
+    keyed: Dict[Tuple, Dict[str, Any]] = {}
+    unkeyed: List[Dict[str, Any]] = []
+    for row in rows:
+        key = tuple(row.get(k) for k in key_columns)
+        if any(part is None for part in key):
+            unkeyed.append(row)
+        else:
+            keyed[key] = row
+
+    existing = _existing_keys(conn, table, key_columns, list(keyed))
+    new_rows = [row for key, row in keyed.items() if key not in existing]
+    old_rows = [row for key, row in keyed.items() if key in existing]
+
+    skipped = updated = 0
+    if old_rows:
+        if conflict_resolution == CONFLICT_ERROR:
+            key = next(k for k in keyed if k in existing)
+            raise ValueError(f"Record {table.name}:{key if len(key) > 1 else key[0]} already exists")
+        if conflict_resolution == CONFLICT_UPDATE:
+            _update_rows(conn, table, old_rows, key_columns)
+            updated = len(old_rows)
+        elif conflict_resolution == CONFLICT_REPLACE:
+            cols = [table.c[k] for k in key_columns]
+            old_keys = [tuple(row[k] for k in key_columns) for row in old_rows]
+            if len(cols) == 1:
+                conn.execute(delete(table).where(cols[0].in_([k[0] for k in old_keys])))
+            else:
+                conn.execute(delete(table).where(tuple_(*cols).in_(old_keys)))
+            new_rows.extend(old_rows)
+        else:
+            skipped = len(old_rows)
+
+    if new_rows:
+        _insert_rows(conn, table, new_rows, key_columns)
+    if unkeyed:
+        for group in _group_by_columns(unkeyed):
+            conn.execute(insert(table), group)
+
+    return len(new_rows) + len(unkeyed), skipped, updated
+
+
+def reset_sequence(conn: Connection, table: Table) -> None:
+    """Move a PostgreSQL serial sequence past explicitly inserted ids."""
+    if conn.dialect.name != "postgresql":
+        return
+    pk = list(table.primary_key.columns)
+    if len(pk) != 1 or _python_type(pk[0]) is not int:
+        return
+
+    column = pk[0]
+    max_id = conn.execute(select(func.max(column))).scalar()
+    if max_id is None:
+        return
+    conn.execute(
+        text("SELECT setval(pg_get_serial_sequence(:table, :column), :value)"),
+        {"table": table.fullname, "column": column.name, "value": max_id},
+    )
+
+
+def load_batches(
+    conn: Connection,
+    batches: Iterable[Tuple[str, List[Dict[str, Any]]]],
+    resolve_table: Callable[[str], Optional[Table]],
+    conflict_resolution: str = CONFLICT_SKIP,
+    key_columns: Optional[Dict[str, List[str]]] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> Dict[str, Dict[str, int]]:
+    """
+    Load (name, rows) batches into their tables.
+
+    Args:
+        conn: Connection (inside the caller's transaction)
+        batches: Iterable of (table or model name, encoded row dicts)
+        resolve_table: Maps a name from the dump to a Table (None skips it)
+        conflict_resolution: skip, update, error or replace
+        key_columns: Optional per-name key columns (defaults to primary keys)
+        progress: Optional callback receiving (name, rows_done)
+
+    Returns:
+        Dict with 'imported', 'skipped' and 'updated' counts per name
+    """
+    stats: Dict[str, Dict[str, int]] = {"imported": {}, "skipped": {}, "updated": {}}
+    decoders: Dict[str, Optional[RowDecoder]] = {}
+    done: Dict[str, int] = {}
+
+    for name, rows in batches:
+        if name not in decoders:
+            table = resolve_table(name)
+            decoders[name] = RowDecoder(table) if table is not None else None
+            if table is None:
+                logger.warning(f"Skipping unknown table or model: {name}")
+            for bucket in stats.values():
+                bucket.setdefault(name, 0)
+
+        decoder = decoders[name]
+        if decoder is None:
+            stats["skipped"][name] += len(rows)
+            continue
+
+        imported, skipped, updated = upsert_rows(
+            conn,
+            decoder.table,
+            [decoder(row) for row in rows],
+            conflict_resolution,
+            (key_columns or {}).get(name),
+        )
+        stats["imported"][name] += imported
+        stats["skipped"][name] += skipped
+        stats["updated"][name] += updated
+
+        done[name] = done.get(name, 0) + len(rows)
+        if progress:
+            progress(name, done[name])
+
+    for decoder in decoders.values():
+        if decoder is not None:
+            reset_sequence(conn, decoder.table)
+
+    return stats
+
+
+def iter_record_batches(
+    data: Dict[str, List[Dict[str, Any]]],
+    batch_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """Split an in-memory {name: [records]} mapping into load batches."""
+    for name, records in data.items():
+        for start in range(0, len(records), batch_size):
+            yield name, records[start:start + batch_size]
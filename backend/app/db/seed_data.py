@@ -0,0 +1,701 @@
+"""
+Seed Data Loading and Export
+
+Bulk implementation of ``manage.py load_data`` / ``export_data`` for the
+JSON seed format::
+
+    {"companies": [...], "permissions": [...], "roles": [...], "users": [...], ...}
+
+Loading:
+- The document is streamed (iter_json_items), one batch of records in memory
+- Natural keys (company code, permission/role/group name, user email) are
+  mapped to ids once up front and kept current as rows are inserted, so
+  references and existence checks never query per record
+- Records are inserted per batch with multi-row ``INSERT ... ON CONFLICT
+  DO NOTHING RETURNING`` and links (role/group permissions, group members)
+  with one executemany per batch
+- Passwords are bcrypt-hashed in a process pool
+- A section whose dependencies appear later in the file (e.g. roles before
+  permissions) is spooled to a temporary file and loaded at the end
+
+Export streams rows with server-side cursors and joins instead of
+per-row lookups (write_json_sections).
+"""
+
+import json
+import logging
+import os
+import tempfile
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import chain, groupby
+from operator import itemgetter
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import Table, bindparam, insert, select, update
+from sqlalchemy.engine import Connection
+
+from app.core.security import get_password_hash
+from app.db.data_stream import (
+    DEFAULT_CHUNK_SIZE,
+    RowDecoder,
+    _dialect_insert,
+    _group_by_columns,
+    _supports_on_conflict,
+    iter_json_items,
+    upsert_rows,
+    write_json_sections,
+)
+from app.models.activity_log import ActivityLog
+from app.models.company import Company
+from app.models.group import Group, GroupPermission, UserGroup
+from app.models.message import Message
+from app.models.notification import Notification
+from app.models.permission import Permission
+from app.models.role import Role
+from app.models.user import User
+from app.models.user_company_role import RolePermission, UserCompanyRole
+
+logger = logging.getLogger(__name__)
+
+# Sections in load order, with the sections their references point to
+SECTION_DEPENDENCIES: Dict[str, Tuple[str, ...]] = {
+    "companies": (),
+    "permissions": (),
+    "roles": ("companies", "permissions"),
+    "users": ("companies",),
+    "groups": ("companies", "users", "permissions"),
+    "user_company_roles": ("users", "companies", "roles"),
+    "notifications": ("users",),
+    "activity_logs": ("users", "companies"),
+    "messages": ("users",),
+}
+
+# Below this many passwords per batch, hashing inline beats pool overhead
+PARALLEL_HASH_THRESHOLD = 8
+
+# Called as progress(section, records_done) after every batch
+ProgressCallback = Callable[[str, int], None]
+
+
+def hash_passwords(passwords: List[str], executor: Optional[Executor] = None) -> List[str]:
+    """bcrypt-hash passwords, in ``executor`` when given."""
+    if executor is None or len(passwords) < PARALLEL_HASH_THRESHOLD:
+        return [get_password_hash(p) for p in passwords]
+    workers = getattr(executor, "_max_workers", 1) or 1
+    return list(executor.map(get_password_hash, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
+
+
+def _codename(item: Dict[str, Any], slug: bool) -> None:
+    """Default a missing codename from the name (load_data semantics)."""
+    if not item.get("codename"):
+        name = item.get("name", "")
+        item["codename"] = name.lower().replace(" ", "_") if slug else name
+
+
+class SeedLoader:
+    """
+    Bulk loader for JSON seed data.
+
+    Existing records (matched by natural key) are skipped, as are their
+    links. Usage:
+
+        with SeedLoader(conn, hash_workers=4) as loader:
+            with open(path, encoding="utf-8") as fh:
+                stats = loader.load(fh)
+    """
+
+    def __init__(
+        self,
+        conn: Connection,
+        batch_size: int = DEFAULT_CHUNK_SIZE,
+        hash_workers: Optional[int] = None,
+        progress: Optional[ProgressCallback] = None,
+    ):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.hash_workers = (os.cpu_count() or 1) if hash_workers is None else hash_workers
+        self.progress = progress
+        self.stats: Dict[str, int] = {}
+
+        # Natural key -> id
+        self.companies: Dict[str, int] = {}
+        self.permissions: Dict[str, int] = {}
+        self.roles: Dict[str, int] = {}
+        self.users: Dict[str, int] = {}
+        self.groups: Dict[str, int] = {}
+
+        self._parent_refs: Dict[str, str] = {}  # company code -> parent code
+        self._decoders: Dict[str, RowDecoder] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._handlers: Dict[str, Callable[[List[Dict[str, Any]]], int]] = {
+            "companies": self._load_companies,
+            "permissions": self._load_permissions,
+            "roles": self._load_roles,
+            "users": self._load_users,
+            "groups": self._load_groups,
+            "user_company_roles": self._load_user_company_roles,
+            "notifications": self._load_notifications,
+            "activity_logs": self._load_activity_logs,
+            "messages": self._load_messages,
+        }
+
+    def __enter__(self) -> "SeedLoader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    # -------------------------------------------------------------------------
+    # Driver
+    # -------------------------------------------------------------------------
+
+    def load(self, fh: IO[str]) -> Dict[str, int]:
+        """
+        Load a seed document from an open text file.
+
+        Returns:
+            Number of records created per section
+        """
+        self.preload()
+        done: Set[str] = set()
+        spooled: Dict[str, IO[str]] = {}
+
+        try:
+            for section, batch, last in self._iter_batches(iter_json_items(fh)):
+                if section not in self._handlers:
+                    continue
+                if section in spooled or not set(SECTION_DEPENDENCIES[section]) <= done:
+                    spool = spooled.get(section)
+                    if spool is None:
+                        logger.debug(f"Deferring seed section '{section}' until its dependencies are loaded")
+                        spool = spooled[section] = tempfile.TemporaryFile("w+t", encoding="utf-8")
+                    spool.writelines(json.dumps(item) + "\n" for item in batch)
+                    continue
+                self._load_batch(section, batch)
+                if last:
+                    done.add(section)
+
+            for section in SECTION_DEPENDENCIES:
+                spool = spooled.get(section)
+                if spool is None:
+                    continue
+                spool.seek(0)
+                for batch in self._iter_spool(spool):
+                    self._load_batch(section, batch)
+        finally:
+            for spool in spooled.values():
+                spool.close()
+
+        self._link_parent_companies()
+        return self.stats
+
+    def preload(self) -> None:
+        """Map the natural keys of existing records to ids (one query per table)."""
+        conn = self.conn
+        self.companies = dict(conn.execute(select(Company.code, Company.id)).all())
+        self.permissions = dict(conn.execute(select(Permission.name, Permission.id)).all())
+        self.roles = dict(conn.execute(select(Role.name, Role.id).order_by(Role.id.desc())).all())
+        self.users = dict(conn.execute(select(User.email, User.id)).all())
+        self.groups = dict(conn.execute(select(Group.name, Group.id).order_by(Group.id.desc())).all())
+
+    def _iter_batches(
+        self,
+        items: Iterable[Tuple[str, Any]],
+    ) -> Iterator[Tuple[str, List[Dict[str, Any]], bool]]:
+        """Group streamed (section, item) pairs into (section, batch, is_last_batch)."""
+        section: Optional[str] = None
+        batch: List[Dict[str, Any]] = []
+        for name, item in items:
+            if name != section:
+                if batch:
+                    yield section, batch, True
+                section, batch = name, []
+            if isinstance(item, dict):
+                batch.append(item)
+            if len(batch) >= self.batch_size:
+                yield section, batch, False
+                batch = []
+        if section is not None:
+            yield section, batch, True
+
+    def _iter_spool(self, spool: IO[str]) -> Iterator[List[Dict[str, Any]]]:
+        batch: List[Dict[str, Any]] = []
+        for line in spool:
+            batch.append(json.loads(line))
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _load_batch(self, section: str, batch: List[Dict[str, Any]]) -> None:
+        count = self._handlers[section](batch) if batch else 0
+        self.stats[section] = self.stats.get(section, 0) + count
+        if self.progress:
+            self.progress(section, self.stats[section])
+
+    # -------------------------------------------------------------------------
+    # Insert helpers
+    # -------------------------------------------------------------------------
+
+    def _decode(self, table: Table, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Keep the item's table columns, coercing dates etc. to bind values."""
+        decoder = self._decoders.get(table.name)
+        if decoder is None:
+            decoder = self._decoders[table.name] = RowDecoder(table)
+        return decoder(item)
+
+    def _insert_new(
+        self,
+        table: Table,
+        rows: List[Dict[str, Any]],
+        key: str,
+        known: Dict[str, int],
+    ) -> Dict[str, int]:
+        """
+        Insert rows whose natural key isn't in ``known`` yet.
+
+        Rows conflicting with a unique constraint are skipped. ``known`` is
+        updated; returns key -> id of the inserted rows.
+        """
+        new: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            value = row.get(key)
+            if value not in known and value not in new:
+                new[value] = row
+        if not new:
+            return {}
+
+        conn = self.conn
+        if _supports_on_conflict(conn):
+            stmt = _dialect_insert(conn, table).on_conflict_do_nothing()
+        else:
+            stmt = insert(table)
+
+        inserted: Dict[str, int] = {}
+        for group in _group_by_columns(list(new.values())):
+            if conn.dialect.insert_executemany_returning:
+                result = conn.execute(stmt.returning(table.c[key], table.c.id), group)
+                inserted.update(result.all())
+            else:
+                conn.execute(stmt, group)
+                keys = [row[key] for row in group]
+                inserted.update(conn.execute(
+                    select(table.c[key], table.c.id).where(table.c[key].in_(keys))
+                ).all())
+
+        known.update(inserted)
+        return inserted
+
+    def _insert_links(self, table: Table, rows: List[Dict[str, Any]]) -> None:
+        if rows:
+            self.conn.execute(insert(table), rows)
+
+    def _insert_all(self, table: Table, rows: List[Dict[str, Any]]) -> int:
+        for group in _group_by_columns(rows):
+            self.conn.execute(insert(table), group)
+        return len(rows)
+
+    # -------------------------------------------------------------------------
+    # Sections
+    # -------------------------------------------------------------------------
+
+    def _load_companies(self, items: List[Dict[str, Any]]) -> int:
+        rows = []
+        for item in items:
+            item.pop("id", None)
+            item.pop("parent_company_id", None)
+            parent_code = item.pop("parent_company_code", None)
+            if parent_code:
+                self._parent_refs[item.get("code")] = parent_code
+            rows.append(self._decode(Company.__table__, item))
+        return len(self._insert_new(Company.__table__, rows, "code", self.companies))
+
+    def _link_parent_companies(self) -> None:
+        """Set parent companies once every company exists."""
+        params = [
+            {"_id": self.companies[child], "_parent_id": self.companies[parent]}
+            for child, parent in self._parent_refs.items()
+            if child in self.companies and parent in self.companies
+        ]
+        if params:
+            table = Company.__table__
+            self.conn.execute(
+                update(table)
+                .where(table.c.id == bindparam("_id"))
+                .values(parent_company_id=bindparam("_parent_id")),
+                params,
+            )
+
+    def _load_permissions(self, items: List[Dict[str, Any]]) -> int:
+        rows = []
+        for item in items:
+            item.pop("id", None)
+            _codename(item, slug=False)
+            rows.append(self._decode(Permission.__table__, item))
+        return len(self._insert_new(Permission.__table__, rows, "name", self.permissions))
+
+    def _load_roles(self, items: List[Dict[str, Any]]) -> int:
+        rows, permission_names = [], {}
+        for item in items:
+            item.pop("id", None)
+            permission_names.setdefault(item.get("name"), item.pop("permissions", []))
+            company_code = item.pop("company_code", None)
+            _codename(item, slug=True)
+            if company_code in self.companies:
+                item["company_id"] = self.companies[company_code]
+            rows.append(self._decode(Role.__table__, item))
+
+        inserted = self._insert_new(Role.__table__, rows, "name", self.roles)
+        self._insert_links(RolePermission.__table__, [
+            {"role_id": role_id, "permission_id": self.permissions[name]}
+            for role_name, role_id in inserted.items()
+            for name in dict.fromkeys(permission_names.get(role_name) or ())
+            if name in self.permissions
+        ])
+        return len(inserted)
+
+    def _load_users(self, items: List[Dict[str, Any]]) -> int:
+        rows, passwords = [], []
+        for item in items:
+            item.pop("id", None)
+            password = item.pop("password", None)
+            company_code = item.pop("current_company_code", None)
+            if item.get("email") in self.users:
+                continue
+            if company_code in self.companies:
+                item["current_company_id"] = self.companies[company_code]
+            row = self._decode(User.__table__, item)
+            if password:
+                passwords.append((row, password))
+            rows.append(row)
+
+        if passwords:
+            hashes = hash_passwords([p for _, p in passwords], self._hash_executor(len(passwords)))
+            for (row, _), hashed in zip(passwords, hashes):
+                row["hashed_password"] = hashed
+
+        return len(self._insert_new(User.__table__, rows, "email", self.users))
+
+    def _hash_executor(self, count: int) -> Optional[ProcessPoolExecutor]:
+        if self.hash_workers <= 1 or count < PARALLEL_HASH_THRESHOLD:
+            return None
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.hash_workers)
+        return self._executor
+
+    def _load_groups(self, items: List[Dict[str, Any]]) -> int:
+        rows, members, permission_names = [], {}, {}
+        for item in items:
+            item.pop("id", None)
+            item.pop("company_id", None)  # Numeric ids don't survive a round-trip
+            company_code = item.pop("company_code", None)
+            members.setdefault(item.get("name"), item.pop("users", []))
+            permission_names.setdefault(item.get("name"), item.pop("permissions", []))
+            _codename(item, slug=True)
+            if company_code in self.companies:
+                item["company_id"] = self.companies[company_code]
+            rows.append(self._decode(Group.__table__, item))
+
+        inserted = self._insert_new(Group.__table__, rows, "name", self.groups)
+        self._insert_links(UserGroup.__table__, [
+            {"group_id": group_id, "user_id": self.users[email]}
+            for group_name, group_id in inserted.items()
+            for email in dict.fromkeys(members.get(group_name) or ())
+            if email in self.users
+        ])
+        self._insert_links(GroupPermission.__table__, [
+            {"group_id": group_id, "permission_id": self.permissions[name]}
+            for group_name, group_id in inserted.items()
+            for name in dict.fromkeys(permission_names.get(group_name) or ())
+            if name in self.permissions
+        ])
+        return len(inserted)
+
+    def _load_user_company_roles(self, items: List[Dict[str, Any]]) -> int:
+        rows = []
+        for item in items:
+            user_id = self.users.get(item.get("user_email"))
+            company_id = self.companies.get(item.get("company_code"))
+            role_id = self.roles.get(item.get("role_name"))
+            if user_id and company_id and role_id:
+                rows.append({
+                    "user_id": user_id,
+                    "company_id": company_id,
+                    "role_id": role_id,
+                    "is_default": item.get("is_default", False),
+                })
+        imported, _, _ = upsert_rows(
+            self.conn,
+            UserCompanyRole.__table__,
+            rows,
+            key_columns=["user_id", "company_id", "role_id"],
+        )
+        return imported
+
+    def _load_notifications(self, items: List[Dict[str, Any]]) -> int:
+        rows = []
+        for item in items:
+            item.pop("id", None)
+            user_id = self.users.get(item.pop("user_email", None))
+            if user_id:
+                item["user_id"] = user_id
+                rows.append(self._decode(Notification.__table__, item))
+        return self._insert_all(Notification.__table__, rows)
+
+    def _load_activity_logs(self, items: List[Dict[str, Any]]) -> int:
+        rows = []
+        for item in items:
+            item.pop("id", None)
+            for field in ("user_id", "company_id", "entity_id"):
+                item.pop(field, None)  # Numeric ids don't survive a round-trip
+            user_id = self.users.get(item.pop("user_email", None))
+            company_id = self.companies.get(item.pop("company_code", None))
+            if user_id:
+                item["user_id"] = user_id
+            if company_id:
+                item["company_id"] = company_id
+            rows.append(self._decode(ActivityLog.__table__, item))
+        return self._insert_all(ActivityLog.__table__, rows)
+
+    def _load_messages(self, items: List[Dict[str, Any]]) -> int:
+        rows = []
+        for item in items:
+            for field in ("id", "parent_id", "user_id", "record_id"):
+                item.pop(field, None)
+            user_id = self.users.get(item.pop("user_email", None))
+            if user_id:
+                item["user_id"] = user_id
+            item["record_id"] = 0
+            rows.append(self._decode(Message.__table__, item))
+        return self._insert_all(Message.__table__, rows)
+
+
+# -------------------------------------------------------------------------
+# Export
+# -------------------------------------------------------------------------
+
+def _enum_value(value: Any) -> Any:
+    return getattr(value, "value", value)
+
+
+def _stream(conn: Connection, stmt, chunk_size: int) -> Iterator[Any]:
+    result = conn.execution_options(yield_per=chunk_size).execute(stmt)
+    for partition in result.partitions():
+        yield from partition
+
+
+def _with_children(
+    parents: Iterable[Any],
+    *children: Iterable[Tuple[int, Any]],
+) -> Iterator[Tuple[Any, List[List[Any]]]]:
+    """
+    Attach child values to parent rows without loading either side.
+
+    ``parents`` are ordered by id and each ``children`` stream yields
+    (parent_id, value) ordered by parent_id; yields (parent, [values per stream]).
+    """
+    cursors = [groupby(stream, key=itemgetter(0)) for stream in children]
+    current = [next(cursor, None) for cursor in cursors]
+    for parent in parents:
+        values = []
+        for index, cursor in enumerate(cursors):
+            group = current[index]
+            while group is not None and group[0] < parent.id:
+                group = next(cursor, None)
+            if group is not None and group[0] == parent.id:
+                values.append([row[1] for row in group[1]])
+                group = next(cursor, None)
+            else:
+                values.append([])
+            current[index] = group
+        yield parent, values
+
+
+def iter_export_sections(
+    conn: Connection,
+    include_all: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    sample_size: int = 1000,
+) -> Iterator[Tuple[str, Iterable[Dict[str, Any]]]]:
+    """
+    Yield (section, records) of a seed document, records streamed lazily.
+
+    Log-like sections (notifications, activity logs, messages) are only
+    included with ``include_all`` and limited to ``sample_size`` rows.
+    """
+    companies_table = Company.__table__
+    users_table = User.__table__
+
+    def companies():
+        parent = companies_table.alias("parent")
+        stmt = (
+            select(companies_table, parent.c.code.label("parent_code"))
+            .select_from(companies_table.outerjoin(parent, parent.c.id == companies_table.c.parent_company_id))
+            .order_by(companies_table.c.id)
+        )
+        for row in _stream(conn, stmt, chunk_size):
+            record = {
+                "name": row.name,
+                "code": row.code,
+                "address": row.address,
+                "city": row.city,
+                "state": row.state,
+                "country": row.country,
+                "zip_code": row.zip_code,
+                "phone": row.phone,
+                "email": row.email,
+                "website": row.website,
+                "is_active": row.is_active,
+            }
+            if row.parent_code:
+                record["parent_company_code"] = row.parent_code
+            yield record
+
+    def permissions():
+        for row in _stream(conn, select(Permission.__table__).order_by(Permission.id), chunk_size):
+            yield {
+                "name": row.name,
+                "description": row.description,
+                "category": _enum_value(row.category),
+                "action": _enum_value(row.action),
+                "resource": row.resource,
+            }
+
+    def roles():
+        role_permissions = _stream(conn, (
+            select(RolePermission.role_id, Permission.name)
+            .join(Permission, Permission.id == RolePermission.permission_id)
+            .order_by(RolePermission.role_id, RolePermission.id)
+        ), chunk_size)
+        rows = _stream(conn, select(Role.__table__).order_by(Role.id), chunk_size)
+        for row, (names,) in _with_children(rows, role_permissions):
+            yield {
+                "name": row.name,
+                "description": row.description,
+                "is_system_role": row.is_system_role,
+                "permissions": names,
+            }
+
+    def users():
+        stmt = select(
+            User.id, User.email, User.username, User.full_name, User.is_active, User.is_superuser,
+        ).order_by(User.id)
+        for row in _stream(conn, stmt, chunk_size):
+            yield {
+                "email": row.email,
+                "username": row.username,
+                "full_name": row.full_name,
+                "is_active": row.is_active,
+                "is_superuser": row.is_superuser,
+            }
+
+    def groups():
+        members = _stream(conn, (
+            select(UserGroup.group_id, User.email)
+            .join(User, User.id == UserGroup.user_id)
+            .order_by(UserGroup.group_id, UserGroup.id)
+        ), chunk_size)
+        group_permissions = _stream(conn, (
+            select(GroupPermission.group_id, Permission.name)
+            .join(Permission, Permission.id == GroupPermission.permission_id)
+            .order_by(GroupPermission.group_id, GroupPermission.id)
+        ), chunk_size)
+        rows = _stream(conn, select(Group.__table__).order_by(Group.id), chunk_size)
+        for row, (emails, names) in _with_children(rows, members, group_permissions):
+            yield {
+                "name": row.name,
+                "description": row.description,
+                "is_active": row.is_active,
+                "users": emails,
+                "permissions": names,
+            }
+
+    def user_company_roles():
+        stmt = (
+            select(User.email, Company.code, Role.name, UserCompanyRole.is_default)
+            .select_from(UserCompanyRole)
+            .outerjoin(User, User.id == UserCompanyRole.user_id)
+            .outerjoin(Company, Company.id == UserCompanyRole.company_id)
+            .outerjoin(Role, Role.id == UserCompanyRole.role_id)
+            .order_by(UserCompanyRole.id)
+        )
+        for email, code, role_name, is_default in _stream(conn, stmt, chunk_size):
+            yield {
+                "user_email": email,
+                "company_code": code,
+                "role_name": role_name,
+                "is_default": is_default,
+            }
+
+    def notifications():
+        stmt = (
+            select(Notification.__table__, users_table.c.email.label("user_email"))
+            .select_from(Notification.__table__.outerjoin(users_table, users_table.c.id == Notification.user_id))
+            .order_by(Notification.id)
+            .limit(sample_size)
+        )
+        for row in _stream(conn, stmt, chunk_size):
+            yield {
+                "user_email": row.user_email,
+                "title": row.title,
+                "description": row.description,
+                "level": _enum_value(row.level),
+                "is_read": row.is_read,
+            }
+
+    def activity_logs():
+        stmt = select(ActivityLog.__table__).order_by(ActivityLog.id).limit(sample_size)
+        for row in _stream(conn, stmt, chunk_size):
+            yield {
+                "action": row.action,
+                "category": _enum_value(row.category),
+                "level": _enum_value(row.level),
+                "entity_type": row.entity_type,
+                "description": row.description,
+            }
+
+    def messages():
+        stmt = select(Message.__table__).order_by(Message.id).limit(sample_size)
+        for row in _stream(conn, stmt, chunk_size):
+            yield {
+                "model_name": row.model_name,
+                "record_id": row.record_id,
+                "body": row.body,
+                "message_type": _enum_value(row.message_type),
+            }
+
+    yield "companies", companies()
+    yield "permissions", permissions()
+    yield "roles", roles()
+    yield "users", users()
+    yield "groups", groups()
+    yield "user_company_roles", user_company_roles()
+    if include_all:
+        yield "notifications", notifications()
+        yield "activity_logs", activity_logs()
+        yield "messages", messages()
+
+
+def export_seed_data(
+    conn: Connection,
+    fh: IO[str],
+    meta: Optional[Dict[str, Any]] = None,
+    include_all: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Dict[str, int]:
+    """
+    Stream a seed document to an open text file.
+
+    Returns:
+        Number of records written per section
+    """
+    sections = iter_export_sections(conn, include_all, chunk_size)
+    if meta is not None:
+        sections = chain([("meta", meta)], sections)
+    return write_json_sections(fh, sections)
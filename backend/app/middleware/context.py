@@ -18,8 +18,10 @@ class ContextMiddleware(BaseHTTPMiddleware):
     """
 
     async def dispatch(self, request: Request, call_next):
-        # Generate request ID
-        request_id = str(uuid.uuid4())
+        # Honor an upstream correlation ID (e.g. from a load balancer), else generate one
+        request_id = request.headers.get("X-Request-ID", "")
+        if not request_id or len(request_id) > 128 or not request_id.isprintable():
+            request_id = str(uuid.uuid4())
 
         # Extract user info from Authorization header
         user_id = None
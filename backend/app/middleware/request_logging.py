@@ -7,6 +7,7 @@ Provides comprehensive request/response logging with:
 - Error logging
 - Sensitive data masking
 - Performance metrics
+- Per-route sampling of successful requests
 """
 
 import json
@@ -22,6 +23,8 @@ from starlette.responses import Response
 from starlette.types import ASGIApp
 
 from app.core.config import settings
+from app.core.context import get_request_context
+from app.core.logging import LogSampler
 
 logger = logging.getLogger(__name__)
 security_logger = logging.getLogger("security")
@@ -57,8 +60,10 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         log_headers: bool = False,
         excluded_paths: Optional[List[str]] = None,
         max_body_length: int = 1000,
+        sampler: Optional[LogSampler] = None,
     ):
         super().__init__(app)
+        self.sampler = sampler or LogSampler()
         self.log_request_body = log_request_body
         self.log_response_body = log_response_body
         self.log_headers = log_headers
@@ -73,57 +78,73 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         if request.url.path in self.excluded_paths:
             return await call_next(request)
 
-        # Generate or get request ID
-        request_id = getattr(request.state, "request_id", None) or str(uuid.uuid4())
-        start_time = time.time()
+        # Reuse the correlation ID assigned by ContextMiddleware
+        ctx = get_request_context()
+        request_id = (
+            (ctx.request_id if ctx else None)
+            or getattr(request.state, "request_id", None)
+            or str(uuid.uuid4())
+        )
+        start_time = time.perf_counter()
 
         # Extract request data
         request_data = await self._extract_request_data(request)
 
-        # Log request
-        logger.info(
-            f"Request: {request.method} {request.url.path} "
-            f"[{request_id}] from {request_data['client_ip']}"
-        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Request: %s %s from %s",
+                request.method, request.url.path, request_data["client_ip"],
+                extra={"request_id": request_id, "request": request_data},
+            )
 
         # Process request
         response = None
-        error = None
         try:
             response = await call_next(request)
         except Exception as e:
-            error = e
             logger.error(
-                f"Request failed: {request.method} {request.url.path} "
-                f"[{request_id}] - {str(e)}"
+                "Request failed: %s %s - %s",
+                request.method, request.url.path, e,
+                extra={
+                    "request_id": request_id,
+                    "method": request.method,
+                    "path": request.url.path,
+                    "client_ip": request_data["client_ip"],
+                },
             )
             raise
 
         # Calculate metrics
-        response_time = time.time() - start_time
+        response_time = time.perf_counter() - start_time
         status_code = response.status_code if response else 500
 
         # Determine log level based on response
         log_level = self._get_log_level(status_code, response_time)
 
-        # Log response
-        log_message = (
-            f"Response: {request.method} {request.url.path} "
-            f"[{request_id}] {status_code} in {response_time:.3f}s"
-        )
-
-        if log_level == logging.WARNING:
-            logger.warning(log_message)
-        elif log_level == logging.ERROR:
-            logger.error(log_message)
-        else:
-            logger.info(log_message)
+        # Successful, fast requests are subject to sampling; errors and slow
+        # requests are always logged
+        if log_level > logging.INFO or self.sampler.should_log(request.url.path, status_code):
+            logger.log(
+                log_level,
+                "Response: %s %s %s in %.3fs",
+                request.method, request.url.path, status_code, response_time,
+                extra={
+                    "request_id": request_id,
+                    "method": request.method,
+                    "path": request.url.path,
+                    "status_code": status_code,
+                    "duration_ms": round(response_time * 1000, 2),
+                    "client_ip": request_data["client_ip"],
+                },
+            )
 
         # Log security events for certain status codes
         if status_code in (401, 403, 429):
             security_logger.warning(
-                f"Security event: {status_code} on {request.method} {request.url.path} "
-                f"from {request_data['client_ip']} [User-Agent: {request_data['user_agent']}]"
+                "Security event: %s on %s %s from %s [User-Agent: %s]",
+                status_code, request.method, request.url.path,
+                request_data["client_ip"], request_data["user_agent"],
+                extra={"request_id": request_id},
             )
 
         return response
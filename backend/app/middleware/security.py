@@ -9,7 +9,6 @@ Provides comprehensive security features:
 """
 
 import logging
-import re
 import time
 import uuid
 from typing import Callable, List, Optional, Set
@@ -20,27 +19,17 @@ from starlette.responses import Response, JSONResponse
 from starlette.types import ASGIApp
 
 from app.core.config import settings
+from app.core.context import get_request_context
+from app.core.threat_signatures import REQUEST_PATTERNS, get_threat_matcher
 
 logger = logging.getLogger(__name__)
 
 
-# Suspicious patterns for threat detection
+# Suspicious patterns for threat detection (compiled once into a single-pass matcher)
 SUSPICIOUS_PATTERNS = [
-    r"<script[^>]*>",  # XSS attempts
-    r"javascript:",  # JavaScript injection
-    r"on\w+\s*=",  # Event handler injection
-    r"union\s+select",  # SQL injection
-    r";\s*drop\s+",  # SQL injection
-    r"--\s*$",  # SQL comment injection
-    r"\.\./",  # Path traversal
-    r"\.\.\\",  # Windows path traversal
-    r"%2e%2e",  # Encoded path traversal
-    r"eval\s*\(",  # Code injection
-    r"exec\s*\(",  # Code injection
+    pattern for patterns in REQUEST_PATTERNS.values() for pattern in patterns
 ]
 
-COMPILED_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in SUSPICIOUS_PATTERNS]
-
 
 class SecurityMiddleware(BaseHTTPMiddleware):
     """
@@ -71,8 +60,9 @@ class SecurityMiddleware(BaseHTTPMiddleware):
         """Process request through security checks"""
         start_time = time.time()
 
-        # Generate request ID
-        request_id = str(uuid.uuid4())
+        # Reuse the request ID from ContextMiddleware so logs and headers correlate
+        ctx = get_request_context()
+        request_id = (ctx.request_id if ctx else None) or str(uuid.uuid4())
         request.state.request_id = request_id
 
         # Check if path is excluded
@@ -85,7 +75,8 @@ class SecurityMiddleware(BaseHTTPMiddleware):
         content_length = request.headers.get("content-length")
         if content_length and int(content_length) > self.max_request_size:
             logger.warning(
-                f"Request too large: {content_length} bytes from {self._get_client_ip(request)}"
+                "Request too large: %s bytes from %s",
+                content_length, self._get_client_ip(request),
             )
             return JSONResponse(
                 status_code=413,
@@ -98,8 +89,9 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             threat = await self._detect_threats(request)
             if threat:
                 logger.warning(
-                    f"Suspicious request detected: {threat} from {self._get_client_ip(request)} "
-                    f"to {request.url.path}"
+                    "Suspicious request detected: %s from %s to %s",
+                    threat, self._get_client_ip(request), request.url.path,
+                    extra={"threat": threat, "path": request.url.path},
                 )
                 # Log but don't block by default - could be adjusted based on severity
                 request.state.suspicious = True
@@ -109,7 +101,7 @@ class SecurityMiddleware(BaseHTTPMiddleware):
         try:
             response = await call_next(request)
         except Exception as e:
-            logger.error(f"Request processing error: {str(e)}")
+            logger.error("Request processing error: %s", e)
             response = JSONResponse(
                 status_code=500,
                 content={"detail": "Internal server error"},
@@ -118,7 +110,7 @@ class SecurityMiddleware(BaseHTTPMiddleware):
         # Calculate response time
         response_time = time.time() - start_time
         if response_time > 2.0:  # Log slow requests
-            logger.warning(f"Slow request: {request.url.path} took {response_time:.2f}s")
+            logger.warning("Slow request: %s took %.2fs", request.url.path, response_time)
 
         # Add security headers
         self._add_security_headers(response, request_id, response_time)
@@ -127,18 +119,19 @@ class SecurityMiddleware(BaseHTTPMiddleware):
 
     async def _detect_threats(self, request: Request) -> Optional[str]:
         """Detect suspicious patterns in request"""
+        matcher = get_threat_matcher("request")
+
         # Check URL path
-        path = request.url.path
-        for pattern in COMPILED_PATTERNS:
-            if pattern.search(path):
-                return f"suspicious_path:{pattern.pattern}"
+        match = matcher.scan(request.url.path)
+        if match:
+            return f"suspicious_path:{match.pattern}"
 
         # Check query parameters
-        query_string = str(request.url.query)
+        query_string = request.url.query
         if query_string:
-            for pattern in COMPILED_PATTERNS:
-                if pattern.search(query_string):
-                    return f"suspicious_query:{pattern.pattern}"
+            match = matcher.scan(query_string)
+            if match:
+                return f"suspicious_query:{match.pattern}"
 
         # Check headers for suspicious content
         user_agent = request.headers.get("user-agent", "")
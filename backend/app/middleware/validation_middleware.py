@@ -7,6 +7,7 @@ from typing import Any, Callable, Dict, List, Optional, Type, Union
 from urllib.parse import unquote
 
 from app.core.logging import log_security_event
+from app.core.threat_signatures import INPUT_PATTERNS, ThreatMatch, get_threat_matcher
 from app.services.validation_service import ValidationService
 from fastapi import HTTPException, Request, Response, status
 from pydantic import BaseModel
@@ -30,113 +31,17 @@ class ValidationMiddleware(BaseHTTPMiddleware):
     def setup_validation_rules(self):
         """Setup comprehensive validation rules"""
 
-        # XSS patterns
-        self.xss_patterns = [
-            r"<script[^>]*>.*?</script>",
-            r"javascript:",
-            r"vbscript:",
-            r"onload\s*=",
-            r"onerror\s*=",
-            r"onclick\s*=",
-            r"onmouseover\s*=",
-            r"onfocus\s*=",
-            r"onblur\s*=",
-            r"<iframe[^>]*>",
-            r"<object[^>]*>",
-            r"<embed[^>]*>",
-            r"<link[^>]*>",
-            r"<meta[^>]*>",
-            r"expression\(",
-            r"url\(",
-            r"@import",
-            r"<svg[^>]*>.*?</svg>",
-            r"<img[^>]*onerror[^>]*>",
-            r"document\.cookie",
-            r"document\.write",
-            r"eval\(",
-            r"setTimeout\(",
-            r"setInterval\(",
-            r"Function\(",
-            r"alert\(",
-            r"confirm\(",
-            r"prompt\(",
-        ]
-
-        # SQL injection patterns
-        self.sql_patterns = [
-            r"(\b(select|insert|update|delete|drop|create|alter|exec|execute|union|declare)\b)",
-            r'(\b(or|and)\s+[\w\'"]+\s*=\s*[\w\'"]+)',
-            r'([\'"]\s*(or|and)\s*[\'"]\s*[\w\'"])',
-            r'(\bwhere\s+[\w\'"]+\s*=\s*[\w\'"]+)',
-            r"(--|\#|\/\*|\*\/)",
-            r"(\bxp_cmdshell\b)",
-            r"(\bsp_executesql\b)",
-            r"(\bdbms_pipe\b)",
-            r"(\butl_file\b)",
-            r"(\bload_file\b)",
-            r"(\binto\s+outfile\b)",
-            r"(\binto\s+dumpfile\b)",
-            r"(\bwaitfor\s+delay\b)",
-            r"(\bbenchmark\b)",
-            r"(\bsleep\s*\()",
-            r"(\bpg_sleep\b)",
-            r"(\bconvert\s*\()",
-            r"(\bcast\s*\()",
-            r"(\bchar\s*\()",
-            r"(\bascii\s*\()",
-            r"(\border\s+by\b)",
-            r"(\bgroup\s+by\b)",
-            r"(\bhaving\b)",
-            r"(\blimit\b)",
-            r"(\boffset\b)",
-        ]
-
-        # Path traversal patterns
-        self.path_traversal_patterns = [
-            r"\.\./",
-            r"\.\.\\",
-            r"%2e%2e%2f",
-            r"%2e%2e\\",
-            r"%252e%252e%252f",
-            r"%c0%af",
-            r"%c1%9c",
-            r"\/\.\.\/\.\.\/",
-            r"\\\.\.\\\.\.\\",
-            r"\.\.%2f",
-            r"\.\.%5c",
-        ]
+        # Signature sets (compiled once per process into single-pass matchers)
+        self.xss_patterns = INPUT_PATTERNS["xss"]
+        self.sql_patterns = INPUT_PATTERNS["sql_injection"]
+        self.path_traversal_patterns = INPUT_PATTERNS["path_traversal"]
+        self.command_patterns = INPUT_PATTERNS["command_injection"]
+        self.input_matcher = get_threat_matcher("input")
+        self.sql_matcher = get_threat_matcher("input", "sql_injection")
+        self.upload_matcher = get_threat_matcher("upload")
 
-        # Command injection patterns
-        self.command_patterns = [
-            r"[\s]*\|[\s]*",
-            r"[\s]*;[\s]*",
-            r"[\s]*&[\s]*",
-            r"[\s]*\$\(",
-            r"[\s]*`",
-            r"\$\{[^}]*\}",
-            r"<%[^%>]*%>",
-            r"\${[^}]*}",
-            r"exec\s*\(",
-            r"system\s*\(",
-            r"shell_exec\s*\(",
-            r"passthru\s*\(",
-            r"popen\s*\(",
-            r"proc_open\s*\(",
-            r"file_get_contents\s*\(",
-            r"readfile\s*\(",
-            r"include\s*\(",
-            r"require\s*\(",
-            r"nc\s+-",
-            r"netcat\s+-",
-            r"wget\s+",
-            r"curl\s+",
-            r"bash\s+-",
-            r"sh\s+-",
-            r"python\s+-",
-            r"perl\s+-",
-            r"ruby\s+-",
-            r"php\s+-",
-        ]
+        # Upper bound on bytes of a multipart body inspected for signatures
+        self.max_upload_scan_bytes = self.config.get("max_upload_scan_bytes", 5 * 1024 * 1024)
 
         # File upload validation
         self.dangerous_extensions = [
@@ -521,31 +426,22 @@ class ValidationMiddleware(BaseHTTPMiddleware):
 
             # Basic file upload validation
             try:
-                # Get request body for basic validation
-                body = await request.body()
-                body_str = body.decode('latin-1', errors='ignore')  # multipart data may contain binary
-
-                # Check for dangerous file extensions in filename patterns
-                dangerous_extensions = ['.exe', '.bat', '.cmd', '.scr', '.pif', '.com', '.vbs', '.jar']
-                for ext in dangerous_extensions:
-                    if ext.lower() in body_str.lower():
-                        await self._log_validation_error(
-                            "dangerous_file_extension",
-                            f"File upload contains dangerous extension: {ext}",
-                            request,
-                        )
-                        return ValidationResult(False, f"Dangerous file extension detected: {ext}", "DANGEROUS_FILE")
-
-                # Check for suspicious script content patterns
-                suspicious_patterns = ['<%', '<?php', '<script', 'javascript:', 'vbscript:', 'onload=', 'onerror=']
-                for pattern in suspicious_patterns:
-                    if pattern.lower() in body_str.lower():
-                        await self._log_validation_error(
-                            "suspicious_content",
-                            f"File upload contains suspicious content pattern: {pattern}",
-                            request,
-                        )
-                        return ValidationResult(False, "Suspicious content detected in file upload", "SUSPICIOUS_CONTENT")
+                match = await self._scan_upload_stream(request)
+                if match and match.category == "dangerous_extension":
+                    ext = match.value.lower()
+                    await self._log_validation_error(
+                        "dangerous_file_extension",
+                        f"File upload contains dangerous extension: {ext}",
+                        request,
+                    )
+                    return ValidationResult(False, f"Dangerous file extension detected: {ext}", "DANGEROUS_FILE")
+                if match:
+                    await self._log_validation_error(
+                        "suspicious_content",
+                        f"File upload contains suspicious content pattern: {match.value.lower()}",
+                        request,
+                    )
+                    return ValidationResult(False, "Suspicious content detected in file upload", "SUSPICIOUS_CONTENT")
 
                 # Check content-type header for known dangerous types
                 content_type = request.headers.get("Content-Type", "")
@@ -576,6 +472,24 @@ class ValidationMiddleware(BaseHTTPMiddleware):
                 False, "File upload validation failed", "FILE_VALIDATION_ERROR"
             )
 
+    async def _scan_upload_stream(self, request: Request) -> Optional[ThreatMatch]:
+        """
+        Scan multipart data for dangerous extensions and script content as
+        it is received (size-capped, binary-safe via latin-1).
+
+        Reading stops at the first match, since the request is rejected.
+        Otherwise the received body is kept on the request, so downstream
+        handlers read it as if Request.body() had been called.
+        """
+        scanner = self.upload_matcher.stream_scanner(max_bytes=self.max_upload_scan_bytes)
+        chunks = []
+        async for chunk in request.stream():
+            chunks.append(chunk)
+            if scanner.feed(chunk):
+                return scanner.match
+        request._body = b"".join(chunks)
+        return None
+
     async def _validate_response(self, response: Response, request: Request):
         """Validate response (optional security check)"""
         try:
@@ -599,58 +513,12 @@ class ValidationMiddleware(BaseHTTPMiddleware):
             logger.error(f"Response validation error: {e}")
 
     def _contains_malicious_patterns(self, content: str) -> bool:
-        """Check if content contains malicious patterns"""
-        # Ensure content is a string
-        if isinstance(content, bytes):
-            content = content.decode('utf-8', errors='ignore')
-        content_lower = content.lower()
-
-        # Check XSS patterns
-        for pattern in self.xss_patterns:
-            try:
-                if re.search(pattern, content_lower, re.IGNORECASE):
-                    return True
-            except (TypeError, re.error):
-                continue
-
-        # Check SQL injection patterns
-        if self._contains_sql_patterns(content):
-            return True
-
-        # Check path traversal patterns
-        for pattern in self.path_traversal_patterns:
-            try:
-                if re.search(pattern, content_lower, re.IGNORECASE):
-                    return True
-            except (TypeError, re.error):
-                continue
-
-        # Check command injection patterns
-        for pattern in self.command_patterns:
-            try:
-                if re.search(pattern, content, re.IGNORECASE):
-                    return True
-            except (TypeError, re.error):
-                continue
-
-        return False
+        """Check if content contains malicious patterns (XSS, SQL, traversal, command)"""
+        return self.input_matcher.is_malicious(content)
 
     def _contains_sql_patterns(self, content: str) -> bool:
         """Check for SQL injection patterns"""
-        # Ensure content is a string
-        if isinstance(content, bytes):
-            content = content.decode('utf-8', errors='ignore')
-        content_lower = content.lower()
-
-        for pattern in self.sql_patterns:
-            try:
-                if re.search(pattern, content_lower, re.IGNORECASE):
-                    return True
-            except (TypeError, re.error):
-                # Skip invalid patterns
-                continue
-
-        return False
+        return self.sql_matcher.is_malicious(content)
 
     async def _log_validation_error(
         self, error_type: str, message: str, request: Request
@@ -658,9 +526,10 @@ class ValidationMiddleware(BaseHTTPMiddleware):
         """Log validation errors"""
         log_security_event(
             "VALIDATION_FAILED",
-            None,
-            request,
             severity="WARNING",
+            ip_address=self._get_client_ip(request),
+            user_agent=request.headers.get("User-Agent", "unknown"),
+            message=message,
             details={
                 "error_type": error_type,
                 "message": message,
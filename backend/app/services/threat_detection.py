@@ -6,13 +6,13 @@ from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass
 from enum import Enum
-import re
 import hashlib
 import json
 
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, func, desc
 
+from app.core.threat_signatures import ANALYTICS_PATTERNS, get_threat_matcher
 from app.models.user import User
 from app.services.zero_trust_security import SecurityContext, RiskLevel
 
@@ -73,23 +73,9 @@ class ThreatDetection:
     _alerts: Dict[str, SecurityAlert] = {}
     _behavior_baselines: Dict[str, Dict[str, Any]] = {}
 
-    # SQL injection patterns
-    SQL_INJECTION_PATTERNS = [
-        r"(\%27)|(\')|(\-\-)|(\%23)|(#)",  # Basic SQL injection
-        r"(\%22)|(\")",  # Double quotes
-        r"((\%3D)|(=))[^\n]*((\%27)|(\')|(\-\-)|(\%3B)|(;))",  # Union-based
-        r"((\%27)|(\'))(\s)*((\%6F)|o|(\%4F))((\%72)|r|(\%52))",  # OR statements
-        r"((\%27)|(\'))union",  # Union select
-    ]
-
-    # XSS patterns
-    XSS_PATTERNS = [
-        r"<script[^>]*>.*?</script>",  # Script tags
-        r"javascript:",  # JavaScript protocol
-        r"on\w+\s*=",  # Event handlers
-        r"<iframe[^>]*>",  # Iframes
-        r"<object[^>]*>",  # Objects
-    ]
+    # SQL injection and XSS patterns (compiled into shared single-pass matchers)
+    SQL_INJECTION_PATTERNS = ANALYTICS_PATTERNS["sql_injection"]
+    XSS_PATTERNS = ANALYTICS_PATTERNS["xss"]
 
     @staticmethod
     def analyze_request(
@@ -135,18 +121,19 @@ class ThreatDetection:
 
         # Check query parameters, body, and headers
         text_to_check = json.dumps(request_data, default=str)
+        matcher = get_threat_matcher("analytics", "sql_injection")
 
-        for pattern in ThreatDetection.SQL_INJECTION_PATTERNS:
-            matches = re.findall(pattern, text_to_check, re.IGNORECASE)
-            if matches:
-                confidence = min(len(matches) * 0.3, 0.9)  # Higher confidence with more matches
+        for signature, match_count in matcher.count_matches(text_to_check).items():
+            pattern = signature.pattern
+            if match_count:
+                confidence = min(match_count * 0.3, 0.9)  # Higher confidence with more matches
 
                 indicator = ThreatIndicator(
                     threat_type=ThreatType.SQL_INJECTION,
                     severity=AlertSeverity.HIGH if confidence > 0.7 else AlertSeverity.MEDIUM,
                     confidence=confidence,
                     description=f"Potential SQL injection detected with pattern: {pattern}",
-                    indicators={"pattern": pattern, "matches": len(matches)},
+                    indicators={"pattern": pattern, "matches": match_count},
                     timestamp=datetime.utcnow(),
                     source_ip=request_data.get("ip_address", "unknown")
                 )
@@ -160,18 +147,19 @@ class ThreatDetection:
         indicators = []
 
         text_to_check = json.dumps(request_data, default=str)
+        matcher = get_threat_matcher("analytics", "xss")
 
-        for pattern in ThreatDetection.XSS_PATTERNS:
-            matches = re.findall(pattern, text_to_check, re.IGNORECASE)
-            if matches:
-                confidence = min(len(matches) * 0.4, 0.95)
+        for signature, match_count in matcher.count_matches(text_to_check).items():
+            pattern = signature.pattern
+            if match_count:
+                confidence = min(match_count * 0.4, 0.95)
 
                 indicator = ThreatIndicator(
                     threat_type=ThreatType.XSS,
                     severity=AlertSeverity.HIGH if confidence > 0.8 else AlertSeverity.MEDIUM,
                     confidence=confidence,
                     description=f"Potential XSS attack detected with pattern: {pattern}",
-                    indicators={"pattern": pattern, "matches": len(matches)},
+                    indicators={"pattern": pattern, "matches": match_count},
                     timestamp=datetime.utcnow(),
                     source_ip=request_data.get("ip_address", "unknown")
                 )
@@ -1,30 +1,37 @@
 """FastVue Framework - Main Application Entry Point"""
 
 import logging
+import secrets
+import time
 from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Optional
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 
+from app.api.deps.auth import get_optional_user
 from app.api.v1 import api_router
 from app.core.config import settings
+from app.core.logging import LogSampler, setup_logging, shutdown_logging
+from app.core.metrics import CONTENT_TYPE_LATEST, MetricsMiddleware, render_metrics
 from app.middleware.security import SecurityMiddleware
 from app.middleware.request_logging import RequestLoggingMiddleware
 from app.middleware.rate_limiting import RateLimitingMiddleware
 from app.middleware.error_handling import ErrorHandlingMiddleware
 from app.middleware.context import ContextMiddleware
-
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, settings.LOG_LEVEL),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("logs/fastvue.log", mode="a"),
-    ],
+from app.models.user import User
+
+# Configure logging (non-blocking: records are queued and written by a listener thread)
+setup_logging(
+    level=settings.LOG_LEVEL,
+    log_dir=settings.LOG_DIR,
+    json_format=settings.LOG_JSON,
+    max_bytes=settings.LOG_MAX_BYTES,
+    backup_count=settings.LOG_BACKUP_COUNT,
+    queue_size=settings.LOG_QUEUE_SIZE,
 )
 
 # Silence noisy loggers
@@ -32,13 +39,7 @@ logging.getLogger("watchfiles").setLevel(logging.WARNING)  # Hot-reload file wat
 logging.getLogger("watchfiles.main").setLevel(logging.WARNING)
 logging.getLogger("uvicorn.access").setLevel(logging.WARNING)  # Access logs (optional)
 logging.getLogger("websockets").setLevel(logging.WARNING)  # WebSocket library
-
-# Configure security logger
-security_logger = logging.getLogger("security")
-security_handler = logging.FileHandler("logs/security.log", mode="a")
-security_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
-security_logger.addHandler(security_handler)
-security_logger.setLevel(logging.INFO)
+logging.getLogger("security").setLevel(logging.INFO)
 
 logger = logging.getLogger(__name__)
 
@@ -94,9 +95,18 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f"Error during module shutdown: {e}")
 
+    try:
+        from modules.base.services.report_engine import shutdown_render_pool
+        shutdown_render_pool()
+    except Exception as e:
+        logger.error(f"Error shutting down report render pool: {e}")
+
     from app.core.cache import cache
     cache.close()
 
+    # Flush queued log records last so shutdown messages are written
+    shutdown_logging()
+
 
 async def _ensure_base_module_installed(loader):
     """Ensure the base module is installed in the database.
@@ -200,7 +210,12 @@ async def _initialize_modules(app: FastAPI):
 
     # Create registry and loader
     registry = ModuleRegistry.get_registry()
-    loader = ModuleLoader(settings.all_addon_paths, registry)
+    loader = ModuleLoader(
+        settings.all_addon_paths,
+        registry,
+        index_path=settings.MODULE_INDEX_PATH or None,
+        max_workers=settings.MODULE_LOAD_WORKERS,
+    )
 
     # Ensure base module is installed in database
     await _ensure_base_module_installed(loader)
@@ -211,6 +226,7 @@ async def _initialize_modules(app: FastAPI):
         logger.info(f"Discovered {len(discovered)} modules: {discovered}")
 
         if settings.AUTO_DISCOVER_MODULES:
+            boot_started = time.perf_counter()
             loaded = loader.load_all_modules()
             logger.info(f"Loaded {len(loaded)} modules")
 
@@ -230,6 +246,8 @@ async def _initialize_modules(app: FastAPI):
 
             # Mount module routers and static files
             for module_info in loaded:
+                mount_started = time.perf_counter()
+
                 # Mount API routers
                 for router in module_info.routers:
                     prefix = f"{settings.API_V1_STR}/{module_info.name}"
@@ -251,6 +269,14 @@ async def _initialize_modules(app: FastAPI):
                     )
                     logger.debug(f"Mounted static files for {module_info.name} at {mount_path}")
 
+                loader.get_timing(module_info.name).mount = time.perf_counter() - mount_started
+
+            logger.info(
+                "Module boot took %.3fs (manifest index: %d hits, %d misses)",
+                time.perf_counter() - boot_started,
+                loader.index_stats["hits"], loader.index_stats["misses"],
+            )
+
         # Apply router overrides registered by modules
         # (modules register overrides via @override_route, @wrap_route decorators)
         from app.core.modules.overrides import get_router_overrider
@@ -310,9 +336,13 @@ app.add_middleware(
     RequestLoggingMiddleware,
     log_request_body=settings.DEBUG,
     log_response_body=False,
+    sampler=LogSampler.from_config(
+        settings.LOG_SUCCESS_SAMPLE_RATE, settings.LOG_SAMPLE_ROUTES
+    ),
     excluded_paths=[
         "/health", "/", "/api/v1/docs", "/api/v1/redoc", "/api/v1/openapi.json",
         "/api/v1/ws", "/ws",  # WebSocket endpoints - high frequency, skip logging
+        "/metrics",  # Prometheus scrapes
     ],
 )
 
@@ -324,9 +354,13 @@ app.add_middleware(
     enable_hsts=settings.ENVIRONMENT == "production",
 )
 
-# 7. Context (outermost - sets user context for activity tracking)
+# 7. Context (sets user context for activity tracking)
 app.add_middleware(ContextMiddleware)
 
+# 8. Metrics (outermost - times the full middleware stack)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, excluded_paths=["/metrics", "/health"])
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -342,6 +376,32 @@ async def health_check():
     }
 
 
+# Prometheus metrics endpoint
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics(request: Request, user: Optional[User] = Depends(get_optional_user)):
+        """
+        Prometheus metrics in text exposition format.
+
+        Requires "Authorization: Bearer <METRICS_TOKEN>" (scrapers) or a
+        superuser's access token.
+        """
+        auth_header = request.headers.get("Authorization", "")
+        token_valid = bool(settings.METRICS_TOKEN) and secrets.compare_digest(
+            auth_header, f"Bearer {settings.METRICS_TOKEN}"
+        )
+        if not token_valid:
+            if user is None:
+                raise HTTPException(
+                    status_code=401,
+                    detail="Metrics token or superuser login required",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+            if not user.is_superuser:
+                raise HTTPException(status_code=403, detail="Superuser access required")
+        return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+
 # Root endpoint
 @app.get("/")
 async def root():
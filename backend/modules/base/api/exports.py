@@ -272,7 +272,7 @@ def export_module_data(
     current_user: User = Depends(get_current_active_user),
 ):
     """
-    Export module data as JSON.
+    Export module data as JSON or gzip-compressed NDJSON (format="ndjson").
 
     Exports data from specified models or all module models.
     """
@@ -282,8 +282,7 @@ def export_module_data(
         export = service.export_module_data(
             module_name=module_name,
             models=data.models,
-            include_related=data.include_related,
-            format=data.format,
+            output_format=data.format,
             user_id=current_user.id,
         )
     except ValueError as e:
@@ -330,10 +329,9 @@ async def upload_import(
     # Save uploaded file
     temp_dir = Path(tempfile.mkdtemp())
     try:
-        file_path = temp_dir / file.filename
+        file_path = temp_dir / Path(file.filename).name
         with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+            shutil.copyfileobj(file.file, f)
 
         # Validate import
         imp = service.validate_import(
@@ -100,6 +100,9 @@ class SyncResult(BaseModel):
     error: Optional[str] = None
     version: Optional[str] = None
     path: Optional[str] = None
+    transferred: Optional[int] = None
+    unchanged: Optional[int] = None
+    removed: Optional[int] = None
 
 
 class SyncStatusResponse(BaseModel):
@@ -322,7 +325,7 @@ def get_all_sync_status(
     results = []
 
     for module_name in modules:
-        status_info = service.get_sync_status(module_name)
+        status_info = service.get_sync_status(module_name, remote_modules=modules)
         results.append(SyncStatusResponse(
             module=module_name,
             **status_info,
@@ -6,16 +6,24 @@ Provides report generation and management.
 
 from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
-from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
-import io
+from pathlib import Path
 
 from app.api.deps import get_current_active_user, get_db
+from app.core.background_tasks import task_manager
+from app.core.config import settings
 from app.models.user import User
 
-from ..services.report_service import ReportService
-from ..models.report import ReportFormat
+from ..services.report_engine import CONTENT_TYPES
+from ..services.report_service import (
+    ReportService,
+    mark_report_execution_failed,
+    run_report_execution,
+)
+from ..models.report import ReportExecution, ReportFormat
 
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
@@ -348,16 +356,61 @@ def render_report(
             detail=f"Failed to generate report: {e}"
         )
 
-    # Return file as streaming response
-    return StreamingResponse(
-        io.BytesIO(result['content']),
+    # Stream the rendered file from disk
+    return FileResponse(
+        result['file_path'],
         media_type=result['content_type'],
-        headers={
-            'Content-Disposition': f'attachment; filename="{result["filename"]}"'
-        }
+        filename=result['filename'],
+        headers={'X-Report-Cache': 'hit' if result['cached'] else 'miss'},
     )
 
 
+@router.post(
+    "/{report_code}/render-async",
+    response_model=ReportExecutionResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def render_report_async(
+    report_code: str,
+    data: RenderReportRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Queue a report for background rendering.
+
+    Poll the returned execution and fetch the file from
+    /executions/{execution_id}/download once it is completed.
+    """
+    service = get_report_service(db)
+
+    try:
+        execution = await run_in_threadpool(
+            service.queue_report,
+            report_code=report_code,
+            record_ids=data.record_ids,
+            user_id=current_user.id,
+            parameters=data.parameters,
+            output_format=data.output_format,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    task_manager.submit_task(
+        run_report_execution,
+        args=(execution.id,),
+        max_retries=0,
+        timeout=settings.REPORT_RENDER_TIMEOUT,
+        metadata={'report_code': report_code, 'execution_id': execution.id},
+        on_failure=mark_report_execution_failed,
+    )
+
+    return execution_to_response(execution)
+
+
 @router.post("/{report_code}/preview", response_model=Dict[str, str])
 def preview_report(
     report_code: str,
@@ -405,6 +458,23 @@ def list_report_executions(
     return [execution_to_response(e) for e in executions]
 
 
+def get_owned_execution(
+    service: ReportService,
+    execution_id: int,
+    user: User,
+) -> ReportExecution:
+    """Fetch an execution run by ``user`` (any execution for superusers), else 404."""
+    execution = service.get_execution(execution_id)
+
+    if not execution or (execution.user_id != user.id and not user.is_superuser):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Execution not found"
+        )
+
+    return execution
+
+
 @router.get("/executions/{execution_id}", response_model=ReportExecutionResponse)
 def get_execution(
     execution_id: int,
@@ -412,16 +482,39 @@ def get_execution(
     current_user: User = Depends(get_current_active_user),
 ):
     """Get a specific execution."""
+    execution = get_owned_execution(get_report_service(db), execution_id, current_user)
+    return execution_to_response(execution)
+
+
+@router.get("/executions/{execution_id}/download")
+def download_execution(
+    execution_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Download the file produced by a completed execution."""
     service = get_report_service(db)
-    execution = service.get_execution(execution_id)
+    execution = get_owned_execution(service, execution_id, current_user)
 
-    if not execution:
+    if execution.status != 'completed':
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Execution is {execution.status}"
+        )
+
+    file_path = Path(execution.file_path or '')
+    if not execution.file_path or not file_path.is_file():
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Execution not found"
+            detail="Report output has expired"
         )
 
-    return execution_to_response(execution)
+    extension = file_path.suffix.lstrip('.')
+    return FileResponse(
+        file_path,
+        media_type=CONTENT_TYPES.get(extension, 'application/octet-stream'),
+        filename=service.get_download_filename(execution.report_code, extension),
+    )
 
 
 # -------------------------------------------------------------------------
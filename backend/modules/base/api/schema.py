@@ -260,9 +260,9 @@ def backup_module_data(
     db: Session = Depends(get_db),
 ) -> Dict[str, Any]:
     """
-    Backup module data to JSON file.
+    Backup module data to a compressed NDJSON file.
 
-    Creates a timestamped backup file in the backups/modules directory.
+    Creates a timestamped .ndjson.gz backup in the backups/modules directory.
     """
     service = ModuleService(db)
 
@@ -219,6 +219,8 @@ def get_next_number(
             detail=f"Sequence '{code}' not found",
         )
 
+    db.commit()
+
     return SequenceNextResponse(code=code, number=number)
 
 
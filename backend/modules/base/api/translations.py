@@ -4,10 +4,11 @@ Translation API Routes
 Endpoints for managing translations and languages.
 """
 
+import hashlib
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
-from fastapi.responses import PlainTextResponse
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
@@ -20,6 +21,7 @@ from ..models.translation import (
     TranslationType,
     TranslationState,
 )
+from ..services.translation_catalog import fallback_chain
 from ..services.translation_service import TranslationService
 
 
@@ -514,6 +516,52 @@ def translate_text(
     )
 
 
+@router.get("/catalog/{lang}")
+def get_translation_catalog(
+    lang: str,
+    request: Request,
+    module_name: Optional[str] = Query(None, description="Restrict to one module"),
+    type: Optional[str] = Query("code", description="Translation type (all types if empty)"),
+    fallback: bool = Query(True, description="Merge fallback languages (e.g. fr for fr_CA)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> Response:
+    """
+    Get a whole translation catalog (name -> value) for the frontend.
+
+    Responses carry an ETag; send it back in If-None-Match to get a 304
+    while the catalog is unchanged.
+    """
+    service = TranslationService(db)
+    languages = fallback_chain(lang) if fallback else (lang,)
+    catalogs = [service.get_catalog(code, module_name) for code in languages]
+
+    version = hashlib.sha256(
+        "|".join([type or "", module_name or ""] + [c.version for c in catalogs]).encode("utf-8")
+    ).hexdigest()[:16]
+    etag = f'"{version}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    # Most specific language wins
+    messages: Dict[str, str] = {}
+    for catalog in reversed(catalogs):
+        messages.update(catalog.by_name(type or None))
+
+    return JSONResponse(
+        content={
+            "lang": lang,
+            "module_name": module_name,
+            "type": type or None,
+            "version": version,
+            "messages": messages,
+        },
+        headers=headers,
+    )
+
+
 # -------------------------------------------------------------------------
 # Bulk Operations
 # -------------------------------------------------------------------------
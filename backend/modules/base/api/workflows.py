@@ -285,6 +285,12 @@ class AvailableTransition(BaseModel):
     confirm_message: Optional[str] = None
 
 
+class AvailableTransitionsRequest(BaseModel):
+    """Batch available transitions request."""
+
+    res_ids: List[int] = Field(..., max_length=1000)
+
+
 class VisualizationData(BaseModel):
     """Workflow visualization data."""
 
@@ -295,6 +301,18 @@ class VisualizationData(BaseModel):
     edges: List[Dict[str, Any]]
 
 
+# -------------------------------------------------------------------------
+# Helper Functions
+# -------------------------------------------------------------------------
+
+
+def _user_groups(user: User) -> List[str]:
+    """Group codes used for transition checks (simplified - you may want to expand this)."""
+    if user.is_superuser:
+        return ["admin", "superuser"]
+    return []
+
+
 # -------------------------------------------------------------------------
 # Workflow Definition Endpoints
 # -------------------------------------------------------------------------
@@ -574,21 +592,39 @@ def get_available_transitions(
     """Get available transitions for a record."""
     service = WorkflowService(db)
 
-    # Get user groups (simplified - you may want to expand this)
-    user_groups = []
-    if current_user.is_superuser:
-        user_groups = ["admin", "superuser"]
-
     transitions = service.get_available_transitions(
         model_name=model_name,
         res_id=res_id,
         user_id=current_user.id,
-        user_groups=user_groups,
+        user_groups=_user_groups(current_user),
     )
 
     return [AvailableTransition(**t) for t in transitions]
 
 
+@router.post("/state/{model_name}/available", response_model=Dict[int, List[AvailableTransition]])
+def get_available_transitions_many(
+    model_name: str,
+    data: AvailableTransitionsRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> Dict[int, List[AvailableTransition]]:
+    """Get available transitions for a page of records in one call."""
+    service = WorkflowService(db)
+
+    transitions = service.get_available_transitions_many(
+        model_name=model_name,
+        res_ids=data.res_ids,
+        user_id=current_user.id,
+        user_groups=_user_groups(current_user),
+    )
+
+    return {
+        res_id: [AvailableTransition(**t) for t in items]
+        for res_id, items in transitions.items()
+    }
+
+
 @router.get("/state/{model_name}/{res_id}/history", response_model=List[Dict[str, Any]])
 def get_workflow_history(
     model_name: str,
@@ -14,6 +14,8 @@ Features:
 
 import functools
 import logging
+import threading
+import time
 from enum import Enum
 from typing import Any, Callable, Dict, List, Optional, Set, Type, Union
 
@@ -23,6 +25,7 @@ from sqlalchemy.event import listen, remove
 from sqlalchemy.orm import Session
 from sqlalchemy.orm.attributes import InstrumentedAttribute
 
+from app.core.config import settings
 from app.db.base import Base
 from app.models.base import TimestampMixin
 
@@ -100,6 +103,9 @@ class HookRegistry:
     Central registry for all model hooks.
 
     Singleton pattern to ensure a single registry across the application.
+    Holds both static hooks (decorators, HookableMixin) and stored hooks
+    (ModelHookDefinition, tagged with their definition id), and keeps
+    per-hook timing statistics.
     """
 
     _instance: Optional["HookRegistry"] = None
@@ -109,6 +115,10 @@ class HookRegistry:
         if cls._instance is None:
             cls._instance = super().__new__(cls)
             cls._hooks = {}
+            cls._instance._refresher = None
+            cls._instance._lock = threading.RLock()
+            cls._instance._stats = {}
+            cls._instance._stats_lock = threading.Lock()
         return cls._instance
 
     def register(
@@ -118,6 +128,9 @@ class HookRegistry:
         callback: Callable,
         fields: List[str] = None,
         priority: int = 10,
+        name: str = None,
+        definition_id: int = None,
+        module_name: str = None,
     ):
         """
         Register a hook callback.
@@ -128,36 +141,120 @@ class HookRegistry:
             callback: Function to call
             fields: For on_change, which fields trigger the hook
             priority: Execution priority (lower = earlier)
+            name: Name used in timing statistics (defaults to the callback's)
+            definition_id: ModelHookDefinition ID for stored hooks
+            module_name: Module owning a stored hook
         """
         key = f"{model_name}:{event.value}"
+        entry = self._entry(key, callback, fields, priority, name, definition_id, module_name)
 
-        if key not in self._hooks:
-            self._hooks[key] = []
+        # Copy on write: lookups never see a half-updated list
+        with self._lock:
+            hooks = self._hooks.get(key, []) + [entry]
+            hooks.sort(key=lambda h: h["priority"])
+            self._hooks[key] = hooks
 
-        self._hooks[key].append({
+        logger.debug(f"Registered hook: {key}")
+
+    @staticmethod
+    def _entry(
+        key: str,
+        callback: Callable,
+        fields: List[str] = None,
+        priority: int = 10,
+        name: str = None,
+        definition_id: int = None,
+        module_name: str = None,
+    ) -> Dict[str, Any]:
+        return {
             "callback": callback,
             "fields": fields or [],
             "priority": priority,
-        })
-
-        # Sort by priority
-        self._hooks[key].sort(key=lambda h: h["priority"])
-
-        logger.debug(f"Registered hook: {key}")
+            "name": f"{key}:{name or getattr(callback, '__qualname__', repr(callback))}",
+            "definition_id": definition_id,
+            "module_name": module_name,
+        }
 
     def unregister(self, model_name: str, event: HookEvent, callback: Callable = None):
         """Unregister a hook."""
         key = f"{model_name}:{event.value}"
 
-        if key not in self._hooks:
-            return
+        with self._lock:
+            if key not in self._hooks:
+                return
+
+            if callback:
+                self._hooks[key] = [
+                    h for h in self._hooks[key] if h["callback"] != callback
+                ]
+            else:
+                del self._hooks[key]
 
-        if callback:
-            self._hooks[key] = [
-                h for h in self._hooks[key] if h["callback"] != callback
+    def unregister_stored(self, module_name: str = None) -> None:
+        """Unregister stored hooks (of one module if given), keeping static hooks."""
+        with self._lock:
+            self._hooks = self._without_stored(module_name)
+
+    def replace_stored(self, hooks: List[Dict[str, Any]]) -> None:
+        """
+        Replace all stored hooks in one step, keeping static hooks.
+
+        Each item has register()'s arguments. The new map is built aside
+        and swapped in, so lookups see either the old or the new hooks.
+        """
+        with self._lock:
+            new_hooks = self._without_stored()
+            for hook in hooks:
+                key = f"{hook['model_name']}:{hook['event'].value}"
+                new_hooks[key] = new_hooks.get(key, []) + [self._entry(
+                    key,
+                    hook["callback"],
+                    hook.get("fields"),
+                    hook.get("priority", 10),
+                    hook.get("name"),
+                    hook.get("definition_id"),
+                    hook.get("module_name"),
+                )]
+            for entries in new_hooks.values():
+                entries.sort(key=lambda h: h["priority"])
+            self._hooks = new_hooks
+
+    def _without_stored(self, module_name: str = None) -> Dict[str, List[Dict[str, Any]]]:
+        hooks = {}
+        for key, entries in self._hooks.items():
+            kept = [
+                h for h in entries
+                if h["definition_id"] is None
+                or (module_name is not None and h["module_name"] != module_name)
             ]
-        else:
-            del self._hooks[key]
+            if kept:
+                hooks[key] = kept
+        return hooks
+
+    def set_refresher(self, refresher: Optional[Callable[[], None]]) -> None:
+        """Set a callable run before hooks are looked up (stored hook staleness check)."""
+        self._refresher = refresher
+
+    def _get_entries(
+        self,
+        model_name: str,
+        event: HookEvent,
+        changed_fields: List[str] = None,
+    ) -> List[Dict[str, Any]]:
+        if self._refresher is not None:
+            self._refresher()
+
+        key = f"{model_name}:{event.value}"
+        hooks = self._hooks.get(key, [])
+
+        if event == HookEvent.ON_CHANGE and changed_fields:
+            # Filter to hooks that watch the changed fields
+            hooks = [
+                h for h in hooks
+                if not h["fields"] or any(f in h["fields"] for f in changed_fields)
+            ]
+
+        return hooks
 
     def get_hooks(
         self,
@@ -176,17 +273,7 @@ class HookRegistry:
         Returns:
             List of callback functions
         """
-        key = f"{model_name}:{event.value}"
-        hooks = self._hooks.get(key, [])
-
-        if event == HookEvent.ON_CHANGE and changed_fields:
-            # Filter to hooks that watch the changed fields
-            hooks = [
-                h for h in hooks
-                if not h["fields"] or any(f in h["fields"] for f in changed_fields)
-            ]
-
-        return [h["callback"] for h in hooks]
+        return [h["callback"] for h in self._get_entries(model_name, event, changed_fields)]
 
     def execute_hooks(
         self,
@@ -209,25 +296,122 @@ class HookRegistry:
         Returns:
             List of hook results
         """
-        hooks = self.get_hooks(model_name, event, changed_fields)
+        hooks = self._get_entries(model_name, event, changed_fields)
         results = []
 
         ctx = context or {}
         ctx["changed_fields"] = changed_fields or []
 
-        for callback in hooks:
+        for hook in hooks:
+            start = time.perf_counter()
             try:
-                result = callback(record, ctx)
+                result = hook["callback"](record, ctx)
                 results.append(result)
             except Exception as e:
                 logger.error(f"Hook execution failed for {model_name}:{event.value}: {e}")
                 raise
+            finally:
+                self._record_timing(hook["name"], time.perf_counter() - start, 1)
+
+        return results
+
+    def execute_hooks_many(
+        self,
+        model_name: str,
+        event: HookEvent,
+        records: List[Any],
+        context: Dict[str, Any] = None,
+        changed_fields: List[str] = None,
+    ) -> List[List[Any]]:
+        """
+        Execute all hooks for an event over many records.
+
+        Hooks are looked up once; each hook runs over all records before
+        the next one (priority order per record is unchanged).
+
+        Args:
+            model_name: Model name
+            event: Hook event
+            records: The records being operated on
+            context: Additional context shared by all calls
+            changed_fields: For on_change, which fields changed
+
+        Returns:
+            List of hook results per record
+        """
+        hooks = self._get_entries(model_name, event, changed_fields)
+        results: List[List[Any]] = [[] for _ in records]
+        if not hooks or not records:
+            return results
+
+        ctx = context or {}
+        ctx["changed_fields"] = changed_fields or []
+
+        for hook in hooks:
+            callback = hook["callback"]
+            calls = 0
+            start = time.perf_counter()
+            try:
+                for record_results, record in zip(results, records):
+                    calls += 1
+                    record_results.append(callback(record, ctx))
+            except Exception as e:
+                logger.error(f"Hook execution failed for {model_name}:{event.value}: {e}")
+                raise
+            finally:
+                self._record_timing(hook["name"], time.perf_counter() - start, calls)
 
         return results
 
     def clear(self):
         """Clear all registered hooks."""
-        self._hooks = {}
+        with self._lock:
+            self._hooks = {}
+
+    # -------------------------------------------------------------------------
+    # Timing statistics
+    # -------------------------------------------------------------------------
+
+    def _record_timing(self, name: str, elapsed: float, calls: int) -> None:
+        per_call = elapsed / calls if calls else 0.0
+        with self._stats_lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = [0, 0.0, 0.0]  # calls, total, max per call
+            stats[0] += calls
+            stats[1] += elapsed
+            stats[2] = max(stats[2], per_call)
+
+        if per_call * 1000 >= settings.HOOK_SLOW_THRESHOLD_MS:
+            logger.warning(f"Slow hook {name}: {per_call * 1000:.1f} ms per call ({calls} calls)")
+
+    def get_hook_stats(self) -> List[Dict[str, Any]]:
+        """Timing per hook, most total time first."""
+        with self._stats_lock:
+            items = [(name, list(stats)) for name, stats in self._stats.items()]
+
+        report = [
+            {
+                "hook": name,
+                "calls": calls,
+                "total_ms": round(total * 1000, 3),
+                "avg_ms": round(total * 1000 / calls, 3) if calls else 0.0,
+                "max_ms": round(max_call * 1000, 3),
+            }
+            for name, (calls, total, max_call) in items
+        ]
+        report.sort(key=lambda r: r["total_ms"], reverse=True)
+        return report
+
+    def get_slow_hooks(self, threshold_ms: float = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Hooks whose average call time reaches the threshold (HOOK_SLOW_THRESHOLD_MS by default)."""
+        if threshold_ms is None:
+            threshold_ms = settings.HOOK_SLOW_THRESHOLD_MS
+        return [r for r in self.get_hook_stats() if r["avg_ms"] >= threshold_ms][:limit]
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self._stats = {}
 
 
 # Global registry instance
@@ -28,6 +28,7 @@ class ExportType(str, Enum):
     ZIP = "zip"
     DATA_JSON = "data_json"
     DATA_CSV = "data_csv"
+    DATA_NDJSON = "data_ndjson"
 
 
 class ImportStatus(str, Enum):
@@ -91,7 +92,7 @@ class ModuleExport(Base, TimestampMixin):
     export_type = Column(
         String(20),
         nullable=False,
-        comment="Export type: zip, data_json, data_csv"
+        comment="Export type: zip, data_json, data_csv, data_ndjson"
     )
 
     # Content flags
@@ -226,7 +227,7 @@ class ModuleImport(Base, TimestampMixin):
     import_type = Column(
         String(20),
         nullable=False,
-        comment="Import type: zip, data_json"
+        comment="Import type: zip, data_json, data_ndjson"
     )
     conflict_resolution = Column(
         String(20),
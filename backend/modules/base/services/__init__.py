@@ -67,7 +67,7 @@ from .distributed_architecture import (
 )
 
 # Report Service
-from .report_service import ReportService
+from .report_service import ReportService, run_report_execution
 
 # Module Export Service
 from .module_export_service import ModuleExportService
@@ -141,6 +141,7 @@ __all__ = [
     "create_enhanced_distributed_service",
     # Reports
     "ReportService",
+    "run_report_execution",
     # Module Export/Import
     "ModuleExportService",
 ]
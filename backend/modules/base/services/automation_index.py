@@ -0,0 +1,233 @@
+"""
+Automation Rule Index
+
+In-memory index of active record-triggered automation rules, keyed by
+(model, trigger). Rules are snapshotted with compiled domain predicates,
+watched fields and compiled Python code, so writes to models without
+rules never query the database.
+
+The index is built once per process and rebuilt when a rule change is
+committed anywhere in the cluster (see CacheGeneration).
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from types import CodeType
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from app.core.cache import CacheGeneration, invalidate_on_commit
+
+from ..models.server_action import AutomationRule
+
+logger = logging.getLogger(__name__)
+
+# Time-based rules are run by the scheduler, not on record events
+RECORD_TRIGGERS = ("on_create", "on_write", "on_delete")
+
+Predicate = Callable[[Any, Dict[str, Any]], bool]
+
+
+@lru_cache(maxsize=512)
+def compile_code(source: str) -> CodeType:
+    """Compile rule/action Python code once per process."""
+    return compile(source, "<automation>", "exec")
+
+
+def _resolve_variable(var: str, record: Any, context: Dict[str, Any]) -> Any:
+    """Resolve "$record.field" or "$<context key>.attr" (AutomationRule semantics)."""
+    parts = var[1:].split(".")
+
+    if parts[0] == "record":
+        obj = record
+    elif parts[0] in context:
+        obj = context[parts[0]]
+    else:
+        return None
+
+    for part in parts[1:]:
+        obj = getattr(obj, part, None)
+    return obj
+
+
+def _as_list(value: Any) -> list:
+    return value if isinstance(value, list) else [value]
+
+
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "=": lambda a, e: a == e,
+    "==": lambda a, e: a == e,
+    "!=": lambda a, e: a != e,
+    "<>": lambda a, e: a != e,
+    ">": lambda a, e: a > e,
+    ">=": lambda a, e: a >= e,
+    "<": lambda a, e: a < e,
+    "<=": lambda a, e: a <= e,
+    "in": lambda a, e: a in _as_list(e),
+    "not in": lambda a, e: a not in _as_list(e),
+    "like": lambda a, e: e in str(a or ""),
+    "contains": lambda a, e: e in str(a or ""),
+    "is null": lambda a, e: a is None,
+    "is not null": lambda a, e: a is not None,
+}
+
+
+def compile_domain(domain: Optional[List[Dict[str, Any]]]) -> Tuple[Optional[Predicate], FrozenSet[str]]:
+    """
+    Compile a rule domain.
+
+    Returns:
+        (predicate or None when every record matches, fields watched by
+        "changed" conditions)
+    """
+    checks = []
+    watched = set()
+
+    for condition in domain or []:
+        field = condition.get("field")
+        operator = (condition.get("operator") or "=").lower()
+        value = condition.get("value")
+
+        if operator == "changed":
+            watched.add(field)
+            continue
+
+        check = _OPERATORS.get(operator)
+        if check is None:
+            # Unknown operators match (AutomationRule._check_condition)
+            continue
+
+        dynamic = isinstance(value, str) and value.startswith("$")
+        checks.append((field, check, value, dynamic))
+
+    if not checks:
+        return None, frozenset(watched)
+
+    def predicate(record: Any, context: Dict[str, Any]) -> bool:
+        for field, check, value, dynamic in checks:
+            expected = _resolve_variable(value, record, context) if dynamic else value
+            if not check(getattr(record, field, None), expected):
+                return False
+        return True
+
+    return predicate, frozenset(watched)
+
+
+@dataclass(frozen=True)
+class IndexedRule:
+    """Session-independent snapshot of an AutomationRule."""
+
+    id: int
+    code: str
+    model_name: str
+    trigger: str
+    sequence: int
+    predicate: Optional[Predicate]
+    watched_fields: FrozenSet[str]
+    action_id: Optional[int]
+    action_code: Optional[str]
+    python_code: Optional[str]
+
+    @classmethod
+    def from_rule(cls, rule: AutomationRule) -> "IndexedRule":
+        predicate, watched = compile_domain(rule.domain)
+        if rule.python_code:
+            compile_code(rule.python_code)
+        return cls(
+            id=rule.id,
+            code=rule.code,
+            model_name=rule.model_name,
+            trigger=rule.trigger,
+            sequence=rule.sequence or 0,
+            predicate=predicate,
+            watched_fields=watched,
+            action_id=rule.action_id,
+            action_code=rule.action_code,
+            python_code=rule.python_code,
+        )
+
+    def applies_to_changes(self, changed_fields: Any) -> bool:
+        """on_write rules with "changed" conditions need one of those fields to change."""
+        if not self.watched_fields or changed_fields is None:
+            return True
+        return not self.watched_fields.isdisjoint(changed_fields)
+
+    def matches(self, record: Any, context: Dict[str, Any]) -> bool:
+        return self.predicate is None or self.predicate(record, context)
+
+
+class AutomationRuleIndex:
+    """Process-wide index of record-triggered rules by (model, trigger)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rules: Optional[Dict[Tuple[str, str], List[IndexedRule]]] = None
+        self._token: Any = None
+        self.generation = CacheGeneration("automation_rules")
+
+    def get_rules(self, db: Session, model_name: str, trigger: str) -> List[IndexedRule]:
+        """Active rules for a model and trigger, in sequence order."""
+        return self._get_index(db).get((model_name, trigger), [])
+
+    def invalidate(self) -> None:
+        """Drop the index here and in other processes."""
+        self.generation.bump()
+
+    def _get_index(self, db: Session) -> Dict[Tuple[str, str], List[IndexedRule]]:
+        token = self.generation.token()
+        rules = self._rules
+        if rules is not None and self._token == token:
+            return rules
+
+        rows = (
+            db.query(AutomationRule)
+            .filter(
+                AutomationRule.is_active == True,
+                AutomationRule.trigger.in_(RECORD_TRIGGERS),
+            )
+            .order_by(AutomationRule.sequence, AutomationRule.id)
+            .all()
+        )
+
+        rules = {}
+        for row in rows:
+            try:
+                indexed = IndexedRule.from_rule(row)
+            except SyntaxError as e:
+                logger.error(f"Automation rule '{row.code}' has invalid Python code: {e}")
+                continue
+            rules.setdefault((indexed.model_name, indexed.trigger), []).append(indexed)
+
+        with self._lock:
+            self._rules = rules
+            self._token = token
+        logger.debug(f"Automation rule index built: {len(rows)} rules")
+        return rules
+
+
+automation_index = AutomationRuleIndex()
+
+
+# -------------------------------------------------------------------------
+# Invalidation
+# -------------------------------------------------------------------------
+
+# Bookkeeping columns written by rule runs; changing them doesn't affect the index
+_RUNTIME_FIELDS = frozenset({"last_run", "updated_at"})
+
+
+def _definition_changed(rule: AutomationRule) -> bool:
+    changed = {
+        attr.key for attr in sa_inspect(rule).attrs
+        if attr.history.has_changes()
+    }
+    return bool(changed - _RUNTIME_FIELDS)
+
+
+invalidate_on_commit("automation_rules", automation_index.invalidate).watch(
+    AutomationRule, updated=_definition_changed
+)
@@ -3,6 +3,10 @@ Automation Service
 
 Executes server actions and automation rules.
 Provides the engine for record-triggered automation.
+
+Record-triggered rules are dispatched from an in-memory index
+(see automation_index), so writes to models without rules don't
+query the rule table.
 """
 
 import importlib
@@ -15,6 +19,7 @@ import httpx
 from sqlalchemy.orm import Session
 
 from ..models.server_action import ActionType, AutomationRule, ServerAction
+from .automation_index import IndexedRule, automation_index, compile_code
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +37,9 @@ class AutomationService:
         # Trigger on record update
         service.trigger_write(record, changed_fields, user)
 
+        # Bulk writes: rules and actions run once for the whole batch
+        service.trigger_write_many(records, changed_fields, user)
+
         # Execute a server action directly
         service.execute_action(action, records)
     """
@@ -66,12 +74,26 @@ class AutomationService:
             user: Current user
             context: Additional context
 
+        Returns:
+            List of execution results
+        """
+        return self.trigger_create_many([record], user, context)
+
+    def trigger_create_many(
+        self,
+        records: List[Any],
+        user: Any = None,
+        context: Dict[str, Any] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Trigger automation rules for a bulk create of one model's records.
+
         Returns:
             List of execution results
         """
         return self._trigger(
             trigger_type="on_create",
-            records=[record],
+            records=records,
             user=user,
             context=context,
         )
@@ -92,6 +114,27 @@ class AutomationService:
             user: Current user
             context: Additional context
 
+        Returns:
+            List of execution results
+        """
+        return self.trigger_write_many([record], changed_fields, user, context)
+
+    def trigger_write_many(
+        self,
+        records: List[Any],
+        changed_fields: Dict[str, Any],
+        user: Any = None,
+        context: Dict[str, Any] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Trigger automation rules for a bulk update of one model's records.
+
+        Args:
+            records: The updated records
+            changed_fields: Fields changed on every record (dict or names)
+            user: Current user
+            context: Additional context
+
         Returns:
             List of execution results
         """
@@ -100,7 +143,7 @@ class AutomationService:
 
         return self._trigger(
             trigger_type="on_write",
-            records=[record],
+            records=records,
             user=user,
             context=ctx,
         )
@@ -119,12 +162,26 @@ class AutomationService:
             user: Current user
             context: Additional context
 
+        Returns:
+            List of execution results
+        """
+        return self.trigger_delete_many([record], user, context)
+
+    def trigger_delete_many(
+        self,
+        records: List[Any],
+        user: Any = None,
+        context: Dict[str, Any] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Trigger automation rules for a bulk delete of one model's records.
+
         Returns:
             List of execution results
         """
         return self._trigger(
             trigger_type="on_delete",
-            records=[record],
+            records=records,
             user=user,
             context=context,
         )
@@ -180,35 +237,34 @@ class AutomationService:
         model_class = type(records[0])
         model_name = self._get_model_name(model_class)
 
-        # Get matching rules
-        rules = (
-            self.db.query(AutomationRule)
-            .filter(
-                AutomationRule.is_active == True,
-                AutomationRule.model_name == model_name,
-                AutomationRule.trigger == trigger_type,
-            )
-            .order_by(AutomationRule.sequence)
-            .all()
-        )
+        # Get matching rules (from the in-memory index)
+        rules = automation_index.get_rules(self.db, model_name, trigger_type)
+        if not rules:
+            return []
 
         results = []
         ctx = context or {}
         ctx["user"] = user
         ctx["trigger"] = trigger_type
+        changed_fields = ctx.get("changed_fields")
+        actions: Dict[Any, Optional[ServerAction]] = {}
 
         for rule in rules:
+            # Skip on_write rules whose watched fields didn't change
+            if trigger_type == "on_write" and not rule.applies_to_changes(changed_fields):
+                continue
+
             # Filter records by domain
             matching_records = [
                 r for r in records
-                if rule.evaluate_domain(r, ctx)
+                if rule.matches(r, ctx)
             ]
 
             if not matching_records:
                 continue
 
             try:
-                result = self._execute_rule(rule, matching_records, ctx)
+                result = self._execute_rule(rule, matching_records, ctx, actions)
                 results.append(result)
             except Exception as e:
                 logger.error(f"Rule '{rule.code}' execution failed: {e}")
@@ -222,11 +278,12 @@ class AutomationService:
 
     def _execute_rule(
         self,
-        rule: AutomationRule,
+        rule: IndexedRule,
         records: List[Any],
         context: Dict[str, Any],
+        actions: Optional[Dict[Any, Optional[ServerAction]]] = None,
     ) -> Dict[str, Any]:
-        """Execute a single automation rule."""
+        """Execute a single automation rule on all matching records."""
         result = {
             "rule": rule.code,
             "records_count": len(records),
@@ -240,10 +297,15 @@ class AutomationService:
 
         # Or execute linked server action
         elif rule.action_id or rule.action_code:
-            action = self._get_action(rule.action_id, rule.action_code)
+            key = (rule.action_id, rule.action_code)
+            if actions is None or key not in actions:
+                action = self._get_action(rule.action_id, rule.action_code)
+                if actions is not None:
+                    actions[key] = action
+            else:
+                action = actions[key]
             if action:
-                for record in records:
-                    self.execute_action(action, record, context)
+                self.execute_actions(action, records, context)
 
         return result
 
@@ -290,13 +352,13 @@ class AutomationService:
         matching = [r for r in records if rule.evaluate_domain(r, {})]
 
         # Execute action
-        for record in matching:
-            if rule.python_code:
+        if rule.python_code:
+            for record in matching:
                 self._run_python_code(rule.python_code, record, {})
-            elif rule.action_id or rule.action_code:
-                action = self._get_action(rule.action_id, rule.action_code)
-                if action:
-                    self.execute_action(action, record, {})
+        elif matching and (rule.action_id or rule.action_code):
+            action = self._get_action(rule.action_id, rule.action_code)
+            if action:
+                self.execute_actions(action, matching, {})
 
         # Update last run
         rule.last_run = now
@@ -336,6 +398,33 @@ class AutomationService:
 
         return handler(action, record, ctx)
 
+    def execute_actions(
+        self,
+        action: ServerAction,
+        records: List[Any],
+        context: Dict[str, Any] = None,
+    ) -> List[Any]:
+        """
+        Execute a server action on several records.
+
+        Record updates are applied to all records and committed once;
+        other action types run per record.
+
+        Returns:
+            List of per-record action results
+        """
+        if action.action_type == ActionType.UPDATE_RECORD.value:
+            ctx = context or {}
+            ctx["action"] = action
+            ctx["db"] = self.db
+            for record in records:
+                ctx["record"] = record
+                self._apply_update_values(action, record, ctx)
+            self.db.commit()
+            return list(records)
+
+        return [self.execute_action(action, record, context) for record in records]
+
     def _execute_python_code(
         self,
         action: ServerAction,
@@ -365,15 +454,22 @@ class AutomationService:
         context: Dict[str, Any],
     ) -> Any:
         """Execute update record action."""
+        self._apply_update_values(action, record, context)
+        self.db.commit()
+        return record
+
+    def _apply_update_values(
+        self,
+        action: ServerAction,
+        record: Any,
+        context: Dict[str, Any],
+    ) -> None:
         for field, value in (action.update_values or {}).items():
             # Resolve dynamic values
             if isinstance(value, str) and value.startswith("$"):
                 value = self._resolve_variable(value, context)
             setattr(record, field, value)
 
-        self.db.commit()
-        return record
-
     def _execute_create_record(
         self,
         action: ServerAction,
@@ -481,7 +577,7 @@ class AutomationService:
             **context,
         }
 
-        exec(code, exec_context)
+        exec(compile_code(code), exec_context)
         return exec_context.get("result")
 
     def _get_action(
@@ -0,0 +1,261 @@
+"""
+Computed Field Engine
+
+Process-wide state shared by ComputedFieldService instances:
+- Python expressions compiled once into code objects
+- Active definitions held as immutable specs, reloaded only after a
+  ComputedFieldDefinition change is committed anywhere in the cluster
+  (see CacheGeneration)
+- Dependency graph used to recompute only the affected fields and rows
+"""
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from types import CodeType
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import CacheGeneration, invalidate_on_commit
+
+from ..models.computed_field import ComputedFieldDefinition, ComputeType
+
+logger = logging.getLogger(__name__)
+
+# Domain values of the form "$record.<field>" correlate an aggregate with
+# the record being computed, e.g. {"field": "order_id", "value": "$record.id"}
+RECORD_REFERENCE = "$record."
+
+# Names available to Python expressions besides record/self
+EXPRESSION_GLOBALS = {
+    "__builtins__": {},
+    "datetime": datetime,
+    "sum": sum,
+    "len": len,
+    "min": min,
+    "max": max,
+    "abs": abs,
+    "round": round,
+}
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(expression: str) -> CodeType:
+    """Compile a Python expression once per process."""
+    return compile(expression, "<computed field>", "eval")
+
+
+def evaluate_expression(code: CodeType, record: Any) -> Any:
+    """Evaluate a compiled expression against a record."""
+    return eval(code, EXPRESSION_GLOBALS, {"record": record, "self": record})
+
+
+@dataclass(frozen=True)
+class ComputedFieldSpec:
+    """Session-independent snapshot of a ComputedFieldDefinition."""
+
+    name: str
+    model_name: str
+    compute_type: str = ComputeType.PYTHON.value
+    expression: Optional[str] = None
+    depends: Tuple[str, ...] = ()
+    aggregate_function: Optional[str] = None
+    aggregate_field: Optional[str] = None
+    aggregate_model: Optional[str] = None
+    aggregate_domain: Tuple[Dict[str, Any], ...] = ()
+    related_field: Optional[str] = None
+    store: bool = False
+
+    @classmethod
+    def from_definition(cls, definition: ComputedFieldDefinition) -> "ComputedFieldSpec":
+        return cls(
+            name=definition.name,
+            model_name=definition.model_name,
+            compute_type=definition.compute_type or ComputeType.PYTHON.value,
+            expression=definition.expression,
+            depends=tuple(definition.depends or ()),
+            aggregate_function=definition.aggregate_function,
+            aggregate_field=definition.aggregate_field,
+            aggregate_model=definition.aggregate_model,
+            aggregate_domain=tuple(definition.aggregate_domain or ()),
+            related_field=definition.related_field,
+            store=bool(definition.store),
+        )
+
+    @property
+    def correlation(self) -> Optional[Tuple[str, str]]:
+        """(child field, record field) linking aggregated rows to the record."""
+        for condition in self.aggregate_domain:
+            value = condition.get("value")
+            if (
+                condition.get("operator", "=") in ("=", "==")
+                and isinstance(value, str)
+                and value.startswith(RECORD_REFERENCE)
+            ):
+                return condition.get("field"), value[len(RECORD_REFERENCE):]
+        return None
+
+    @property
+    def static_domain(self) -> List[Dict[str, Any]]:
+        """Aggregate domain without record references."""
+        return [
+            c for c in self.aggregate_domain
+            if not (isinstance(c.get("value"), str) and c["value"].startswith(RECORD_REFERENCE))
+        ]
+
+    @property
+    def trigger_fields(self) -> Set[str]:
+        """Fields of the aggregated model whose changes affect this field."""
+        fields = {c.get("field") for c in self.aggregate_domain}
+        if self.aggregate_field:
+            fields.add(self.aggregate_field)
+        fields.discard(None)
+        return fields
+
+
+@dataclass
+class _DefinitionIndex:
+    by_model: Dict[str, List[ComputedFieldSpec]] = field(default_factory=dict)
+    # model -> field -> specs on the same model depending on that field
+    dependents: Dict[str, Dict[str, List[ComputedFieldSpec]]] = field(default_factory=dict)
+    # aggregated model -> aggregate specs computed over it
+    aggregates_over: Dict[str, List[ComputedFieldSpec]] = field(default_factory=dict)
+
+
+class ComputedFieldRegistry:
+    """
+    Process-level cache of active computed field definitions.
+
+    Definitions are loaded in one query on first use and reloaded once a
+    transaction that modified a ComputedFieldDefinition commits, in this
+    or any other process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index: Optional[_DefinitionIndex] = None
+        self._token: Any = None
+        self.generation = CacheGeneration("computed_fields")
+
+    def invalidate(self) -> None:
+        """Drop the definitions here and in other processes."""
+        self.generation.bump()
+
+    def _get_index(self, db: Session) -> _DefinitionIndex:
+        token = self.generation.token()
+        index = self._index
+        if index is not None and self._token == token:
+            return index
+
+        definitions = (
+            db.query(ComputedFieldDefinition)
+            .filter(ComputedFieldDefinition.is_active == True)
+            .order_by(ComputedFieldDefinition.id)
+            .all()
+        )
+        index = self._build_index([ComputedFieldSpec.from_definition(d) for d in definitions])
+
+        # Definitions read before a concurrent invalidation are published
+        # with the older token, so the next lookup reloads them
+        with self._lock:
+            self._index = index
+            self._token = token
+        return index
+
+    @staticmethod
+    def _build_index(specs: Iterable[ComputedFieldSpec]) -> _DefinitionIndex:
+        index = _DefinitionIndex()
+        for spec in specs:
+            index.by_model.setdefault(spec.model_name, []).append(spec)
+            if spec.compute_type == ComputeType.AGGREGATE.value and spec.aggregate_model:
+                index.aggregates_over.setdefault(spec.aggregate_model, []).append(spec)
+
+        for model_name, model_specs in index.by_model.items():
+            index.by_model[model_name] = _order_by_dependencies(model_name, model_specs)
+            dependents: Dict[str, List[ComputedFieldSpec]] = {}
+            for spec in index.by_model[model_name]:
+                for dep in spec.depends:
+                    dependents.setdefault(dep, []).append(spec)
+            index.dependents[model_name] = dependents
+
+        return index
+
+    def get_definitions(self, db: Session, model_name: str) -> List[ComputedFieldSpec]:
+        """Active definitions for a model, dependencies first."""
+        return self._get_index(db).by_model.get(model_name, [])
+
+    def get_definition(self, db: Session, model_name: str, field_name: str) -> Optional[ComputedFieldSpec]:
+        for spec in self.get_definitions(db, model_name):
+            if spec.name == field_name:
+                return spec
+        return None
+
+    def affected_definitions(
+        self,
+        db: Session,
+        model_name: str,
+        changed_fields: Iterable[str],
+    ) -> List[ComputedFieldSpec]:
+        """
+        Definitions on a model affected by changed fields, including
+        definitions depending on other affected computed fields.
+        """
+        index = self._get_index(db)
+        dependents = index.dependents.get(model_name)
+        if not dependents:
+            return []
+
+        affected: Set[str] = set()
+        pending = list(changed_fields)
+        while pending:
+            for spec in dependents.get(pending.pop(), ()):
+                if spec.name not in affected:
+                    affected.add(spec.name)
+                    pending.append(spec.name)
+
+        return [s for s in index.by_model[model_name] if s.name in affected]
+
+    def aggregates_over(self, db: Session, model_name: str) -> List[ComputedFieldSpec]:
+        """Aggregate definitions (on any model) computed over a model's rows."""
+        return self._get_index(db).aggregates_over.get(model_name, [])
+
+
+def _order_by_dependencies(model_name: str, specs: List[ComputedFieldSpec]) -> List[ComputedFieldSpec]:
+    """Order specs so computed fields come after the computed fields they use."""
+    by_name = {s.name: s for s in specs}
+    ordered: List[ComputedFieldSpec] = []
+    state: Dict[str, int] = {}  # 1 = visiting, 2 = done
+
+    def visit(spec: ComputedFieldSpec) -> None:
+        mark = state.get(spec.name)
+        if mark == 2:
+            return
+        if mark == 1:
+            raise ValueError(spec.name)
+        state[spec.name] = 1
+        for dep in spec.depends:
+            if dep in by_name and dep != spec.name:
+                visit(by_name[dep])
+        state[spec.name] = 2
+        ordered.append(spec)
+
+    try:
+        for spec in specs:
+            visit(spec)
+    except ValueError as e:
+        logger.warning(f"Circular computed field dependency on {model_name}.{e}; using definition order")
+        return list(specs)
+    return ordered
+
+
+definition_registry = ComputedFieldRegistry()
+
+
+# -------------------------------------------------------------------------
+# Invalidation
+# -------------------------------------------------------------------------
+
+invalidate_on_commit("computed_fields", definition_registry.invalidate, ComputedFieldDefinition)
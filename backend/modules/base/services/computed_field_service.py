@@ -5,16 +5,17 @@ Manages computed field calculations including:
 - Simple expression evaluation
 - Aggregate calculations (requires DB access)
 - Related field resolution
-- Batch recomputation
+- Set-based batch recomputation (one grouped query per aggregate and batch)
 """
 
 import importlib
 import logging
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Set, Type
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Type
 
-from sqlalchemy import func as sql_func, text
+from sqlalchemy import bindparam, func as sql_func, inspect as sa_inspect, select, text, update
 from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import TextClause
 
 from ..models.computed_field import (
     AggregateFunction,
@@ -22,9 +23,36 @@ from ..models.computed_field import (
     ComputedFieldInfo,
     ComputeType,
 )
+from .computed_field_engine import (
+    ComputedFieldSpec,
+    compile_expression,
+    definition_registry,
+    evaluate_expression,
+)
 
 logger = logging.getLogger(__name__)
 
+# SQL keywords that are forbidden in computed field expressions
+FORBIDDEN_SQL_KEYWORDS = frozenset({
+    "DROP", "DELETE", "UPDATE", "ALTER", "TRUNCATE",
+    "INSERT", "GRANT", "REVOKE", "CREATE", "EXEC",
+})
+
+
+@lru_cache(maxsize=512)
+def _compile_sql_expression(expression: str) -> Optional[TextClause]:
+    """Validate and compile an SQL expression once per process."""
+    # Reject expressions containing dangerous SQL keywords
+    upper_expr = expression.upper()
+    for kw in FORBIDDEN_SQL_KEYWORDS:
+        if kw in upper_expr:
+            logger.error(
+                f"Forbidden keyword '{kw}' in SQL expression, "
+                f"rejecting: {expression[:100]}"
+            )
+            return None
+    return text(expression)
+
 
 class ComputedFieldService:
     """
@@ -45,6 +73,9 @@ class ComputedFieldService:
         # Batch recompute for multiple records
         service.recompute_batch(records, ['total', 'tax_amount'])
 
+        # Recompute stored fields for a whole table without loading it
+        service.recompute_stored('sales.SaleOrder', ['amount_total'])
+
         # Compute aggregate field
         value = service.compute_aggregate(
             function='sum',
@@ -57,7 +88,6 @@ class ComputedFieldService:
     def __init__(self, db: Session):
         self.db = db
         self._model_cache: Dict[str, Type] = {}
-        self._definition_cache: Dict[str, List[ComputedFieldDefinition]] = {}
 
     # -------------------------------------------------------------------------
     # Main Computation Methods
@@ -114,19 +144,81 @@ class ComputedFieldService:
         """
         Recompute fields for a batch of records.
 
+        Aggregates are computed with one grouped query per field for the
+        whole batch instead of one query per record.
+
         Args:
             records: List of records
             fields: Optional list of field names (all if None)
         """
+        by_class: Dict[Type, List[Any]] = {}
         for record in records:
-            if fields:
-                for field_name in fields:
-                    self.compute_field(record, field_name)
-            else:
-                self.compute_all(record)
+            by_class.setdefault(type(record), []).append(record)
+
+        for model_class, group in by_class.items():
+            self._recompute_group(model_class, group, fields)
 
         self.db.flush()
 
+    def recompute_stored(
+        self,
+        model_name: str,
+        fields: List[str] = None,
+        ids: Optional[Iterable[int]] = None,
+        batch_size: int = 1000,
+    ) -> int:
+        """
+        Recompute stored dynamic fields directly in the database.
+
+        Aggregate fields are written with one grouped query and one
+        executemany UPDATE per batch; other fields load each batch of
+        records once.
+
+        Args:
+            model_name: Model whose fields to recompute
+            fields: Optional list of field names (all stored fields if None)
+            ids: Optional record IDs (all records if None)
+            batch_size: Records per batch
+
+        Returns:
+            Number of records processed
+        """
+        model_class = self._get_model_class(model_name)
+        if not model_class:
+            logger.warning(f"Model not found for recompute: {model_name}")
+            return 0
+
+        specs = [
+            spec for spec in definition_registry.get_definitions(self.db, model_name)
+            if spec.store
+            and (not fields or spec.name in fields)
+            and hasattr(model_class, spec.name)
+        ]
+        if not specs:
+            return 0
+
+        aggregate_specs = [s for s in specs if s.compute_type == ComputeType.AGGREGATE.value]
+        record_specs = [s for s in specs if s.compute_type != ComputeType.AGGREGATE.value]
+
+        processed = 0
+        for batch_ids in self._iter_id_batches(model_class, ids, batch_size):
+            for spec in aggregate_specs:
+                self._store_aggregate(model_class, spec, batch_ids)
+
+            if record_specs:
+                records = (
+                    self.db.query(model_class)
+                    .filter(model_class.id.in_(batch_ids))
+                    .populate_existing()
+                    .all()
+                )
+                self._compute_specs(records, record_specs)
+                self.db.flush()
+
+            processed += len(batch_ids)
+
+        return processed
+
     def recompute_dependents(
         self,
         record: Any,
@@ -135,12 +227,18 @@ class ComputedFieldService:
         """
         Recompute all fields that depend on the changed fields.
 
+        Follows the definition dependency graph: computed fields on the
+        record that (transitively) use a changed field, and stored
+        aggregates on other models whose rows include this record. Only
+        the affected parent rows are updated.
+
         Args:
             record: The record
             changed_fields: List of fields that changed
 
         Returns:
-            List of field names that were recomputed
+            List of field names that were recomputed (aggregates on other
+            models as "model.field")
         """
         recomputed = []
 
@@ -154,15 +252,100 @@ class ComputedFieldService:
 
         # Check dynamic definitions
         model_name = self._get_model_name(type(record))
-        definitions = self._get_definitions(model_name)
 
-        for definition in definitions:
-            if any(dep in changed_fields for dep in (definition.depends or [])):
-                self._compute_definition(record, definition)
-                recomputed.append(definition.name)
+        for definition in definition_registry.affected_definitions(self.db, model_name, changed_fields):
+            self._compute_definition(record, definition)
+            recomputed.append(definition.name)
+
+        # Stored aggregates computed over this model
+        changed = set(changed_fields)
+        aggregates = [
+            spec for spec in definition_registry.aggregates_over(self.db, model_name)
+            if spec.store and spec.trigger_fields & changed
+        ]
+        targets = []
+        for spec in aggregates:
+            parent_class = self._get_model_class(spec.model_name)
+            if parent_class and hasattr(parent_class, spec.name):
+                # Read before flushing, which clears the old foreign key value
+                targets.append((spec, parent_class, self._affected_parent_ids(record, parent_class, spec)))
+        if targets:
+            self.db.flush()
+
+        for spec, parent_class, parent_ids in targets:
+            if parent_ids is None:
+                # Uncorrelated aggregate: every parent row shares the value
+                self.recompute_stored(spec.model_name, [spec.name])
+            elif parent_ids:
+                self._store_aggregate(parent_class, spec, parent_ids)
+                # Stored fields on the parent computed from this aggregate
+                followers = [
+                    s.name for s in definition_registry.affected_definitions(
+                        self.db, spec.model_name, [spec.name]
+                    ) if s.store
+                ]
+                if followers:
+                    self.recompute_stored(spec.model_name, followers, ids=parent_ids)
+            else:
+                continue
+
+            recomputed.append(f"{spec.model_name}.{spec.name}")
 
         return recomputed
 
+    def _recompute_group(
+        self,
+        model_class: Type,
+        records: List[Any],
+        fields: Optional[List[str]],
+    ) -> None:
+        """Recompute fields for records of one model class."""
+        mixin_fields: Dict[str, Any] = getattr(model_class, "_computed_fields", None) or {}
+        model_name = self._get_model_name(model_class)
+        specs = [
+            spec for spec in definition_registry.get_definitions(self.db, model_name)
+            if not fields or spec.name in fields
+        ]
+
+        if fields:
+            selected = [f for f in fields if f in mixin_fields]
+            # Mixin fields take precedence over dynamic definitions
+            specs = [s for s in specs if s.name not in mixin_fields]
+        else:
+            selected = list(mixin_fields)
+
+        for field_name in selected:
+            info = mixin_fields[field_name]
+            if getattr(info, "aggregate_function", None) and getattr(info, "aggregate_foreign_key", None):
+                values = self._aggregate_by_key(
+                    self._aggregate_function_name(info.aggregate_function),
+                    info.aggregate_model,
+                    info.aggregate_field,
+                    list(info.aggregate_domain or []),
+                    info.aggregate_foreign_key,
+                    [record.id for record in records],
+                )
+                if values is not None:
+                    for record in records:
+                        setattr(record, field_name, values.get(record.id) or 0)
+            else:
+                for record in records:
+                    record._compute_field(field_name)
+
+        self._compute_specs(records, specs)
+
+    def _compute_specs(self, records: List[Any], specs: List[ComputedFieldSpec]) -> None:
+        """Compute dynamic definitions for records, aggregates set-based."""
+        for spec in specs:
+            if spec.compute_type == ComputeType.AGGREGATE.value:
+                values = self._aggregate_for_records(records, spec)
+                for record, value in zip(records, values):
+                    if value is not None and hasattr(record, spec.name):
+                        setattr(record, spec.name, value)
+            else:
+                for record in records:
+                    self._compute_definition(record, spec)
+
     # -------------------------------------------------------------------------
     # Aggregate Computation
     # -------------------------------------------------------------------------
@@ -244,7 +427,7 @@ class ComputedFieldService:
             })
 
         return self.compute_aggregate(
-            function=info.aggregate_function.value if hasattr(info.aggregate_function, "value") else info.aggregate_function,
+            function=self._aggregate_function_name(info.aggregate_function),
             model=info.aggregate_model,
             field=info.aggregate_field,
             domain=domain,
@@ -257,7 +440,7 @@ class ComputedFieldService:
     def _compute_definition(
         self,
         record: Any,
-        definition: ComputedFieldDefinition,
+        definition: ComputedFieldSpec,
     ) -> Any:
         """Compute a field based on its dynamic definition."""
         value = None
@@ -269,12 +452,7 @@ class ComputedFieldService:
             value = self._compute_sql_expression(record, definition.expression)
 
         elif definition.compute_type == "aggregate":
-            value = self.compute_aggregate(
-                function=definition.aggregate_function,
-                model=definition.aggregate_model,
-                field=definition.aggregate_field,
-                domain=definition.aggregate_domain,
-            )
+            value = self._aggregate_for_records([record], definition)[0]
 
         elif definition.compute_type == "related":
             value = self._compute_related(record, definition.related_field)
@@ -298,30 +476,12 @@ class ComputedFieldService:
         if not expression:
             return None
 
-        context = {
-            "record": record,
-            "self": record,
-            "datetime": datetime,
-            "sum": sum,
-            "len": len,
-            "min": min,
-            "max": max,
-            "abs": abs,
-            "round": round,
-        }
-
         try:
-            return eval(expression, {"__builtins__": {}}, context)
+            return evaluate_expression(compile_expression(expression), record)
         except Exception as e:
             logger.error(f"Error evaluating expression '{expression}': {e}")
             return None
 
-    # SQL keywords that are forbidden in computed field expressions
-    _FORBIDDEN_SQL_KEYWORDS = frozenset({
-        "DROP", "DELETE", "UPDATE", "ALTER", "TRUNCATE",
-        "INSERT", "GRANT", "REVOKE", "CREATE", "EXEC",
-    })
-
     def _compute_sql_expression(
         self,
         record: Any,
@@ -336,18 +496,11 @@ class ComputedFieldService:
         if not expression:
             return None
 
-        # Reject expressions containing dangerous SQL keywords
-        upper_expr = expression.upper()
-        for kw in self._FORBIDDEN_SQL_KEYWORDS:
-            if kw in upper_expr:
-                logger.error(
-                    f"Forbidden keyword '{kw}' in SQL expression, "
-                    f"rejecting: {expression[:100]}"
-                )
-                return None
+        stmt = _compile_sql_expression(expression)
+        if stmt is None:
+            return None
 
         try:
-            stmt = text(expression)
             result = self.db.execute(
                 stmt, {"record_id": record.id}
             ).scalar()
@@ -415,41 +568,220 @@ class ComputedFieldService:
         )
 
         self.db.add(definition)
+        # Committing a definition invalidates the process-wide registry
         self.db.commit()
         self.db.refresh(definition)
 
-        # Clear cache
-        self._definition_cache.pop(model_name, None)
-
         logger.info(f"Created computed field definition: {model_name}.{name}")
         return definition
 
-    def _get_definitions(self, model_name: str) -> List[ComputedFieldDefinition]:
-        """Get all active definitions for a model."""
-        if model_name not in self._definition_cache:
-            definitions = (
-                self.db.query(ComputedFieldDefinition)
-                .filter(
-                    ComputedFieldDefinition.model_name == model_name,
-                    ComputedFieldDefinition.is_active == True,
-                )
-                .all()
-            )
-            self._definition_cache[model_name] = definitions
-
-        return self._definition_cache.get(model_name, [])
+    def _get_definitions(self, model_name: str) -> List[ComputedFieldSpec]:
+        """Get all active definitions for a model, dependencies first."""
+        return definition_registry.get_definitions(self.db, model_name)
 
     def _get_definition(
         self,
         model_name: str,
         field_name: str,
-    ) -> Optional[ComputedFieldDefinition]:
+    ) -> Optional[ComputedFieldSpec]:
         """Get a specific definition by model and field name."""
-        definitions = self._get_definitions(model_name)
-        for d in definitions:
-            if d.name == field_name:
-                return d
-        return None
+        return definition_registry.get_definition(self.db, model_name, field_name)
+
+    # -------------------------------------------------------------------------
+    # Set-based Aggregates
+    # -------------------------------------------------------------------------
+
+    def _aggregate_by_key(
+        self,
+        function: str,
+        model: str,
+        field: str,
+        domain: List[Dict],
+        group_field: str,
+        keys: List[Any],
+    ) -> Optional[Dict[Any, Any]]:
+        """
+        Aggregate a model's rows grouped by one column, for the given keys.
+
+        Returns:
+            {key: aggregate} for keys that have rows, or None if the model
+            or fields cannot be resolved
+        """
+        model_class = self._get_model_class(model)
+        if not model_class:
+            logger.warning(f"Model not found for aggregate: {model}")
+            return None
+
+        column = getattr(model_class, field, None)
+        group_column = getattr(model_class, group_field, None)
+        if column is None or group_column is None:
+            logger.warning(f"Field not found for aggregate: {model}.{field} by {group_field}")
+            return None
+
+        agg_func = self._get_aggregate_func(function, column)
+        if agg_func is None:
+            return None
+
+        keys = [k for k in set(keys) if k is not None]
+        if not keys:
+            return {}
+
+        query = self.db.query(group_column, agg_func).filter(group_column.in_(keys))
+        for condition in domain or []:
+            query = self._apply_condition(query, model_class, condition)
+
+        return dict(query.group_by(group_column).all())
+
+    def _aggregate_for_records(
+        self,
+        records: List[Any],
+        spec: ComputedFieldSpec,
+    ) -> List[Any]:
+        """Aggregate values for records, in order, with one grouped query."""
+        correlation = spec.correlation
+        if correlation is None:
+            value = self.compute_aggregate(
+                function=spec.aggregate_function,
+                model=spec.aggregate_model,
+                field=spec.aggregate_field,
+                domain=list(spec.aggregate_domain),
+            )
+            return [value] * len(records)
+
+        group_field, record_field = correlation
+        keys = [getattr(record, record_field, None) for record in records]
+        values = self._aggregate_by_key(
+            spec.aggregate_function,
+            spec.aggregate_model,
+            spec.aggregate_field,
+            spec.static_domain,
+            group_field,
+            keys,
+        )
+        if values is None:
+            return [None] * len(records)
+        return [values.get(key) or 0 for key in keys]
+
+    def _store_aggregate(
+        self,
+        model_class: Type,
+        spec: ComputedFieldSpec,
+        ids: List[int],
+    ) -> None:
+        """Write a stored aggregate for the given rows in one executemany UPDATE."""
+        table = model_class.__table__
+        target = getattr(model_class, spec.name).property.columns[0]
+
+        correlation = spec.correlation
+        if correlation is None:
+            value = self.compute_aggregate(
+                function=spec.aggregate_function,
+                model=spec.aggregate_model,
+                field=spec.aggregate_field,
+                domain=list(spec.aggregate_domain),
+            )
+            params = [{"_pk": pk, "_value": value} for pk in ids]
+        else:
+            group_field, record_field = correlation
+            if record_field == "id":
+                keys = {pk: pk for pk in ids}
+            else:
+                key_column = getattr(model_class, record_field)
+                keys = dict(
+                    self.db.execute(
+                        select(model_class.id, key_column).where(model_class.id.in_(ids))
+                    ).all()
+                )
+
+            values = self._aggregate_by_key(
+                spec.aggregate_function,
+                spec.aggregate_model,
+                spec.aggregate_field,
+                spec.static_domain,
+                group_field,
+                list(keys.values()),
+            )
+            if values is None:
+                return
+            params = [
+                {"_pk": pk, "_value": values.get(keys.get(pk)) or 0}
+                for pk in ids
+            ]
+
+        if params:
+            stmt = (
+                update(table)
+                .where(table.c.id == bindparam("_pk"))
+                .values({target.name: bindparam("_value")})
+            )
+            self.db.execute(stmt, params)
+
+        # Values were written behind the ORM's back; expire loaded copies
+        mapper = sa_inspect(model_class)
+        for pk in ids:
+            obj = self.db.identity_map.get(mapper.identity_key_from_primary_key([pk]))
+            if obj is not None:
+                self.db.expire(obj, [spec.name])
+
+    def _affected_parent_ids(
+        self,
+        record: Any,
+        parent_class: Type,
+        spec: ComputedFieldSpec,
+    ) -> Optional[List[int]]:
+        """
+        IDs of parent rows whose aggregate includes the record, before or
+        after its change. None when the aggregate is not correlated.
+        """
+        correlation = spec.correlation
+        if correlation is None:
+            return None
+
+        group_field, record_field = correlation
+        keys = {getattr(record, group_field, None)}
+        try:
+            keys.update(sa_inspect(record).attrs[group_field].history.deleted or ())
+        except Exception:
+            pass
+        keys.discard(None)
+        if not keys:
+            return []
+
+        if record_field == "id":
+            return sorted(keys)
+
+        key_column = getattr(parent_class, record_field)
+        return list(
+            self.db.execute(select(parent_class.id).where(key_column.in_(keys))).scalars()
+        )
+
+    def _iter_id_batches(
+        self,
+        model_class: Type,
+        ids: Optional[Iterable[int]],
+        batch_size: int,
+    ) -> Iterator[List[int]]:
+        """Yield record IDs in batches (keyset pagination when ids is None)."""
+        if ids is not None:
+            ordered = sorted(set(ids))
+            for i in range(0, len(ordered), batch_size):
+                yield ordered[i:i + batch_size]
+            return
+
+        last_id = None
+        while True:
+            stmt = select(model_class.id).order_by(model_class.id).limit(batch_size)
+            if last_id is not None:
+                stmt = stmt.where(model_class.id > last_id)
+            batch = list(self.db.execute(stmt).scalars())
+            if not batch:
+                return
+            yield batch
+            last_id = batch[-1]
+
+    @staticmethod
+    def _aggregate_function_name(function: Any) -> str:
+        return function.value if hasattr(function, "value") else function
 
     # -------------------------------------------------------------------------
     # Helper Methods
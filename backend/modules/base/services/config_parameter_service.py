@@ -11,6 +11,7 @@ from typing import Any, Dict, List, Optional
 from sqlalchemy.orm import Session
 
 from ..models.config_parameter import ConfigParameter, ConfigValueType
+from .config_snapshot import ConfigSnapshot, config_cache, has_pending_changes, mark_changed
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +28,7 @@ class ConfigParameterService:
     - Module association for grouping
     - Company-specific configuration
     - Default value loading from manifests
+    - Reads served from cached per-company snapshots (see config_snapshot)
 
     Usage:
         service = ConfigParameterService(db)
@@ -61,7 +63,25 @@ class ConfigParameterService:
         Returns:
             The parameter value (typed) or default
         """
-        return ConfigParameter.get_param(self.db, key, default, company_id)
+        if has_pending_changes(self.db):
+            # Read this session's own uncommitted changes
+            return ConfigParameter.get_param(self.db, key, default, company_id)
+        return config_cache.get(self.db, key, default, company_id)
+
+    def get_snapshot(self, company_id: Optional[int] = None) -> ConfigSnapshot:
+        """
+        Get the immutable, typed parameters visible to a company.
+
+        Lookups on the snapshot don't touch the database; use it for
+        code that reads many parameters or reads them per request.
+
+        Args:
+            company_id: Optional company ID (None for global parameters only)
+
+        Returns:
+            ConfigSnapshot
+        """
+        return config_cache.get_snapshot(self.db, company_id)
 
     def set_param(
         self,
@@ -136,7 +156,9 @@ class ConfigParameterService:
         Returns:
             Dictionary of key -> typed value
         """
-        return ConfigParameter.get_module_params(self.db, module_name, company_id)
+        if has_pending_changes(self.db):
+            return ConfigParameter.get_module_params(self.db, module_name, company_id)
+        return config_cache.get_snapshot(self.db, company_id).get_module(module_name)
 
     def load_defaults_from_manifest(
         self,
@@ -354,6 +376,8 @@ class ConfigParameterService:
             ConfigParameter.module_name == module_name,
             ConfigParameter.is_system == False
         ).delete()
+        if count:
+            mark_changed(self.db)
         logger.info(f"Deleted {count} config parameters for module {module_name}")
         return count
 
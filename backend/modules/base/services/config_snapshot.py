@@ -0,0 +1,142 @@
+"""
+Configuration Snapshots
+
+All configuration parameters loaded in one query and served from
+immutable, typed per-company snapshots:
+
+- Values are converted to their Python type once, at load time
+- A company snapshot holds the global parameters overlaid with that
+  company's own, so a lookup is a single dict access
+- Snapshots are rebuilt after a parameter change is committed anywhere
+  in the cluster (see CacheGeneration)
+"""
+
+import copy
+import logging
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Mapping, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import CacheGeneration, invalidate_on_commit
+
+from ..models.config_parameter import ConfigParameter
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """Immutable typed parameters visible to one company (None = global only)."""
+
+    company_id: Optional[int]
+    values: Mapping[str, Any]
+    modules: Mapping[str, FrozenSet[str]]  # module_name -> keys
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.values.get(key, _MISSING)
+        if value is _MISSING:
+            return default
+        # JSON values are shared between requests; hand out copies
+        return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+
+    def get_module(self, module_name: str) -> Dict[str, Any]:
+        """key -> typed value for the parameters of one module."""
+        return {key: self.get(key) for key in self.modules.get(module_name, ())}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.values
+
+
+class ConfigParameterCache:
+    """Process-wide cache of configuration snapshots by company."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows: Optional[Tuple[Tuple[str, Optional[str], Optional[int], Any], ...]] = None
+        self._snapshots: Dict[Optional[int], ConfigSnapshot] = {}
+        self._token: Any = None
+        self.generation = CacheGeneration("config_parameters")
+
+    def get_snapshot(self, db: Session, company_id: Optional[int] = None) -> ConfigSnapshot:
+        """Snapshot for a company, loading parameters on first use or after a change."""
+        rows, snapshots = self._get_rows(db)
+        snapshot = snapshots.get(company_id)
+        if snapshot is None:
+            snapshot = self._build(rows, company_id)
+            with self._lock:
+                if self._snapshots is snapshots:
+                    snapshots[company_id] = snapshot
+        return snapshot
+
+    def get(self, db: Session, key: str, default: Any = None, company_id: Optional[int] = None) -> Any:
+        return self.get_snapshot(db, company_id).get(key, default)
+
+    def invalidate(self) -> None:
+        """Drop snapshots here and in other processes."""
+        self.generation.bump()
+
+    def _get_rows(self, db: Session):
+        token = self.generation.token()
+        rows, snapshots = self._rows, self._snapshots
+        if rows is not None and self._token == token:
+            return rows, snapshots
+
+        params = db.query(ConfigParameter).all()
+        rows = tuple(
+            (p.key, p.module_name, p.company_id, p.get_typed_value())
+            for p in params
+        )
+        snapshots = {}
+        with self._lock:
+            self._rows = rows
+            self._snapshots = snapshots
+            self._token = token
+        logger.debug(f"Config parameter cache loaded: {len(rows)} parameters")
+        return rows, snapshots
+
+    @staticmethod
+    def _build(rows, company_id: Optional[int]) -> ConfigSnapshot:
+        values: Dict[str, Any] = {}
+        modules: Dict[str, set] = {}
+        # Global parameters first so company-specific ones override them
+        for key, module_name, row_company, value in sorted(rows, key=lambda r: r[2] is not None):
+            if row_company is not None and row_company != company_id:
+                continue
+            values[key] = value
+            if module_name:
+                modules.setdefault(module_name, set()).add(key)
+
+        return ConfigSnapshot(
+            company_id=company_id,
+            values=MappingProxyType(values),
+            modules=MappingProxyType({name: frozenset(keys) for name, keys in modules.items()}),
+        )
+
+
+config_cache = ConfigParameterCache()
+
+
+# -------------------------------------------------------------------------
+# Invalidation
+# -------------------------------------------------------------------------
+
+_invalidation = invalidate_on_commit("config_parameters", config_cache.invalidate, ConfigParameter)
+
+
+def mark_changed(session: Session) -> None:
+    """
+    Rebuild snapshots when the session commits.
+
+    Needed for bulk query updates/deletes, which don't emit mapper events.
+    """
+    _invalidation.mark(session)
+
+
+def has_pending_changes(session: Session) -> bool:
+    """Whether the session changed parameters that aren't committed yet."""
+    return _invalidation.has_pending(session)
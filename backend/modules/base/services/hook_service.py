@@ -5,14 +5,25 @@ Manages model hooks including:
 - Loading stored hook definitions
 - Executing hooks programmatically
 - Managing hook lifecycle
+
+Stored hooks are compiled once and registered in the global hook_registry
+for the whole process; they are reloaded after a definition change is
+committed anywhere in the cluster (see CacheGeneration). Hook lookups only
+compare generations: a commit in this process reloads right away, a change
+made elsewhere is loaded in the background while the current hooks keep
+running.
 """
 
-import importlib
 import logging
+import threading
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Callable, Dict, List, Optional, Type
+from types import CodeType
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Set, Type
+
+from sqlalchemy.orm import Session, object_session
 
-from sqlalchemy.orm import Session
+from app.core.cache import CacheGeneration, CommitInvalidation
 
 from ..models.model_hook import (
     HookEvent,
@@ -24,6 +35,239 @@ from ..models.model_hook import (
 logger = logging.getLogger(__name__)
 
 
+# -------------------------------------------------------------------------
+# Stored hooks
+# -------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class StoredHook:
+    """Session-independent snapshot of a ModelHookDefinition."""
+
+    id: int
+    name: str
+    model_name: str
+    module_name: Optional[str]
+    event: str
+    fields: tuple
+    python_code: Optional[str]
+    method_name: Optional[str]
+    sequence: int
+
+    @classmethod
+    def from_definition(cls, definition: ModelHookDefinition) -> "StoredHook":
+        return cls(
+            id=definition.id,
+            name=definition.name,
+            model_name=definition.model_name,
+            module_name=definition.module_name,
+            event=definition.event,
+            fields=tuple(definition.fields or ()),
+            python_code=definition.python_code,
+            method_name=definition.method_name,
+            sequence=definition.sequence if definition.sequence is not None else 10,
+        )
+
+
+def _code_callback(hook: StoredHook) -> Callable:
+    """Callback running a stored hook's code, compiled once."""
+    code: CodeType = compile(hook.python_code, f"<hook {hook.model_name}.{hook.name}>", "exec")
+
+    def callback(record: Any, context: Dict[str, Any]) -> Any:
+        exec_context = {
+            "record": record,
+            "self": record,
+            "context": context,
+            # The caller's session when given, else the record's own
+            "db": context.get("db") or object_session(record),
+            "datetime": datetime,
+            "logger": logger,
+            "result": None,
+        }
+
+        try:
+            exec(code, exec_context)
+            return exec_context.get("result")
+        except Exception as e:
+            logger.error(f"Hook code execution failed ({hook.name}): {e}")
+            raise
+
+    return callback
+
+
+def _method_callback(hook: StoredHook) -> Callable:
+    """Callback that calls a model method."""
+    method_name = hook.method_name
+
+    def callback(record: Any, context: Dict[str, Any]) -> Any:
+        method = getattr(record, method_name, None)
+        if method and callable(method):
+            return method(context)
+        else:
+            logger.warning(
+                f"Method {method_name} not found on {type(record).__name__}"
+            )
+            return None
+
+    return callback
+
+
+class StoredHookLoader:
+    """
+    Keeps stored hook definitions registered in hook_registry.
+
+    Loading is opt-in (load()); once loaded, hook lookups start a background
+    reload whenever the "model_hooks" generation changed.
+    """
+
+    def __init__(self, registry: HookRegistry):
+        self.registry = registry
+        self.generation = CacheGeneration("model_hooks")
+        self._lock = threading.RLock()
+        self._reloading: Optional[threading.Thread] = None
+        self._token: Any = None
+        # Modules whose hooks are loaded; None = all modules
+        self._modules: Optional[FrozenSet[str]] = None
+        self._loaded = False
+        self.loaded_ids: FrozenSet[int] = frozenset()
+
+    def load(self, db: Session, module_name: str = None) -> int:
+        """Load stored hooks (of all modules, or add one module's)."""
+        with self._lock:
+            if module_name is None:
+                self._modules = None
+            elif self._loaded and self._modules is not None:
+                self._modules = self._modules | {module_name}
+            elif not self._loaded:
+                self._modules = frozenset({module_name})
+            self._loaded = True
+            return self._reload(db, module_name)
+
+    def invalidate(self) -> None:
+        """Reload stored hooks here and in other processes."""
+        self.generation.bump()
+
+    def is_stale(self) -> bool:
+        return self._loaded and self.generation.token() != self._token
+
+    def refresh(self, db: Session = None) -> None:
+        """
+        Reload if definitions changed since the last load.
+
+        With a session the reload happens now; without one (hook lookups)
+        it is started in the background and the current hooks stay in use.
+        """
+        if not self.is_stale():
+            return
+
+        if db is not None:
+            with self._lock:
+                if self.is_stale():
+                    self._reload(db)
+            return
+
+        with self._lock:
+            if self._reloading is not None and self._reloading.is_alive():
+                return
+            self._reloading = threading.Thread(
+                target=self._reload_in_background, name="hook-reload", daemon=True
+            )
+            self._reloading.start()
+
+    def reload_with(self, bind: Any) -> None:
+        """Reload now in a session of its own on bind (after a local commit)."""
+        if not self._loaded:
+            return
+        session = Session(bind=bind)
+        try:
+            with self._lock:
+                self._reload(session)
+        except Exception as e:
+            # Keep running the hooks we have; retried on the next lookup
+            logger.error(f"Failed to reload stored hooks: {e}")
+        finally:
+            session.close()
+
+    def _reload_in_background(self) -> None:
+        from app.db.base import SessionLocal
+
+        session = SessionLocal()
+        try:
+            with self._lock:
+                if self.is_stale():
+                    self._reload(session)
+        except Exception as e:
+            # Keep running the hooks we have; retried on the next lookup
+            logger.error(f"Failed to reload stored hooks: {e}")
+        finally:
+            session.close()
+
+    def _reload(self, db: Session, module_name: str = None) -> int:
+        """Re-register loaded hooks; returns the number registered for module_name (or all)."""
+        token = self.generation.token()
+
+        query = db.query(ModelHookDefinition).filter(ModelHookDefinition.is_active == True)
+        if self._modules is not None:
+            query = query.filter(ModelHookDefinition.module_name.in_(self._modules))
+        hooks = [
+            StoredHook.from_definition(d)
+            for d in query.order_by(ModelHookDefinition.sequence, ModelHookDefinition.id).all()
+        ]
+
+        compiled = []
+        for hook in hooks:
+            try:
+                callback = self._make_callback(hook)
+                if callback is not None:
+                    compiled.append((hook, HookEvent(hook.event), callback))
+            except Exception as e:
+                logger.error(f"Failed to load hook {hook.name}: {e}")
+
+        # Swap stored hooks in one step; static hooks are kept
+        self.registry.replace_stored([
+            {
+                "model_name": hook.model_name,
+                "event": event,
+                "callback": callback,
+                "fields": list(hook.fields),
+                "priority": hook.sequence,
+                "name": hook.name,
+                "definition_id": hook.id,
+                "module_name": hook.module_name,
+            }
+            for hook, event, callback in compiled
+        ])
+
+        self.loaded_ids = frozenset(hook.id for hook, _, _ in compiled)
+        self._token = token
+
+        loaded = sum(1 for hook, _, _ in compiled if module_name is None or hook.module_name == module_name)
+        logger.info(f"Loaded {loaded} hook definitions")
+        return loaded
+
+    @staticmethod
+    def _make_callback(hook: StoredHook) -> Optional[Callable]:
+        if hook.python_code:
+            return _code_callback(hook)
+        if hook.method_name:
+            return _method_callback(hook)
+        logger.warning(f"Hook {hook.name} has no action defined")
+        return None
+
+
+stored_hooks = StoredHookLoader(hook_registry)
+hook_registry.set_refresher(stored_hooks.refresh)
+
+
+def _reload_hooks(session: Session, changed: Set[Any]) -> None:
+    stored_hooks.invalidate()
+    # This process sees its own change before the next lookup
+    stored_hooks.reload_with(session.get_bind())
+
+
+CommitInvalidation("model_hooks", _reload_hooks).watch(ModelHookDefinition)
+
+
 class HookService:
     """
     Service for managing model hooks.
@@ -54,7 +298,6 @@ class HookService:
 
     def __init__(self, db: Session):
         self.db = db
-        self._loaded_definitions: Dict[int, bool] = {}
 
     # -------------------------------------------------------------------------
     # Hook Loading
@@ -62,7 +305,7 @@ class HookService:
 
     def load_stored_hooks(self, module_name: str = None) -> int:
         """
-        Load hook definitions from the database.
+        Load hook definitions from the database into the global registry.
 
         Args:
             module_name: Optional filter by module
@@ -70,33 +313,11 @@ class HookService:
         Returns:
             Number of hooks loaded
         """
-        query = self.db.query(ModelHookDefinition).filter(
-            ModelHookDefinition.is_active == True
-        )
-
-        if module_name:
-            query = query.filter(ModelHookDefinition.module_name == module_name)
-
-        definitions = query.order_by(ModelHookDefinition.sequence).all()
-        loaded = 0
-
-        for definition in definitions:
-            if definition.id in self._loaded_definitions:
-                continue
-
-            try:
-                self._register_definition(definition)
-                self._loaded_definitions[definition.id] = True
-                loaded += 1
-            except Exception as e:
-                logger.error(f"Failed to load hook {definition.name}: {e}")
-
-        logger.info(f"Loaded {loaded} hook definitions")
-        return loaded
+        return stored_hooks.load(self.db, module_name)
 
     def reload_hooks(self, module_name: str = None) -> int:
         """
-        Reload all hooks, clearing existing ones.
+        Reload stored hooks (static hooks are kept).
 
         Args:
             module_name: Optional filter by module
@@ -104,94 +325,7 @@ class HookService:
         Returns:
             Number of hooks loaded
         """
-        # Clear existing loaded definitions
-        if module_name:
-            self._unload_module_hooks(module_name)
-        else:
-            hook_registry.clear()
-            self._loaded_definitions = {}
-
-        return self.load_stored_hooks(module_name)
-
-    def _register_definition(self, definition: ModelHookDefinition):
-        """Register a stored hook definition."""
-        event = HookEvent(definition.event)
-
-        if definition.python_code:
-            callback = self._create_code_callback(definition)
-        elif definition.method_name:
-            callback = self._create_method_callback(definition)
-        else:
-            logger.warning(f"Hook {definition.name} has no action defined")
-            return
-
-        hook_registry.register(
-            model_name=definition.model_name,
-            event=event,
-            callback=callback,
-            fields=definition.fields,
-            priority=definition.sequence,
-        )
-
-    def _create_code_callback(
-        self,
-        definition: ModelHookDefinition,
-    ) -> Callable:
-        """Create a callback that executes Python code."""
-        code = definition.python_code
-
-        def callback(record: Any, context: Dict[str, Any]) -> Any:
-            exec_context = {
-                "record": record,
-                "self": record,
-                "context": context,
-                "db": self.db,
-                "datetime": datetime,
-                "logger": logger,
-                "result": None,
-            }
-
-            try:
-                exec(code, exec_context)
-                return exec_context.get("result")
-            except Exception as e:
-                logger.error(f"Hook code execution failed ({definition.name}): {e}")
-                raise
-
-        return callback
-
-    def _create_method_callback(
-        self,
-        definition: ModelHookDefinition,
-    ) -> Callable:
-        """Create a callback that calls a model method."""
-        method_name = definition.method_name
-
-        def callback(record: Any, context: Dict[str, Any]) -> Any:
-            method = getattr(record, method_name, None)
-            if method and callable(method):
-                return method(context)
-            else:
-                logger.warning(
-                    f"Method {method_name} not found on {type(record).__name__}"
-                )
-                return None
-
-        return callback
-
-    def _unload_module_hooks(self, module_name: str):
-        """Unload all hooks for a module."""
-        definitions = (
-            self.db.query(ModelHookDefinition)
-            .filter(ModelHookDefinition.module_name == module_name)
-            .all()
-        )
-
-        for definition in definitions:
-            if definition.id in self._loaded_definitions:
-                del self._loaded_definitions[definition.id]
-                # Note: We can't easily unregister specific hooks,
-                # so we clear and reload
+        return stored_hooks.load(self.db, module_name)
 
     # -------------------------------------------------------------------------
     # Hook Execution
@@ -218,15 +352,59 @@ class HookService:
         """
         model_name = self._get_model_name(type(record))
         hook_event = HookEvent(event)
+        stored_hooks.refresh(self.db)
 
         return hook_registry.execute_hooks(
             model_name=model_name,
             event=hook_event,
             record=record,
-            context=context,
+            context=self._context(context),
             changed_fields=changed_fields,
         )
 
+    def execute_hooks_many(
+        self,
+        records: List[Any],
+        event: str,
+        context: Dict[str, Any] = None,
+        changed_fields: List[str] = None,
+    ) -> List[List[Any]]:
+        """
+        Execute all hooks for an event over a list of records.
+
+        Records are grouped by model; hooks are looked up once per model.
+
+        Args:
+            records: The records
+            event: Event name (e.g., 'before_create')
+            context: Additional context shared by all calls
+            changed_fields: For on_change, which fields changed
+
+        Returns:
+            List of hook results per record, in input order
+        """
+        hook_event = HookEvent(event)
+        ctx = self._context(context)
+        stored_hooks.refresh(self.db)
+
+        by_model: Dict[str, List[int]] = {}
+        for index, record in enumerate(records):
+            by_model.setdefault(self._get_model_name(type(record)), []).append(index)
+
+        results: List[List[Any]] = [[] for _ in records]
+        for model_name, indexes in by_model.items():
+            model_results = hook_registry.execute_hooks_many(
+                model_name=model_name,
+                event=hook_event,
+                records=[records[i] for i in indexes],
+                context=ctx,
+                changed_fields=changed_fields,
+            )
+            for index, record_results in zip(indexes, model_results):
+                results[index] = record_results
+
+        return results
+
     def execute_onchange(
         self,
         record: Any,
@@ -322,9 +500,8 @@ class HookService:
         self.db.commit()
         self.db.refresh(definition)
 
-        # Register immediately
-        self._register_definition(definition)
-        self._loaded_definitions[definition.id] = True
+        # Register immediately (other workers reload on their next hook run)
+        stored_hooks.load(self.db, definition.module_name)
 
         logger.info(f"Created hook: {model_name}.{name}@{event}")
         return definition
@@ -361,10 +538,7 @@ class HookService:
         self.db.refresh(definition)
 
         # Re-register the hook
-        if definition.id in self._loaded_definitions:
-            del self._loaded_definitions[definition.id]
-            self._register_definition(definition)
-            self._loaded_definitions[definition.id] = True
+        stored_hooks.refresh(self.db)
 
         return definition
 
@@ -390,8 +564,7 @@ class HookService:
         self.db.delete(definition)
         self.db.commit()
 
-        if hook_id in self._loaded_definitions:
-            del self._loaded_definitions[hook_id]
+        stored_hooks.refresh(self.db)
 
         return True
 
@@ -420,10 +593,42 @@ class HookService:
 
         return query.order_by(ModelHookDefinition.sequence).all()
 
+    # -------------------------------------------------------------------------
+    # Timing
+    # -------------------------------------------------------------------------
+
+    def get_hook_stats(self) -> List[Dict[str, Any]]:
+        """
+        Get per-hook timing in this process.
+
+        Returns:
+            List of {hook, calls, total_ms, avg_ms, max_ms}, most total time first
+        """
+        return hook_registry.get_hook_stats()
+
+    def get_slow_hooks(self, threshold_ms: float = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Get hooks whose average call time reaches a threshold.
+
+        Args:
+            threshold_ms: Threshold in milliseconds (HOOK_SLOW_THRESHOLD_MS by default)
+            limit: Maximum entries
+
+        Returns:
+            Slow hooks, most total time first
+        """
+        return hook_registry.get_slow_hooks(threshold_ms, limit)
+
     # -------------------------------------------------------------------------
     # Helper Methods
     # -------------------------------------------------------------------------
 
+    def _context(self, context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Hook context with this service's session available to stored hook code."""
+        context = context if context is not None else {}
+        context.setdefault("db", self.db)
+        return context
+
     def _get_model_name(self, model_class: Type) -> str:
         """Get the full model name."""
         module = model_class.__module__
@@ -3,8 +3,8 @@ Module Export/Import Service
 
 Provides module packaging functionality with:
 - ZIP export with code and optional data
-- Data export to JSON/CSV
-- Import validation and execution
+- Data export to JSON/CSV or streamed, gzip-compressed NDJSON
+- Import validation and batched, idempotent execution
 - Rollback support
 """
 
@@ -18,9 +18,10 @@ import tempfile
 import zipfile
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, IO, List, Optional, Tuple
 import traceback
 
+from sqlalchemy import Table
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
@@ -33,6 +34,7 @@ from ..models.module_export import (
     ConflictResolution,
 )
 from ..models.module import InstalledModule
+from app.db import data_stream
 
 logger = logging.getLogger(__name__)
 
@@ -118,17 +120,14 @@ class ModuleExportService:
                         arcname = file_path.relative_to(module_path.parent)
                         zf.write(file_path, arcname)
 
-                # Add data if requested
+                # Add data if requested (streamed into the archive as NDJSON)
                 if include_data:
-                    data_content, models, counts = self._export_module_data(
-                        module_name,
-                        data_models,
-                    )
-                    exported_models = models
-                    record_counts = counts
-
-                    # Add data file to zip
-                    zf.writestr(f"{module_name}/data/export_data.json", data_content)
+                    named_tables = self._resolve_model_tables(module_name, data_models)
+                    with zf.open(f"{module_name}/data/export_data.ndjson", 'w', force_zip64=True) as raw:
+                        with io.TextIOWrapper(raw, encoding='utf-8') as fh:
+                            exported_models, record_counts = self._write_module_data(
+                                module_name, named_tables, fh, 'ndjson',
+                            )
 
                 # Add export metadata
                 metadata = {
@@ -172,40 +171,54 @@ class ModuleExportService:
         output_format: str = 'json',
         output_path: Optional[str] = None,
         user_id: Optional[int] = None,
+        progress: Optional[data_stream.ProgressCallback] = None,
     ) -> ModuleExport:
         """
-        Export module data to JSON/CSV.
+        Export module data to JSON/CSV or compressed NDJSON.
+
+        Rows are streamed to the output file in chunks, so memory use does
+        not grow with table size.
 
         Args:
             module_name: Module name
             models: Specific models to export
-            output_format: json or csv
+            output_format: json, csv or ndjson (gzip-compressed)
             output_path: Custom output path
             user_id: User performing export
+            progress: Optional callback receiving (table_name, rows_done)
 
         Returns:
             ModuleExport record
         """
-        data_content, exported_models, record_counts = self._export_module_data(
-            module_name,
-            models,
-        )
+        if output_format not in ('json', 'csv', 'ndjson'):
+            raise ValueError(f"Unsupported export format: {output_format}")
+
+        named_tables = self._resolve_model_tables(module_name, models)
 
         # Generate output path
         if not output_path:
             exports_dir = Path(settings.BASE_DIR) / 'exports'
             exports_dir.mkdir(parents=True, exist_ok=True)
             timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-            extension = 'json' if output_format == 'json' else 'csv'
+            extension = {'json': 'json', 'csv': 'csv', 'ndjson': 'ndjson.gz'}[output_format]
             output_path = str(exports_dir / f"{module_name}_data_{timestamp}.{extension}")
 
-        # Write file
-        Path(output_path).write_text(data_content)
+        # Stream rows to the file
+        with data_stream.open_dump(output_path, 'w') as fh:
+            exported_models, record_counts = self._write_module_data(
+                module_name, named_tables, fh, output_format, progress,
+            )
+
+        export_type = {
+            'json': ExportType.DATA_JSON.value,
+            'csv': ExportType.DATA_CSV.value,
+            'ndjson': ExportType.DATA_NDJSON.value,
+        }[output_format]
 
         # Create export record
         export = ModuleExport(
             module_name=module_name,
-            export_type=ExportType.DATA_JSON.value if output_format == 'json' else ExportType.DATA_CSV.value,
+            export_type=export_type,
             includes_data=True,
             includes_code=False,
             includes_static=False,
@@ -224,58 +237,97 @@ class ModuleExportService:
 
         return export
 
-    def _export_module_data(
+    def _resolve_model_tables(
         self,
         module_name: str,
         models: Optional[List[str]] = None,
-    ) -> Tuple[str, List[str], Dict[str, int]]:
-        """Export data from module models."""
+    ) -> List[Tuple[str, Table]]:
+        """Resolve model names (all module models by default) to their tables."""
         from app.core.modules import ModuleRegistry
 
         registry = ModuleRegistry.get_registry()
-        module_info = registry.get_module(module_name)
+        module_info = registry.get(module_name)
 
         if not module_info:
             raise ValueError(f"Module '{module_name}' not registered")
 
-        # Get models to export
-        if models:
-            model_names = models
-        else:
-            # Get all models from module
-            model_names = [m.model_name for m in module_info.models] if module_info.models else []
-
-        data = {}
-        record_counts = {}
-        exported_models = []
+        module_models = {cls.__name__: cls for cls in module_info.models or []}
+        model_names = models or list(module_models)
 
+        named_tables = []
         for model_name in model_names:
-            model_class = registry.get_model_class(model_name)
-            if not model_class:
+            model_class = module_models.get(model_name) or self._get_model_class(model_name)
+            if model_class is None or not hasattr(model_class, '__table__'):
                 logger.warning(f"Model {model_name} not found, skipping")
                 continue
+            named_tables.append((model_name, model_class.__table__))
+
+        return named_tables
 
-            records = self.db.query(model_class).all()
-            model_data = []
+    def _write_module_data(
+        self,
+        module_name: str,
+        named_tables: List[Tuple[str, Table]],
+        fh: IO[str],
+        output_format: str = 'json',
+        progress: Optional[data_stream.ProgressCallback] = None,
+    ) -> Tuple[List[str], Dict[str, int]]:
+        """
+        Stream model rows to an open text file.
 
-            for record in records:
-                record_dict = {}
-                for column in record.__table__.columns:
-                    value = getattr(record, column.name)
-                    # Handle special types
-                    if isinstance(value, datetime):
-                        value = value.isoformat()
-                    elif hasattr(value, '__json__'):
-                        value = value.__json__()
-                    record_dict[column.name] = value
-                model_data.append(record_dict)
+        NDJSON dumps are keyed by table name; JSON output keeps the
+        {model_name: [records]} layout accepted by data imports.
 
-            if model_data:
-                data[model_name] = model_data
-                record_counts[model_name] = len(model_data)
-                exported_models.append(model_name)
+        Returns:
+            (exported model names, record count per model)
+        """
+        connection = self.db.connection()
+
+        if output_format == 'ndjson':
+            table_counts = data_stream.dump_tables(
+                connection,
+                [table for _, table in named_tables],
+                fh,
+                header={
+                    'module_name': module_name,
+                    'export_date': datetime.utcnow().isoformat(),
+                    'fastvue_version': settings.VERSION,
+                },
+                progress=progress,
+            )
+            record_counts = {
+                model_name: table_counts[table.name]
+                for model_name, table in named_tables
+                if table_counts.get(table.name)
+            }
+            return list(record_counts), record_counts
 
-        return json.dumps(data, indent=2, default=str), exported_models, record_counts
+        record_counts = {}
+        fh.write('{')
+        first_model = True
+        for model_name, table in named_tables:
+            columns = [c.name for c in table.columns]
+            count = 0
+            for chunk in data_stream.iter_row_chunks(connection, table):
+                for row in chunk:
+                    if count == 0:
+                        fh.write(('' if first_model else ',') + json.dumps(model_name) + ':[')
+                        first_model = False
+                    else:
+                        fh.write(',')
+                    fh.write(json.dumps(
+                        {col: data_stream.encode_value(v) for col, v in zip(columns, row)},
+                        default=str,
+                    ))
+                    count += 1
+                if progress:
+                    progress(table.name, count)
+            if count:
+                fh.write(']')
+                record_counts[model_name] = count
+        fh.write('}')
+
+        return list(record_counts), record_counts
 
     # ==================== Module Import ====================
 
@@ -301,6 +353,8 @@ class ModuleExportService:
         # Determine import type
         if path.suffix == '.zip':
             import_type = 'zip'
+        elif path.name.endswith(('.ndjson', '.ndjson.gz')):
+            import_type = 'data_ndjson'
         elif path.suffix == '.json':
             import_type = 'data_json'
         else:
@@ -322,6 +376,8 @@ class ModuleExportService:
         try:
             if import_type == 'zip':
                 self._validate_zip_import(import_record)
+            elif import_type == 'data_ndjson':
+                self._validate_ndjson_import(import_record)
             else:
                 self._validate_data_import(import_record)
 
@@ -418,12 +474,8 @@ class ModuleExportService:
                 for model_name, records in data.items():
                     if not isinstance(records, list):
                         errors.append(f"Data for {model_name} must be a list")
-                    else:
-                        # Check if model exists
-                        from app.core.modules import ModuleRegistry
-                        registry = ModuleRegistry.get_registry()
-                        if not registry.get_model_class(model_name):
-                            warnings.append(f"Model {model_name} not found in registry")
+                    elif self._resolve_table(model_name) is None:
+                        warnings.append(f"Model {model_name} not found in registry")
 
         except json.JSONDecodeError as e:
             errors.append(f"Invalid JSON: {e}")
@@ -431,6 +483,35 @@ class ModuleExportService:
         import_record.validation_errors = errors
         import_record.validation_warnings = warnings
 
+    def _validate_ndjson_import(self, import_record: ModuleImport) -> None:
+        """Validate an NDJSON dump by streaming through it once."""
+        errors = []
+        warnings = []
+
+        try:
+            with data_stream.open_dump(import_record.source_file) as fh:
+                header = data_stream.read_header(fh)
+                import_record.module_name = header.get('module_name')
+                import_record.version_check = {
+                    'export_version': header.get('fastvue_version'),
+                    'current_version': settings.VERSION,
+                }
+
+                for line_no, line in enumerate(fh, start=2):
+                    if not line.startswith('{'):
+                        continue  # Row arrays are checked when loading
+                    item = json.loads(line)
+                    if item.get('kind') == 'table' and self._resolve_table(item.get('table', '')) is None:
+                        warnings.append(f"Table {item.get('table')} not found")
+
+        except (OSError, EOFError) as e:
+            errors.append(f"Unreadable data file: {e}")
+        except ValueError as e:
+            errors.append(f"Invalid data file: {e}")
+
+        import_record.validation_errors = errors
+        import_record.validation_warnings = warnings
+
     def import_module(
         self,
         import_id: int,
@@ -479,6 +560,8 @@ class ModuleExportService:
 
         except Exception as e:
             logger.exception(f"Import failed: {e}")
+            # Discard partially imported rows before recording the failure
+            self.db.rollback()
             import_record.fail(str(e), traceback.format_exc())
 
         self.db.commit()
@@ -510,66 +593,36 @@ class ModuleExportService:
         import_record: ModuleImport,
         conflict_resolution: str,
     ) -> None:
-        """Execute data import."""
-        from app.core.modules import ModuleRegistry
-
-        registry = ModuleRegistry.get_registry()
-
-        with open(import_record.source_file, 'r') as f:
-            data = json.load(f)
-
-        imported_records = {}
-        skipped_records = {}
-        updated_records = {}
-
-        for model_name, records in data.items():
-            model_class = registry.get_model_class(model_name)
-            if not model_class:
-                logger.warning(f"Skipping unknown model: {model_name}")
-                skipped_records[model_name] = len(records)
-                continue
-
-            imported = 0
-            skipped = 0
-            updated = 0
-
-            for record_data in records:
-                record_id = record_data.get('id')
-
-                if record_id:
-                    existing = self.db.query(model_class).filter(
-                        model_class.id == record_id
-                    ).first()
-
-                    if existing:
-                        if conflict_resolution == ConflictResolution.SKIP.value:
-                            skipped += 1
-                            continue
-                        elif conflict_resolution == ConflictResolution.ERROR.value:
-                            raise ValueError(f"Record {model_name}:{record_id} already exists")
-                        elif conflict_resolution == ConflictResolution.UPDATE.value:
-                            for key, value in record_data.items():
-                                if key != 'id' and hasattr(existing, key):
-                                    setattr(existing, key, value)
-                            updated += 1
-                            continue
-                        elif conflict_resolution == ConflictResolution.REPLACE.value:
-                            self.db.delete(existing)
-
-                # Create new record
-                new_record = model_class(**record_data)
-                self.db.add(new_record)
-                imported += 1
-
-            imported_records[model_name] = imported
-            skipped_records[model_name] = skipped
-            updated_records[model_name] = updated
+        """Execute data import in batches (NDJSON dumps are streamed)."""
+        if import_record.import_type == 'data_ndjson':
+            with data_stream.open_dump(import_record.source_file) as fh:
+                data_stream.read_header(fh)
+                stats = self._load_batches(data_stream.iter_dump_batches(fh), conflict_resolution)
+        else:
+            with open(import_record.source_file, 'r') as f:
+                data = json.load(f)
+            stats = self._load_batches(data_stream.iter_record_batches(data), conflict_resolution)
 
         self.db.commit()
 
-        import_record.imported_records = imported_records
-        import_record.skipped_records = skipped_records
-        import_record.updated_records = updated_records
+        import_record.imported_records = stats['imported']
+        import_record.skipped_records = stats['skipped']
+        import_record.updated_records = stats['updated']
+
+    def _load_batches(
+        self,
+        batches,
+        conflict_resolution: str,
+        progress: Optional[data_stream.ProgressCallback] = None,
+    ) -> Dict[str, Dict[str, int]]:
+        """Load record batches inside the session's transaction."""
+        return data_stream.load_batches(
+            self.db.connection(),
+            batches,
+            self._resolve_table,
+            conflict_resolution,
+            progress=progress,
+        )
 
     def rollback_import(self, import_id: int) -> ModuleImport:
         """Rollback a completed import."""
@@ -740,70 +793,37 @@ class ModuleExportService:
         """
         Import data directly from a dictionary.
 
+        Records are upserted in batches inside a single transaction.
+
         Args:
             data: Dictionary with model names as keys and record lists as values
             conflict_resolution: How to handle conflicts
 
         Returns:
             Import statistics
-        """
-        from app.core.modules import ModuleRegistry
-
-        registry = ModuleRegistry.get_registry()
 
-        imported_records = {}
-        skipped_records = {}
-        updated_records = {}
-        errors = []
-
-        for model_name, records in data.items():
-            model_class = registry.get_model_class(model_name)
-            if not model_class:
-                errors.append(f"Unknown model: {model_name}")
-                skipped_records[model_name] = len(records)
-                continue
+        Raises:
+            ValueError: If a record exists and conflict_resolution is "error"
+        """
+        errors = [
+            f"Unknown model: {model_name}"
+            for model_name in data
+            if self._resolve_table(model_name) is None
+        ]
 
-            imported = 0
-            skipped = 0
-            updated = 0
-
-            for record_data in records:
-                try:
-                    record_id = record_data.get('id')
-
-                    if record_id:
-                        existing = self.db.query(model_class).filter(
-                            model_class.id == record_id
-                        ).first()
-
-                        if existing:
-                            if conflict_resolution == ConflictResolution.SKIP.value:
-                                skipped += 1
-                                continue
-                            elif conflict_resolution == ConflictResolution.ERROR.value:
-                                raise ValueError(f"Record {model_name}:{record_id} already exists")
-                            elif conflict_resolution == ConflictResolution.UPDATE.value:
-                                for key, value in record_data.items():
-                                    if key != 'id' and hasattr(existing, key):
-                                        setattr(existing, key, value)
-                                updated += 1
-                                continue
-                            elif conflict_resolution == ConflictResolution.REPLACE.value:
-                                self.db.delete(existing)
-
-                    # Create new record
-                    new_record = model_class(**record_data)
-                    self.db.add(new_record)
-                    imported += 1
-
-                except Exception as e:
-                    errors.append(f"Error importing {model_name}: {e}")
-
-            imported_records[model_name] = imported
-            skipped_records[model_name] = skipped
-            updated_records[model_name] = updated
+        try:
+            stats = self._load_batches(
+                data_stream.iter_record_batches(data),
+                conflict_resolution,
+            )
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
 
-        self.db.commit()
+        imported_records = stats['imported']
+        skipped_records = stats['skipped']
+        updated_records = stats['updated']
 
         return {
             'imported': imported_records,
@@ -824,6 +844,32 @@ class ModuleExportService:
             InstalledModule.state == 'installed',
         ).first()
 
+    def _get_model_class(self, model_name: str) -> Optional[type]:
+        """Look up a registered model by full or short class name."""
+        from app.core.modules import ModuleRegistry
+
+        registry = ModuleRegistry.get_registry()
+        model_class = registry.get_model(model_name)
+        if model_class is not None:
+            return model_class
+
+        suffix = f".{model_name}"
+        for full_name, candidate in registry.get_all_models().items():
+            if full_name.endswith(suffix):
+                return candidate
+        return None
+
+    def _resolve_table(self, name: str) -> Optional[Table]:
+        """Resolve a table name (NDJSON dumps) or model name (JSON data) to a Table."""
+        from app.db.base import Base
+
+        table = Base.metadata.tables.get(name)
+        if table is not None:
+            return table
+
+        model_class = self._get_model_class(name)
+        return getattr(model_class, '__table__', None)
+
     def _calculate_file_hash(self, file_path: str) -> str:
         """Calculate SHA-256 hash of file."""
         sha256 = hashlib.sha256()
@@ -8,7 +8,7 @@ Includes schema lifecycle management (table creation, upgrade, deletion).
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Type
+from typing import Any, Callable, Dict, List, Optional, Type
 
 from sqlalchemy import Engine
 from sqlalchemy.orm import Session, DeclarativeBase
@@ -1649,11 +1649,21 @@ export default routes;
         logger.info(f"Dropping schema for module '{name}' ({len(table_names)} tables)")
         return self.migration_engine.uninstall_module_schema(name, table_names, cascade)
 
-    def _backup_module_data(self, name: str, table_names: List[str]) -> Optional[str]:
-        """Backup module data to JSON file."""
-        import json
-        from datetime import datetime
-        from pathlib import Path
+    def _backup_module_data(
+        self,
+        name: str,
+        table_names: List[str],
+        progress: Optional[Callable[[str, int], None]] = None,
+    ) -> Optional[str]:
+        """
+        Backup module data to a gzip-compressed NDJSON file.
+
+        Rows are streamed table by table in chunks, so memory use does not
+        grow with table size.
+        """
+        from sqlalchemy import MetaData, Table
+
+        from app.db.data_stream import dump_tables, open_dump
 
         # Get backend directory (where this code runs from)
         backend_dir = Path(__file__).parent.parent.parent.parent  # modules/base/services -> backend
@@ -1661,58 +1671,98 @@ export default routes;
         backup_dir.mkdir(parents=True, exist_ok=True)
 
         timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        backup_file = backup_dir / f"{name}_{timestamp}.json"
-
-        backup_data = {
-            "module_name": name,
-            "timestamp": timestamp,
-            "tables": {},
-        }
+        backup_file = backup_dir / f"{name}_{timestamp}.ndjson.gz"
 
         try:
-            from sqlalchemy import text
-
+            metadata = MetaData()
             with self.engine.connect() as conn:
-                for table_name in table_names:
-                    if self.schema_inspector.table_exists(table_name):
-                        result = conn.execute(text(f"SELECT * FROM {table_name}"))
-                        rows = [dict(row._mapping) for row in result]
-                        backup_data["tables"][table_name] = {
-                            "row_count": len(rows),
-                            "data": self._serialize_rows(rows),
-                        }
-
-            with open(backup_file, "w") as f:
-                json.dump(backup_data, f, indent=2, default=str)
-
-            logger.info(f"Backed up module '{name}' data to {backup_file}")
+                tables = [
+                    Table(table_name, metadata, autoload_with=conn)
+                    for table_name in table_names
+                    if self.schema_inspector.table_exists(table_name)
+                ]
+                with open_dump(backup_file, "w") as fh:
+                    counts = dump_tables(
+                        conn,
+                        tables,
+                        fh,
+                        header={"module_name": name, "timestamp": timestamp},
+                        progress=progress,
+                    )
+
+            logger.info(
+                f"Backed up module '{name}' data to {backup_file} "
+                f"({sum(counts.values())} rows in {len(counts)} tables)"
+            )
             return str(backup_file)
         except Exception as e:
             logger.error(f"Failed to backup module '{name}' data: {e}")
+            backup_file.unlink(missing_ok=True)
             return None
 
-    def _serialize_rows(self, rows: List[Dict]) -> List[Dict]:
-        """Serialize database rows to JSON-compatible format."""
-        from datetime import datetime, date
-        from decimal import Decimal
-        import uuid
-
-        serialized = []
-        for row in rows:
-            serialized_row = {}
-            for key, value in row.items():
-                if isinstance(value, (datetime, date)):
-                    serialized_row[key] = value.isoformat()
-                elif isinstance(value, Decimal):
-                    serialized_row[key] = float(value)
-                elif isinstance(value, uuid.UUID):
-                    serialized_row[key] = str(value)
-                elif isinstance(value, bytes):
-                    serialized_row[key] = value.decode("utf-8", errors="replace")
-                else:
-                    serialized_row[key] = value
-            serialized.append(serialized_row)
-        return serialized
+    def restore_module_data(
+        self,
+        backup_file: str,
+        conflict_resolution: str = "skip",
+        progress: Optional[Callable[[str, int], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Restore module data from a backup file.
+
+        Accepts NDJSON backups (streamed in batches) and legacy JSON backups.
+        Rows are upserted by primary key, so restoring the same backup twice
+        is a no-op with the default "skip" strategy. Runs in one transaction.
+
+        Args:
+            backup_file: Path to a .ndjson.gz/.ndjson or legacy .json backup
+            conflict_resolution: skip, update, error or replace
+            progress: Optional callback receiving (table_name, rows_done)
+
+        Returns:
+            Dict with module name and imported/skipped/updated counts per table
+        """
+        import json
+
+        from sqlalchemy import MetaData, Table
+
+        from app.db.data_stream import iter_dump_batches, iter_record_batches, load_batches, open_dump, read_header
+
+        path = Path(backup_file)
+        if not path.exists():
+            raise FileNotFoundError(f"Backup file not found: {backup_file}")
+
+        metadata = MetaData()
+
+        with self.engine.begin() as conn:
+            def resolve_table(table_name: str):
+                if not self.schema_inspector.table_exists(table_name):
+                    return None
+                return Table(table_name, metadata, autoload_with=conn)
+
+            if path.name.endswith((".ndjson", ".ndjson.gz")):
+                with open_dump(path) as fh:
+                    header = read_header(fh)
+                    stats = load_batches(
+                        conn, iter_dump_batches(fh), resolve_table,
+                        conflict_resolution, progress=progress,
+                    )
+            else:
+                with open(path) as f:
+                    header = json.load(f)
+                data = {
+                    table_name: table_data.get("data", [])
+                    for table_name, table_data in header.pop("tables", {}).items()
+                }
+                stats = load_batches(
+                    conn, iter_record_batches(data), resolve_table,
+                    conflict_resolution, progress=progress,
+                )
+
+        logger.info(
+            f"Restored {sum(stats['imported'].values())} rows for module "
+            f"'{header.get('module_name')}' from {path}"
+        )
+        return {"module_name": header.get("module_name"), **stats}
 
     # -------------------------------------------------------------------------
     # Schema Query Methods (for API)
@@ -0,0 +1,379 @@
+"""
+Record Rule Engine
+
+Process-wide state shared by RecordRuleService instances:
+- Active record rules held as immutable snapshots, loaded in one query
+  and reloaded only after a rule change is committed anywhere in the
+  cluster (see CacheGeneration)
+- Rule domains compiled once into SQLAlchemy criteria per
+  (model, operation, role set); "$user.*", "$now" and "$today" values
+  become bind parameters filled in per request
+- Rule domains compiled once into Python predicates for in-memory checks
+"""
+
+import fnmatch
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple, Type
+
+from sqlalchemy import and_, bindparam
+from sqlalchemy.orm import Session
+
+from app.core.cache import CacheGeneration, invalidate_on_commit
+
+from ..models.record_rule import RecordRule
+
+logger = logging.getLogger(__name__)
+
+OPERATIONS = ("read", "write", "create", "delete")
+
+Predicate = Callable[[Any, Dict[str, Any]], bool]
+
+
+def _as_list(value: Any) -> list:
+    return value if isinstance(value, list) else [value]
+
+
+def _is_variable(value: Any) -> bool:
+    return isinstance(value, str) and value.startswith("$")
+
+
+def resolve_variable(var: str, context: Dict[str, Any]) -> Any:
+    """Resolve a variable like $user.current_company_id (RecordRule semantics)."""
+    parts = var[1:].split(".")
+
+    obj = context.get(parts[0])
+    for part in parts[1:]:
+        if obj is None:
+            return None
+        obj = getattr(obj, part, None)
+    return obj
+
+
+def rule_context(user: Any, record: Any = None) -> Dict[str, Any]:
+    """Variables available to rule domains."""
+    return {
+        "user": user,
+        "now": datetime.utcnow(),
+        "today": date.today(),
+        "record": record,
+    }
+
+
+# -------------------------------------------------------------------------
+# Python predicates (single record checks)
+# -------------------------------------------------------------------------
+
+def _like(pattern: Any, case_sensitive: bool) -> Callable[[Any], bool]:
+    pattern = str(pattern or "").replace("%", "*").replace("_", "?")
+    if case_sensitive:
+        return lambda actual: fnmatch.fnmatchcase(str(actual or ""), pattern)
+    pattern = pattern.lower()
+    return lambda actual: fnmatch.fnmatchcase(str(actual or "").lower(), pattern)
+
+
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "=": lambda a, e: a == e,
+    "==": lambda a, e: a == e,
+    "!=": lambda a, e: a != e,
+    "<>": lambda a, e: a != e,
+    ">": lambda a, e: a > e,
+    ">=": lambda a, e: a >= e,
+    "<": lambda a, e: a < e,
+    "<=": lambda a, e: a <= e,
+    "in": lambda a, e: a in _as_list(e),
+    "not in": lambda a, e: a not in _as_list(e),
+    "like": lambda a, e: _like(e, True)(a),
+    "ilike": lambda a, e: _like(e, False)(a),
+    "is null": lambda a, e: a is None,
+    "is not null": lambda a, e: a is not None,
+}
+
+
+def compile_predicate(domain: Tuple[Dict[str, Any], ...]) -> Optional[Predicate]:
+    """
+    Compile a rule domain into ``predicate(record, context) -> bool``.
+
+    Returns None when every record matches. A record missing a domain
+    field never matches; unknown operators are ignored.
+    """
+    checks = []
+    for condition in domain:
+        operator = (condition.get("operator") or "=").lower()
+        compare = _OPERATORS.get(operator)
+        if compare is None:
+            continue
+
+        value = condition.get("value")
+        if _is_variable(value):
+            checks.append((condition.get("field"), compare, value, True))
+        elif operator in ("like", "ilike"):
+            matcher = _like(value, operator == "like")
+            checks.append((condition.get("field"), lambda a, e, m=matcher: m(a), None, False))
+        else:
+            checks.append((condition.get("field"), compare, value, False))
+
+    if not checks:
+        return None
+
+    def predicate(record: Any, context: Dict[str, Any]) -> bool:
+        for field, compare, value, dynamic in checks:
+            if not hasattr(record, field):
+                return False
+            expected = resolve_variable(value, context) if dynamic else value
+            if not compare(getattr(record, field), expected):
+                return False
+        return True
+
+    return predicate
+
+
+# -------------------------------------------------------------------------
+# SQL criteria (queries and batch checks)
+# -------------------------------------------------------------------------
+
+_PARAM_CHARS = re.compile(r"\W")
+
+
+def _column_criterion(column: Any, operator: str, value: Any) -> Any:
+    """Criterion for a column/operator pair; value may be a bind parameter."""
+    if operator in ("=", "=="):
+        return column == value
+    if operator in ("!=", "<>"):
+        return column != value
+    if operator == ">":
+        return column > value
+    if operator == ">=":
+        return column >= value
+    if operator == "<":
+        return column < value
+    if operator == "<=":
+        return column <= value
+    if operator == "in":
+        return column.in_(value)
+    if operator == "not in":
+        return ~column.in_(value)
+    if operator == "like":
+        return column.like(value)
+    if operator == "ilike":
+        return column.ilike(value)
+    if operator == "is null":
+        return column.is_(None)
+    if operator == "is not null":
+        return column.isnot(None)
+    return None
+
+
+_SQL_OPERATORS = frozenset({
+    "=", "==", "!=", "<>", ">", ">=", "<", "<=", "in", "not in",
+    "like", "ilike", "is null", "is not null",
+})
+
+
+class CompiledCriteria:
+    """
+    SQLAlchemy criteria for the rules one model is subject to (AND-ed).
+
+    Variable values ("$user.current_company_id", ...) are bind parameters,
+    so the clause is built once and reused across users and requests.
+    "=" / "!=" against a NULL variable must render IS [NOT] NULL, so one
+    clause is kept per combination of NULL variables (usually just one).
+    """
+
+    def __init__(self, rules: List["RuleSnapshot"], model_class: Type):
+        self._clauses: Dict[FrozenSet[str], Any] = {}
+        self._conditions: List[Tuple[Any, str, Any, Optional[str]]] = []
+        variables = []
+
+        for rule in rules:
+            for index, condition in enumerate(rule.domain):
+                field = condition.get("field")
+                if not field or not hasattr(model_class, field):
+                    logger.warning(f"Field '{field}' not found on {model_class.__name__} (rule '{rule.name}')")
+                    continue
+
+                operator = (condition.get("operator") or "=").lower()
+                if operator not in _SQL_OPERATORS:
+                    logger.warning(f"Unknown operator: {operator}")
+                    continue
+
+                value = condition.get("value")
+                expanding = operator in ("in", "not in")
+                name = None
+                if _is_variable(value):
+                    name = _PARAM_CHARS.sub("_", f"rr_{rule.id}_{index}_{value[1:]}")
+                    variables.append((name, value, expanding))
+                    value = bindparam(name, expanding=expanding)
+                elif expanding:
+                    value = _as_list(value)
+
+                self._conditions.append((getattr(model_class, field), operator, value, name))
+
+        self.variables: Tuple[Tuple[str, str, bool], ...] = tuple(variables)
+
+    @property
+    def empty(self) -> bool:
+        """True when no condition applies (e.g. rules on unknown fields only)."""
+        return not self._conditions
+
+    def bind(self, user: Any) -> Tuple[Any, Dict[str, Any]]:
+        """The clause and its bind parameter values for a user."""
+        context = rule_context(user) if self.variables else {}
+        params = {}
+        for name, variable, expanding in self.variables:
+            value = resolve_variable(variable, context)
+            params[name] = _as_list(value) if expanding else value
+
+        nulls = frozenset(name for name, value in params.items() if value is None)
+        clause = self._clauses.get(nulls)
+        if clause is None:
+            clause = self._build(nulls)
+            self._clauses[nulls] = clause
+        return clause, {k: v for k, v in params.items() if k not in nulls}
+
+    def _build(self, nulls: FrozenSet[str]) -> Any:
+        filters = []
+        for column, operator, value, name in self._conditions:
+            if name in nulls:
+                # Same SQL the rule produces when compared with a literal None
+                value = None
+            filters.append(_column_criterion(column, operator, value))
+        return and_(*filters)
+
+
+# -------------------------------------------------------------------------
+# Rule cache
+# -------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class RuleSnapshot:
+    """Session-independent snapshot of an active RecordRule."""
+
+    id: int
+    name: str
+    model_name: str
+    sequence: int
+    operations: FrozenSet[str]
+    role_id: Optional[int]
+    is_superuser_bypass: bool
+    domain: Tuple[Dict[str, Any], ...]
+    predicate: Optional[Predicate]
+
+    @classmethod
+    def from_rule(cls, rule: RecordRule) -> "RuleSnapshot":
+        domain = tuple(rule.domain or ())
+        return cls(
+            id=rule.id,
+            name=rule.name,
+            model_name=rule.model_name,
+            sequence=rule.sequence or 0,
+            operations=frozenset(op for op in OPERATIONS if rule.applies_to_operation(op)),
+            role_id=rule.role_id,
+            is_superuser_bypass=bool(rule.is_superuser_bypass),
+            domain=domain,
+            predicate=compile_predicate(domain),
+        )
+
+    def matches(self, record: Any, context: Dict[str, Any]) -> bool:
+        return self.predicate is None or self.predicate(record, context)
+
+
+# Criteria cache key: (model class, operation, role ids of role-restricted rules that apply)
+_CriteriaKey = Tuple[Type, str, FrozenSet[int]]
+
+
+class RecordRuleCache:
+    """Process-wide cache of active record rules and their compiled criteria."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rules: Optional[Dict[str, List[RuleSnapshot]]] = None
+        self._criteria: Dict[_CriteriaKey, Optional[CompiledCriteria]] = {}
+        self._token: Any = None
+        self.generation = CacheGeneration("record_rules")
+
+    def invalidate(self) -> None:
+        """Drop cached rules here and in other processes."""
+        self.generation.bump()
+
+    def get_rules(
+        self,
+        db: Session,
+        model_name: str,
+        operation: str,
+        role_ids: Optional[FrozenSet[int]] = None,
+    ) -> List[RuleSnapshot]:
+        """
+        Active rules for a model and operation, in sequence order.
+
+        Role-restricted rules are kept only if their role is in ``role_ids``
+        (all are kept when ``role_ids`` is None).
+        """
+        operation = operation.lower()
+        return [
+            rule for rule in self._get_rules(db).get(model_name, ())
+            if operation in rule.operations
+            and (not rule.role_id or role_ids is None or rule.role_id in role_ids)
+        ]
+
+    def get_criteria(
+        self,
+        db: Session,
+        model_class: Type,
+        model_name: str,
+        operation: str,
+        role_ids: Optional[FrozenSet[int]] = None,
+    ) -> Optional[CompiledCriteria]:
+        """Compiled criteria for the rules a user with ``role_ids`` is subject to."""
+        rules = self.get_rules(db, model_name, operation, role_ids)
+        if not rules:
+            return None
+
+        key = (model_class, operation.lower(), frozenset(r.role_id for r in rules if r.role_id))
+        criteria_map = self._criteria
+        if key in criteria_map:
+            return criteria_map[key]
+
+        criteria = CompiledCriteria(rules, model_class)
+        if criteria.empty:
+            criteria = None
+        with self._lock:
+            if self._criteria is criteria_map:
+                criteria_map[key] = criteria
+        return criteria
+
+    def _get_rules(self, db: Session) -> Dict[str, List[RuleSnapshot]]:
+        token = self.generation.token()
+        rules = self._rules
+        if rules is not None and self._token == token:
+            return rules
+
+        rows = (
+            db.query(RecordRule)
+            .filter(RecordRule.is_active == True)
+            .order_by(RecordRule.sequence, RecordRule.id)
+            .all()
+        )
+        rules = {}
+        for row in rows:
+            rules.setdefault(row.model_name, []).append(RuleSnapshot.from_rule(row))
+
+        with self._lock:
+            self._rules = rules
+            self._criteria = {}
+            self._token = token
+        logger.debug(f"Record rule cache built: {len(rows)} rules")
+        return rules
+
+
+rule_cache = RecordRuleCache()
+
+
+# -------------------------------------------------------------------------
+# Invalidation
+# -------------------------------------------------------------------------
+
+invalidate_on_commit("record_rules", rule_cache.invalidate, RecordRule)
@@ -6,32 +6,39 @@ Similar to Odoo's ir.rule functionality.
 """
 
 import logging
-from typing import Any, Dict, List, Optional, Type, TypeVar
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple, Type, TypeVar
 
-from sqlalchemy import and_, or_
+from sqlalchemy import inspect, select
 from sqlalchemy.orm import Query, Session
 
 from app.models.user import User
 
-from ..models.record_rule import RecordRule, RuleOperation, RuleScope
+from ..models.record_rule import RecordRule
+from .record_rule_engine import rule_cache, rule_context
 
 logger = logging.getLogger(__name__)
 
 T = TypeVar("T")
 
+# Primary keys per IN (...) list in check_access_many
+CHECK_BATCH_SIZE = 500
+
 
 class RecordRuleService:
     """
     Service for applying record-level security rules.
 
+    Active rules and their compiled filters are cached per process (see
+    record_rule_engine), so applying rules doesn't query the rules table.
+
     Usage:
         service = RecordRuleService(db)
         query = service.apply_rules(query, MyModel, user, "read")
+        allowed = service.check_access_many(records, user, "write")
     """
 
     def __init__(self, db: Session):
         self.db = db
-        self._rules_cache: Dict[str, List[RecordRule]] = {}
 
     def get_rules_for_model(
         self,
@@ -50,33 +57,17 @@ class RecordRuleService:
         Returns:
             List of applicable RecordRule objects
         """
-        cache_key = f"{model_name}:{operation}"
+        rules = rule_cache.get_rules(self.db, model_name, operation, self._role_ids(user))
+        if not rules:
+            return []
 
-        # Query rules
-        query = (
+        records = (
             self.db.query(RecordRule)
-            .filter(RecordRule.model_name == model_name)
-            .filter(RecordRule.is_active == True)
-            .order_by(RecordRule.sequence)
+            .filter(RecordRule.id.in_([r.id for r in rules]))
+            .order_by(RecordRule.sequence, RecordRule.id)
+            .all()
         )
-
-        rules = query.all()
-
-        # Filter by operation
-        applicable = []
-        for rule in rules:
-            if not rule.applies_to_operation(operation):
-                continue
-
-            # Check role restriction
-            if rule.role_id and user:
-                user_role_ids = [ucr.role_id for ucr in user.company_roles]
-                if rule.role_id not in user_role_ids:
-                    continue
-
-            applicable.append(rule)
-
-        return applicable
+        return records
 
     def apply_rules(
         self,
@@ -101,26 +92,14 @@ class RecordRuleService:
         if user.is_superuser:
             return query
 
-        # Get model name
-        model_name = self._get_model_name(model_class)
-
-        # Get applicable rules
-        rules = self.get_rules_for_model(model_name, operation, user)
-
-        if not rules:
+        bound = self._bind_criteria(model_class, user, operation)
+        if bound is None:
             return query
 
-        # Build filters from rules
-        filters = []
-        for rule in rules:
-            rule_filter = self._build_filter(rule, model_class, user)
-            if rule_filter is not None:
-                filters.append(rule_filter)
-
-        # Apply filters (AND logic between rules)
-        if filters:
-            query = query.filter(and_(*filters))
-
+        clause, params = bound
+        query = query.filter(clause)
+        if params:
+            query = query.params(**params)
         return query
 
     def check_access(
@@ -132,6 +111,9 @@ class RecordRuleService:
         """
         Check if a user has access to a specific record.
 
+        Evaluated in Python, so it also works for records that aren't
+        persisted yet (e.g. before create).
+
         Args:
             record: The record to check access for
             user: The current user
@@ -144,23 +126,98 @@ class RecordRuleService:
             return True
 
         model_name = self._get_model_name(type(record))
-        rules = self.get_rules_for_model(model_name, operation, user)
+        rules = rule_cache.get_rules(self.db, model_name, operation, self._role_ids(user))
 
         if not rules:
             return True  # No rules = full access
 
         # All rules must pass
+        context = rule_context(user, record)
         for rule in rules:
             if rule.is_superuser_bypass and user.is_superuser:
                 continue
 
-            conditions = rule.evaluate_domain(user, record)
-            if not self._check_conditions(record, conditions):
+            if not rule.matches(record, context):
                 logger.debug(f"Access denied by rule '{rule.name}' for {model_name}")
                 return False
 
         return True
 
+    def check_access_many(
+        self,
+        records: Sequence[Any],
+        user: User,
+        operation: str,
+    ) -> Dict[Any, bool]:
+        """
+        Check access to a page of persisted records in one query per model.
+
+        Rules are evaluated by the database against the stored rows
+        (pending changes are flushed first by autoflush). Records without
+        a primary key fall back to check_access.
+
+        Args:
+            records: The records to check
+            user: The current user
+            operation: The operation type
+
+        Returns:
+            Mapping of primary key (or the record itself when it has none)
+            to whether access is allowed
+        """
+        results: Dict[Any, bool] = {}
+        by_class: Dict[Type, List[Any]] = {}
+
+        for record in records:
+            identity = inspect(record).identity
+            if identity is None or len(identity) != 1:
+                results[record] = self.check_access(record, user, operation)
+            else:
+                by_class.setdefault(type(record), []).append(identity[0])
+
+        for model_class, ids in by_class.items():
+            if user.is_superuser:
+                results.update(dict.fromkeys(ids, True))
+                continue
+
+            bound = self._bind_criteria(model_class, user, operation)
+            if bound is None:
+                results.update(dict.fromkeys(ids, True))
+                continue
+
+            clause, params = bound
+            pk = inspect(model_class).primary_key[0]
+            allowed = set()
+            for start in range(0, len(ids), CHECK_BATCH_SIZE):
+                chunk = ids[start:start + CHECK_BATCH_SIZE]
+                stmt = select(pk).where(pk.in_(chunk), clause)
+                allowed.update(self.db.execute(stmt, params).scalars())
+
+            for record_id in ids:
+                results[record_id] = record_id in allowed
+
+        return results
+
+    def _bind_criteria(self, model_class: Type, user: User, operation: str) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        """Cached rule criteria for a model, bound to the user's values."""
+        criteria = rule_cache.get_criteria(
+            self.db,
+            model_class,
+            self._get_model_name(model_class),
+            operation,
+            self._role_ids(user),
+        )
+        if criteria is None:
+            return None
+        return criteria.bind(user)
+
+    @staticmethod
+    def _role_ids(user: Optional[User]) -> Optional[FrozenSet[int]]:
+        """Roles used to select role-restricted rules (None = no filtering)."""
+        if user is None:
+            return None
+        return frozenset(ucr.role_id for ucr in user.company_roles)
+
     def _get_model_name(self, model_class: Type) -> str:
         """Get the full model name for a class."""
         module = model_class.__module__
@@ -173,111 +230,6 @@ class RecordRuleService:
 
         return model_class.__name__
 
-    def _build_filter(
-        self,
-        rule: RecordRule,
-        model_class: Type,
-        user: User,
-    ) -> Any:
-        """Build a SQLAlchemy filter from a rule."""
-        conditions = rule.evaluate_domain(user)
-
-        filters = []
-        for field, cond in conditions.items():
-            if not hasattr(model_class, field):
-                logger.warning(f"Field '{field}' not found on {model_class.__name__}")
-                continue
-
-            column = getattr(model_class, field)
-            operator = cond.get("operator", "=")
-            value = cond.get("value")
-
-            filter_expr = self._build_operator_filter(column, operator, value)
-            if filter_expr is not None:
-                filters.append(filter_expr)
-
-        if not filters:
-            return None
-
-        return and_(*filters)
-
-    def _build_operator_filter(self, column: Any, operator: str, value: Any) -> Any:
-        """Build a filter expression for a specific operator."""
-        operator = operator.lower()
-
-        if operator == "=" or operator == "==":
-            return column == value
-        elif operator == "!=" or operator == "<>":
-            return column != value
-        elif operator == ">":
-            return column > value
-        elif operator == ">=":
-            return column >= value
-        elif operator == "<":
-            return column < value
-        elif operator == "<=":
-            return column <= value
-        elif operator == "in":
-            return column.in_(value if isinstance(value, list) else [value])
-        elif operator == "not in":
-            return ~column.in_(value if isinstance(value, list) else [value])
-        elif operator == "like":
-            return column.like(value)
-        elif operator == "ilike":
-            return column.ilike(value)
-        elif operator == "is null":
-            return column.is_(None)
-        elif operator == "is not null":
-            return column.isnot(None)
-        else:
-            logger.warning(f"Unknown operator: {operator}")
-            return None
-
-    def _check_conditions(self, record: Any, conditions: Dict[str, Any]) -> bool:
-        """Check if a record matches all conditions."""
-        for field, cond in conditions.items():
-            if not hasattr(record, field):
-                return False
-
-            record_value = getattr(record, field)
-            operator = cond.get("operator", "=")
-            expected = cond.get("value")
-
-            if not self._check_operator(record_value, operator, expected):
-                return False
-
-        return True
-
-    def _check_operator(self, actual: Any, operator: str, expected: Any) -> bool:
-        """Check if a value matches an operator condition."""
-        operator = operator.lower()
-
-        if operator == "=" or operator == "==":
-            return actual == expected
-        elif operator == "!=" or operator == "<>":
-            return actual != expected
-        elif operator == ">":
-            return actual > expected
-        elif operator == ">=":
-            return actual >= expected
-        elif operator == "<":
-            return actual < expected
-        elif operator == "<=":
-            return actual <= expected
-        elif operator == "in":
-            return actual in (expected if isinstance(expected, list) else [expected])
-        elif operator == "not in":
-            return actual not in (expected if isinstance(expected, list) else [expected])
-        elif operator == "like":
-            import fnmatch
-            return fnmatch.fnmatch(str(actual or ""), expected.replace("%", "*"))
-        elif operator == "is null":
-            return actual is None
-        elif operator == "is not null":
-            return actual is not None
-        else:
-            return True
-
 
 def get_record_rule_service(db: Session) -> RecordRuleService:
     """Factory function for RecordRuleService."""
@@ -11,23 +11,39 @@ Supports multiple remote module sources:
 2. Object Storage (S3, MinIO, GCS)
 3. Git Repositories
 4. Module Registry API
+
+Syncs are incremental: per-file content fingerprints from the last sync
+are kept in each cached module, only changed files are transferred
+(concurrently), and each new version is installed with an atomic
+symlink swap.
 """
 
 import os
+import io
 import json
 import shutil
 import tempfile
 import hashlib
-from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 from enum import Enum
 import logging
 
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+
 logger = logging.getLogger(__name__)
 
+# Per-file fingerprints of the synced version, stored in the module directory
+SYNC_MANIFEST = ".sync_manifest.json"
+# Installed module versions; cache entries are symlinks into this directory
+VERSIONS_DIR = ".versions"
+
 
 class RemoteSourceType(str, Enum):
     """Types of remote module sources."""
@@ -47,6 +63,76 @@ class ModuleSyncStatus(str, Enum):
     OUTDATED = "outdated"
 
 
+@dataclass(frozen=True)
+class RemoteFile:
+    """A remote module file and its content fingerprint (hash or ETag)."""
+
+    path: str  # Relative to the module root, POSIX separators
+    fingerprint: str
+    size: int
+    mtime: Optional[float] = None
+
+
+def file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class LocalObjectStore:
+    """
+    Directory-backed stand-in for the S3 client calls used by module sync.
+
+    Buckets are subdirectories of ``root`` and keys are relative file
+    paths. Selected with an S3 source endpoint of ``file:///path/to/root``,
+    which allows exercising S3 sources without MinIO (tests, development).
+    """
+
+    class exceptions:
+        class NoSuchKey(Exception):
+            pass
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def get_paginator(self, operation: str) -> "LocalObjectStore":
+        if operation != "list_objects_v2":
+            raise ValueError(f"Unsupported operation: {operation}")
+        return self
+
+    def paginate(self, Bucket: str, Prefix: str = "", Delimiter: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        bucket_path = self.root / Bucket
+        contents, prefixes = [], set()
+        for path in sorted(bucket_path.rglob("*")):
+            if not path.is_file():
+                continue
+            key = path.relative_to(bucket_path).as_posix()
+            if not key.startswith(Prefix):
+                continue
+            rest = key[len(Prefix):]
+            if Delimiter and Delimiter in rest:
+                prefixes.add(Prefix + rest.split(Delimiter, 1)[0] + Delimiter)
+                continue
+            digest = hashlib.md5(path.read_bytes()).hexdigest()
+            contents.append({"Key": key, "ETag": f'"{digest}"', "Size": path.stat().st_size})
+        yield {
+            "Contents": contents,
+            "CommonPrefixes": [{"Prefix": p} for p in sorted(prefixes)],
+        }
+
+    def get_object(self, Bucket: str, Key: str) -> Dict[str, Any]:
+        path = self.root / Bucket / Key
+        if not path.is_file():
+            raise self.exceptions.NoSuchKey(Key)
+        return {"Body": io.BytesIO(path.read_bytes())}
+
+    def download_file(self, bucket: str, key: str, filename: str) -> None:
+        shutil.copyfile(self.root / bucket / key, filename)
+
+
 class RemoteModuleService:
     """
     Service for managing modules across distributed servers.
@@ -91,10 +177,12 @@ class RemoteModuleService:
         self,
         db: Session,
         local_cache_dir: Optional[Path] = None,
+        max_workers: Optional[int] = None,
     ):
         self.db = db
         self.local_cache_dir = local_cache_dir or Path("modules/.remote_cache")
         self.local_cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max(1, max_workers or settings.REMOTE_MODULE_SYNC_WORKERS)
         self._remote_sources: Dict[str, Dict[str, Any]] = {}
 
     # -------------------------------------------------------------------------
@@ -243,17 +331,7 @@ class RemoteModuleService:
 
     def _discover_s3_modules(self, config: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
         """Discover modules from S3-compatible storage."""
-        try:
-            import boto3
-        except ImportError:
-            raise ImportError("boto3 required for S3 support: pip install boto3")
-
-        s3 = boto3.client(
-            "s3",
-            endpoint_url=config.get("endpoint"),
-            aws_access_key_id=config.get("access_key"),
-            aws_secret_access_key=config.get("secret_key"),
-        )
+        s3 = self._s3_client(config)
 
         bucket = config["bucket"]
         prefix = config.get("prefix", "")
@@ -283,6 +361,24 @@ class RemoteModuleService:
 
         return modules
 
+    def _s3_client(self, config: Dict[str, Any]) -> Any:
+        """S3 client for a source (LocalObjectStore for file:// endpoints)."""
+        endpoint = config.get("endpoint") or ""
+        if endpoint.startswith("file://"):
+            return LocalObjectStore(Path(endpoint[len("file://"):]))
+
+        try:
+            import boto3
+        except ImportError:
+            raise ImportError("boto3 required for S3 support: pip install boto3")
+
+        return boto3.client(
+            "s3",
+            endpoint_url=config.get("endpoint"),
+            aws_access_key_id=config.get("access_key"),
+            aws_secret_access_key=config.get("secret_key"),
+        )
+
     def _discover_git_modules(self, config: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
         """Discover modules from Git repository."""
         import subprocess
@@ -343,20 +439,26 @@ class RemoteModuleService:
         module_name: str,
         source_name: Optional[str] = None,
         force: bool = False,
+        remote_modules: Optional[Dict[str, Dict[str, Any]]] = None,
     ) -> Dict[str, Any]:
         """
         Sync a single module from remote to local cache.
 
+        Only files whose content changed since the last sync are
+        transferred; the new version is installed by swapping the
+        module's cache symlink, so readers never see a partial copy.
+
         Args:
             module_name: Module to sync
             source_name: Specific source, or auto-detect
-            force: Force re-sync even if up-to-date
+            force: Transfer every file even if unchanged
+            remote_modules: Result of discover_remote_modules() to reuse
 
         Returns:
             Sync result with status and details
         """
-        # Find module in remote sources
-        remote_modules = self.discover_remote_modules(source_name)
+        if remote_modules is None:
+            remote_modules = self.discover_remote_modules(source_name)
 
         if module_name not in remote_modules:
             return {
@@ -364,42 +466,51 @@ class RemoteModuleService:
                 "error": f"Module {module_name} not found in remote sources",
             }
 
-        module_info = remote_modules[module_name]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return self._sync_discovered(module_name, remote_modules[module_name], force, executor)
+
+    def sync_all_modules(self, force: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Sync all remote modules to local cache, discovering them once."""
+        remote_modules = self.discover_remote_modules()
+        results = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for module_name, module_info in remote_modules.items():
+                results[module_name] = self._sync_discovered(module_name, module_info, force, executor)
+
+        return results
+
+    def _sync_discovered(
+        self,
+        module_name: str,
+        module_info: Dict[str, Any],
+        force: bool,
+        executor: ThreadPoolExecutor,
+    ) -> Dict[str, Any]:
+        """Sync a discovered module, transferring files on ``executor``."""
         source_type = module_info["source_type"]
         remote_version = module_info["version"]
-
-        # Check local version
         local_path = self.local_cache_dir / module_name
-        local_manifest_path = local_path / "__manifest__.py"
-
-        if local_path.exists() and not force:
-            if local_manifest_path.exists():
-                local_manifest = self._load_manifest(local_manifest_path)
-                local_version = local_manifest.get("version", "0.0.0")
-
-                if local_version == remote_version:
-                    return {
-                        "status": ModuleSyncStatus.SYNCED.value,
-                        "message": "Already up-to-date",
-                        "version": local_version,
-                    }
 
-        # Sync based on source type
         try:
             if source_type == RemoteSourceType.NFS.value:
-                self._sync_from_nfs(module_info, local_path)
+                stats = self._sync_from_nfs(module_info, local_path, force, executor)
             elif source_type == RemoteSourceType.S3.value:
-                self._sync_from_s3(module_info, local_path)
+                stats = self._sync_from_s3(module_info, local_path, force, executor)
             elif source_type == RemoteSourceType.GIT.value:
-                self._sync_from_git(module_info, local_path)
+                stats = self._sync_from_git(module_info, local_path, force, executor)
             elif source_type == RemoteSourceType.REGISTRY.value:
-                self._sync_from_registry(module_info, local_path)
+                stats = self._sync_from_registry(module_info, local_path, force, executor)
+            else:
+                raise ValueError(f"Unsupported source type: {source_type}")
 
+            changed = stats["transferred"] or stats["removed"]
             return {
                 "status": ModuleSyncStatus.SYNCED.value,
-                "message": "Successfully synced",
+                "message": "Successfully synced" if changed else "Already up-to-date",
                 "version": remote_version,
                 "path": str(local_path),
+                **stats,
             }
 
         except Exception as e:
@@ -409,29 +520,24 @@ class RemoteModuleService:
                 "error": str(e),
             }
 
-    def sync_all_modules(self, force: bool = False) -> Dict[str, Dict[str, Any]]:
-        """Sync all remote modules to local cache."""
-        remote_modules = self.discover_remote_modules()
-        results = {}
-
-        for module_name in remote_modules:
-            results[module_name] = self.sync_module(module_name, force=force)
-
-        return results
-
-    def _sync_from_nfs(self, module_info: Dict, local_path: Path) -> None:
+    def _sync_from_nfs(
+        self,
+        module_info: Dict,
+        local_path: Path,
+        force: bool,
+        executor: ThreadPoolExecutor,
+    ) -> Dict[str, int]:
         """Sync module from NFS mount."""
-        remote_path = Path(module_info["path"])
-
-        if local_path.exists():
-            shutil.rmtree(local_path)
-
-        shutil.copytree(remote_path, local_path)
-
-    def _sync_from_s3(self, module_info: Dict, local_path: Path) -> None:
-        """Sync module from S3."""
-        import boto3
+        return self._sync_from_tree(Path(module_info["path"]), local_path, force, executor)
 
+    def _sync_from_s3(
+        self,
+        module_info: Dict,
+        local_path: Path,
+        force: bool,
+        executor: ThreadPoolExecutor,
+    ) -> Dict[str, int]:
+        """Sync module from S3, comparing object ETags with the last sync."""
         # Parse S3 path
         s3_path = module_info["path"]  # s3://bucket/prefix/
         parts = s3_path.replace("s3://", "").split("/", 1)
@@ -441,31 +547,35 @@ class RemoteModuleService:
         # Get config from source
         source_name = module_info["source"]
         config = self._remote_sources[source_name]["config"]
+        s3 = self._s3_client(config)
 
-        s3 = boto3.client(
-            "s3",
-            endpoint_url=config.get("endpoint"),
-            aws_access_key_id=config.get("access_key"),
-            aws_secret_access_key=config.get("secret_key"),
-        )
-
-        # Clear local path
-        if local_path.exists():
-            shutil.rmtree(local_path)
-        local_path.mkdir(parents=True)
-
-        # Download all files
+        files: Dict[str, RemoteFile] = {}
         paginator = s3.get_paginator("list_objects_v2")
         for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
             for obj in page.get("Contents", []):
                 key = obj["Key"]
                 relative_path = key[len(prefix):]
-                local_file = local_path / relative_path
+                if not relative_path or key.endswith("/"):
+                    continue
+                files[relative_path] = RemoteFile(
+                    path=relative_path,
+                    fingerprint=obj["ETag"].strip('"'),
+                    size=obj.get("Size", 0),
+                )
+
+        def fetch(relative_path: str, destination: Path) -> None:
+            s3.download_file(bucket, prefix + relative_path, str(destination))
 
-                local_file.parent.mkdir(parents=True, exist_ok=True)
-                s3.download_file(bucket, key, str(local_file))
+        previous = {} if force else self._read_sync_manifest(local_path)
+        return self._sync_files(local_path, files, fetch, executor, previous)
 
-    def _sync_from_git(self, module_info: Dict, local_path: Path) -> None:
+    def _sync_from_git(
+        self,
+        module_info: Dict,
+        local_path: Path,
+        force: bool,
+        executor: ThreadPoolExecutor,
+    ) -> Dict[str, int]:
         """Sync module from Git repository."""
         import subprocess
 
@@ -478,7 +588,7 @@ class RemoteModuleService:
         source_name = module_info["source"]
         config = self._remote_sources[source_name]["config"]
 
-        # Clone to temp and copy module
+        # Clone to temp and copy the module's changed files
         with tempfile.TemporaryDirectory() as temp_dir:
             cmd = ["git", "clone", "--depth", "1", "-b", branch, url, temp_dir]
 
@@ -488,14 +598,15 @@ class RemoteModuleService:
 
             subprocess.run(cmd, check=True, capture_output=True, env=env)
 
-            source_path = Path(temp_dir) / module_subpath
+            return self._sync_from_tree(Path(temp_dir) / module_subpath, local_path, force, executor)
 
-            if local_path.exists():
-                shutil.rmtree(local_path)
-
-            shutil.copytree(source_path, local_path)
-
-    def _sync_from_registry(self, module_info: Dict, local_path: Path) -> None:
+    def _sync_from_registry(
+        self,
+        module_info: Dict,
+        local_path: Path,
+        force: bool,
+        executor: ThreadPoolExecutor,
+    ) -> Dict[str, int]:
         """Sync module from HTTP registry."""
         import httpx
 
@@ -519,16 +630,150 @@ class RemoteModuleService:
         )
         response.raise_for_status()
 
-        # Extract to local path
+        # Extract to temp and copy the module's changed files
         import zipfile
-        import io
 
-        if local_path.exists():
-            shutil.rmtree(local_path)
-        local_path.mkdir(parents=True)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with zipfile.ZipFile(io.BytesIO(response.content)) as zf:
+                zf.extractall(temp_dir)
+
+            return self._sync_from_tree(Path(temp_dir), local_path, force, executor)
+
+    # -------------------------------------------------------------------------
+    # Incremental Transfer
+    # -------------------------------------------------------------------------
+
+    def _sync_from_tree(
+        self,
+        source_path: Path,
+        local_path: Path,
+        force: bool,
+        executor: ThreadPoolExecutor,
+    ) -> Dict[str, int]:
+        """Sync a module from a directory (mount, checkout or extracted archive)."""
+        if not source_path.is_dir():
+            raise ValueError(f"Module path not available: {source_path}")
+
+        previous = {} if force else self._read_sync_manifest(local_path)
+        files: Dict[str, RemoteFile] = {}
+        for path in source_path.rglob("*"):
+            if not path.is_file():
+                continue
+            relative_path = path.relative_to(source_path).as_posix()
+            stat = path.stat()
+            known = previous.get(relative_path)
+            if known and known.get("size") == stat.st_size and known.get("mtime") == stat.st_mtime:
+                # Unchanged size and mtime: skip re-reading the file (rsync's quick check)
+                fingerprint = known["fingerprint"]
+            else:
+                fingerprint = file_sha256(path)
+            files[relative_path] = RemoteFile(relative_path, fingerprint, stat.st_size, stat.st_mtime)
+
+        def fetch(relative_path: str, destination: Path) -> None:
+            shutil.copy2(source_path / relative_path, destination)
+
+        return self._sync_files(local_path, files, fetch, executor, previous)
+
+    def _sync_files(
+        self,
+        local_path: Path,
+        files: Dict[str, "RemoteFile"],
+        fetch: Callable[[str, Path], None],
+        executor: ThreadPoolExecutor,
+        previous: Dict[str, Dict[str, Any]],
+    ) -> Dict[str, int]:
+        """
+        Bring ``local_path`` in line with a remote file listing.
+
+        Files whose fingerprint matches the last sync are hard-linked
+        from the installed version; the others are fetched concurrently
+        into a new version directory, which is then activated.
+        """
+        files = {rel: f for rel, f in files.items() if self._is_safe_relative(rel)}
+
+        changed = [
+            rel for rel, remote in files.items()
+            if previous.get(rel, {}).get("fingerprint") != remote.fingerprint
+            or not (local_path / rel).is_file()
+        ]
+        removed = len(set(previous) - set(files))
+        stats = {"transferred": len(changed), "unchanged": len(files) - len(changed), "removed": removed}
+
+        if not changed and not removed and local_path.exists():
+            return stats
+
+        version_dir = self._versions_dir / f"{local_path.name}-{uuid.uuid4().hex[:12]}"
+        version_dir.mkdir(parents=True)
+        try:
+            changed_set = set(changed)
+            for rel in files:
+                target = version_dir / rel
+                target.parent.mkdir(parents=True, exist_ok=True)
+                if rel not in changed_set:
+                    self._link_or_copy(local_path / rel, target)
+
+            futures = [executor.submit(fetch, rel, version_dir / rel) for rel in changed]
+            for future in futures:
+                future.result()
+
+            manifest = {
+                rel: {"fingerprint": f.fingerprint, "size": f.size, "mtime": f.mtime}
+                for rel, f in files.items()
+            }
+            (version_dir / SYNC_MANIFEST).write_text(json.dumps(manifest, sort_keys=True))
+        except BaseException:
+            shutil.rmtree(version_dir, ignore_errors=True)
+            raise
+
+        self._activate(local_path, version_dir)
+        return stats
+
+    @property
+    def _versions_dir(self) -> Path:
+        return self.local_cache_dir / VERSIONS_DIR
+
+    def _activate(self, local_path: Path, version_dir: Path) -> None:
+        """Point ``local_path`` at ``version_dir`` with an atomic symlink swap."""
+        keep = {version_dir.name}
+        if local_path.is_symlink():
+            keep.add(Path(os.readlink(local_path)).name)
+        elif local_path.exists():
+            # Cache populated before versioned installs: move it aside once
+            legacy = self._versions_dir / f"{local_path.name}-{uuid.uuid4().hex[:12]}"
+            os.rename(local_path, legacy)
+            keep.add(legacy.name)
+
+        temp_link = local_path.with_name(f".{local_path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        os.symlink(os.path.relpath(version_dir, local_path.parent), temp_link, target_is_directory=True)
+        os.replace(temp_link, local_path)
+
+        # Keep the previous version for readers that resolved the old link
+        for item in self._versions_dir.iterdir():
+            name, _, _ = item.name.rpartition("-")
+            if name == local_path.name and item.name not in keep:
+                shutil.rmtree(item, ignore_errors=True)
+
+    def _read_sync_manifest(self, local_path: Path) -> Dict[str, Dict[str, Any]]:
+        """File fingerprints recorded by the last sync of a module."""
+        try:
+            return json.loads((local_path / SYNC_MANIFEST).read_text())
+        except (OSError, ValueError):
+            return {}
 
-        with zipfile.ZipFile(io.BytesIO(response.content)) as zf:
-            zf.extractall(local_path)
+    @staticmethod
+    def _is_safe_relative(relative_path: str) -> bool:
+        path = PurePosixPath(relative_path)
+        if path.is_absolute() or ".." in path.parts or relative_path == SYNC_MANIFEST:
+            logger.warning(f"Skipping unsafe remote path: {relative_path}")
+            return False
+        return True
+
+    @staticmethod
+    def _link_or_copy(source: Path, target: Path) -> None:
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copy2(source, target)
 
     # -------------------------------------------------------------------------
     # Helper Methods
@@ -557,10 +802,15 @@ class RemoteModuleService:
             return local_path
         return None
 
-    def get_sync_status(self, module_name: str) -> Dict[str, Any]:
-        """Get sync status for a module."""
+    def get_sync_status(
+        self,
+        module_name: str,
+        remote_modules: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        """Get sync status for a module (reusing ``remote_modules`` if given)."""
         local_path = self.local_cache_dir / module_name
-        remote_modules = self.discover_remote_modules()
+        if remote_modules is None:
+            remote_modules = self.discover_remote_modules()
 
         if module_name not in remote_modules:
             return {"status": "not_found", "message": "Module not in any remote source"}
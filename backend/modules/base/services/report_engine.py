@@ -0,0 +1,347 @@
+"""
+Report Rendering Engine
+
+Rendering machinery used by ReportService:
+- Compiled Jinja2 templates cached per report version (source hash)
+- PDF rendering in a bounded process pool, off the request/event-loop thread
+- Streaming writers for XLSX (openpyxl write-only mode), CSV and JSON
+- A file-based output cache keyed by (report, parameters, data version);
+  templates using render-time values (``now``) are never served from it
+"""
+
+import csv
+import hashlib
+import importlib.util
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from jinja2 import Environment, Template, meta
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = {
+    'pdf': 'application/pdf',
+    'html': 'text/html',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv',
+    'json': 'application/json',
+}
+
+
+@dataclass
+class RenderedReport:
+    """A rendered report stored on disk."""
+
+    path: Path
+    extension: str
+    size: int
+    cached: bool = False
+
+    @property
+    def content_type(self) -> str:
+        return CONTENT_TYPES[self.extension]
+
+
+# -------------------------------------------------------------------------
+# Template cache
+# -------------------------------------------------------------------------
+
+class TemplateCache:
+    """
+    LRU cache of compiled templates.
+
+    Keys include a hash of the template source, so editing a report's
+    template naturally produces a new entry instead of a stale hit.
+    """
+
+    def __init__(self, env_factory: Callable[[], Environment], max_size: int = 256):
+        self._env_factory = env_factory
+        self._env: Optional[Environment] = None
+        self._templates: "OrderedDict[Tuple[str, str], Template]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def env(self) -> Environment:
+        if self._env is None:
+            with self._lock:
+                if self._env is None:
+                    self._env = self._env_factory()
+        return self._env
+
+    def get(self, report_key: str, source: str) -> Template:
+        """Get the compiled template for a report's current source."""
+        key = (report_key, source_version(source))
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None:
+                self._templates.move_to_end(key)
+                self.hits += 1
+                return template
+            self.misses += 1
+
+        template = self.env.from_string(source)
+
+        with self._lock:
+            self._templates[key] = template
+            self._templates.move_to_end(key)
+            while len(self._templates) > self.max_size:
+                self._templates.popitem(last=False)
+        return template
+
+    def clear(self) -> None:
+        with self._lock:
+            self._templates.clear()
+
+
+def source_version(source: str) -> str:
+    """Short, stable version identifier for template source text."""
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()[:16]
+
+
+# Context values that differ on every render; outputs using them aren't reused
+VOLATILE_VARIABLES = frozenset({'now'})
+
+
+@lru_cache(maxsize=256)
+def template_variables(source: str) -> FrozenSet[str]:
+    """Context variables a template reads."""
+    return frozenset(meta.find_undeclared_variables(Environment().parse(source)))
+
+
+def is_volatile(source: str) -> bool:
+    """Whether a template renders values that change on every render."""
+    return not VOLATILE_VARIABLES.isdisjoint(template_variables(source))
+
+
+# -------------------------------------------------------------------------
+# Render pool (PDF)
+# -------------------------------------------------------------------------
+
+_render_pool: Optional[ProcessPoolExecutor] = None
+_render_pool_lock = threading.Lock()
+
+
+def get_render_pool() -> Optional[ProcessPoolExecutor]:
+    """Get the shared render process pool (None when REPORT_RENDER_WORKERS is 0)."""
+    global _render_pool
+    if settings.REPORT_RENDER_WORKERS <= 0:
+        return None
+    if _render_pool is None:
+        with _render_pool_lock:
+            if _render_pool is None:
+                # spawn: forking a threaded server with open DB connections is unsafe
+                _render_pool = ProcessPoolExecutor(
+                    max_workers=settings.REPORT_RENDER_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+    return _render_pool
+
+
+def shutdown_render_pool(wait: bool = False) -> None:
+    """Shut down the render pool (application shutdown)."""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is not None:
+            _render_pool.shutdown(wait=wait, cancel_futures=True)
+            _render_pool = None
+
+
+def pdf_available() -> bool:
+    """Whether weasyprint can be imported."""
+    return importlib.util.find_spec('weasyprint') is not None
+
+
+def _write_pdf(html_content: str, css_content: str, path: str) -> int:
+    """Render HTML to a PDF file (runs inside a pool worker)."""
+    from weasyprint import CSS, HTML
+
+    HTML(string=html_content).write_pdf(path, stylesheets=[CSS(string=css_content)])
+    return os.path.getsize(path)
+
+
+def render_pdf(html_content: str, css_content: str, path: Path, timeout: Optional[float] = None) -> int:
+    """Render a PDF in the process pool, blocking only the calling thread."""
+    pool = get_render_pool()
+    if pool is None:
+        return _write_pdf(html_content, css_content, str(path))
+
+    future = pool.submit(_write_pdf, html_content, css_content, str(path))
+    return future.result(timeout=timeout or settings.REPORT_RENDER_TIMEOUT)
+
+
+# -------------------------------------------------------------------------
+# Streaming writers
+# -------------------------------------------------------------------------
+
+def _headers(records: List[Dict[str, Any]]) -> List[str]:
+    return list(records[0].keys()) if records else []
+
+
+def write_xlsx(path: Path, records: Iterable[Dict[str, Any]], headers: List[str], sheet_name: str) -> None:
+    """Write records with openpyxl's write-only (streaming) workbook."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=(sheet_name or 'Report')[:31])
+    if headers:
+        ws.append(headers)
+        for record in records:
+            ws.append([record.get(h) for h in headers])
+    wb.save(str(path))
+
+
+def write_csv(path: Path, records: Iterable[Dict[str, Any]], headers: List[str]) -> None:
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        if not headers:
+            return
+        writer = csv.DictWriter(f, fieldnames=headers)
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def write_json(path: Path, records: Iterable[Dict[str, Any]]) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for i, record in enumerate(records):
+            if i:
+                f.write(',')
+            f.write(json.dumps(record, default=str))
+        f.write(']')
+
+
+def xlsx_available() -> bool:
+    return importlib.util.find_spec('openpyxl') is not None
+
+
+# -------------------------------------------------------------------------
+# Output cache
+# -------------------------------------------------------------------------
+
+def records_version(count: int, last_modified: Any) -> str:
+    """Version of a record set from aggregates (row count, latest update)."""
+    return f"{count}:{last_modified.isoformat() if last_modified is not None else ''}"
+
+
+def data_version(records: List[Dict[str, Any]]) -> str:
+    """
+    Fingerprint of loaded record data, for models without an update
+    timestamp to version them by.
+    """
+    digest = hashlib.sha256()
+    for record in records:
+        digest.update(json.dumps(record, sort_keys=True, default=str).encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()[:16]
+
+
+class ReportOutputCache:
+    """
+    Rendered outputs on disk, keyed by report version, parameters and data.
+
+    Files are published with an atomic rename, so concurrent workers never
+    serve a partially written report. Entries are reused for ``ttl`` seconds
+    and kept on disk for at least ``retention`` seconds, so queued executions
+    can still be downloaded when caching is disabled.
+    """
+
+    # Seconds between expiry sweeps triggered by store()
+    PURGE_INTERVAL = 300
+
+    def __init__(self, directory: Path, ttl: int, retention: int = 0):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.retention = max(ttl, retention, 0)
+        self._last_purge = 0.0
+
+    @staticmethod
+    def make_key(
+        report_code: str,
+        report_version: str,
+        output_format: str,
+        record_ids: List[int],
+        parameters: Optional[Dict[str, Any]],
+        records_version: str,
+    ) -> str:
+        payload = json.dumps(
+            [report_code, report_version, output_format, sorted(record_ids),
+             parameters or {}, records_version],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def path_for(self, key: str, extension: str) -> Path:
+        return self.directory / f"{key}.{extension}"
+
+    def get(self, key: str, extension: str) -> Optional[Path]:
+        """Return the cached file if present and fresh."""
+        if self.ttl <= 0:
+            return None
+        path = self.path_for(key, extension)
+        try:
+            if time.time() - path.stat().st_mtime <= self.ttl:
+                return path
+        except FileNotFoundError:
+            pass
+        return None
+
+    def temp_path(self, extension: str) -> Path:
+        """A unique scratch path in the cache directory (same filesystem as entries)."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, name = tempfile.mkstemp(dir=self.directory, prefix='.render-', suffix=f'.{extension}')
+        os.close(fd)
+        return Path(name)
+
+    def store(self, temp_path: Path, key: str, extension: str) -> Path:
+        path = self.path_for(key, extension)
+        os.replace(temp_path, path)
+        now = time.time()
+        if now - self._last_purge >= self.PURGE_INTERVAL:
+            self._last_purge = now
+            self.purge_expired()
+        return path
+
+    def purge_expired(self) -> int:
+        """Delete outputs past their retention; returns the number of files removed."""
+        if not self.directory.exists():
+            return 0
+        removed = 0
+        cutoff = time.time() - self.retention
+        for path in self.directory.iterdir():
+            try:
+                if path.is_file() and path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+
+_output_cache: Optional[ReportOutputCache] = None
+
+
+def get_output_cache() -> ReportOutputCache:
+    global _output_cache
+    if _output_cache is None:
+        _output_cache = ReportOutputCache(
+            Path(settings.REPORT_OUTPUT_DIR),
+            settings.REPORT_CACHE_TTL,
+            settings.REPORT_OUTPUT_RETENTION,
+        )
+    return _output_cache
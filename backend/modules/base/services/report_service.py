@@ -3,56 +3,79 @@ Report Service
 
 Provides report generation with:
 - PDF/Excel/CSV/HTML output formats
-- Jinja2 templates
+- Jinja2 templates (compiled once per template version)
 - Record data binding
 - Execution logging
+- Cached outputs and background ("render now, download later") jobs
 """
 
-import io
-import json
-import csv
-import hashlib
+import importlib
 import logging
-import tempfile
+import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Type
 from decimal import Decimal
 
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from jinja2 import Environment, BaseLoader, TemplateError
 
+from app.core.config import settings
+
 from ..models.report import (
     ReportDefinition,
     ReportExecution,
     ReportSchedule,
     ReportFormat,
 )
+from . import report_engine
+from .report_engine import RenderedReport
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_TEMPLATE = """
+            <html>
+            <head><title>{{ report.name }}</title></head>
+            <body>
+                <h1>{{ report.name }}</h1>
+                {% for record in records %}
+                <div class="record">
+                    {% for key, value in record.items() %}
+                    <p><strong>{{ key }}:</strong> {{ value }}</p>
+                    {% endfor %}
+                </div>
+                <hr>
+                {% endfor %}
+            </body>
+            </html>
+            """
+
 
 class ReportService:
     """Service for report generation and management."""
 
     def __init__(self, db: Session):
         self.db = db
-        self._jinja_env = None
 
     @property
     def jinja_env(self) -> Environment:
-        """Get Jinja2 environment."""
-        if self._jinja_env is None:
-            self._jinja_env = Environment(
-                loader=BaseLoader(),
-                autoescape=True,
-            )
-            # Add custom filters
-            self._jinja_env.filters['currency'] = self._format_currency
-            self._jinja_env.filters['date'] = self._format_date
-            self._jinja_env.filters['datetime'] = self._format_datetime
-            self._jinja_env.filters['number'] = self._format_number
-        return self._jinja_env
+        """Get the shared Jinja2 environment."""
+        return _template_cache.env
+
+    @staticmethod
+    def _build_jinja_env() -> Environment:
+        """Create the Jinja2 environment with report filters."""
+        env = Environment(
+            loader=BaseLoader(),
+            autoescape=True,
+        )
+        # Add custom filters
+        env.filters['currency'] = ReportService._format_currency
+        env.filters['date'] = ReportService._format_date
+        env.filters['datetime'] = ReportService._format_datetime
+        env.filters['number'] = ReportService._format_number
+        return env
 
     # ==================== Report Definition CRUD ====================
 
@@ -161,8 +184,80 @@ class ReportService:
         Render a report for given records.
 
         Returns:
-            Dict with keys: content, content_type, filename, execution_id
+            Dict with keys: file_path, content_type, filename, execution_id, cached
+        """
+        report = self._get_renderable_report(report_code)
+        execution = self._create_execution(report, record_ids, user_id, parameters, output_format)
+        execution.start()
+        self.db.commit()
+
+        return self._run(report, execution)
+
+    def queue_report(
+        self,
+        report_code: str,
+        record_ids: List[int],
+        user_id: Optional[int] = None,
+        parameters: Optional[Dict] = None,
+        output_format: Optional[str] = None,
+    ) -> ReportExecution:
+        """
+        Create a pending execution to be rendered by run_report_execution().
+
+        The caller schedules the job; the result is downloaded from the
+        execution once it is completed.
+        """
+        report = self._get_renderable_report(report_code)
+        execution = self._create_execution(report, record_ids, user_id, parameters, output_format)
+        self.db.commit()
+        self.db.refresh(execution)
+        return execution
+
+    def run_execution(self, execution_id: int) -> Dict[str, Any]:
+        """Render a pending execution created by queue_report()."""
+        execution = self.get_execution(execution_id)
+        if not execution:
+            raise ValueError(f"Execution {execution_id} not found")
+        if execution.status != 'pending':
+            raise ValueError(f"Execution {execution_id} is already {execution.status}")
+
+        report = self.get_report(execution.report_id)
+        if not report:
+            execution.fail("Report no longer exists")
+            self.db.commit()
+            raise ValueError(f"Report for execution {execution_id} not found")
+
+        execution.start()
+        self.db.commit()
+
+        return self._run(report, execution)
+
+    def fail_execution(self, execution_id: int, error: str) -> bool:
+        """
+        Mark an unfinished execution as failed.
+
+        Used when the render job dies outside _run() (timeout, worker error);
+        finished executions are left untouched.
         """
+        updated = (
+            self.db.query(ReportExecution)
+            .filter(
+                ReportExecution.id == execution_id,
+                ReportExecution.status.in_(('pending', 'running')),
+            )
+            .update(
+                {
+                    ReportExecution.status: 'failed',
+                    ReportExecution.completed_at: datetime.utcnow(),
+                    ReportExecution.error_message: error,
+                },
+                synchronize_session=False,
+            )
+        )
+        self.db.commit()
+        return bool(updated)
+
+    def _get_renderable_report(self, report_code: str) -> ReportDefinition:
         report = self.get_report_by_code(report_code)
         if not report:
             raise ValueError(f"Report '{report_code}' not found")
@@ -170,10 +265,17 @@ class ReportService:
         if not report.is_active:
             raise ValueError(f"Report '{report_code}' is not active")
 
-        # Use specified format or default from report
-        format_to_use = output_format or report.output_format
+        return report
 
-        # Create execution record
+    def _create_execution(
+        self,
+        report: ReportDefinition,
+        record_ids: List[int],
+        user_id: Optional[int],
+        parameters: Optional[Dict],
+        output_format: Optional[str],
+    ) -> ReportExecution:
+        # Use specified format or default from report
         execution = ReportExecution(
             report_id=report.id,
             report_code=report.code,
@@ -181,90 +283,189 @@ class ReportService:
             model_name=report.model_name,
             record_ids=record_ids,
             parameters=parameters or {},
-            output_format=format_to_use,
+            output_format=output_format or report.output_format,
         )
         self.db.add(execution)
-        self.db.commit()
-
-        execution.start()
-        self.db.commit()
+        return execution
 
+    def _run(self, report: ReportDefinition, execution: ReportExecution) -> Dict[str, Any]:
+        """Render an execution that has been started, recording the outcome."""
         try:
-            # Get record data
-            records = self._get_record_data(report.model_name, record_ids)
-
-            # Render template
-            context = {
-                'records': records,
-                'record': records[0] if len(records) == 1 else None,
-                'report': report,
-                'parameters': parameters or {},
-                'now': datetime.utcnow(),
-            }
+            rendered = self._render_output(
+                report,
+                execution.record_ids,
+                execution.parameters,
+                execution.output_format,
+            )
 
-            html_content = self._render_template(report, context)
-
-            # Generate output
-            if format_to_use == ReportFormat.PDF.value:
-                content, content_type = self._generate_pdf(report, html_content)
-                extension = 'pdf'
-            elif format_to_use == ReportFormat.XLSX.value:
-                content, content_type = self._generate_excel(report, records, context)
-                extension = 'xlsx'
-            elif format_to_use == ReportFormat.CSV.value:
-                content, content_type = self._generate_csv(records)
-                extension = 'csv'
-            elif format_to_use == ReportFormat.JSON.value:
-                content, content_type = self._generate_json(records)
-                extension = 'json'
-            else:  # HTML
-                content = html_content.encode('utf-8')
-                content_type = 'text/html'
-                extension = 'html'
-
-            # Save to temp file
-            filename = f"{report.code}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{extension}"
-            temp_path = Path(tempfile.gettempdir()) / filename
-            temp_path.write_bytes(content)
-
-            execution.complete(str(temp_path), len(content))
+            execution.complete(str(rendered.path), rendered.size)
             self.db.commit()
 
             return {
-                'content': content,
-                'content_type': content_type,
-                'filename': filename,
+                'file_path': str(rendered.path),
+                'content_type': rendered.content_type,
+                'filename': self.get_download_filename(report.code, rendered.extension),
                 'execution_id': execution.id,
+                'cached': rendered.cached,
             }
 
         except Exception as e:
-            logger.exception(f"Failed to render report {report_code}")
+            logger.exception(f"Failed to render report {report.code}")
+            self.db.rollback()
             execution.fail(str(e))
             self.db.commit()
             raise
 
+    def _render_output(
+        self,
+        report: ReportDefinition,
+        record_ids: List[int],
+        parameters: Optional[Dict],
+        output_format: str,
+    ) -> RenderedReport:
+        """
+        Render records to a file, reusing a cached output when the report,
+        parameters and record data are unchanged.
+
+        The cache is checked against an aggregate version of the records
+        (see _records_version), so a hit doesn't load them. Templates
+        showing render-time values are rendered every time.
+        """
+        template_source = self._get_template_source(report)
+        extension = self._resolve_extension(output_format)
+        output_cache = report_engine.get_output_cache()
+
+        records = None
+        cache_key = None
+        if extension not in ('pdf', 'html') or not report_engine.is_volatile(template_source):
+            report_version = report_engine.source_version(template_source)
+            if report.updated_at:
+                report_version = f"{report_version}:{report.updated_at.isoformat()}"
+
+            records_version = self._records_version(report.model_name, record_ids)
+            if records_version is None:
+                records = self._get_record_data(report.model_name, record_ids)
+                records_version = report_engine.data_version(records)
+
+            cache_key = output_cache.make_key(
+                report.code,
+                report_version,
+                extension,
+                record_ids,
+                parameters,
+                records_version,
+            )
+            cached_path = output_cache.get(cache_key, extension)
+            if cached_path is not None:
+                return RenderedReport(cached_path, extension, cached_path.stat().st_size, cached=True)
+
+        if records is None:
+            records = self._get_record_data(report.model_name, record_ids)
+
+        temp_path = output_cache.temp_path(extension)
+        try:
+            if extension in ('pdf', 'html'):
+                context = {
+                    'records': records,
+                    'record': records[0] if len(records) == 1 else None,
+                    'report': report,
+                    'parameters': parameters or {},
+                    'now': datetime.utcnow(),
+                }
+                html_content = self._render_template(report, context, template_source)
+
+                if extension == 'pdf':
+                    report_engine.render_pdf(html_content, self._page_css(report), temp_path)
+                else:
+                    temp_path.write_text(html_content, encoding='utf-8')
+            else:
+                headers = list(records[0].keys()) if records else []
+                if extension == 'xlsx':
+                    report_engine.write_xlsx(temp_path, records, headers, report.excel_sheet_name)
+                elif extension == 'csv':
+                    report_engine.write_csv(temp_path, records, headers)
+                else:
+                    report_engine.write_json(temp_path, records)
+
+            # Uncacheable outputs are still kept for download
+            path = output_cache.store(temp_path, cache_key or uuid.uuid4().hex, extension)
+        except Exception:
+            temp_path.unlink(missing_ok=True)
+            raise
+
+        return RenderedReport(path, extension, path.stat().st_size)
+
+    @staticmethod
+    def _resolve_extension(output_format: str) -> str:
+        """Map a report format to the file type actually produced."""
+        if output_format == ReportFormat.PDF.value:
+            if report_engine.pdf_available():
+                return 'pdf'
+            logger.warning("weasyprint not installed, returning HTML instead")
+            return 'html'
+        if output_format == ReportFormat.XLSX.value:
+            if report_engine.xlsx_available():
+                return 'xlsx'
+            # Fallback to CSV
+            return 'csv'
+        if output_format in (ReportFormat.CSV.value, ReportFormat.JSON.value):
+            return output_format
+        return 'html'
+
+    @staticmethod
+    def get_download_filename(report_code: str, extension: str) -> str:
+        return f"{report_code}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{extension}"
+
     def _get_record_data(
         self,
         model_name: str,
         record_ids: List[int],
     ) -> List[Dict[str, Any]]:
         """Get record data from database."""
-        # This is a simplified version - in practice, you'd use
-        # the model introspection service to dynamically query
-        from app.core.modules import ModuleRegistry
-
-        registry = ModuleRegistry.get_registry()
-
-        # Try to get model class
-        model_class = registry.get_model_class(model_name)
+        model_class = self._get_model_class(model_name)
         if model_class:
             records = self.db.query(model_class).filter(
                 model_class.id.in_(record_ids)
-            ).all()
+            ).order_by(model_class.id).all()
             return [self._model_to_dict(r) for r in records]
 
         return []
 
+    def _records_version(self, model_name: str, record_ids: List[int]) -> Optional[str]:
+        """
+        Version of the records a report reads, from their count and latest
+        update time (one aggregate query). None when the model has no
+        update timestamp.
+        """
+        model_class = self._get_model_class(model_name)
+        if model_class is None:
+            return report_engine.records_version(0, None)
+        updated_at = getattr(model_class, 'updated_at', None)
+        if updated_at is None:
+            return None
+
+        count, last_modified = self.db.query(
+            func.count(model_class.id), func.max(updated_at)
+        ).filter(model_class.id.in_(record_ids)).one()
+        return report_engine.records_version(count, last_modified)
+
+    def _get_model_class(self, model_name: str) -> Optional[Type]:
+        """Get a model class by name ("module.ModelName")."""
+        from app.core.modules import ModuleRegistry
+
+        model_class = ModuleRegistry.get_registry().get_model(model_name)
+        if model_class is not None:
+            return model_class
+
+        try:
+            parts = model_name.split(".")
+            if len(parts) == 2:
+                mod = importlib.import_module(f"modules.{parts[0]}.models")
+                return getattr(mod, parts[1], None)
+        except Exception:
+            pass
+        return None
+
     def _model_to_dict(self, obj: Any) -> Dict[str, Any]:
         """Convert SQLAlchemy model to dictionary."""
         result = {}
@@ -277,12 +478,8 @@ class ReportService:
             result[column.name] = value
         return result
 
-    def _render_template(
-        self,
-        report: ReportDefinition,
-        context: Dict[str, Any],
-    ) -> str:
-        """Render Jinja2 template."""
+    def _get_template_source(self, report: ReportDefinition) -> str:
+        """Get the template source for a report (inline, file or default)."""
         template_content = report.template_content
 
         if not template_content and report.template_file:
@@ -290,107 +487,34 @@ class ReportService:
             if template_path.exists():
                 template_content = template_path.read_text()
 
-        if not template_content:
-            # Default template
-            template_content = """
-            <html>
-            <head><title>{{ report.name }}</title></head>
-            <body>
-                <h1>{{ report.name }}</h1>
-                <p>Generated: {{ now }}</p>
-                {% for record in records %}
-                <div class="record">
-                    {% for key, value in record.items() %}
-                    <p><strong>{{ key }}:</strong> {{ value }}</p>
-                    {% endfor %}
-                </div>
-                <hr>
-                {% endfor %}
-            </body>
-            </html>
-            """
+        return template_content or DEFAULT_TEMPLATE
+
+    def _render_template(
+        self,
+        report: ReportDefinition,
+        context: Dict[str, Any],
+        template_source: Optional[str] = None,
+    ) -> str:
+        """Render the report's Jinja2 template (compiled once per version)."""
+        if template_source is None:
+            template_source = self._get_template_source(report)
 
         try:
-            template = self.jinja_env.from_string(template_content)
+            template = _template_cache.get(report.code, template_source)
             return template.render(**context)
         except TemplateError as e:
             raise ValueError(f"Template error: {e}")
 
-    def _generate_pdf(
-        self,
-        report: ReportDefinition,
-        html_content: str,
-    ) -> tuple:
-        """Generate PDF from HTML."""
-        try:
-            from weasyprint import HTML, CSS
-        except ImportError:
-            logger.warning("weasyprint not installed, returning HTML instead")
-            return html_content.encode('utf-8'), 'text/html'
-
-        # Build CSS for paper settings
-        css_content = f"""
+    @staticmethod
+    def _page_css(report: ReportDefinition) -> str:
+        """Build CSS for paper settings."""
+        return f"""
         @page {{
             size: {report.paper_format} {report.orientation};
             margin: {report.margin_top}mm {report.margin_right}mm {report.margin_bottom}mm {report.margin_left}mm;
         }}
         """
 
-        html = HTML(string=html_content)
-        css = CSS(string=css_content)
-        pdf_bytes = html.write_pdf(stylesheets=[css])
-
-        return pdf_bytes, 'application/pdf'
-
-    def _generate_excel(
-        self,
-        report: ReportDefinition,
-        records: List[Dict],
-        context: Dict,
-    ) -> tuple:
-        """Generate Excel file."""
-        try:
-            from openpyxl import Workbook
-            from openpyxl.utils.dataframe import dataframe_to_rows
-        except ImportError:
-            # Fallback to CSV
-            return self._generate_csv(records)
-
-        wb = Workbook()
-        ws = wb.active
-        ws.title = report.excel_sheet_name or 'Report'
-
-        if records:
-            # Header row
-            headers = list(records[0].keys())
-            ws.append(headers)
-
-            # Data rows
-            for record in records:
-                ws.append([record.get(h) for h in headers])
-
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
-
-        return output.read(), 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-
-    def _generate_csv(self, records: List[Dict]) -> tuple:
-        """Generate CSV file."""
-        if not records:
-            return b'', 'text/csv'
-
-        output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=records[0].keys())
-        writer.writeheader()
-        writer.writerows(records)
-
-        return output.getvalue().encode('utf-8'), 'text/csv'
-
-    def _generate_json(self, records: List[Dict]) -> tuple:
-        """Generate JSON file."""
-        return json.dumps(records, indent=2, default=str).encode('utf-8'), 'application/json'
-
     # ==================== Template Filters ====================
 
     @staticmethod
@@ -531,3 +655,40 @@ class ReportService:
             query = query.filter(ReportSchedule.is_active == True)
 
         return query.all()
+
+
+_template_cache = report_engine.TemplateCache(
+    ReportService._build_jinja_env,
+    max_size=settings.REPORT_TEMPLATE_CACHE_SIZE,
+)
+
+
+def run_report_execution(execution_id: int) -> Dict[str, Any]:
+    """
+    Background job: render a queued report execution in its own session.
+
+    Returns a summary (not the file) so task results stay small.
+    """
+    from app.db.base import SessionLocal
+
+    db = SessionLocal()
+    try:
+        result = ReportService(db).run_execution(execution_id)
+        return {
+            'execution_id': execution_id,
+            'file_path': result['file_path'],
+            'cached': result['cached'],
+        }
+    finally:
+        db.close()
+
+
+def mark_report_execution_failed(execution_id: int, error: Optional[str]) -> None:
+    """Failure callback for run_report_execution (timeouts, worker errors)."""
+    from app.db.base import SessionLocal
+
+    db = SessionLocal()
+    try:
+        ReportService(db).fail_execution(execution_id, error or "Report rendering failed")
+    finally:
+        db.close()
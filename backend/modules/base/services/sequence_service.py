@@ -1,49 +1,113 @@
 """
 Sequence Service
 
-Provides thread-safe sequence number generation.
+Provides sequence number generation that is safe across workers.
 Supports multiple sequence formats and auto-reset.
+
+Allocation modes (SEQUENCE_ALLOCATION_MODE, or per call):
+- strict: the sequence row is locked (SELECT ... FOR UPDATE) in the
+  caller's transaction. Numbers are gap-less and released on rollback,
+  but concurrent callers wait for the first transaction to commit, so
+  callers should commit promptly (allocation methods only commit when
+  passed commit=True).
+- fast: each worker reserves a block of SEQUENCE_BLOCK_SIZE numbers in a
+  short separate transaction and hands them out from memory. Numbers are
+  unique and increasing per worker, but unused numbers leave gaps.
 """
 
 import logging
 import threading
-from datetime import datetime
-from typing import Optional
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 
-from sqlalchemy import and_
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+
 from ..models.sequence import Sequence, SequenceDateRange
 
 logger = logging.getLogger(__name__)
 
-# Global lock for sequence generation (prevents race conditions)
-_sequence_locks: dict = {}
+SEQUENCE_MODE_STRICT = "strict"
+SEQUENCE_MODE_FAST = "fast"
+SEQUENCE_MODES = (SEQUENCE_MODE_STRICT, SEQUENCE_MODE_FAST)
+
+# Per-sequence locks guarding this process's reserved blocks (by sequence id)
+_sequence_locks: Dict[int, threading.Lock] = {}
 _global_lock = threading.Lock()
 
 
-def _get_sequence_lock(code: str) -> threading.Lock:
-    """Get or create a lock for a specific sequence code."""
+def _get_sequence_lock(sequence_id: int) -> threading.Lock:
+    """Get or create a lock for a specific sequence."""
+    with _global_lock:
+        if sequence_id not in _sequence_locks:
+            _sequence_locks[sequence_id] = threading.Lock()
+        return _sequence_locks[sequence_id]
+
+
+@dataclass
+class _NumberBlock:
+    """Numbers reserved by this process for one sequence period."""
+
+    next: int
+    end: int  # exclusive
+    increment: int
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+
+    def contains(self, date: datetime) -> bool:
+        date = _naive(date)
+        if self.date_from is not None and date < self.date_from:
+            return False
+        if self.date_to is not None and date > self.date_to:
+            return False
+        return True
+
+    @property
+    def exhausted(self) -> bool:
+        return self.next >= self.end
+
+
+# sequence id -> reserved blocks (one per period in use)
+_blocks: Dict[int, List[_NumberBlock]] = {}
+
+
+def clear_reserved_blocks(sequence_id: Optional[int] = None) -> None:
+    """Drop this process's reserved blocks (unused numbers become gaps)."""
     with _global_lock:
-        if code not in _sequence_locks:
-            _sequence_locks[code] = threading.Lock()
-        return _sequence_locks[code]
+        if sequence_id is None:
+            _blocks.clear()
+        else:
+            _blocks.pop(sequence_id, None)
+
+
+def _naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Compare stored (possibly tz-aware) and naive UTC datetimes."""
+    if value is not None and value.tzinfo is not None:
+        return value.replace(tzinfo=None)
+    return value
 
 
 class SequenceService:
     """
     Service for generating sequence numbers.
 
-    Provides thread-safe number generation with support for:
+    Provides concurrency-safe number generation with support for:
     - Custom prefixes and suffixes with date placeholders
     - Company-specific sequences
     - Automatic reset (yearly, monthly, daily)
     - Date-range based sub-sequences
+    - Strict (gap-less) and fast (block-reserved) allocation
+    - Bulk allocation for imports
 
     Usage:
         service = SequenceService(db)
         number = service.next_by_code("sale.order")
+        db.commit()
         # Returns: "SO-2024-12-00001"
+
+        numbers = service.next_n("sale.order", 500)
     """
 
     def __init__(self, db: Session):
@@ -82,51 +146,90 @@ class SequenceService:
         code: str,
         company_id: Optional[int] = None,
         date: Optional[datetime] = None,
+        mode: Optional[str] = None,
+        commit: bool = False,
     ) -> Optional[str]:
         """
         Get the next formatted sequence number by code.
 
-        Thread-safe implementation using database row locking.
+        In strict mode the number is allocated in the session's transaction,
+        which the caller commits (keeping the number and releasing the row
+        lock) or pass commit=True. The number is released if that
+        transaction rolls back.
 
         Args:
             code: Sequence code
             company_id: Optional company ID for company-specific sequences
             date: Date to use for formatting (default: now)
+            mode: "strict" or "fast" (default: SEQUENCE_ALLOCATION_MODE)
+            commit: Commit the session after allocating
 
         Returns:
             Formatted sequence string or None if sequence not found
         """
-        lock = _get_sequence_lock(code)
+        numbers = self.next_n(code, 1, company_id, date, mode, commit=commit)
+        return numbers[0] if numbers else None
 
-        with lock:
-            sequence = self.get_sequence(code, company_id)
+    def next_n(
+        self,
+        code: str,
+        count: int,
+        company_id: Optional[int] = None,
+        date: Optional[datetime] = None,
+        mode: Optional[str] = None,
+        commit: bool = False,
+    ) -> List[str]:
+        """
+        Allocate several consecutive sequence numbers at once (imports).
 
-            if not sequence:
-                logger.warning(f"Sequence not found: {code}")
-                return None
+        In strict mode the numbers belong to the session's transaction,
+        which the caller commits (or pass commit=True).
 
-            date = date or datetime.utcnow()
+        Args:
+            code: Sequence code
+            count: Number of sequence numbers
+            company_id: Optional company ID for company-specific sequences
+            date: Date to use for formatting (default: now)
+            mode: "strict" or "fast" (default: SEQUENCE_ALLOCATION_MODE)
+            commit: Commit the session after allocating
 
-            # Check for reset
-            if sequence.should_reset(date):
-                self._reset_sequence(sequence, date)
+        Returns:
+            Formatted sequence strings (empty if sequence not found)
+        """
+        mode = mode or settings.SEQUENCE_ALLOCATION_MODE
+        if mode not in SEQUENCE_MODES:
+            raise ValueError(f"Unknown sequence allocation mode: {mode}")
+        if count < 1:
+            return []
 
-            # Get the number (use date range if configured)
-            if sequence.use_date_range:
-                number = self._next_date_range_number(sequence, date)
-            else:
-                number = sequence.number_next
-                sequence.number_next += sequence.number_increment
-                sequence.last_reset_date = sequence.last_reset_date or date
+        sequence = self.get_sequence(code, company_id)
 
-            self.db.commit()
+        if not sequence:
+            logger.warning(f"Sequence not found: {code}")
+            return []
+
+        date = date or datetime.utcnow()
 
-            return sequence.format_number(number, date)
+        if mode == SEQUENCE_MODE_STRICT:
+            start, increment, _ = self._allocate_locked(self.db, sequence.id, date, count)
+            numbers = range(start, start + count * increment, increment)
+        elif count == 1:
+            numbers = [self._next_from_block(sequence.id, date)]
+        else:
+            start, increment, _ = self._reserve(sequence.id, date, count)
+            numbers = range(start, start + count * increment, increment)
+
+        formatted = [sequence.format_number(number, date) for number in numbers]
+        if commit:
+            self.db.commit()
+        return formatted
 
     def next_by_id(
         self,
         sequence_id: int,
         date: Optional[datetime] = None,
+        mode: Optional[str] = None,
+        commit: bool = False,
     ) -> Optional[str]:
         """
         Get the next formatted sequence number by ID.
@@ -134,6 +237,8 @@ class SequenceService:
         Args:
             sequence_id: Sequence ID
             date: Date to use for formatting
+            mode: "strict" or "fast" (default: SEQUENCE_ALLOCATION_MODE)
+            commit: Commit the session after allocating (see next_by_code)
 
         Returns:
             Formatted sequence string or None
@@ -143,27 +248,117 @@ class SequenceService:
         if not sequence:
             return None
 
-        return self.next_by_code(sequence.code, sequence.company_id, date)
+        return self.next_by_code(sequence.code, sequence.company_id, date, mode, commit)
+
+    # -------------------------------------------------------------------------
+    # Allocation
+    # -------------------------------------------------------------------------
+
+    def _allocate_locked(
+        self,
+        db: Session,
+        sequence_id: int,
+        date: datetime,
+        count: int,
+    ) -> Tuple[int, int, Tuple[Optional[datetime], Optional[datetime]]]:
+        """
+        Allocate count numbers under a row lock held by db's transaction.
+
+        Returns:
+            (first number, increment, (period start, period end))
+        """
+        sequence = (
+            db.query(Sequence)
+            .filter(Sequence.id == sequence_id)
+            .with_for_update()
+            .populate_existing()
+            .one()
+        )
+        increment = sequence.number_increment or 1
+
+        # Check for reset
+        if sequence.should_reset(date):
+            self._reset_sequence(sequence, date)
+
+        # Get the number (use date range if configured)
+        if sequence.use_date_range:
+            number, date_range = self._next_date_range_number(db, sequence, date, count)
+            period = (_naive(date_range.date_from), _naive(date_range.date_to))
+        else:
+            number = sequence.number_next
+            sequence.number_next += count * increment
+            sequence.last_reset_date = sequence.last_reset_date or date
+            period = self._reset_period_bounds(sequence, date)
+
+        db.flush()
+        return number, increment, period
+
+    def _reserve(
+        self,
+        sequence_id: int,
+        date: datetime,
+        count: int,
+    ) -> Tuple[int, int, Tuple[Optional[datetime], Optional[datetime]]]:
+        """Reserve numbers in a short transaction of its own."""
+        session = Session(bind=self.db.get_bind())
+        try:
+            result = self._allocate_locked(session, sequence_id, date, count)
+            session.commit()
+            return result
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _next_from_block(self, sequence_id: int, date: datetime) -> int:
+        """Hand out the next number from this process's reserved block."""
+        with _get_sequence_lock(sequence_id):
+            blocks = _blocks.setdefault(sequence_id, [])
+            block = next((b for b in blocks if b.contains(date) and not b.exhausted), None)
+
+            if block is None:
+                block_size = max(settings.SEQUENCE_BLOCK_SIZE, 1)
+                start, increment, (date_from, date_to) = self._reserve(sequence_id, date, block_size)
+                block = _NumberBlock(
+                    next=start,
+                    end=start + block_size * increment,
+                    increment=increment,
+                    date_from=date_from,
+                    date_to=date_to,
+                )
+                # Keep unspent blocks of other periods for back-dated numbers
+                blocks[:] = [b for b in blocks if not b.exhausted]
+                blocks.append(block)
+
+            number = block.next
+            block.next += block.increment
+            return number
 
     def _next_date_range_number(
         self,
+        db: Session,
         sequence: Sequence,
         date: datetime,
-    ) -> int:
-        """Get the next number for a date-range sequence."""
+        count: int = 1,
+    ) -> Tuple[int, SequenceDateRange]:
+        """Get the next number(s) for a date-range sequence."""
         # Find or create date range
         date_range = (
-            self.db.query(SequenceDateRange)
+            db.query(SequenceDateRange)
             .filter(
                 SequenceDateRange.sequence_id == sequence.id,
                 SequenceDateRange.date_from <= date,
                 SequenceDateRange.date_to >= date,
             )
+            .with_for_update()
+            .populate_existing()
             .first()
         )
 
         if not date_range:
             # Create a new date range for the current year
+            # (the sequence row lock serializes creation)
             year_start = datetime(date.year, 1, 1)
             year_end = datetime(date.year, 12, 31, 23, 59, 59)
 
@@ -173,13 +368,33 @@ class SequenceService:
                 date_to=year_end,
                 number_next=1,
             )
-            self.db.add(date_range)
-            self.db.flush()
+            db.add(date_range)
+            db.flush()
 
         number = date_range.number_next
-        date_range.number_next += sequence.number_increment
+        date_range.number_next += count * (sequence.number_increment or 1)
 
-        return number
+        return number, date_range
+
+    @staticmethod
+    def _reset_period_bounds(
+        sequence: Sequence,
+        date: datetime,
+    ) -> Tuple[Optional[datetime], Optional[datetime]]:
+        """Period of date in which numbers of a resetting sequence are valid."""
+        date = _naive(date)
+        if sequence.reset_period == "year":
+            start = datetime(date.year, 1, 1)
+            end = datetime(date.year + 1, 1, 1)
+        elif sequence.reset_period == "month":
+            start = datetime(date.year, date.month, 1)
+            end = datetime(date.year + date.month // 12, date.month % 12 + 1, 1)
+        elif sequence.reset_period == "day":
+            start = datetime(date.year, date.month, date.day)
+            end = start + timedelta(days=1)
+        else:
+            return None, None
+        return start, end - timedelta(microseconds=1)
 
     def _reset_sequence(self, sequence: Sequence, date: datetime) -> None:
         """Reset a sequence to 1."""
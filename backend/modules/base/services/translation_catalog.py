@@ -0,0 +1,214 @@
+"""
+Translation Catalogs
+
+In-memory catalogs of non-record translations (code strings, views,
+selections, ...), loaded lazily per language in one query and served
+from immutable mappings:
+
+- ``LanguageCatalog.messages`` maps (type, name) to the translated value
+  across all modules; ``LanguageCatalog.modules`` holds the same data
+  split per module
+- Each catalog carries a content hash used as its version/ETag
+- A language is reloaded after a transaction that changed its
+  translations commits anywhere in the cluster (see CacheGeneration)
+
+Record (model field) translations are per res_id and stay in the database.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.core.cache import CacheGeneration, CommitInvalidation
+
+from ..models.translation import IrTranslation
+
+logger = logging.getLogger(__name__)
+
+MessageKey = Tuple[str, str]  # (type, name)
+
+
+def fallback_chain(lang: str) -> Tuple[str, ...]:
+    """Languages tried in order for a lookup, e.g. fr_CA -> (fr_CA, fr)."""
+    base = lang.split("_", 1)[0]
+    return (lang, base) if base != lang else (lang,)
+
+
+def catalog_version(messages: Mapping[MessageKey, str]) -> str:
+    """Stable content hash of a catalog."""
+    digest = hashlib.sha256()
+    for (type_, name), value in sorted(messages.items()):
+        digest.update(json.dumps([type_, name, value], ensure_ascii=False).encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class Catalog:
+    """Immutable translations of one language (optionally one module)."""
+
+    lang: str
+    module_name: Optional[str]
+    messages: Mapping[MessageKey, str]
+    version: str
+
+    def get(self, type_: str, name: str) -> Optional[str]:
+        return self.messages.get((type_, name))
+
+    def by_name(self, type_: Optional[str] = None) -> Dict[str, str]:
+        """name -> value, optionally restricted to one translation type."""
+        return {
+            name: value
+            for (t, name), value in self.messages.items()
+            if type_ is None or t == type_
+        }
+
+
+@dataclass(frozen=True)
+class LanguageCatalog(Catalog):
+    """Catalog of a whole language with per-module catalogs."""
+
+    modules: Mapping[Optional[str], Catalog]
+
+
+def _make_catalog(lang: str, module_name: Optional[str], messages: Dict[MessageKey, str]) -> Catalog:
+    return Catalog(lang, module_name, MappingProxyType(messages), catalog_version(messages))
+
+
+class TranslationCatalogs:
+    """Process-wide, lazily loaded translation catalogs by language."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._catalogs: Dict[str, Tuple[Any, LanguageCatalog]] = {}
+        self._generations: Dict[str, CacheGeneration] = {}
+        # Bumped when a change isn't tied to one language
+        self.generation = CacheGeneration("translations")
+
+    def _language_generation(self, lang: str) -> CacheGeneration:
+        generation = self._generations.get(lang)
+        if generation is None:
+            with self._lock:
+                generation = self._generations.setdefault(lang, CacheGeneration(f"translations:{lang}"))
+        return generation
+
+    def _token(self, lang: str) -> Any:
+        return self.generation.token(), self._language_generation(lang).token()
+
+    def get_language(self, db: Session, lang: str) -> LanguageCatalog:
+        """Catalog of a language, loading it on first use or after a change."""
+        token = self._token(lang)
+        entry = self._catalogs.get(lang)
+        if entry is not None and entry[0] == token:
+            return entry[1]
+
+        catalog = self._load(db, lang)
+        with self._lock:
+            self._catalogs[lang] = (token, catalog)
+        return catalog
+
+    def get_catalog(self, db: Session, lang: str, module_name: Optional[str] = None) -> Catalog:
+        """Catalog of a language, or of one module within it."""
+        catalog = self.get_language(db, lang)
+        if module_name is None:
+            return catalog
+        module = catalog.modules.get(module_name)
+        if module is None:
+            module = _make_catalog(lang, module_name, {})
+        return module
+
+    def lookup(self, db: Session, lang: str, type_: str, name: str) -> Optional[str]:
+        """Translated value following the language fallback chain."""
+        for code in fallback_chain(lang):
+            value = self.get_language(db, code).messages.get((type_, name))
+            if value is not None:
+                return value
+        return None
+
+    def invalidate(self, lang: Optional[str] = None) -> None:
+        """Reload a language (all languages if None) here and in other processes."""
+        if lang is None:
+            self.generation.bump()
+        else:
+            self._language_generation(lang).bump()
+
+    @staticmethod
+    def _load(db: Session, lang: str) -> LanguageCatalog:
+        rows = (
+            db.query(
+                IrTranslation.type,
+                IrTranslation.name,
+                IrTranslation.value,
+                IrTranslation.module_name,
+            )
+            .filter(
+                IrTranslation.lang == lang,
+                IrTranslation.res_id.is_(None),
+                IrTranslation.value.isnot(None),
+                IrTranslation.value != "",
+            )
+            .all()
+        )
+
+        messages: Dict[MessageKey, str] = {}
+        per_module: Dict[Optional[str], Dict[MessageKey, str]] = {}
+        for type_, name, value, module_name in rows:
+            messages[(type_, name)] = value
+            per_module.setdefault(module_name, {})[(type_, name)] = value
+
+        modules = {
+            module_name: _make_catalog(lang, module_name, module_messages)
+            for module_name, module_messages in per_module.items()
+        }
+        logger.debug(f"Translation catalog loaded: {lang} ({len(rows)} entries)")
+        return LanguageCatalog(
+            lang=lang,
+            module_name=None,
+            messages=MappingProxyType(messages),
+            version=catalog_version(messages),
+            modules=MappingProxyType(modules),
+        )
+
+
+translation_catalogs = TranslationCatalogs()
+
+
+# -------------------------------------------------------------------------
+# Invalidation
+# -------------------------------------------------------------------------
+
+def _invalidate_catalogs(session: Session, changed: Set[Optional[str]]) -> None:
+    if None in changed:
+        translation_catalogs.invalidate()
+        return
+    for lang in changed:
+        translation_catalogs.invalidate(lang)
+
+
+_invalidation = CommitInvalidation("translation_catalogs", _invalidate_catalogs)
+
+
+def mark_changed(session: Session, lang: Optional[str] = None) -> None:
+    """
+    Reload a language's catalog when the session commits.
+
+    Needed for bulk query updates/deletes, which don't emit mapper events.
+    """
+    _invalidation.mark(session, lang)
+
+
+def _mark_translation_changed(mapper, connection, target) -> None:
+    session = object_session(target)
+    if session is not None and target.res_id is None:
+        mark_changed(session, target.lang)
+
+
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(IrTranslation, _event_name, _mark_translation_changed)
@@ -6,6 +6,9 @@ Provides i18n functionality including:
 - Language file import/export (JSON, PO formats)
 - Model field translation
 - Code string translation
+
+Non-record translations are served from in-memory catalogs (see
+translation_catalog); record translations are read from the database.
 """
 
 import json
@@ -23,6 +26,10 @@ from ..models.translation import (
     TranslationType,
     TranslationState,
 )
+from .translation_catalog import Catalog, mark_changed, translation_catalogs
+
+# Keys per IN (...) list when looking up existing translations in bulk
+LOOKUP_BATCH_SIZE = 500
 
 
 class TranslationService:
@@ -169,6 +176,7 @@ class TranslationService:
         self.db.query(IrTranslation).filter(
             IrTranslation.lang == code
         ).delete()
+        mark_changed(self.db, code)
 
         self.db.delete(language)
         self.db.flush()
@@ -189,6 +197,9 @@ class TranslationService:
         """
         Get translation for a text.
 
+        Falls back along the language chain (e.g. fr_CA, then fr) before
+        returning the source text.
+
         Args:
             text: Source text to translate
             lang: Target language code
@@ -199,9 +210,32 @@ class TranslationService:
         Returns:
             Translated text or original if not found
         """
-        return IrTranslation.translate(
-            self.db, text, lang, type, name, res_id
-        )
+        if res_id is not None:
+            return IrTranslation.translate(
+                self.db, text, lang, type, name, res_id
+            )
+
+        if name is None:
+            name = f"_auto_{hash(text)}"
+
+        return translation_catalogs.lookup(self.db, lang, type, name) or text
+
+    def get_catalog(
+        self,
+        lang: str,
+        module_name: Optional[str] = None,
+    ) -> Catalog:
+        """
+        Get the in-memory catalog of a language.
+
+        Args:
+            lang: Language code
+            module_name: Restrict to one module's translations
+
+        Returns:
+            Immutable Catalog ((type, name) -> value, plus version)
+        """
+        return translation_catalogs.get_catalog(self.db, lang, module_name)
 
     def set_translation(
         self,
@@ -425,6 +459,7 @@ class TranslationService:
 
         result = query.delete(synchronize_session=False)
         self.db.flush()
+        mark_changed(self.db, lang)
 
         # Update language counts
         if lang:
@@ -543,28 +578,12 @@ class TranslationService:
         with open(path, "r", encoding="utf-8") as f:
             data = json.load(f)
 
-        created = 0
-        updated = 0
-
-        for source, value in data.items():
-            if isinstance(value, str):
-                name = f"{module_name}.{source}"
-                existing = self.get_translation(name, lang, type)
-                self.set_translation(
-                    source=source,
-                    value=value,
-                    lang=lang,
-                    type=type,
-                    name=name,
-                    module_name=module_name,
-                )
-                if existing:
-                    updated += 1
-                else:
-                    created += 1
-
-        self._update_language_count(lang)
-        return created, updated
+        entries = [
+            {"source": source, "value": value, "name": f"{module_name}.{source}", "type": type}
+            for source, value in data.items()
+            if isinstance(value, str)
+        ]
+        return self._set_many(entries, lang, module_name)
 
     def _load_po_file(
         self,
@@ -577,37 +596,26 @@ class TranslationService:
         with open(path, "r", encoding="utf-8") as f:
             content = f.read()
 
-        created = 0
-        updated = 0
-
         # Parse PO format
         # Pattern matches: msgid "..." msgstr "..."
         pattern = r'msgid\s+"(.+?)"\s*\nmsgstr\s+"(.+?)"'
         matches = re.findall(pattern, content, re.MULTILINE)
 
+        entries = []
         for source, value in matches:
             if source and value:  # Skip empty translations
                 # Unescape PO strings
                 source = source.replace('\\"', '"').replace("\\n", "\n")
                 value = value.replace('\\"', '"').replace("\\n", "\n")
 
-                name = f"{module_name}.{source}"
-                existing = self.get_translation(name, lang, type)
-                self.set_translation(
-                    source=source,
-                    value=value,
-                    lang=lang,
-                    type=type,
-                    name=name,
-                    module_name=module_name,
-                )
-                if existing:
-                    updated += 1
-                else:
-                    created += 1
+                entries.append({
+                    "source": source,
+                    "value": value,
+                    "name": f"{module_name}.{source}",
+                    "type": type,
+                })
 
-        self._update_language_count(lang)
-        return created, updated
+        return self._set_many(entries, lang, module_name)
 
     def export_translations(
         self,
@@ -704,35 +712,7 @@ class TranslationService:
         Returns:
             Tuple of (created_count, updated_count)
         """
-        created = 0
-        updated = 0
-
-        for t in translations:
-            name = t.get("name")
-            type_val = t.get("type", TranslationType.CODE.value)
-            res_id = t.get("res_id")
-
-            existing = None
-            if name:
-                existing = self.get_translation(name, lang, type_val, res_id)
-
-            self.set_translation(
-                source=t["source"],
-                value=t["value"],
-                lang=lang,
-                type=type_val,
-                name=name,
-                res_id=res_id,
-                module_name=t.get("module_name", module_name),
-            )
-
-            if existing:
-                updated += 1
-            else:
-                created += 1
-
-        self._update_language_count(lang)
-        return created, updated
+        return self._set_many(translations, lang, module_name)
 
     def search_translations(
         self,
@@ -824,6 +804,85 @@ class TranslationService:
     # Helper Methods
     # -------------------------------------------------------------------------
 
+    def _set_many(
+        self,
+        translations: List[Dict[str, Any]],
+        lang: str,
+        module_name: Optional[str] = None,
+    ) -> Tuple[int, int]:
+        """
+        Upsert translations with batched lookups and a single flush.
+
+        Same per-entry semantics as IrTranslation.set_translation; a key
+        repeated within the batch counts as created once, then updated.
+        """
+        entries = []
+        for t in translations:
+            type_val = t.get("type") or TranslationType.CODE.value
+            name = t.get("name") or f"_auto_{hash(t['source'])}"
+            entries.append(((type_val, name, t.get("res_id")), t))
+
+        existing = self._find_translations(lang, [key for key, _ in entries])
+
+        created = 0
+        updated = 0
+        for key, t in entries:
+            value = t["value"]
+            state = t.get("state")
+            translation = existing.get(key)
+
+            if translation:
+                translation.source = t["source"]
+                translation.value = value
+                if state:
+                    translation.state = state
+                elif value:
+                    translation.state = TranslationState.TRANSLATED.value
+                updated += 1
+            else:
+                type_val, name, res_id = key
+                translation = IrTranslation(
+                    lang=lang,
+                    type=type_val,
+                    name=name,
+                    res_id=res_id,
+                    source=t["source"],
+                    value=value,
+                    module_name=t.get("module_name", module_name),
+                    state=state or (
+                        TranslationState.TRANSLATED.value if value
+                        else TranslationState.TO_TRANSLATE.value
+                    ),
+                )
+                self.db.add(translation)
+                existing[key] = translation
+                created += 1
+
+        self.db.flush()
+        self._update_language_count(lang)
+        return created, updated
+
+    def _find_translations(
+        self,
+        lang: str,
+        keys: List[Tuple[str, str, Optional[int]]],
+    ) -> Dict[Tuple[str, str, Optional[int]], IrTranslation]:
+        """Existing translations by (type, name, res_id), in batched queries."""
+        names = sorted({name for _, name, _ in keys})
+        types = {type_val for type_val, _, _ in keys}
+        found: Dict[Tuple[str, str, Optional[int]], IrTranslation] = {}
+
+        for start in range(0, len(names), LOOKUP_BATCH_SIZE):
+            rows = self.db.query(IrTranslation).filter(
+                IrTranslation.lang == lang,
+                IrTranslation.type.in_(types),
+                IrTranslation.name.in_(names[start:start + LOOKUP_BATCH_SIZE]),
+            ).all()
+            for row in rows:
+                found.setdefault((row.type, row.name, row.res_id), row)
+
+        return found
+
     def _update_language_count(self, lang: str) -> None:
         """Update translation count for a language."""
         language = self.get_language(lang)
@@ -0,0 +1,260 @@
+"""
+Workflow Engine
+
+Active workflows compiled into immutable state machines shared by
+WorkflowService instances:
+- Transitions indexed by (workflow, from_state), in sequence order
+- Domain conditions compiled into predicates, condition/action Python
+  code compiled once into code objects
+- Reloaded after a workflow or transition change is committed anywhere
+  in the cluster (see CacheGeneration)
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from types import CodeType, MappingProxyType
+from typing import Any, Callable, Dict, FrozenSet, List, Mapping, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import CacheGeneration, invalidate_on_commit
+
+from ..models.workflow import WorkflowDefinition, WorkflowTransition
+
+logger = logging.getLogger(__name__)
+
+# Names available to condition expressions and transition code
+SAFE_GLOBALS = {"__builtins__": {}}
+
+Predicate = Callable[[Any], bool]
+
+
+@lru_cache(maxsize=1024)
+def compile_condition(source: str) -> CodeType:
+    """Compile a condition expression once per process."""
+    return compile(source, "<workflow condition>", "eval")
+
+
+@lru_cache(maxsize=1024)
+def compile_action(source: str) -> CodeType:
+    """Compile transition Python code once per process."""
+    return compile(source, "<workflow action>", "exec")
+
+
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "=": lambda a, e: a == e,
+    "!=": lambda a, e: a != e,
+    "in": lambda a, e: a in e,
+    "not in": lambda a, e: a not in e,
+    ">": lambda a, e: a > e,
+    ">=": lambda a, e: a >= e,
+    "<": lambda a, e: a < e,
+    "<=": lambda a, e: a <= e,
+}
+
+
+def compile_domain(domain: Optional[List]) -> Optional[Predicate]:
+    """
+    Compile a [[field, op, value], ...] domain into ``predicate(record)``.
+
+    Returns None when the domain has no conditions. Unknown operators are
+    ignored; a condition that raises makes the record not match.
+    """
+    checks = []
+    for condition in domain or []:
+        if isinstance(condition, (list, tuple)) and len(condition) >= 3:
+            field, op, value = condition[:3]
+            compare = _OPERATORS.get(op)
+            if compare is not None:
+                checks.append((field, compare, value))
+
+    if not checks:
+        return None
+
+    def predicate(record: Any) -> bool:
+        try:
+            for field, compare, value in checks:
+                if not compare(getattr(record, field, None), value):
+                    return False
+            return True
+        except Exception:
+            return False
+
+    return predicate
+
+
+def evaluate_condition(code: CodeType, record: Any) -> bool:
+    """Evaluate a compiled condition; errors count as False."""
+    try:
+        context = {"record": record, "True": True, "False": False, "None": None}
+        return bool(eval(code, SAFE_GLOBALS, context))
+    except Exception:
+        return False
+
+
+@dataclass(frozen=True)
+class CompiledTransition:
+    """Session-independent, pre-compiled WorkflowTransition."""
+
+    id: int
+    workflow_id: int
+    code: str
+    name: str
+    from_state: str
+    to_state: str
+    sequence: int
+    required_groups: FrozenSet[str]
+    domain: Optional[Predicate]
+    condition: Optional[CodeType]
+    button_name: Optional[str]
+    button_class: Optional[str]
+    icon: Optional[str]
+    confirm_message: Optional[str]
+
+    @classmethod
+    def from_transition(cls, transition: WorkflowTransition) -> "CompiledTransition":
+        condition = None
+        if transition.condition_code:
+            try:
+                condition = compile_condition(transition.condition_code)
+            except SyntaxError as e:
+                # Same outcome as the interpreted check: the condition never passes
+                logger.error(f"Workflow transition '{transition.code}' has an invalid condition: {e}")
+                condition = compile_condition("False")
+        return cls(
+            id=transition.id,
+            workflow_id=transition.workflow_id,
+            code=transition.code,
+            name=transition.name,
+            from_state=transition.from_state,
+            to_state=transition.to_state,
+            sequence=transition.sequence or 0,
+            required_groups=frozenset(transition.required_groups or ()),
+            domain=compile_domain(transition.condition_domain),
+            condition=condition,
+            button_name=transition.button_name,
+            button_class=transition.button_class,
+            icon=transition.icon,
+            confirm_message=transition.confirm_message,
+        )
+
+    def is_allowed(self, record: Optional[Any], user_groups: Optional[FrozenSet[str]]) -> bool:
+        """Whether the transition is available to a user for a record."""
+        if self.required_groups:
+            if not user_groups or self.required_groups.isdisjoint(user_groups):
+                return False
+
+        if record is not None:
+            if self.domain is not None and not self.domain(record):
+                return False
+            if self.condition is not None and not evaluate_condition(self.condition, record):
+                return False
+
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "code": self.code,
+            "name": self.name,
+            "from_state": self.from_state,
+            "to_state": self.to_state,
+            "button_name": self.button_name,
+            "button_class": self.button_class,
+            "icon": self.icon,
+            "confirm_message": self.confirm_message,
+        }
+
+
+@dataclass(frozen=True)
+class CompiledWorkflow:
+    """Immutable state machine of an active workflow."""
+
+    id: int
+    code: str
+    model_name: str
+    default_state: Optional[str]
+    state_codes: FrozenSet[str]
+    transitions: Mapping[str, Tuple[CompiledTransition, ...]]  # from_state -> transitions
+
+    def transitions_from(self, state: str) -> Tuple[CompiledTransition, ...]:
+        return self.transitions.get(state, ())
+
+    def available(
+        self,
+        state: str,
+        record: Optional[Any] = None,
+        user_groups: Optional[FrozenSet[str]] = None,
+    ) -> List[CompiledTransition]:
+        """Transitions available from a state for a user and record."""
+        return [t for t in self.transitions_from(state) if t.is_allowed(record, user_groups)]
+
+
+class WorkflowRegistry:
+    """Process-wide cache of compiled active workflows by id."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._workflows: Optional[Dict[int, CompiledWorkflow]] = None
+        self._token: Any = None
+        self.generation = CacheGeneration("workflows")
+
+    def get(self, db: Session, workflow_id: int) -> Optional[CompiledWorkflow]:
+        """Compiled workflow, or None if it doesn't exist or is inactive."""
+        return self._get_workflows(db).get(workflow_id)
+
+    def invalidate(self) -> None:
+        """Drop compiled workflows here and in other processes."""
+        self.generation.bump()
+
+    def _get_workflows(self, db: Session) -> Dict[int, CompiledWorkflow]:
+        token = self.generation.token()
+        workflows = self._workflows
+        if workflows is not None and self._token == token:
+            return workflows
+
+        definitions = db.query(WorkflowDefinition).filter(WorkflowDefinition.is_active == True).all()
+        transitions = (
+            db.query(WorkflowTransition)
+            .filter(
+                WorkflowTransition.is_active == True,
+                WorkflowTransition.workflow_id.in_([d.id for d in definitions]),
+            )
+            .order_by(WorkflowTransition.sequence, WorkflowTransition.id)
+            .all()
+        ) if definitions else []
+
+        by_state: Dict[int, Dict[str, List[CompiledTransition]]] = {}
+        for transition in transitions:
+            compiled = CompiledTransition.from_transition(transition)
+            by_state.setdefault(compiled.workflow_id, {}).setdefault(compiled.from_state, []).append(compiled)
+
+        workflows = {}
+        for definition in definitions:
+            states = by_state.get(definition.id, {})
+            workflows[definition.id] = CompiledWorkflow(
+                id=definition.id,
+                code=definition.code,
+                model_name=definition.model_name,
+                default_state=definition.default_state,
+                state_codes=frozenset(definition.state_codes),
+                transitions=MappingProxyType({state: tuple(ts) for state, ts in states.items()}),
+            )
+
+        with self._lock:
+            self._workflows = workflows
+            self._token = token
+        logger.debug(f"Workflow registry built: {len(workflows)} workflows, {len(transitions)} transitions")
+        return workflows
+
+
+workflow_registry = WorkflowRegistry()
+
+
+# -------------------------------------------------------------------------
+# Invalidation
+# -------------------------------------------------------------------------
+
+invalidate_on_commit("workflows", workflow_registry.invalidate, WorkflowDefinition, WorkflowTransition)
@@ -6,9 +6,12 @@ Provides workflow engine functionality including:
 - State transitions with conditions and actions
 - State tracking and history
 - Visualization data for frontend
+
+Available transitions are evaluated against compiled, cached workflows
+(see workflow_engine).
 """
 
-from typing import Any, Dict, List, Optional, Type
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Type
 from datetime import datetime
 
 from sqlalchemy.orm import Session
@@ -22,6 +25,7 @@ from ..models.workflow import (
     WorkflowState,
     WorkflowActivity,
 )
+from .workflow_engine import SAFE_GLOBALS, compile_action, workflow_registry
 
 
 class WorkflowService:
@@ -455,121 +459,85 @@ class WorkflowService:
         if not state:
             return []
 
-        workflow = self.get_workflow_by_id(state.workflow_id)
-        if not workflow or not workflow.is_active:
+        workflow = workflow_registry.get(self.db, state.workflow_id)
+        if not workflow:
             return []
 
-        transitions = self.get_transitions(
-            workflow_id=workflow.id,
-            from_state=state.current_state,
-            active_only=True,
-        )
+        groups = self._group_set(user_groups)
+        return [
+            t.to_dict()
+            for t in workflow.available(state.current_state, record, groups)
+        ]
 
-        available = []
-        for t in transitions:
-            if self._check_transition_conditions(t, record, user_groups):
-                available.append({
-                    "id": t.id,
-                    "code": t.code,
-                    "name": t.name,
-                    "from_state": t.from_state,
-                    "to_state": t.to_state,
-                    "button_name": t.button_name,
-                    "button_class": t.button_class,
-                    "icon": t.icon,
-                    "confirm_message": t.confirm_message,
-                })
-
-        return available
-
-    def _check_transition_conditions(
+    def get_available_transitions_many(
         self,
-        transition: WorkflowTransition,
-        record: Optional[Any],
-        user_groups: Optional[List[str]],
-    ) -> bool:
-        """Check if transition conditions are met."""
-        # Check required groups
-        if transition.required_groups:
-            if not user_groups:
-                return False
-            if not any(g in user_groups for g in transition.required_groups):
-                return False
-
-        # Check domain condition
-        if transition.condition_domain and record:
-            if not self._evaluate_domain(transition.condition_domain, record):
-                return False
-
-        # Check Python condition
-        if transition.condition_code and record:
-            if not self._evaluate_condition(transition.condition_code, record):
-                return False
+        model_name: str,
+        res_ids: Iterable[int],
+        user_id: Optional[int] = None,
+        user_groups: Optional[List[str]] = None,
+        records: Optional[Dict[int, Any]] = None,
+    ) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Get available transitions for many records of a model at once.
 
-        return True
+        Loads all workflow states in one query and evaluates the cached,
+        compiled workflows in memory.
 
-    def _evaluate_domain(
-        self,
-        domain: List,
-        record: Any,
-    ) -> bool:
-        """Evaluate domain filter against record."""
-        try:
-            for condition in domain:
-                if isinstance(condition, (list, tuple)) and len(condition) >= 3:
-                    field, op, value = condition[:3]
-
-                    # Get record value
-                    record_value = getattr(record, field, None)
-
-                    # Evaluate condition
-                    if op == "=":
-                        if record_value != value:
-                            return False
-                    elif op == "!=":
-                        if record_value == value:
-                            return False
-                    elif op == "in":
-                        if record_value not in value:
-                            return False
-                    elif op == "not in":
-                        if record_value in value:
-                            return False
-                    elif op == ">":
-                        if not (record_value > value):
-                            return False
-                    elif op == ">=":
-                        if not (record_value >= value):
-                            return False
-                    elif op == "<":
-                        if not (record_value < value):
-                            return False
-                    elif op == "<=":
-                        if not (record_value <= value):
-                            return False
-
-            return True
-        except Exception:
-            return False
+        Args:
+            model_name: Model name
+            res_ids: Record IDs
+            user_id: Current user ID
+            user_groups: User's group codes
+            records: Optional res_id -> record map for condition evaluation
 
-    def _evaluate_condition(
-        self,
-        condition_code: str,
-        record: Any,
-    ) -> bool:
-        """Evaluate Python condition."""
-        try:
-            # Limited context for safety
-            context = {
-                "record": record,
-                "True": True,
-                "False": False,
-                "None": None,
-            }
-            result = eval(condition_code, {"__builtins__": {}}, context)
-            return bool(result)
-        except Exception:
-            return False
+        Returns:
+            Dict of res_id -> list of available transition dicts
+            (empty for records without workflow state)
+        """
+        res_ids = list(dict.fromkeys(res_ids))
+        result: Dict[int, List[Dict[str, Any]]] = {res_id: [] for res_id in res_ids}
+        if not res_ids:
+            return result
+
+        rows = self.db.query(
+            WorkflowState.res_id,
+            WorkflowState.workflow_id,
+            WorkflowState.current_state,
+        ).filter(
+            WorkflowState.model_name == model_name,
+            WorkflowState.res_id.in_(res_ids),
+        ).order_by(WorkflowState.id).all()
+
+        groups = self._group_set(user_groups)
+        records = records or {}
+        # Records without conditions to evaluate share one result per state
+        shared: Dict[tuple, List[Dict[str, Any]]] = {}
+        seen = set()
+
+        for res_id, workflow_id, current_state in rows:
+            # Match get_for_record: the first state row of a record wins
+            if res_id in seen:
+                continue
+            seen.add(res_id)
+
+            workflow = workflow_registry.get(self.db, workflow_id)
+            if not workflow:
+                continue
+
+            record = records.get(res_id)
+            if record is None:
+                key = (workflow_id, current_state)
+                if key not in shared:
+                    shared[key] = [t.to_dict() for t in workflow.available(current_state, None, groups)]
+                result[res_id] = [dict(t) for t in shared[key]]
+            else:
+                result[res_id] = [t.to_dict() for t in workflow.available(current_state, record, groups)]
+
+        return result
+
+    @staticmethod
+    def _group_set(user_groups: Optional[List[str]]) -> Optional[FrozenSet[str]]:
+        return frozenset(user_groups) if user_groups else None
 
     def execute_transition(
         self,
@@ -674,7 +642,7 @@ class WorkflowService:
                     "user_id": user_id,
                     "note": note,
                 }
-                exec(transition.python_code, {"__builtins__": {}}, exec_context)
+                exec(compile_action(transition.python_code), dict(SAFE_GLOBALS), exec_context)
                 action_result = exec_context.get("result")
             except Exception as e:
                 # Log error but don't fail transition
@@ -51,6 +51,7 @@ from .models import (
     RevenueTransaction,
     EventLog,
 )
+from .hooks import register_hooks
 from .services import (
     PublisherService,
     get_publisher_service,
@@ -64,6 +65,8 @@ from .services import (
     get_analytics_service,
 )
 
+register_hooks()
+
 __all__ = [
     # API
     "router",
@@ -4,15 +4,18 @@ Marketplace Analytics API
 Analytics and tracking endpoints.
 """
 
+import math
 from datetime import date, datetime, timedelta
 from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query, Request
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
-from app.api.deps import get_db, get_current_user
+from app.api.deps import get_db, get_current_user, get_optional_user
 from app.models.user import User
 from ..services.analytics_service import AnalyticsService, get_analytics_service
+from ..services.publisher_auth import ApiKeyRejected, authenticate_api_key
+from ..services.publisher_service import PublisherService
 from ..models.publisher import Publisher
 
 router = APIRouter()
@@ -87,6 +90,35 @@ def get_referrer(request: Request) -> Optional[str]:
     return request.headers.get("Referer")
 
 
+def get_request_publisher_id(
+    x_api_key: Optional[str] = Header(None, alias="X-API-Key"),
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_optional_user),
+) -> int:
+    """Publisher of the request: by X-API-Key (pollers, CI) or the logged-in user."""
+    if x_api_key:
+        try:
+            return authenticate_api_key(db, x_api_key, require_active=False).id
+        except ApiKeyRejected as e:
+            if e.reason == "rate_limited":
+                raise HTTPException(
+                    status_code=429,
+                    detail=str(e),
+                    headers={"Retry-After": str(math.ceil(e.retry_after))},
+                )
+            raise HTTPException(status_code=401, detail=str(e))
+
+    if current_user is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    publisher_id = db.query(Publisher.id).filter(
+        Publisher.user_id == current_user.id,
+    ).scalar()
+    if not publisher_id:
+        raise HTTPException(status_code=404, detail="Publisher account not found")
+    return publisher_id
+
+
 # =============================================================================
 # Tracking Endpoints (Public)
 # =============================================================================
@@ -276,19 +308,52 @@ async def get_publisher_analytics(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    publisher_id: int = Depends(get_request_publisher_id),
 ):
-    """Get analytics for current user's publisher account."""
-    # Get publisher for current user
-    publisher = db.query(Publisher).filter(
-        Publisher.user_id == current_user.id,
-    ).first()
+    """Get analytics for the requesting publisher account (user or API key)."""
+    service = get_analytics_service(db)
+    return service.get_publisher_analytics(publisher_id, start_date, end_date)
 
-    if not publisher:
-        raise HTTPException(status_code=404, detail="Publisher account not found")
 
-    service = get_analytics_service(db)
-    return service.get_publisher_analytics(publisher.id, start_date, end_date)
+@router.get("/publisher/stats")
+async def get_publisher_stats(
+    period: str = Query("day", pattern="^(day|month)$"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db),
+    publisher_id: int = Depends(get_request_publisher_id),
+):
+    """Get precomputed statistics and rollups for the requesting publisher account (user or API key)."""
+    service = PublisherService(db)
+    summary = service.get_stats(publisher_id, "all")
+    if not start_date:
+        start_date = date.today() - timedelta(days=30 if period == "day" else 365)
+    history = service.get_stats_history(publisher_id, period, start_date, end_date)
+
+    return {
+        "summary": {
+            "total_modules": summary.total_modules,
+            "published_modules": summary.published_modules,
+            "total_versions": summary.total_versions,
+            "total_downloads": summary.total_downloads,
+            "total_views": summary.total_views,
+            "total_revenue": float(summary.total_revenue or 0),
+            "total_earnings": float(summary.total_earnings or 0),
+            "average_rating": float(summary.average_rating) if summary.average_rating is not None else None,
+            "total_reviews": summary.total_reviews,
+            "calculated_at": summary.calculated_at.isoformat(),
+        } if summary else None,
+        "history": [
+            {
+                "period_start": stats.period_start.date().isoformat(),
+                "downloads": stats.downloads_this_period,
+                "views": stats.views_this_period,
+                "revenue": float(stats.revenue_this_period or 0),
+                "reviews": stats.reviews_this_period,
+            }
+            for stats in history
+        ],
+    }
 
 
 @router.get("/publisher/{publisher_id}/analytics")
@@ -349,6 +414,22 @@ async def aggregate_daily_platform_stats(
     return {"message": f"Daily platform stats aggregated for {stat_date or 'yesterday'}"}
 
 
+@router.post("/aggregate/publisher-stats")
+async def aggregate_publisher_stats(
+    full: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Refresh publisher statistics (only publishers with new activity unless full)."""
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    service = PublisherService(db)
+    if full:
+        return {"publishers": service.refresh_stats()}
+    return service.refresh_stats_incremental()
+
+
 # =============================================================================
 # Event Logging (Internal)
 # =============================================================================
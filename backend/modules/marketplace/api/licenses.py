@@ -14,6 +14,7 @@ from app.api.deps import get_current_active_user, get_db
 from app.models.user import User
 
 from ..services.license_service import LicenseService, get_license_service
+from ..services.license_verification import license_token_signer
 from ..services.module_service import get_module_service
 
 
@@ -84,6 +85,14 @@ class VerifyLicenseResponse(BaseModel):
     trial_ends_at: Optional[str] = None
     error: Optional[str] = None
     message: Optional[str] = None
+    token: Optional[str] = None  # Signed license token for offline checks
+    token_expires_at: Optional[str] = None
+
+
+class LicenseTokenKeyResponse(BaseModel):
+    """Public key verifying offline license tokens."""
+    algorithm: str
+    public_key: str
 
 
 class ActivateLicenseRequest(BaseModel):
@@ -158,6 +167,26 @@ def get_my_licenses(
     return [license_to_response(lic) for lic in licenses]
 
 
+# Declared before /{license_key} so it isn't taken for a key
+@router.get("/token-key", response_model=LicenseTokenKeyResponse)
+def get_license_token_key():
+    """
+    Get the public key verifying offline license tokens.
+
+    This endpoint is public; instances cache the key and check the token
+    returned by /verify locally until it nears expiry.
+    """
+    if not license_token_signer.enabled:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Offline license tokens are not enabled"
+        )
+    return LicenseTokenKeyResponse(
+        algorithm=license_token_signer.algorithm,
+        public_key=license_token_signer.public_key,
+    )
+
+
 @router.get("/{license_key}", response_model=LicenseDetailResponse)
 def get_license(
     license_key: str,
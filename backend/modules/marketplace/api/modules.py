@@ -16,6 +16,7 @@ from app.models.user import User
 
 from ..services.module_service import ModuleService, get_module_service
 from ..services.publisher_service import get_publisher_service
+from ..services.search_service import get_search_service
 from ..models.publisher import Publisher
 
 
@@ -179,6 +180,14 @@ class SearchResponse(BaseModel):
     total: int
     limit: int
     offset: int
+    facets: Dict[str, Dict[str, int]] = {}  # {category: {id: n}, price: {band: n}, rating: {"4": n}}
+
+
+class SuggestionResponse(BaseModel):
+    """Autocomplete suggestion."""
+    text: str
+    kind: str
+    slug: Optional[str] = None
 
 
 # -------------------------------------------------------------------------
@@ -239,6 +248,7 @@ def list_modules(
     query: Optional[str] = Query(None, description="Search query"),
     category: Optional[int] = Query(None, description="Category ID"),
     license_type: Optional[str] = Query(None, description="License type filter"),
+    price_band: Optional[str] = Query(None, description="Price band: free, under_50, 50_to_200, 200_plus"),
     publisher: Optional[int] = Query(None, description="Publisher ID filter"),
     tags: Optional[str] = Query(None, description="Comma-separated tags"),
     min_rating: Optional[float] = Query(None, ge=1, le=5),
@@ -248,18 +258,19 @@ def list_modules(
     db: Session = Depends(get_db),
 ):
     """
-    List and search marketplace modules.
+    List and search marketplace modules, with facet counts.
 
     Public endpoint - no authentication required.
     """
-    service = get_module_service(db)
+    service = get_search_service(db)
 
     tag_list = tags.split(",") if tags else None
 
-    modules, total = service.search_modules(
+    result = service.search(
         query=query,
         category_id=category,
         license_type=license_type,
+        price_band=price_band,
         publisher_id=publisher,
         tags=tag_list,
         min_rating=min_rating,
@@ -269,13 +280,28 @@ def list_modules(
     )
 
     return SearchResponse(
-        modules=[module_to_list_response(m) for m in modules],
-        total=total,
+        modules=[module_to_list_response(m) for m in result.modules],
+        total=result.total,
         limit=limit,
         offset=offset,
+        facets=result.facets,
     )
 
 
+@router.get("/suggest", response_model=List[SuggestionResponse])
+def suggest_modules(
+    q: str = Query(..., min_length=1, max_length=100, description="Typed prefix"),
+    limit: int = Query(10, ge=1, le=20),
+    db: Session = Depends(get_db),
+):
+    """Autocomplete module names, tags and keywords by prefix."""
+    service = get_search_service(db)
+    return [
+        SuggestionResponse(text=s.text, kind=s.kind, slug=s.slug)
+        for s in service.suggest(q, limit=limit)
+    ]
+
+
 @router.get("/featured", response_model=List[ModuleListResponse])
 def get_featured_modules(
     limit: int = Query(10, ge=1, le=50),
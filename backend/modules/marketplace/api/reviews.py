@@ -606,3 +606,18 @@ async def feature_review(
         return {"message": f"Review {'featured' if featured else 'unfeatured'} successfully"}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/moderation/rating-summaries/rebuild")
+async def rebuild_rating_summaries(
+    module_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Recompute rating summaries from the reviews (one module, or all)."""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    service = get_review_service(db)
+    count = service.rebuild_rating_summaries([module_id] if module_id else None)
+    return {"message": f"Rebuilt {count} rating summaries", "rebuilt": count}
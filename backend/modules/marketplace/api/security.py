@@ -7,14 +7,23 @@ Code signing, security scanning, and trusted publisher management.
 from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, status
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
 from app.api.deps.database import get_db
 from app.api.deps.auth import get_current_active_user
+from app.core.background_tasks import task_manager
+from app.core.config import settings
 from app.models.user import User
 
-from ..services.security_service import SecurityService, get_security_service
+from ..services.package_ingestion import PackageTooLarge
+from ..services.security_service import (
+    SecurityService,
+    get_security_service,
+    mark_package_scan_failed,
+    run_package_scan,
+)
 
 
 router = APIRouter(prefix="/security", tags=["Marketplace Security"])
@@ -110,6 +119,8 @@ class SecurityScanResponse(BaseModel):
     info_count: int
     findings: List[Dict[str, Any]]
     error_message: Optional[str]
+    package_sha256: Optional[str] = None
+    package_size: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -218,6 +229,8 @@ def scan_to_response(scan) -> SecurityScanResponse:
         info_count=scan.info_count,
         findings=scan.findings or [],
         error_message=scan.error_message,
+        package_sha256=scan.package_sha256,
+        package_size=scan.package_size,
     )
 
 
@@ -380,28 +393,97 @@ def create_scan(
 
 
 @router.post("/scans/{scan_id}/run", response_model=SecurityScanResponse)
-async def run_scan(
+def run_scan(
     scan_id: str,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
     """
-    Run a security scan on uploaded module content.
+    Run a security scan on uploaded module content and wait for the result.
 
-    The file should be a ZIP archive of the module.
+    The file should be a ZIP archive of the module. Large packages
+    should use /scans/{scan_id}/submit instead.
     """
     service = get_security_service(db)
 
     try:
-        content = await file.read()
-        scan = service.run_security_scan(scan_id, content)
+        service.attach_package(scan_id, file.file)
+        scan = service.run_security_scan(scan_id)
+    except PackageTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+    return scan_to_response(scan)
+
+
+@router.post(
+    "/scans/{scan_id}/submit",
+    response_model=SecurityScanResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def submit_scan(
+    scan_id: str,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Queue a security scan of an uploaded module package.
+
+    The package is streamed to storage and scanned in the background;
+    poll GET /scans/{scan_id} until the status is completed or failed.
+    """
+    service = get_security_service(db)
+
+    try:
+        scan = await run_in_threadpool(service.attach_package, scan_id, file.file)
+    except PackageTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e)
         )
 
+    task_manager.submit_task(
+        run_package_scan,
+        args=(scan_id,),
+        max_retries=0,
+        timeout=settings.PACKAGE_SCAN_TIMEOUT,
+        metadata={"scan_id": scan_id, "package_sha256": scan.package_sha256},
+        on_failure=mark_package_scan_failed,
+    )
+
+    return scan_to_response(scan)
+
+
+@router.get("/scans/{scan_id}", response_model=SecurityScanResponse)
+def get_scan(
+    scan_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Get a security scan (status polling for submitted scans)."""
+    service = get_security_service(db)
+    scan = service.get_scan(scan_id)
+
+    if not scan:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Scan not found"
+        )
+
     return scan_to_response(scan)
 
 
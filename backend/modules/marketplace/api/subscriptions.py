@@ -5,17 +5,20 @@ Subscription management, plans, invoices, and billing.
 """
 
 from typing import Any, Dict, List, Optional
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel, Field
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_active_user, get_db
 from app.models.user import User
 
+from ..services.billing_run_service import BillingRunService
 from ..services.subscription_service import SubscriptionService
+from ..services.usage_ingestion import UsageEvent, usage_buffer
 from ..models.subscription import (
     BillingCycle,
     SubscriptionStatus,
@@ -234,6 +237,53 @@ class RecordUsageRequest(BaseModel):
     metadata: Optional[Dict[str, Any]] = None
 
 
+class UsageEventRequest(BaseModel):
+    """Metered usage event."""
+    subscription_id: int
+    metric: str = Field(..., min_length=1, max_length=50)
+    quantity: float = Field(..., gt=0)
+    idempotency_key: str = Field(..., min_length=1, max_length=100)
+    period_start: Optional[date] = None
+    period_end: Optional[date] = None
+
+
+class IngestUsageRequest(BaseModel):
+    """Bulk usage ingestion request."""
+    events: List[UsageEventRequest] = Field(..., min_length=1, max_length=10000)
+
+
+class IngestUsageResponse(BaseModel):
+    """Bulk usage ingestion response."""
+    accepted: int
+    rejected: List[Dict[str, Any]]
+
+
+class StartBillingRunRequest(BaseModel):
+    """Start billing run request."""
+    kind: str = Field(..., pattern="^(renewals|trials|overdue)$")
+    run_date: Optional[date] = None
+    chunk_size: Optional[int] = Field(None, gt=0)
+
+
+class BillingRunResponse(BaseModel):
+    """Billing run response."""
+    run_id: str
+    kind: str
+    run_date: str
+    status: str
+    cursor: int
+    chunk_size: int
+    workers: Optional[int]
+    processed_count: int
+    failed_count: int
+    invoice_count: int
+    duration_seconds: float
+    items_per_second: float
+    started_at: Optional[str]
+    completed_at: Optional[str]
+    error_summary: Optional[List[Dict[str, Any]]]
+
+
 # -------------------------------------------------------------------------
 # Helper Functions
 # -------------------------------------------------------------------------
@@ -315,6 +365,27 @@ def invoice_to_response(inv) -> InvoiceResponse:
     )
 
 
+def billing_run_to_response(run) -> BillingRunResponse:
+    """Convert billing run model to response."""
+    return BillingRunResponse(
+        run_id=run.run_id,
+        kind=run.kind,
+        run_date=run.run_date.isoformat(),
+        status=run.status,
+        cursor=run.cursor,
+        chunk_size=run.chunk_size,
+        workers=run.workers,
+        processed_count=run.processed_count or 0,
+        failed_count=run.failed_count or 0,
+        invoice_count=run.invoice_count or 0,
+        duration_seconds=float(run.duration_seconds or 0),
+        items_per_second=run.items_per_second,
+        started_at=run.started_at.isoformat() if run.started_at else None,
+        completed_at=run.completed_at.isoformat() if run.completed_at else None,
+        error_summary=run.error_summary,
+    )
+
+
 def payment_to_response(pmt) -> PaymentResponse:
     """Convert payment to response model."""
     return PaymentResponse(
@@ -448,6 +519,85 @@ def update_plan(
     return plan_to_response(plan)
 
 
+# -------------------------------------------------------------------------
+# Billing Run Endpoints
+# -------------------------------------------------------------------------
+
+
+@router.post("/billing-runs", response_model=BillingRunResponse)
+def start_billing_run(
+    data: StartBillingRunRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Run a billing job (renewals, trials or overdue).
+
+    Resumes today's run of the job if it was interrupted.
+    Requires admin privileges.
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+
+    service = BillingRunService(db)
+    run = service.run(data.kind, run_date=data.run_date, chunk_size=data.chunk_size)
+    return billing_run_to_response(run)
+
+
+@router.get("/billing-runs", response_model=List[BillingRunResponse])
+def list_billing_runs(
+    kind: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """List recent billing runs with their progress and throughput."""
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+
+    service = BillingRunService(db)
+    return [billing_run_to_response(run) for run in service.list_runs(kind, limit)]
+
+
+@router.get("/billing-runs/{run_id}", response_model=BillingRunResponse)
+def get_billing_run(
+    run_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Get a billing run."""
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+
+    run = BillingRunService(db).get_run(run_id)
+    if not run:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Billing run not found"
+        )
+    return billing_run_to_response(run)
+
+
+@router.post("/billing-runs/{run_id}/resume", response_model=BillingRunResponse)
+def resume_billing_run(
+    run_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Resume an interrupted or failed billing run after its checkpoint."""
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+
+    try:
+        run = BillingRunService(db).resume_run(run_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return billing_run_to_response(run)
+
+
 # -------------------------------------------------------------------------
 # Subscription Endpoints
 # -------------------------------------------------------------------------
@@ -814,6 +964,39 @@ def list_subscription_usage(
     ]
 
 
+@router.post("/usage/events", response_model=IngestUsageResponse)
+def ingest_usage_events(
+    data: IngestUsageRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Record metered usage events in bulk.
+
+    Events are acknowledged once committed; each idempotency key counts
+    once per subscription, so failed requests can be retried as a whole.
+    """
+    events = [
+        UsageEvent(
+            subscription_id=e.subscription_id,
+            metric=e.metric,
+            quantity=Decimal(str(e.quantity)),
+            idempotency_key=e.idempotency_key,
+            period_start=e.period_start,
+            period_end=e.period_end,
+        )
+        for e in data.events
+    ]
+    try:
+        result = usage_buffer.ingest(db, events, user_id=current_user.id)
+    except (TimeoutError, SQLAlchemyError):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Usage could not be recorded, retry later"
+        )
+    return IngestUsageResponse(**result)
+
+
 @router.post("/{subscription_id}/usage", response_model=UsageResponse, status_code=status.HTTP_201_CREATED)
 def record_usage(
     subscription_id: int,
@@ -836,8 +1019,6 @@ def record_usage(
             subscription_id=subscription_id,
             metric=data.metric,
             quantity=Decimal(str(data.quantity)),
-            unit_price=Decimal(str(data.unit_price)) if data.unit_price else None,
-            metadata=data.metadata,
         )
     except ValueError as e:
         raise HTTPException(
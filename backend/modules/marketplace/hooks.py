@@ -0,0 +1,32 @@
+"""
+Marketplace Lifecycle Hooks
+
+Background flushers and worker pools of the marketplace, started and
+stopped through the module registry's "startup" and "shutdown" hooks so
+they only run when the marketplace module is loaded.
+"""
+
+from typing import Optional
+
+from app.core.modules.registry import ModuleRegistry, get_registry
+
+from .services.license_verification import heartbeat_buffer
+from .services.package_ingestion import shutdown_scan_pool
+from .services.publisher_auth import api_key_usage_buffer
+from .services.usage_ingestion import usage_buffer
+
+
+def register_hooks(registry: Optional[ModuleRegistry] = None) -> None:
+    """Register the marketplace startup/shutdown hooks."""
+    registry = registry or get_registry()
+
+    registry.register_hook("startup", heartbeat_buffer.start)
+    registry.register_hook("shutdown", heartbeat_buffer.stop)
+
+    registry.register_hook("startup", usage_buffer.start)
+    registry.register_hook("shutdown", usage_buffer.stop)
+
+    registry.register_hook("startup", api_key_usage_buffer.start)
+    registry.register_hook("shutdown", api_key_usage_buffer.stop)
+
+    registry.register_hook("shutdown", shutdown_scan_pool)
@@ -58,6 +58,7 @@ from .security import (
     SigningKey,
     ModuleSignature,
     SecurityScan,
+    PackageFileScan,
     SecurityPolicy,
     TrustedPublisher,
 )
@@ -79,9 +80,11 @@ from .subscription import (
     SubscriptionInvoice,
     InvoicePayment,
     SubscriptionUsage,
+    UsageEventKey,
     CreditBalance,
     CreditTransaction,
     SubscriptionEvent,
+    BillingRun,
     BillingCycle,
     SubscriptionStatus,
     InvoiceStatus,
@@ -126,6 +129,7 @@ __all__ = [
     "SigningKey",
     "ModuleSignature",
     "SecurityScan",
+    "PackageFileScan",
     "SecurityPolicy",
     "TrustedPublisher",
     # Payouts
@@ -141,9 +145,11 @@ __all__ = [
     "SubscriptionInvoice",
     "InvoicePayment",
     "SubscriptionUsage",
+    "UsageEventKey",
     "CreditBalance",
     "CreditTransaction",
     "SubscriptionEvent",
+    "BillingRun",
     "BillingCycle",
     "SubscriptionStatus",
     "InvoiceStatus",
@@ -11,6 +11,7 @@ from typing import TYPE_CHECKING, List, Optional
 from sqlalchemy import (
     Boolean,
     Column,
+    Computed,
     DateTime,
     ForeignKey,
     Integer,
@@ -21,7 +22,7 @@ from sqlalchemy import (
     Index,
     BigInteger,
 )
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.orm import relationship, backref
 
 from app.db.base import Base
@@ -33,6 +34,15 @@ if TYPE_CHECKING:
     from .license import License
 
 
+# Expression of the generated search_vector column (migration t6u7v8w9x0y1)
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('english', coalesce(display_name, '') || ' ' || replace(technical_name, '_', ' ')), 'A')"
+    " || setweight(to_tsvector('english', coalesce(short_description, '')), 'B')"
+    " || setweight(jsonb_to_tsvector('english', coalesce(tags, '[]') || coalesce(keywords, '[]'), '[\"string\"]'), 'B')"
+    " || setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+)
+
+
 class MarketplaceCategory(Base, TimestampMixin):
     """
     Module categories for organization and browsing.
@@ -142,7 +152,9 @@ class MarketplaceModule(Base, TimestampMixin, AuditMixin):
     # Discovery
     tags = Column(JSONB, default=list)  # ["accounting", "inventory"]
     keywords = Column(JSONB, default=list)  # For search
-    search_vector = Column(Text, nullable=True)  # Full-text search
+    # Weighted full-text document (name A; summary, tags, keywords B;
+    # description C), generated by PostgreSQL: never written
+    search_vector = Column(TSVECTOR, Computed(SEARCH_VECTOR_EXPRESSION, persisted=True))
 
     # Compatibility
     fastvue_versions = Column(JSONB, default=list)  # ["1.0", "1.1", "2.0"]
@@ -219,6 +231,15 @@ class MarketplaceModule(Base, TimestampMixin, AuditMixin):
         Index("ix_modules_featured", "featured", "featured_order"),
         Index("ix_modules_license_type", "license_type"),
         Index("ix_modules_download_count", "download_count"),
+        Index("ix_modules_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_modules_display_name_trgm", "display_name",
+            postgresql_using="gin", postgresql_ops={"display_name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_modules_technical_name_trgm", "technical_name",
+            postgresql_using="gin", postgresql_ops={"technical_name": "gin_trgm_ops"},
+        ),
     )
 
     def __repr__(self) -> str:
@@ -131,6 +131,9 @@ class PublisherPayoutItem(Base, TimestampMixin):
     # Status
     status = Column(String(20), default="pending", index=True)  # pending, processing, completed, failed, on_hold
 
+    # Sent with the provider transfer so retries never pay twice
+    idempotency_key = Column(String(100), unique=True, nullable=True)
+
     # Payout method
     payout_method = Column(String(20), nullable=True)  # stripe, paypal, bank_transfer
     payout_destination = Column(String(200), nullable=True)  # Account ID or email
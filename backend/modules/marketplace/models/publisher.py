@@ -63,7 +63,7 @@ class Publisher(Base, TimestampMixin, AuditMixin):
     verification_type = Column(String(20), nullable=True)  # identity, business, partner
 
     # Status
-    status = Column(String(20), default="pending", index=True)  # pending, active, suspended, banned
+    status = Column(String(20), default="pending")  # pending, active, suspended, banned
     status_reason = Column(Text, nullable=True)
     suspended_at = Column(DateTime(timezone=True), nullable=True)
 
@@ -83,7 +83,8 @@ class Publisher(Base, TimestampMixin, AuditMixin):
 
     # Settings
     notification_settings = Column(JSONB, default=dict)
-    api_key_hash = Column(String(64), nullable=True)  # For CLI publishing
+    api_key_hash = Column(String(64), nullable=True, index=True)  # For CLI publishing
+    api_key_last_used_at = Column(DateTime(timezone=True), nullable=True)  # Written in batches
 
     # Relationships
     user: "User" = relationship(
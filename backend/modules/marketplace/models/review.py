@@ -249,7 +249,8 @@ class RatingSummary(Base, TimestampMixin):
     """
     Pre-aggregated rating statistics per module.
 
-    Updated via triggers or scheduled tasks for performance.
+    Kept current incrementally as reviews change (see ReviewService);
+    rebuilt from the reviews for repair.
     """
     __tablename__ = "marketplace_rating_summaries"
 
@@ -281,6 +282,19 @@ class RatingSummary(Base, TimestampMixin):
     avg_support = Column(Integer, nullable=True)
     avg_value = Column(Integer, nullable=True)
 
+    # Running totals the averages are derived from
+    rating_sum = Column(Integer, default=0, nullable=False)
+    ease_of_use_sum = Column(Integer, default=0, nullable=False)
+    ease_of_use_count = Column(Integer, default=0, nullable=False)
+    features_sum = Column(Integer, default=0, nullable=False)
+    features_count = Column(Integer, default=0, nullable=False)
+    documentation_sum = Column(Integer, default=0, nullable=False)
+    documentation_count = Column(Integer, default=0, nullable=False)
+    support_sum = Column(Integer, default=0, nullable=False)
+    support_count = Column(Integer, default=0, nullable=False)
+    value_sum = Column(Integer, default=0, nullable=False)
+    value_count = Column(Integer, default=0, nullable=False)
+
     # Trends
     rating_trend = Column(String(10), nullable=True)  # up, down, stable
     reviews_this_month = Column(Integer, default=0)
@@ -196,6 +196,11 @@ class SecurityScan(Base, TimestampMixin):
     # Policy violations
     policy_violations = Column(JSONB, default=list)  # Marketplace policy checks
 
+    # Scanned package (stored archive)
+    package_path = Column(String(500), nullable=True)
+    package_sha256 = Column(String(64), nullable=True)
+    package_size = Column(Integer, nullable=True)
+
     # Scanner info
     scanner_version = Column(String(50), nullable=True)
     scan_duration_ms = Column(Integer, nullable=True)
@@ -221,6 +226,25 @@ class SecurityScan(Base, TimestampMixin):
         return self.critical_count > 0 or self.high_count > 0
 
 
+class PackageFileScan(Base):
+    """
+    Cached code-pattern findings of one package file.
+
+    Keyed by the file's content hash and the scanner version, so files
+    unchanged between uploads (and between modules) are scanned once.
+    Findings carry line numbers but no file name.
+    """
+    __tablename__ = "marketplace_package_file_scans"
+
+    content_hash = Column(String(64), primary_key=True)
+    scanner_version = Column(String(50), primary_key=True)
+    findings = Column(JSONB, default=list)  # [{type, severity, message, line, recommendation}]
+    scanned_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"<PackageFileScan {self.content_hash[:12]} v{self.scanner_version}>"
+
+
 class SecurityPolicy(Base, TimestampMixin):
     """
     Security policies for marketplace modules.
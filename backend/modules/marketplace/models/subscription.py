@@ -566,6 +566,28 @@ class SubscriptionUsage(Base, TimestampMixin):
     )
 
 
+class UsageEventKey(Base):
+    """
+    Idempotency key of an ingested usage event.
+
+    Written in the same transaction as the usage it was counted in, so a
+    retried event is recognized and counted once.
+    """
+    __tablename__ = "marketplace_usage_event_keys"
+
+    subscription_id = Column(
+        Integer,
+        ForeignKey("marketplace_subscriptions.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    idempotency_key = Column(String(100), primary_key=True)
+    received_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_usage_event_keys_received", "received_at"),
+    )
+
+
 class CreditBalance(Base, TimestampMixin):
     """
     Credit balance for prepaid billing.
@@ -714,3 +736,61 @@ class SubscriptionEvent(Base, TimestampMixin):
         Index("ix_sub_events_type", "event_type"),
         Index("ix_sub_events_created", "created_at"),
     )
+
+
+class BillingRun(Base, TimestampMixin):
+    """
+    Checkpointed run of a billing job.
+
+    Due records are processed in ID order, in chunks committed one at a
+    time. The cursor is the highest ID up to which every chunk has been
+    committed, so an interrupted run resumes after it. The process
+    executing a run refreshes its heartbeat at every checkpoint; a running
+    run is only taken over once its heartbeat is older than the lease.
+    """
+    __tablename__ = "marketplace_billing_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(
+        String(50),
+        unique=True,
+        nullable=False,
+        index=True,
+        default=lambda: f"run_{uuid.uuid4().hex[:16]}"
+    )
+
+    # Job
+    kind = Column(String(20), nullable=False)  # renewals, trials, overdue
+    run_date = Column(Date, nullable=False)
+    status = Column(String(20), default="running", index=True)  # running, completed, failed
+
+    # Progress
+    cursor = Column(Integer, default=0, nullable=False)
+    chunk_size = Column(Integer, nullable=False)
+    workers = Column(Integer, default=1)
+    processed_count = Column(Integer, default=0)
+    failed_count = Column(Integer, default=0)
+    invoice_count = Column(Integer, default=0)
+
+    # Timing (duration sums the time of all attempts)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+    duration_seconds = Column(Numeric(12, 3), default=Decimal("0"))
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)  # Last checkpoint of the executing process
+
+    error_summary = Column(JSONB, nullable=True)
+
+    __table_args__ = (
+        Index("ix_billing_runs_kind_date", "kind", "run_date"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<BillingRun {self.run_id} {self.kind} - {self.status}>"
+
+    @property
+    def items_per_second(self) -> float:
+        """Throughput over the time spent processing."""
+        duration = float(self.duration_seconds or 0)
+        if not duration:
+            return 0.0
+        return (self.processed_count or 0) / duration
@@ -9,6 +9,7 @@ from .module_service import ModuleService, get_module_service
 from .license_service import LicenseService, get_license_service
 from .review_service import ReviewService, get_review_service
 from .analytics_service import AnalyticsService, get_analytics_service
+from .search_service import MarketplaceSearch, get_search_service
 from .security_service import SecurityService
 from .payout_service import PayoutService
 from .subscription_service import SubscriptionService
@@ -29,6 +30,9 @@ __all__ = [
     # Analytics
     "AnalyticsService",
     "get_analytics_service",
+    # Search
+    "MarketplaceSearch",
+    "get_search_service",
     # Security
     "SecurityService",
     # Payouts
@@ -582,63 +582,62 @@ class AnalyticsService:
         if not end_date:
             end_date = date.today()
 
-        # Get publisher's modules
-        module_ids = self.db.query(MarketplaceModule.id).filter(
+        modules = self.db.query(
+            MarketplaceModule.id,
+            MarketplaceModule.technical_name,
+            MarketplaceModule.display_name,
+            MarketplaceModule.download_count,
+            MarketplaceModule.view_count,
+        ).filter(
             MarketplaceModule.publisher_id == publisher_id,
         ).all()
-        module_ids = [m[0] for m in module_ids]
 
-        if not module_ids:
+        if not modules:
             return {
                 "total_downloads": 0,
                 "total_views": 0,
                 "modules": [],
             }
 
-        # Total downloads
-        total_downloads = self.db.query(ModuleDownload).filter(
-            ModuleDownload.module_id.in_(module_ids),
+        # Period counts of all modules, one grouped query each
+        downloads = dict(self.db.query(
+            ModuleDownload.module_id,
+            func.count(ModuleDownload.id),
+        ).join(
+            MarketplaceModule, MarketplaceModule.id == ModuleDownload.module_id,
+        ).filter(
+            MarketplaceModule.publisher_id == publisher_id,
             ModuleDownload.download_date >= start_date,
             ModuleDownload.download_date <= end_date,
-        ).count()
+        ).group_by(ModuleDownload.module_id).all())
 
-        # Total views
-        total_views = self.db.query(ModuleView).filter(
-            ModuleView.module_id.in_(module_ids),
+        views = dict(self.db.query(
+            ModuleView.module_id,
+            func.count(ModuleView.id),
+        ).join(
+            MarketplaceModule, MarketplaceModule.id == ModuleView.module_id,
+        ).filter(
+            MarketplaceModule.publisher_id == publisher_id,
             ModuleView.view_date >= start_date,
             ModuleView.view_date <= end_date,
-        ).count()
+        ).group_by(ModuleView.module_id).all())
 
-        # Per module stats
-        module_stats = []
-        for module_id in module_ids:
-            module = self.db.query(MarketplaceModule).get(module_id)
-            if module:
-                downloads = self.db.query(ModuleDownload).filter(
-                    ModuleDownload.module_id == module_id,
-                    ModuleDownload.download_date >= start_date,
-                    ModuleDownload.download_date <= end_date,
-                ).count()
-
-                views = self.db.query(ModuleView).filter(
-                    ModuleView.module_id == module_id,
-                    ModuleView.view_date >= start_date,
-                    ModuleView.view_date <= end_date,
-                ).count()
-
-                module_stats.append({
-                    "module_id": module_id,
-                    "technical_name": module.technical_name,
-                    "display_name": module.display_name,
-                    "downloads": downloads,
-                    "views": views,
-                    "total_downloads": module.download_count,
-                    "total_views": module.view_count,
-                })
+        module_stats = [
+            {
+                "module_id": module.id,
+                "technical_name": module.technical_name,
+                "display_name": module.display_name,
+                "downloads": downloads.get(module.id, 0),
+                "views": views.get(module.id, 0),
+                "total_downloads": module.download_count,
+                "total_views": module.view_count,
+            }
+            for module in modules
+        ]
 
         return {
-            "total_downloads": total_downloads,
-            "total_views": total_views,
+            "total_downloads": sum(downloads.values()),
+            "total_views": sum(views.values()),
             "modules": sorted(module_stats, key=lambda x: x["downloads"], reverse=True),
         }
 
@@ -0,0 +1,585 @@
+"""
+Billing Run Service
+
+Runs the periodic subscription billing jobs as checkpointed runs:
+
+- renewals: active/trialing subscriptions whose period has ended
+- trials: trialing subscriptions whose trial has ended
+- overdue: pending invoices past their due date
+
+Due records are paged in ID order (keyset) and handled set-based, one
+chunk per transaction, by up to BILLING_RUN_WORKERS workers each with its
+own session. The invoice numbers of a chunk are allocated together from
+the gap-free invoice sequence just before the chunk commits. A chunk that
+fails is retried record by record, so a bad record only fails itself.
+
+Processed records are no longer due, so running a job again (or resuming
+an interrupted run after its cursor) never bills anything twice. A run is
+claimed before it is executed, so two processes never execute the same
+run; a run whose process died is taken over once BILLING_RUN_LEASE has
+passed since its last checkpoint.
+"""
+
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import and_, bindparam, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+from ..models.subscription import (
+    BillingRun,
+    Subscription,
+    SubscriptionEvent,
+    SubscriptionInvoice,
+    SubscriptionPlan,
+    SubscriptionStatus,
+    SubscriptionUsage,
+    InvoiceStatus,
+)
+from .subscription_service import SubscriptionService
+
+logger = logging.getLogger(__name__)
+
+BILLING_RUN_KINDS = ("renewals", "trials", "overdue")
+
+# Errors kept on a run (the counts cover all of them)
+MAX_RUN_ERRORS = 100
+
+
+@dataclass
+class ChunkResult:
+    """Outcome of a committed chunk."""
+
+    last_id: int
+    processed: int = 0
+    failed: int = 0
+    invoices: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+
+    def merge(self, other: "ChunkResult") -> None:
+        self.processed += other.processed
+        self.failed += other.failed
+        self.invoices += other.invoices
+        self.errors.extend(other.errors)
+
+
+def _due_filter(kind: str, run_date: date):
+    """Condition selecting the records a job still has to process."""
+    if kind == "renewals":
+        return and_(
+            Subscription.status.in_([
+                SubscriptionStatus.ACTIVE.value,
+                SubscriptionStatus.TRIALING.value,
+            ]),
+            Subscription.current_period_end <= run_date,
+            Subscription.auto_renew == True,
+            Subscription.cancel_at_period_end == False,
+        )
+    if kind == "trials":
+        return and_(
+            Subscription.status == SubscriptionStatus.TRIALING.value,
+            Subscription.trial_end <= run_date,
+        )
+    return and_(
+        SubscriptionInvoice.status == InvoiceStatus.PENDING.value,
+        SubscriptionInvoice.due_date < run_date,
+    )
+
+
+def _record_model(kind: str):
+    return SubscriptionInvoice if kind == "overdue" else Subscription
+
+
+class BillingRunService:
+    """
+    Service for running checkpointed billing jobs.
+
+    Example:
+        service = BillingRunService(db)
+        run = service.run("renewals")
+        print(run.processed_count, run.items_per_second)
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ==================== Runs ====================
+
+    def get_run(self, run_id: str) -> Optional[BillingRun]:
+        """Get a billing run by its run ID."""
+        return self.db.query(BillingRun).filter(BillingRun.run_id == run_id).first()
+
+    def list_runs(self, kind: Optional[str] = None, limit: int = 20) -> List[BillingRun]:
+        """List the most recent billing runs."""
+        query = self.db.query(BillingRun)
+        if kind:
+            query = query.filter(BillingRun.kind == kind)
+        return query.order_by(BillingRun.id.desc()).limit(limit).all()
+
+    def run(
+        self,
+        kind: str,
+        run_date: Optional[date] = None,
+        chunk_size: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        session_factory: Optional[Callable[[], Session]] = None,
+    ) -> BillingRun:
+        """
+        Run a billing job, resuming an interrupted run of the same day.
+
+        Args:
+            kind: "renewals", "trials" or "overdue"
+            run_date: Date records are due by (default: today)
+            chunk_size: Records per chunk (default: BILLING_RUN_CHUNK_SIZE)
+            max_workers: Concurrent chunks (default: BILLING_RUN_WORKERS)
+            session_factory: Creates the workers' sessions (default: SessionLocal)
+
+        Returns:
+            The completed billing run
+        """
+        if kind not in BILLING_RUN_KINDS:
+            raise ValueError(f"Unknown billing run kind: {kind}")
+
+        run_date = run_date or date.today()
+
+        run = self.db.query(BillingRun).filter(
+            BillingRun.kind == kind,
+            BillingRun.run_date == run_date,
+            BillingRun.status == "running",
+        ).order_by(BillingRun.id.desc()).first()
+
+        if run:
+            self._claim(run)
+            logger.info(f"Resuming billing run {run.run_id} after record {run.cursor}")
+        else:
+            now = datetime.utcnow()
+            run = BillingRun(
+                kind=kind,
+                run_date=run_date,
+                status="running",
+                cursor=0,
+                chunk_size=chunk_size or settings.BILLING_RUN_CHUNK_SIZE,
+                processed_count=0,
+                failed_count=0,
+                invoice_count=0,
+                duration_seconds=Decimal("0"),
+                started_at=now,
+                heartbeat_at=now,
+            )
+            self.db.add(run)
+            self.db.commit()
+
+        return self._execute(run, max_workers, session_factory)
+
+    def resume_run(
+        self,
+        run_id: str,
+        max_workers: Optional[int] = None,
+        session_factory: Optional[Callable[[], Session]] = None,
+    ) -> BillingRun:
+        """Resume an interrupted or failed run after its checkpoint."""
+        run = self.get_run(run_id)
+        if not run:
+            raise ValueError(f"Billing run {run_id} not found")
+
+        if run.status == "completed":
+            raise ValueError(f"Billing run {run_id} is already completed")
+
+        self._claim(run)
+        return self._execute(run, max_workers, session_factory)
+
+    def _claim(self, run: BillingRun) -> None:
+        """
+        Take over a failed run, or a running one whose process stopped
+        checkpointing; raises ValueError while another process executes it.
+
+        A single conditional UPDATE, so of two processes claiming the same
+        run only one succeeds.
+        """
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=settings.BILLING_RUN_LEASE)
+        claimed = self.db.execute(
+            update(BillingRun)
+            .where(
+                BillingRun.id == run.id,
+                or_(
+                    BillingRun.status == "failed",
+                    and_(
+                        BillingRun.status == "running",
+                        or_(BillingRun.heartbeat_at.is_(None), BillingRun.heartbeat_at < stale),
+                    ),
+                ),
+            )
+            .values(status="running", heartbeat_at=now),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        self.db.commit()
+        if not claimed:
+            raise ValueError(f"Billing run {run.run_id} is being executed by another process")
+        self.db.refresh(run)
+
+    def _execute(
+        self,
+        run: BillingRun,
+        max_workers: Optional[int],
+        session_factory: Optional[Callable[[], Session]],
+    ) -> BillingRun:
+        """Process the due records after the run's cursor."""
+        workers = settings.BILLING_RUN_WORKERS if max_workers is None else max_workers
+        run.workers = workers
+        self.db.commit()
+
+        if run.kind != "overdue":
+            SubscriptionService(self.db).ensure_invoice_sequence()
+
+        started = time.monotonic()
+        try:
+            if workers <= 1:
+                for ids in self._due_chunks(run):
+                    self._checkpoint(run, self._process_chunk(run.kind, run.run_date, ids))
+            else:
+                if session_factory is None:
+                    from app.db.base import SessionLocal
+                    session_factory = SessionLocal
+
+                # Chunks are checkpointed in ID order; a few run ahead
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="billing") as executor:
+                    in_flight = deque()
+                    for ids in self._due_chunks(run):
+                        in_flight.append(executor.submit(
+                            self._run_chunk, session_factory, run.kind, run.run_date, ids
+                        ))
+                        if len(in_flight) >= workers * 2:
+                            self._checkpoint(run, in_flight.popleft().result())
+                    while in_flight:
+                        self._checkpoint(run, in_flight.popleft().result())
+        except Exception:
+            self.db.rollback()
+            run.status = "failed"
+            run.duration_seconds = self._elapsed(run, started)
+            self.db.commit()
+            raise
+
+        run.status = "completed"
+        run.completed_at = datetime.utcnow()
+        run.duration_seconds = self._elapsed(run, started)
+        self.db.commit()
+        self.db.refresh(run)
+
+        logger.info(
+            f"Billing run {run.run_id} ({run.kind}): {run.processed_count} processed, "
+            f"{run.failed_count} failed, {run.invoice_count} invoices "
+            f"in {float(run.duration_seconds):.1f}s ({run.items_per_second:.0f}/s)"
+        )
+        return run
+
+    @staticmethod
+    def _elapsed(run: BillingRun, started: float) -> Decimal:
+        elapsed = Decimal(str(round(time.monotonic() - started, 3)))
+        return (run.duration_seconds or Decimal("0")) + elapsed
+
+    def _due_chunks(self, run: BillingRun) -> Iterator[List[int]]:
+        """Page the IDs of due records after the cursor (keyset)."""
+        model = _record_model(run.kind)
+        due = _due_filter(run.kind, run.run_date)
+        last_id = run.cursor
+
+        while True:
+            ids = list(self.db.scalars(
+                select(model.id).where(due, model.id > last_id).order_by(model.id).limit(run.chunk_size)
+            ))
+            # Don't hold the read transaction while the chunk is processed
+            self.db.commit()
+            if not ids:
+                return
+            yield ids
+            last_id = ids[-1]
+
+    def _checkpoint(self, run: BillingRun, result: ChunkResult) -> None:
+        """Record a committed chunk on the run."""
+        run.cursor = max(run.cursor, result.last_id)
+        run.processed_count += result.processed
+        run.failed_count += result.failed
+        run.invoice_count += result.invoices
+        if result.errors and len(run.error_summary or []) < MAX_RUN_ERRORS:
+            run.error_summary = ((run.error_summary or []) + result.errors)[:MAX_RUN_ERRORS]
+        run.heartbeat_at = datetime.utcnow()
+        self.db.commit()
+
+    # ==================== Chunks ====================
+
+    @staticmethod
+    def _run_chunk(
+        session_factory: Callable[[], Session],
+        kind: str,
+        run_date: date,
+        ids: List[int],
+    ) -> ChunkResult:
+        db = session_factory()
+        try:
+            return BillingRunService(db)._process_chunk(kind, run_date, ids)
+        finally:
+            db.close()
+
+    def _process_chunk(self, kind: str, run_date: date, ids: List[int]) -> ChunkResult:
+        """Process and commit a chunk, one record at a time if it fails."""
+        handler = {
+            "renewals": self._renew,
+            "trials": self._end_trials,
+            "overdue": self._mark_overdue,
+        }[kind]
+
+        try:
+            result = handler(run_date, ids)
+            self.db.commit()
+            return result
+        except Exception as e:
+            self.db.rollback()
+            if len(ids) == 1:
+                return self._record_failure(kind, ids[0], e)
+            logger.warning(f"Billing chunk {ids[0]}-{ids[-1]} failed, retrying records one by one: {e}")
+
+        result = ChunkResult(last_id=ids[-1])
+        for record_id in ids:
+            result.merge(self._process_chunk(kind, run_date, [record_id]))
+        return result
+
+    def _record_failure(self, kind: str, record_id: int, error: Exception) -> ChunkResult:
+        """Record a record that could not be processed."""
+        logger.error(f"Billing run ({kind}) failed for record {record_id}: {error}")
+
+        if kind == "renewals":
+            # Mark as past due
+            try:
+                self.db.query(Subscription).filter(Subscription.id == record_id).update(
+                    {"status": SubscriptionStatus.PAST_DUE.value}, synchronize_session=False
+                )
+                self.db.add(SubscriptionEvent(
+                    subscription_id=record_id,
+                    event_type="payment_failed",
+                    data={"error": str(error)},
+                    triggered_by="system",
+                ))
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                logger.exception(f"Could not mark subscription {record_id} as past due")
+
+        return ChunkResult(
+            last_id=record_id,
+            failed=1,
+            errors=[{"id": record_id, "error": str(error)}],
+        )
+
+    def _lock_due_subscriptions(self, kind: str, run_date: date, ids: List[int]) -> List[SimpleNamespace]:
+        """
+        Load the chunk's subscriptions that are still due, locking them.
+
+        Rows locked by another transaction are waited for, not skipped:
+        the cursor moves past this chunk, so a skipped record would not be
+        billed until the next run. Once the lock is granted the due filter
+        is re-checked, so a record the other transaction processed drops out.
+
+        Plain column values (not ORM objects), changed by the caller and
+        written back with _update_subscriptions.
+        """
+        table = Subscription.__table__
+        rows = self.db.execute(
+            select(table).where(
+                table.c.id.in_(ids),
+                _due_filter(kind, run_date),
+            ).order_by(table.c.id).with_for_update()
+        )
+        return [SimpleNamespace(**row._mapping) for row in rows]
+
+    def _update_subscriptions(self, subscriptions: List[SimpleNamespace]) -> None:
+        """Write back the status and period of subscriptions (bulk, by primary key)."""
+        if subscriptions:
+            self.db.execute(update(Subscription), [
+                {
+                    "id": subscription.id,
+                    "status": subscription.status,
+                    "current_period_start": subscription.current_period_start,
+                    "current_period_end": subscription.current_period_end,
+                }
+                for subscription in subscriptions
+            ])
+
+    def _renew(self, run_date: date, ids: List[int]) -> ChunkResult:
+        """Move due subscriptions to their next period and invoice it."""
+        service = SubscriptionService(self.db)
+        subscriptions = self._lock_due_subscriptions("renewals", run_date, ids)
+        events = []
+
+        for subscription in subscriptions:
+            # Update period
+            old_period_end = subscription.current_period_end
+            subscription.current_period_start = old_period_end
+            subscription.current_period_end = service._calculate_period_end(
+                old_period_end, subscription.billing_cycle
+            )
+
+            # End trial if it was in trial
+            if subscription.status == SubscriptionStatus.TRIALING.value:
+                subscription.status = SubscriptionStatus.ACTIVE.value
+                events.append(self._event(subscription.id, "trial_ended", {}))
+
+        self._update_subscriptions(subscriptions)
+        invoices = self._invoice(service, subscriptions)
+        for subscription in subscriptions:
+            events.append(self._event(subscription.id, "renewed", {
+                "new_period_start": str(subscription.current_period_start),
+                "new_period_end": str(subscription.current_period_end),
+                "invoice_id": invoices[subscription.id],
+            }))
+        self._add_events(events)
+
+        return ChunkResult(last_id=ids[-1], processed=len(subscriptions), invoices=len(invoices))
+
+    def _end_trials(self, run_date: date, ids: List[int]) -> ChunkResult:
+        """Activate (and invoice) or expire subscriptions whose trial ended."""
+        service = SubscriptionService(self.db)
+        subscriptions = self._lock_due_subscriptions("trials", run_date, ids)
+        events = []
+        converted = []
+
+        for subscription in subscriptions:
+            events.append(self._event(subscription.id, "trial_ended", {}))
+
+            if subscription.auto_renew:
+                # Transition to active and generate invoice
+                subscription.status = SubscriptionStatus.ACTIVE.value
+                subscription.current_period_start = subscription.trial_end
+                subscription.current_period_end = service._calculate_period_end(
+                    subscription.trial_end,
+                    subscription.billing_cycle
+                )
+                converted.append(subscription)
+                events.append(self._event(subscription.id, "activated", {"from_trial": True}))
+            else:
+                # Cancel subscription
+                subscription.status = SubscriptionStatus.EXPIRED.value
+                events.append(self._event(subscription.id, "expired", {"reason": "trial_not_converted"}))
+
+        self._update_subscriptions(subscriptions)
+        invoices = self._invoice(service, converted)
+        self._add_events(events)
+
+        return ChunkResult(last_id=ids[-1], processed=len(subscriptions), invoices=len(invoices))
+
+    def _mark_overdue(self, run_date: date, ids: List[int]) -> ChunkResult:
+        """Mark pending invoices past due date as overdue."""
+        invoices = self.db.execute(
+            select(SubscriptionInvoice.id, SubscriptionInvoice.subscription_id).where(
+                SubscriptionInvoice.id.in_(ids),
+                _due_filter("overdue", run_date),
+            ).order_by(SubscriptionInvoice.id).with_for_update()
+        ).all()
+        if not invoices:
+            return ChunkResult(last_id=ids[-1])
+
+        self.db.execute(
+            update(SubscriptionInvoice)
+            .where(SubscriptionInvoice.id.in_([invoice_id for invoice_id, _ in invoices]))
+            .values(status=InvoiceStatus.OVERDUE.value),
+            execution_options={"synchronize_session": False},
+        )
+
+        # Mark subscriptions as past due
+        subscription_ids = sorted({subscription_id for _, subscription_id in invoices if subscription_id})
+        if subscription_ids:
+            self.db.execute(
+                update(Subscription)
+                .where(Subscription.id.in_(subscription_ids))
+                .values(status=SubscriptionStatus.PAST_DUE.value),
+                execution_options={"synchronize_session": False},
+            )
+        self._add_events([
+            self._event(subscription_id, "payment_failed", {"invoice_id": invoice_id, "reason": "overdue"})
+            for invoice_id, subscription_id in invoices
+            if subscription_id
+        ])
+
+        return ChunkResult(last_id=ids[-1], processed=len(invoices))
+
+    def _invoice(self, service: SubscriptionService, subscriptions: List[SimpleNamespace]) -> Dict[int, int]:
+        """
+        Invoice the current period of subscriptions, in bulk.
+
+        Returns:
+            subscription ID -> invoice ID
+        """
+        if not subscriptions:
+            return {}
+
+        plans = {
+            plan.id: plan
+            for plan in self.db.query(SubscriptionPlan).filter(
+                SubscriptionPlan.id.in_({subscription.plan_id for subscription in subscriptions})
+            )
+        }
+        usage = service._unbilled_usage([subscription.id for subscription in subscriptions])
+        rows = [
+            service._invoice_values(subscription, plans[subscription.plan_id], usage.get(subscription.id, []))
+            for subscription in subscriptions
+        ]
+
+        # Last, so the sequence row stays locked only until the commit
+        for row, number in zip(rows, service._next_invoice_numbers(len(rows))):
+            row["invoice_number"] = number
+        invoice_ids = dict(
+            (subscription_id, invoice_id)
+            for invoice_id, subscription_id in self.db.execute(
+                insert(SubscriptionInvoice).returning(
+                    SubscriptionInvoice.id, SubscriptionInvoice.subscription_id
+                ),
+                rows,
+            )
+        )
+
+        # Mark usage as billed
+        billed = [
+            {"b_subscription_id": subscription_id, "b_invoice_id": invoice_ids[subscription_id]}
+            for subscription_id in usage
+        ]
+        if billed:
+            usage_table = SubscriptionUsage.__table__
+            self.db.execute(
+                update(usage_table)
+                .where(
+                    usage_table.c.subscription_id == bindparam("b_subscription_id"),
+                    usage_table.c.billed == False,
+                )
+                .values(billed=True, invoice_id=bindparam("b_invoice_id")),
+                billed,
+            )
+
+        return invoice_ids
+
+    @staticmethod
+    def _event(subscription_id: int, event_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "subscription_id": subscription_id,
+            "event_type": event_type,
+            "data": data,
+            "triggered_by": "system",
+        }
+
+    def _add_events(self, events: List[Dict[str, Any]]) -> None:
+        """Log subscription events in one statement."""
+        if events:
+            self.db.execute(insert(SubscriptionEvent), events)
+
+
+def get_billing_run_service(db: Session) -> BillingRunService:
+    """Dependency for getting billing run service."""
+    return BillingRunService(db)
@@ -22,6 +22,15 @@ from ..models.license import (
     Cart,
     Coupon,
 )
+from .license_verification import (
+    LicenseSnapshot,
+    has_pending_changes,
+    heartbeat_buffer,
+    license_cache,
+    license_token_signer,
+    load_snapshot,
+    mark_changed,
+)
 
 
 class LicenseService:
@@ -193,6 +202,11 @@ class LicenseService:
         """
         Verify a license key.
 
+        Served from the cached license snapshot; only the first check of
+        a new instance writes (to activate it). Check bookkeeping is
+        buffered and written in batches (see HeartbeatBuffer). When offline
+        tokens are enabled, a valid result carries a signed token.
+
         Args:
             license_key: License key to verify
             instance_id: Instance/machine identifier
@@ -201,82 +215,54 @@ class LicenseService:
         Returns:
             Verification result with status and details
         """
-        license = self.get_license_by_key(license_key)
+        snapshot = self.get_license_snapshot(license_key)
 
-        if not license:
+        if not snapshot:
             return {
                 "valid": False,
                 "error": "invalid_license",
                 "message": "License key not found",
             }
 
-        # Check status
-        if license.status != "active":
-            return {
-                "valid": False,
-                "error": "license_inactive",
-                "message": f"License is {license.status}",
-            }
-
-        # Check expiration
-        if license.expires_at and datetime.utcnow() > license.expires_at:
-            return {
-                "valid": False,
-                "error": "license_expired",
-                "message": "License has expired",
-                "expired_at": license.expires_at.isoformat(),
-            }
-
-        # Check domain restriction
-        if license.instance_domains and domain:
-            if domain not in license.instance_domains:
-                return {
-                    "valid": False,
-                    "error": "domain_not_allowed",
-                    "message": f"Domain {domain} not allowed",
-                    "allowed_domains": license.instance_domains,
-                }
-
-        # Check instance activation
-        activation = self.db.query(LicenseActivation).filter(
-            and_(
-                LicenseActivation.license_id == license.id,
-                LicenseActivation.instance_id == instance_id,
-                LicenseActivation.status == "active",
-            )
-        ).first()
+        error = snapshot.check(instance_id, domain)
+        if error:
+            return error
 
-        if not activation:
-            # Check if can activate
-            if license.active_instances >= license.max_instances:
-                return {
+        activation_id = snapshot.activations.get(instance_id)
+        if activation_id is None:
+            # Auto-activate if not found
+            try:
+                activation_id = self.activate_license(license_key, instance_id, domain).id
+            except ValueError:
+                # The cached snapshot was stale; decide on the current license
+                current = load_snapshot(self.db, license_key)
+                if current is None:
+                    return {
+                        "valid": False,
+                        "error": "invalid_license",
+                        "message": "License key not found",
+                    }
+                return current.check(instance_id, domain) or {
                     "valid": False,
-                    "error": "max_instances_reached",
-                    "message": f"Maximum {license.max_instances} instances allowed",
-                    "active_instances": license.active_instances,
+                    "error": "license_inactive",
+                    "message": "License cannot accept new activations",
                 }
 
-            # Auto-activate if not found
-            activation = self.activate_license(license_key, instance_id, domain)
+        heartbeat_buffer.record(snapshot.id, activation_id)
 
-        # Update verification timestamp
-        activation.last_check = datetime.utcnow()
-        activation.check_count += 1
-        license.last_verified_at = datetime.utcnow()
-        self.db.commit()
+        result = snapshot.valid_result(instance_id, activation_id)
+        token = license_token_signer.issue(snapshot, instance_id)
+        if token:
+            result["token"], expires_at = token
+            result["token_expires_at"] = expires_at.isoformat()
+        return result
 
-        return {
-            "valid": True,
-            "license_type": license.license_type,
-            "module_id": license.module_id,
-            "module_name": license.module.technical_name if license.module else None,
-            "expires_at": license.expires_at.isoformat() if license.expires_at else None,
-            "is_trial": license.is_trial,
-            "trial_ends_at": license.trial_ends_at.isoformat() if license.trial_ends_at else None,
-            "features": {},  # Could include tier-specific features
-            "instance_id": instance_id,
-            "activation_id": activation.id,
-        }
+    def get_license_snapshot(self, license_key: str) -> Optional[LicenseSnapshot]:
+        """Cached snapshot of a license; reads the database inside a write."""
+        if has_pending_changes(self.db):
+            # Uncommitted changes aren't in the shared cache
+            return load_snapshot(self.db, license_key)
+        return license_cache.get(self.db, license_key)
 
     # -------------------------------------------------------------------------
     # License Activation
@@ -533,6 +519,7 @@ class LicenseService:
             )
         ).update({"status": "expired"})
 
+        mark_changed(self.db)
         self.db.commit()
         return count
 
@@ -0,0 +1,521 @@
+"""
+License Verification
+
+Read-mostly path behind the phone-home verification endpoint:
+
+- Licenses are served from immutable per-key snapshots (license fields,
+  module name and active instances) cached in process. A snapshot is
+  reloaded after its license or activations change (see CacheGeneration),
+  or after LICENSE_CACHE_TTL
+- Heartbeat bookkeeping (last_check, check_count, last_verified_at) is
+  buffered in memory and written in periodic batched UPDATEs
+- Optionally, a signed token lets an instance verify its license offline
+  until the token nears expiry
+"""
+
+import calendar
+import logging
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+
+from jose import jwk, jwt
+from sqlalchemy import bindparam, event, inspect, select, update
+from sqlalchemy.orm import Session, joinedload, object_session
+
+from app.core.cache import CacheGeneration, CommitInvalidation
+from app.core.config import settings
+
+from ..models.license import License, LicenseActivation
+
+logger = logging.getLogger(__name__)
+
+# Licenses are spread over this many generation counters so a change
+# only reloads the snapshots sharing its counter
+GENERATION_SHARDS = 64
+
+# Columns a verification decision depends on
+_LICENSE_FIELDS = (
+    "license_key", "module_id", "license_type", "status", "expires_at",
+    "is_trial", "trial_ends_at", "max_instances", "active_instances",
+    "instance_domains",
+)
+_ACTIVATION_FIELDS = ("license_id", "instance_id", "status")
+
+
+def _timestamp(value: datetime) -> int:
+    """Unix timestamp of a UTC datetime (naive or aware)."""
+    return calendar.timegm(value.utctimetuple())
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@dataclass(frozen=True)
+class LicenseSnapshot:
+    """Immutable view of a license and its active instances."""
+
+    id: int
+    license_key: str
+    module_id: int
+    module_name: Optional[str]
+    license_type: str
+    status: str
+    expires_at: Optional[datetime]
+    is_trial: bool
+    trial_ends_at: Optional[datetime]
+    max_instances: int
+    active_instances: int
+    instance_domains: Tuple[str, ...]
+    activations: Mapping[str, int]  # active instance_id -> activation id
+
+    @classmethod
+    def from_license(cls, license: License, activations: Dict[str, int]) -> "LicenseSnapshot":
+        return cls(
+            id=license.id,
+            license_key=license.license_key,
+            module_id=license.module_id,
+            module_name=license.module.technical_name if license.module else None,
+            license_type=license.license_type,
+            status=license.status,
+            expires_at=license.expires_at,
+            is_trial=bool(license.is_trial),
+            trial_ends_at=license.trial_ends_at,
+            max_instances=license.max_instances or 0,
+            active_instances=license.active_instances or 0,
+            instance_domains=tuple(license.instance_domains or ()),
+            activations=MappingProxyType(dict(activations)),
+        )
+
+    def check(
+        self,
+        instance_id: str,
+        domain: Optional[str] = None,
+        now: Optional[datetime] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Failed verification result, or None when the instance may use the license.
+
+        An instance that isn't activated yet passes if a slot is free; the
+        caller activates it.
+        """
+        if self.status != "active":
+            return {
+                "valid": False,
+                "error": "license_inactive",
+                "message": f"License is {self.status}",
+            }
+
+        if self.expires_at and (now or datetime.utcnow()) > self.expires_at:
+            return {
+                "valid": False,
+                "error": "license_expired",
+                "message": "License has expired",
+                "expired_at": self.expires_at.isoformat(),
+            }
+
+        if self.instance_domains and domain and domain not in self.instance_domains:
+            return {
+                "valid": False,
+                "error": "domain_not_allowed",
+                "message": f"Domain {domain} not allowed",
+                "allowed_domains": list(self.instance_domains),
+            }
+
+        if instance_id not in self.activations and self.active_instances >= self.max_instances:
+            return {
+                "valid": False,
+                "error": "max_instances_reached",
+                "message": f"Maximum {self.max_instances} instances allowed",
+                "active_instances": self.active_instances,
+            }
+
+        return None
+
+    def valid_result(self, instance_id: str, activation_id: int) -> Dict[str, Any]:
+        return {
+            "valid": True,
+            "license_type": self.license_type,
+            "module_id": self.module_id,
+            "module_name": self.module_name,
+            "expires_at": self.expires_at.isoformat() if self.expires_at else None,
+            "is_trial": self.is_trial,
+            "trial_ends_at": self.trial_ends_at.isoformat() if self.trial_ends_at else None,
+            "features": {},  # Could include tier-specific features
+            "instance_id": instance_id,
+            "activation_id": activation_id,
+        }
+
+
+def load_snapshot(db: Session, license_key: str) -> Optional[LicenseSnapshot]:
+    """Snapshot of a license read from the database, or None if the key doesn't exist."""
+    license = (
+        db.query(License)
+        .options(joinedload(License.module))
+        .filter(License.license_key == license_key)
+        .first()
+    )
+    if license is None:
+        return None
+
+    activations = dict(
+        db.query(LicenseActivation.instance_id, LicenseActivation.id)
+        .filter(
+            LicenseActivation.license_id == license.id,
+            LicenseActivation.status == "active",
+        )
+        .all()
+    )
+    return LicenseSnapshot.from_license(license, activations)
+
+
+# -------------------------------------------------------------------------
+# Snapshot Cache
+# -------------------------------------------------------------------------
+
+
+class LicenseCache:
+    """Process-wide cache of license snapshots by key (unknown keys included)."""
+
+    def __init__(self, ttl: Optional[float] = None, max_size: Optional[int] = None):
+        self.ttl = settings.LICENSE_CACHE_TTL if ttl is None else ttl
+        self.max_size = settings.LICENSE_CACHE_SIZE if max_size is None else max_size
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[Any, float, Optional[LicenseSnapshot]]] = {}
+        # Bumped when a change isn't tied to one license
+        self.generation = CacheGeneration("licenses")
+        self._shards = [CacheGeneration(f"licenses:{i}") for i in range(GENERATION_SHARDS)]
+
+    def _shard(self, license_key: str) -> CacheGeneration:
+        return self._shards[zlib.crc32(license_key.encode("utf-8")) % GENERATION_SHARDS]
+
+    def _token(self, license_key: str) -> Any:
+        return self.generation.token(), self._shard(license_key).token()
+
+    def get(self, db: Session, license_key: str) -> Optional[LicenseSnapshot]:
+        """Snapshot of a license, or None if the key doesn't exist."""
+        token = self._token(license_key)
+        now = time.monotonic()
+        entry = self._entries.get(license_key)
+        if entry is not None and entry[0] == token and now - entry[1] < self.ttl:
+            return entry[2]
+
+        snapshot = load_snapshot(db, license_key)
+        with self._lock:
+            if license_key not in self._entries and len(self._entries) >= self.max_size:
+                # Drop the oldest entry
+                self._entries.pop(next(iter(self._entries)), None)
+            self._entries[license_key] = (token, now, snapshot)
+        return snapshot
+
+    def invalidate(self, license_key: Optional[str] = None) -> None:
+        """Reload a license (all licenses if None) here and in other processes."""
+        if license_key is None:
+            self.generation.bump()
+        else:
+            self._shard(license_key).bump()
+
+    def clear(self) -> None:
+        """Drop this process's snapshots."""
+        with self._lock:
+            self._entries.clear()
+
+
+license_cache = LicenseCache()
+
+
+# -------------------------------------------------------------------------
+# Heartbeat Buffer
+# -------------------------------------------------------------------------
+
+
+class HeartbeatBuffer:
+    """
+    Verification bookkeeping collected in memory and written in batches.
+
+    Checks of the same activation between flushes collapse into one
+    UPDATE that adds their count, so check_count stays exact across
+    processes while last_check lags by at most the flush interval.
+    """
+
+    def __init__(self, flush_interval: Optional[float] = None):
+        self.flush_interval = (
+            settings.LICENSE_HEARTBEAT_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        )
+        self._lock = threading.Lock()
+        self._activations: Dict[int, List[Any]] = {}  # activation id -> [last_check, checks]
+        self._licenses: Dict[int, datetime] = {}  # license id -> last_verified_at
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, license_id: int, activation_id: int, checked_at: Optional[datetime] = None) -> None:
+        checked_at = checked_at or datetime.utcnow()
+        with self._lock:
+            entry = self._activations.get(activation_id)
+            if entry is None:
+                self._activations[activation_id] = [checked_at, 1]
+            else:
+                entry[0] = max(entry[0], checked_at)
+                entry[1] += 1
+            previous = self._licenses.get(license_id)
+            if previous is None or checked_at > previous:
+                self._licenses[license_id] = checked_at
+
+    @property
+    def pending(self) -> int:
+        """Buffered activation checks not written yet."""
+        with self._lock:
+            return sum(checks for _, checks in self._activations.values())
+
+    def flush(self, db: Optional[Session] = None) -> int:
+        """
+        Write buffered bookkeeping and commit.
+
+        Uses its own session when db is None. On failure the entries are
+        put back and retried on the next flush. Returns the number of
+        activations updated.
+        """
+        with self._lock:
+            activations, self._activations = self._activations, {}
+            licenses, self._licenses = self._licenses, {}
+        if not activations and not licenses:
+            return 0
+
+        own_session = db is None
+        if own_session:
+            from app.db.base import SessionLocal
+            db = SessionLocal()
+        try:
+            self._write(db, activations, licenses)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            self._restore(activations, licenses)
+            logger.error(f"License heartbeat flush failed ({len(activations)} activations): {e}")
+            return 0
+        finally:
+            if own_session:
+                db.close()
+
+        logger.debug(f"License heartbeats flushed: {len(activations)} activations, {len(licenses)} licenses")
+        return len(activations)
+
+    @staticmethod
+    def _write(db: Session, activations: Dict[int, List[Any]], licenses: Dict[int, datetime]) -> None:
+        # Core statements: bookkeeping doesn't invalidate license snapshots
+        activation_table = LicenseActivation.__table__
+        license_table = License.__table__
+        if activations:
+            db.execute(
+                update(activation_table)
+                .where(activation_table.c.id == bindparam("activation_id"))
+                .values(
+                    last_check=bindparam("checked_at"),
+                    check_count=activation_table.c.check_count + bindparam("checks"),
+                ),
+                [
+                    {"activation_id": activation_id, "checked_at": checked_at, "checks": checks}
+                    for activation_id, (checked_at, checks) in sorted(activations.items())
+                ],
+            )
+        if licenses:
+            db.execute(
+                update(license_table)
+                .where(license_table.c.id == bindparam("license_id"))
+                .values(last_verified_at=bindparam("verified_at")),
+                [
+                    {"license_id": license_id, "verified_at": verified_at}
+                    for license_id, verified_at in sorted(licenses.items())
+                ],
+            )
+
+    def _restore(self, activations: Dict[int, List[Any]], licenses: Dict[int, datetime]) -> None:
+        with self._lock:
+            for activation_id, (checked_at, checks) in activations.items():
+                entry = self._activations.setdefault(activation_id, [checked_at, 0])
+                entry[0] = max(entry[0], checked_at)
+                entry[1] += checks
+            for license_id, verified_at in licenses.items():
+                if license_id not in self._licenses or verified_at > self._licenses[license_id]:
+                    self._licenses[license_id] = verified_at
+
+    def start(self) -> None:
+        """Flush periodically in a background thread."""
+        if self._thread is not None or self.flush_interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="license-heartbeats", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and write what's left."""
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"License heartbeat flusher error: {e}")
+
+
+heartbeat_buffer = HeartbeatBuffer()
+
+
+# -------------------------------------------------------------------------
+# Offline Tokens
+# -------------------------------------------------------------------------
+
+
+class LicenseTokenSigner:
+    """
+    Signs license tokens instances can verify offline with the public key.
+
+    Disabled (issue() returns None) when no private key is configured.
+    """
+
+    def __init__(
+        self,
+        private_key: Optional[str] = None,
+        algorithm: Optional[str] = None,
+        ttl: Optional[int] = None,
+    ):
+        self.private_key = private_key if private_key is not None else settings.LICENSE_TOKEN_PRIVATE_KEY
+        self.algorithm = algorithm or settings.LICENSE_TOKEN_ALGORITHM
+        self.ttl = settings.LICENSE_TOKEN_TTL if ttl is None else ttl
+        self._public_key: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.private_key)
+
+    @property
+    def public_key(self) -> Optional[str]:
+        """PEM public key instances verify tokens with."""
+        if not self.enabled:
+            return None
+        if self._public_key is None:
+            key = jwk.construct(self.private_key, self.algorithm).public_key()
+            self._public_key = key.to_pem().decode("ascii")
+        return self._public_key
+
+    def issue(
+        self,
+        snapshot: LicenseSnapshot,
+        instance_id: str,
+        now: Optional[datetime] = None,
+    ) -> Optional[Tuple[str, datetime]]:
+        """(token, expires_at) for an instance, never outliving the license."""
+        if not self.enabled:
+            return None
+        now = now or datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl)
+        if snapshot.expires_at is not None:
+            expires_at = min(expires_at, _naive_utc(snapshot.expires_at))
+
+        claims = {
+            "sub": snapshot.license_key,
+            "iid": instance_id,
+            "mod": snapshot.module_name,
+            "typ": snapshot.license_type,
+            "trial": snapshot.is_trial,
+            "iat": _timestamp(now),
+            "exp": _timestamp(expires_at),
+        }
+        return jwt.encode(claims, self.private_key, algorithm=self.algorithm), expires_at
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        """Claims of a valid token; raises jose.JWTError otherwise."""
+        return jwt.decode(token, self.public_key, algorithms=[self.algorithm])
+
+
+license_token_signer = LicenseTokenSigner()
+
+
+# -------------------------------------------------------------------------
+# Invalidation
+# -------------------------------------------------------------------------
+
+def _invalidate_licenses(session: Session, changed: Set[Optional[str]]) -> None:
+    if None in changed:
+        license_cache.invalidate()
+        return
+    for license_key in changed:
+        license_cache.invalidate(license_key)
+
+
+_invalidation = CommitInvalidation("licenses", _invalidate_licenses)
+
+
+def mark_changed(session: Session, license_key: Optional[str] = None) -> None:
+    """
+    Reload a license's snapshot (all if None) when the session commits.
+
+    Needed for bulk query updates/deletes, which don't emit mapper events.
+    """
+    _invalidation.mark(session, license_key)
+
+
+def has_pending_changes(session: Session) -> bool:
+    """Whether the session changed licenses that aren't committed yet."""
+    return _invalidation.has_pending(session)
+
+
+def _changed(target, fields: Tuple[str, ...]) -> bool:
+    state = inspect(target)
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+
+def _mark_license_changed(mapper, connection, target) -> None:
+    session = object_session(target)
+    if session is not None:
+        mark_changed(session, target.license_key)
+
+
+def _mark_license_updated(mapper, connection, target) -> None:
+    if _changed(target, ("license_key",)):
+        # The snapshot cached under the old key is stale too
+        session = object_session(target)
+        if session is not None:
+            mark_changed(session)
+    elif _changed(target, _LICENSE_FIELDS):
+        _mark_license_changed(mapper, connection, target)
+
+
+def _mark_activation_changed(mapper, connection, target) -> None:
+    session = object_session(target)
+    if session is None:
+        return
+    license = target.__dict__.get("license")
+    if license is not None:
+        license_key = license.license_key
+    else:
+        license_key = connection.scalar(
+            select(License.license_key).where(License.id == target.license_id)
+        )
+    mark_changed(session, license_key)
+
+
+def _mark_activation_updated(mapper, connection, target) -> None:
+    if _changed(target, _ACTIVATION_FIELDS):
+        _mark_activation_changed(mapper, connection, target)
+
+
+event.listen(License, "after_insert", _mark_license_changed)
+event.listen(License, "after_update", _mark_license_updated)
+event.listen(License, "after_delete", _mark_license_changed)
+event.listen(LicenseActivation, "after_insert", _mark_activation_changed)
+event.listen(LicenseActivation, "after_update", _mark_activation_updated)
+event.listen(LicenseActivation, "after_delete", _mark_activation_changed)
+
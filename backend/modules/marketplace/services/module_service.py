@@ -25,6 +25,7 @@ from ..models.module import (
     ModuleDependency,
 )
 from ..models.review import RatingSummary
+from .search_service import MarketplaceSearch, suggestion_cache
 
 
 class ModuleService:
@@ -197,6 +198,7 @@ class ModuleService:
         module.updated_at = datetime.utcnow()
 
         self.db.commit()
+        suggestion_cache.invalidate()
         self.db.refresh(module)
         return module
 
@@ -211,6 +213,7 @@ class ModuleService:
         module.archived_at = datetime.utcnow()
 
         self.db.commit()
+        suggestion_cache.invalidate()
         return True
 
     # -------------------------------------------------------------------------
@@ -256,6 +259,7 @@ class ModuleService:
             latest_version.published_by = reviewer_id
 
         self.db.commit()
+        suggestion_cache.invalidate()
         self.db.refresh(module)
         return module
 
@@ -301,6 +305,7 @@ class ModuleService:
             latest_version.published_at = datetime.utcnow()
 
         self.db.commit()
+        suggestion_cache.invalidate()
         self.db.refresh(module)
         return module
 
@@ -459,6 +464,7 @@ class ModuleService:
         module_version.deprecation_message = message
 
         self.db.commit()
+        suggestion_cache.invalidate()
         self.db.refresh(module_version)
         return module_version
 
@@ -481,83 +487,26 @@ class ModuleService:
         offset: int = 0,
     ) -> Tuple[List[MarketplaceModule], int]:
         """
-        Search and filter modules.
+        Search and filter modules (see MarketplaceSearch for ranking and facets).
 
         Returns:
             Tuple of (modules, total_count)
         """
-        base_query = self.db.query(MarketplaceModule).filter(
-            MarketplaceModule.status == "published"
+        result = MarketplaceSearch(self.db).search(
+            query=query,
+            category_id=category_id,
+            license_type=license_type,
+            publisher_id=publisher_id,
+            tags=tags,
+            min_rating=min_rating,
+            min_downloads=min_downloads,
+            fastvue_version=fastvue_version,
+            sort_by=sort_by,
+            limit=limit,
+            offset=offset,
+            with_facets=False,
         )
-
-        # Text search
-        if query:
-            search_filter = or_(
-                MarketplaceModule.display_name.ilike(f"%{query}%"),
-                MarketplaceModule.short_description.ilike(f"%{query}%"),
-                MarketplaceModule.technical_name.ilike(f"%{query}%"),
-            )
-            base_query = base_query.filter(search_filter)
-
-        # Filters
-        if category_id:
-            base_query = base_query.filter(MarketplaceModule.category_id == category_id)
-
-        if license_type:
-            base_query = base_query.filter(MarketplaceModule.license_type == license_type)
-
-        if publisher_id:
-            base_query = base_query.filter(MarketplaceModule.publisher_id == publisher_id)
-
-        if tags:
-            # Module must have all specified tags
-            for tag in tags:
-                base_query = base_query.filter(
-                    MarketplaceModule.tags.contains([tag])
-                )
-
-        if min_rating:
-            base_query = base_query.filter(
-                MarketplaceModule.average_rating >= min_rating
-            )
-
-        if min_downloads:
-            base_query = base_query.filter(
-                MarketplaceModule.download_count >= min_downloads
-            )
-
-        if fastvue_version:
-            base_query = base_query.filter(
-                MarketplaceModule.fastvue_versions.contains([fastvue_version])
-            )
-
-        # Count total
-        total = base_query.count()
-
-        # Sorting
-        if sort_by == "downloads":
-            base_query = base_query.order_by(desc(MarketplaceModule.download_count))
-        elif sort_by == "rating":
-            base_query = base_query.order_by(desc(MarketplaceModule.average_rating))
-        elif sort_by == "newest":
-            base_query = base_query.order_by(desc(MarketplaceModule.published_at))
-        elif sort_by == "updated":
-            base_query = base_query.order_by(desc(MarketplaceModule.updated_at))
-        elif sort_by == "name":
-            base_query = base_query.order_by(MarketplaceModule.display_name)
-        else:
-            # Default: relevance (by downloads and rating)
-            base_query = base_query.order_by(
-                desc(MarketplaceModule.download_count + MarketplaceModule.rating_count * 10)
-            )
-
-        # Pagination
-        modules = base_query.options(
-            joinedload(MarketplaceModule.publisher),
-            joinedload(MarketplaceModule.category),
-        ).offset(offset).limit(limit).all()
-
-        return modules, total
+        return result.modules, result.total
 
     def get_featured_modules(self, limit: int = 10) -> List[MarketplaceModule]:
         """Get featured modules."""
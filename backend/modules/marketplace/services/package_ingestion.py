@@ -0,0 +1,380 @@
+"""
+Module Package Ingestion
+
+Upload and security-scan pipeline for module packages:
+
+- Uploads are copied to MODULE_UPLOAD_DIR in CHUNK_SIZE pieces and hashed
+  on the way, so a package is never held in memory whole
+- Python files are scanned in a process pool (PACKAGE_SCAN_WORKERS) with
+  one combined pattern pass per file and incremental line numbers
+- Per-file findings are cached by content hash (PackageFileScan), so
+  files unchanged between uploads are not scanned again
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+from ..models.security import PackageFileScan
+
+logger = logging.getLogger(__name__)
+
+# Part of the per-file cache key: bump when patterns or findings change
+SCANNER_VERSION = "2.0"
+
+CHUNK_SIZE = 1024 * 1024
+_SCAN_BATCH_BYTES = 4 * 1024 * 1024  # Source bytes per pool task
+_LOOKUP_BATCH = 500  # Content hashes per cache query
+
+DANGEROUS_EXTENSIONS = frozenset({".exe", ".dll", ".so", ".dylib", ".bat", ".cmd", ".ps1", ".sh"})
+
+# (pattern, description, severity); groups must be non-capturing, the
+# combined pattern identifies the alternative by its named group
+CODE_PATTERNS: List[Tuple[str, str, str]] = [
+    (r"\bexec\s*\(", "exec() call", "high"),
+    (r"\beval\s*\(", "eval() call", "high"),
+    (r"\b__import__\s*\(", "Dynamic import", "medium"),
+    (r"\bos\.system\s*\(", "os.system() call", "high"),
+    (r"\bsubprocess\.\w+\s*\(", "subprocess usage", "medium"),
+    (r"\bpickle\.loads?\s*\(", "pickle usage (unsafe deserialization)", "high"),
+    (r"\brequests?\.(?:get|post|put|delete)\s*\(", "HTTP request", "info"),
+    (r"(?:password|secret|api_key|token)\s*=\s*[\"'][^\"']+[\"']", "Hardcoded secret", "critical"),
+]
+
+_COMBINED_PATTERN = re.compile(
+    "|".join(f"(?P<p{i}>{pattern})" for i, (pattern, _, _) in enumerate(CODE_PATTERNS)),
+    re.IGNORECASE,
+)
+
+
+class PackageTooLarge(ValueError):
+    """An upload exceeded MODULE_UPLOAD_MAX_SIZE."""
+
+
+@dataclass(frozen=True)
+class StoredPackage:
+    """A package written to the package store."""
+
+    path: str
+    sha256: str
+    size: int
+
+
+# -------------------------------------------------------------------------
+# Storage
+# -------------------------------------------------------------------------
+
+
+def store_package(
+    fileobj: BinaryIO,
+    upload_dir: Optional[str] = None,
+    max_size: Optional[int] = None,
+) -> StoredPackage:
+    """
+    Copy an upload into the package store, hashing it on the way.
+
+    Packages are stored by content ({sha256}.zip), so re-uploads of the
+    same archive share one file.
+
+    Raises:
+        PackageTooLarge: the upload is larger than max_size
+    """
+    upload_dir = upload_dir or settings.MODULE_UPLOAD_DIR
+    max_size = settings.MODULE_UPLOAD_MAX_SIZE if max_size is None else max_size
+    os.makedirs(upload_dir, exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    fd, partial_path = tempfile.mkstemp(dir=upload_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = fileobj.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_size and size > max_size:
+                    raise PackageTooLarge(f"Package exceeds the {max_size} byte limit")
+                digest.update(chunk)
+                out.write(chunk)
+        path = os.path.join(upload_dir, f"{digest.hexdigest()}.zip")
+        os.replace(partial_path, path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    return StoredPackage(path=path, sha256=digest.hexdigest(), size=size)
+
+
+# -------------------------------------------------------------------------
+# Source scanning (pool workers)
+# -------------------------------------------------------------------------
+
+
+def scan_source(source: str) -> List[Dict[str, Any]]:
+    """
+    Code-pattern findings of one source file, in order of position.
+
+    All patterns are matched in a single pass; where matches of two
+    patterns would overlap, the leftmost one is reported.
+    """
+    findings = []
+    line = 1
+    position = 0
+    for match in _COMBINED_PATTERN.finditer(source):
+        start = match.start()
+        line += source.count("\n", position, start)
+        position = start
+        _, description, severity = CODE_PATTERNS[int(match.lastgroup[1:])]
+        findings.append({
+            "type": "code_pattern",
+            "severity": severity,
+            "message": f"Potentially dangerous pattern: {description}",
+            "line": line,
+            "recommendation": f"Review usage of {description}",
+        })
+    return findings
+
+
+def _scan_members(
+    archive_path: str,
+    names: List[str],
+    deadline: Optional[float] = None,
+) -> List[Tuple[str, Optional[List[Dict[str, Any]]]]]:
+    """
+    Scan archive members (runs inside a pool worker); None for unreadable members.
+
+    ``deadline`` (a time.monotonic() value) is checked between members when
+    scanning in the calling thread; pool scans are bounded by the caller.
+    """
+    results = []
+    with zipfile.ZipFile(archive_path) as zf:
+        for name in names:
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError("Package scan timed out")
+            try:
+                source = zf.read(name).decode("utf-8", errors="ignore")
+            except Exception as e:
+                logger.warning(f"Skipping unreadable package file {name}: {e}")
+                results.append((name, None))
+                continue
+            results.append((name, scan_source(source)))
+    return results
+
+
+_scan_pool: Optional[ProcessPoolExecutor] = None
+_scan_pool_lock = threading.Lock()
+
+
+def get_scan_pool() -> Optional[ProcessPoolExecutor]:
+    """Get the shared scan process pool (None when PACKAGE_SCAN_WORKERS is 0)."""
+    global _scan_pool
+    if settings.PACKAGE_SCAN_WORKERS <= 0:
+        return None
+    if _scan_pool is None:
+        with _scan_pool_lock:
+            if _scan_pool is None:
+                # spawn: forking a threaded server with open DB connections is unsafe
+                _scan_pool = ProcessPoolExecutor(
+                    max_workers=settings.PACKAGE_SCAN_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _scan_pool
+
+
+def shutdown_scan_pool(wait: bool = False) -> None:
+    """Shut down the scan pool (application shutdown)."""
+    global _scan_pool
+    with _scan_pool_lock:
+        if _scan_pool is not None:
+            _scan_pool.shutdown(wait=wait, cancel_futures=True)
+            _scan_pool = None
+
+
+def _batches(infos: Iterable[zipfile.ZipInfo]) -> List[List[str]]:
+    """Member names grouped into pool tasks of about _SCAN_BATCH_BYTES."""
+    batches: List[List[str]] = []
+    batch: List[str] = []
+    batch_bytes = 0
+    for info in infos:
+        batch.append(info.filename)
+        batch_bytes += info.file_size
+        if batch_bytes >= _SCAN_BATCH_BYTES:
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _scan_files(
+    archive_path: str,
+    infos: List[zipfile.ZipInfo],
+    timeout: Optional[float] = None,
+) -> Dict[str, Optional[List[Dict[str, Any]]]]:
+    """
+    Scan archive members, in the pool when there is more than one batch.
+
+    A single batch is scanned in the calling thread: starting it in a
+    worker would cost more than the scan.
+    """
+    batches = _batches(infos)
+    pool = get_scan_pool()
+    deadline = time.monotonic() + (timeout or settings.PACKAGE_SCAN_TIMEOUT)
+    if pool is None or len(batches) <= 1:
+        return {
+            name: findings
+            for batch in batches
+            for name, findings in _scan_members(archive_path, batch, deadline)
+        }
+
+    futures = [pool.submit(_scan_members, archive_path, batch) for batch in batches]
+    results = {}
+    try:
+        for future in futures:
+            results.update(future.result(timeout=max(0.0, deadline - time.monotonic())))
+    finally:
+        for future in futures:
+            future.cancel()
+    return results
+
+
+# -------------------------------------------------------------------------
+# Per-file cache
+# -------------------------------------------------------------------------
+
+
+def _dialect_insert(db: Session, table):
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        return pg_insert(table)
+    from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+    return sqlite_insert(table)
+
+
+def _member_hashes(zf: zipfile.ZipFile, infos: Iterable[zipfile.ZipInfo]) -> Dict[str, str]:
+    """Content hash of each readable member."""
+    hashes = {}
+    for info in infos:
+        digest = hashlib.sha256()
+        try:
+            with zf.open(info) as member:
+                for chunk in iter(lambda: member.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+        except Exception as e:
+            logger.warning(f"Skipping unreadable package file {info.filename}: {e}")
+            continue
+        hashes[info.filename] = digest.hexdigest()
+    return hashes
+
+
+def cached_findings(db: Session, content_hashes: Iterable[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Cached findings of the content hashes found for SCANNER_VERSION."""
+    content_hashes = sorted(set(content_hashes))
+    cached = {}
+    for i in range(0, len(content_hashes), _LOOKUP_BATCH):
+        cached.update(
+            db.query(PackageFileScan.content_hash, PackageFileScan.findings).filter(
+                PackageFileScan.scanner_version == SCANNER_VERSION,
+                PackageFileScan.content_hash.in_(content_hashes[i:i + _LOOKUP_BATCH]),
+            ).all()
+        )
+    return cached
+
+
+def store_findings(db: Session, findings: Dict[str, List[Dict[str, Any]]]) -> None:
+    """Cache findings by content hash (not committed; concurrent scans may race, first write wins)."""
+    if not findings:
+        return
+    table = PackageFileScan.__table__
+    db.execute(
+        _dialect_insert(db, table).on_conflict_do_nothing(index_elements=["content_hash", "scanner_version"]),
+        [
+            {"content_hash": content_hash, "scanner_version": SCANNER_VERSION, "findings": file_findings}
+            for content_hash, file_findings in sorted(findings.items())
+        ],
+    )
+
+
+# -------------------------------------------------------------------------
+# Package scan
+# -------------------------------------------------------------------------
+
+
+def scan_package(db: Session, archive_path: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Security findings of a stored package.
+
+    Checks file types and the manifest, then code patterns of Python
+    files. Files with cached findings are skipped, identical files are
+    scanned once, and new findings are added to the cache (the caller
+    commits).
+
+    Returns:
+        {"findings": [...], "files": Python files, "scanned": files scanned now}
+    """
+    findings: List[Dict[str, Any]] = []
+    with zipfile.ZipFile(archive_path) as zf:
+        names = zf.namelist()
+        for name in names:
+            if os.path.splitext(name)[1].lower() in DANGEROUS_EXTENSIONS:
+                findings.append({
+                    "type": "dangerous_file",
+                    "severity": "high",
+                    "message": f"Potentially dangerous file type: {name}",
+                    "location": name,
+                    "recommendation": "Remove executable files from the module",
+                })
+
+        sources = [info for info in zf.infolist() if info.filename.endswith(".py")]
+        hashes = _member_hashes(zf, sources)
+
+    by_hash = cached_findings(db, hashes.values())
+    pending: Dict[str, zipfile.ZipInfo] = {}
+    for info in sources:
+        content_hash = hashes.get(info.filename)
+        if content_hash is not None and content_hash not in by_hash:
+            pending.setdefault(content_hash, info)
+
+    scanned = {
+        hashes[name]: file_findings
+        for name, file_findings in _scan_files(archive_path, list(pending.values()), timeout).items()
+        if file_findings is not None
+    }
+    store_findings(db, scanned)
+    by_hash.update(scanned)
+
+    for info in sources:
+        for finding in by_hash.get(hashes.get(info.filename), ()):
+            findings.append({
+                "type": finding["type"],
+                "severity": finding["severity"],
+                "message": finding["message"],
+                "location": f"{info.filename}:{finding['line']}",
+                "recommendation": finding["recommendation"],
+            })
+
+    if not any(name.endswith("__manifest__.py") for name in names):
+        findings.append({
+            "type": "manifest",
+            "severity": "high",
+            "message": "Missing __manifest__.py file",
+            "location": "/",
+            "recommendation": "Add a __manifest__.py file with module metadata",
+        })
+
+    return {"findings": findings, "files": len(sources), "scanned": len(scanned)}
@@ -4,14 +4,18 @@ Marketplace Payout Service
 Manages publisher payouts, balances, and financial transactions.
 """
 
+import logging
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date, timedelta
 from decimal import Decimal
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Callable, Optional, List, Dict, Any, Tuple
 
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, or_, func, insert, select
 from sqlalchemy.orm import Session, joinedload
 
+from app.core.config import settings
+
 from ..models.payout import (
     PayoutBatch,
     PublisherPayoutItem,
@@ -22,6 +26,9 @@ from ..models.payout import (
 )
 from ..models.publisher import Publisher
 from ..models.license import Order, OrderItem
+from ..models.module import MarketplaceModule
+
+logger = logging.getLogger(__name__)
 
 
 class PayoutService:
@@ -33,6 +40,9 @@ class PayoutService:
     # Minimum payout threshold
     DEFAULT_MINIMUM_PAYOUT = Decimal("50.00")
 
+    # Payout items inserted per statement when populating a batch
+    INSERT_CHUNK_SIZE = 1000
+
     def __init__(self, db: Session):
         self.db = db
 
@@ -319,6 +329,68 @@ class PayoutService:
 
         return query.offset(offset).limit(limit).all()
 
+    def _period_sales(
+        self,
+        period_start: date,
+        period_end: date,
+        publisher_ids: Any,
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Completed sales in a period, grouped by publisher.
+
+        Two grouped queries regardless of the number of publishers.
+
+        Args:
+            publisher_ids: List of publisher IDs or a select of them
+
+        Returns:
+            publisher_id -> {"order_ids": [...], "modules": {module_id: [amount, count]}}
+        """
+        period_filter = and_(
+            Order.status == "completed",
+            Order.completed_at >= datetime.combine(period_start, datetime.min.time()),
+            Order.completed_at < datetime.combine(period_end + timedelta(days=1), datetime.min.time()),
+            MarketplaceModule.publisher_id.in_(publisher_ids),
+        )
+
+        sales: Dict[int, Dict[str, Any]] = {}
+
+        def entry(publisher_id: int) -> Dict[str, Any]:
+            return sales.setdefault(publisher_id, {"order_ids": [], "modules": {}})
+
+        by_module = self.db.query(
+            MarketplaceModule.publisher_id,
+            OrderItem.module_id,
+            func.sum(OrderItem.unit_price * OrderItem.quantity),
+            func.count(OrderItem.id),
+        ).join(Order, Order.id == OrderItem.order_id).join(
+            MarketplaceModule, MarketplaceModule.id == OrderItem.module_id
+        ).filter(period_filter).group_by(
+            MarketplaceModule.publisher_id, OrderItem.module_id
+        ).order_by(OrderItem.module_id)
+
+        for publisher_id, module_id, amount, count in by_module:
+            entry(publisher_id)["modules"][module_id] = [Decimal(str(amount or 0)), count]
+
+        orders = self.db.query(
+            MarketplaceModule.publisher_id,
+            OrderItem.order_id,
+        ).join(Order, Order.id == OrderItem.order_id).join(
+            MarketplaceModule, MarketplaceModule.id == OrderItem.module_id
+        ).filter(period_filter).distinct().order_by(OrderItem.order_id)
+
+        for publisher_id, order_id in orders:
+            entry(publisher_id)["order_ids"].append(order_id)
+
+        return sales
+
+    @staticmethod
+    def _module_breakdown(modules: Dict[int, List[Any]]) -> List[Dict[str, Any]]:
+        return [
+            {"module_id": module_id, "amount": float(amount), "count": count}
+            for module_id, (amount, count) in modules.items()
+        ]
+
     def calculate_publisher_payout(
         self,
         publisher_id: int,
@@ -328,45 +400,24 @@ class PayoutService:
         """Calculate payout for a publisher for a period."""
         balance = self.get_or_create_balance(publisher_id)
 
-        # Get all completed orders for this publisher in the period
-        order_items = self.db.query(OrderItem).join(Order).filter(
-            and_(
-                Order.status == "completed",
-                Order.completed_at >= datetime.combine(period_start, datetime.min.time()),
-                Order.completed_at < datetime.combine(period_end + timedelta(days=1), datetime.min.time()),
-            )
-        ).all()
-
-        # Calculate totals
-        gross_amount = Decimal("0.00")
-        order_ids = []
-        module_breakdown = {}
-
-        for item in order_items:
-            gross_amount += item.unit_price * item.quantity
-            order_ids.append(item.order_id)
-
-            module_id = item.module_id
-            if module_id not in module_breakdown:
-                module_breakdown[module_id] = {
-                    "module_id": module_id,
-                    "amount": Decimal("0.00"),
-                    "count": 0,
-                }
-            module_breakdown[module_id]["amount"] += item.unit_price * item.quantity
-            module_breakdown[module_id]["count"] += 1
+        sales = self._period_sales(period_start, period_end, [publisher_id]).get(
+            publisher_id, {"order_ids": [], "modules": {}}
+        )
+        gross_amount = sum((amount for amount, _ in sales["modules"].values()), Decimal("0.00"))
 
         platform_fee = gross_amount * self.DEFAULT_PLATFORM_FEE_RATE
         net_amount = gross_amount - platform_fee
 
         # Add any pending adjustments
-        adjustments = self.db.query(PayoutAdjustment).filter(
+        adjustment_total = self.db.query(
+            func.coalesce(func.sum(PayoutAdjustment.amount), 0)
+        ).filter(
             and_(
                 PayoutAdjustment.publisher_id == publisher_id,
                 PayoutAdjustment.status == "pending",
             )
-        ).all()
-        adjustment_total = sum(a.amount for a in adjustments)
+        ).scalar()
+        adjustment_total = Decimal(str(adjustment_total))
 
         return {
             "publisher_id": publisher_id,
@@ -376,16 +427,9 @@ class PayoutService:
             "platform_fee": float(platform_fee),
             "adjustments": float(adjustment_total),
             "net_amount": float(net_amount + adjustment_total),
-            "order_count": len(set(order_ids)),
-            "order_ids": list(set(order_ids)),
-            "module_breakdown": [
-                {
-                    "module_id": k,
-                    "amount": float(v["amount"]),
-                    "count": v["count"],
-                }
-                for k, v in module_breakdown.items()
-            ],
+            "order_count": len(sales["order_ids"]),
+            "order_ids": sales["order_ids"],
+            "module_breakdown": self._module_breakdown(sales["modules"]),
             "available_balance": float(balance.available_balance),
             "pending_balance": float(balance.pending_balance),
         }
@@ -394,81 +438,93 @@ class PayoutService:
         self,
         batch: PayoutBatch,
         minimum_amount: Optional[Decimal] = None,
-    ) -> List[PublisherPayoutItem]:
+    ) -> int:
         """
         Populate a batch with payout items for eligible publishers.
 
+        Builds all items from a few grouped queries and inserts them in
+        bulk. Publishers already in the batch are skipped, so an
+        interrupted run can simply be repeated.
+
         Args:
             batch: The payout batch
             minimum_amount: Minimum amount for payout (default from settings)
+
+        Returns:
+            Number of items added
         """
         if minimum_amount is None:
             minimum_amount = self.DEFAULT_MINIMUM_PAYOUT
 
-        # Get all publishers with available balance >= minimum
-        balances = self.db.query(PublisherBalance).filter(
-            and_(
-                PublisherBalance.available_balance >= minimum_amount,
-                PublisherBalance.auto_payout_enabled == True,
-            )
-        ).all()
-
-        items = []
-        total_gross = Decimal("0.00")
-        total_fees = Decimal("0.00")
-        total_net = Decimal("0.00")
-
-        for balance in balances:
-            # Calculate payout details
-            payout_data = self.calculate_publisher_payout(
-                balance.publisher_id,
-                batch.period_start,
-                batch.period_end,
-            )
-
-            net_amount = balance.available_balance
-
-            # Get publisher's payout method
-            publisher = self.db.query(Publisher).filter(
-                Publisher.id == balance.publisher_id
-            ).first()
-
-            payout_method = None
-            payout_destination = None
-            if publisher and publisher.payout_settings:
-                payout_method = publisher.payout_settings.get("method")
-                payout_destination = publisher.payout_settings.get("destination")
-
-            item = PublisherPayoutItem(
-                batch_id=batch.id,
-                publisher_id=balance.publisher_id,
-                gross_amount=net_amount,  # Already net after fees
-                platform_fee=Decimal("0.00"),  # Already deducted
-                adjustments=Decimal("0.00"),
-                net_amount=net_amount,
-                currency="USD",
-                order_count=payout_data["order_count"],
-                order_ids=payout_data["order_ids"],
-                module_breakdown=payout_data["module_breakdown"],
-                status="pending",
-                payout_method=payout_method,
-                payout_destination=payout_destination,
-            )
-            self.db.add(item)
-            items.append(item)
+        # Publishers with available balance >= minimum, not in the batch yet
+        eligible = and_(
+            PublisherBalance.available_balance >= minimum_amount,
+            PublisherBalance.auto_payout_enabled == True,
+            ~PublisherBalance.publisher_id.in_(
+                select(PublisherPayoutItem.publisher_id).where(PublisherPayoutItem.batch_id == batch.id)
+            ),
+        )
+        balances = self.db.query(
+            PublisherBalance.publisher_id,
+            PublisherBalance.available_balance,
+            Publisher.payout_method,
+            Publisher.stripe_account_id,
+            Publisher.paypal_email,
+        ).outerjoin(
+            Publisher, Publisher.id == PublisherBalance.publisher_id
+        ).filter(eligible).order_by(PublisherBalance.publisher_id).all()
+
+        sales = self._period_sales(
+            batch.period_start,
+            batch.period_end,
+            select(PublisherBalance.publisher_id).where(eligible),
+        )
 
-            total_net += net_amount
+        rows = []
+        for publisher_id, net_amount, payout_method, stripe_account_id, paypal_email in balances:
+            publisher_sales = sales.get(publisher_id, {"order_ids": [], "modules": {}})
+            payout_destination = {
+                "stripe": stripe_account_id,
+                "paypal": paypal_email,
+            }.get(payout_method)
+
+            rows.append({
+                "batch_id": batch.id,
+                "publisher_id": publisher_id,
+                "gross_amount": net_amount,  # Already net after fees
+                "platform_fee": Decimal("0.00"),  # Already deducted
+                "adjustments": Decimal("0.00"),
+                "net_amount": net_amount,
+                "currency": "USD",
+                "order_count": len(publisher_sales["order_ids"]),
+                "order_ids": publisher_sales["order_ids"],
+                "module_breakdown": self._module_breakdown(publisher_sales["modules"]),
+                "status": "pending",
+                "idempotency_key": f"payout:{batch.batch_id}:{publisher_id}",
+                "payout_method": payout_method,
+                "payout_destination": payout_destination,
+            })
+
+        for start in range(0, len(rows), self.INSERT_CHUNK_SIZE):
+            self.db.execute(insert(PublisherPayoutItem), rows[start:start + self.INSERT_CHUNK_SIZE])
 
         # Update batch totals
-        batch.total_payouts = len(items)
-        batch.total_gross_amount = total_gross
-        batch.total_platform_fees = total_fees
-        batch.total_net_amount = total_net
-        batch.pending_count = len(items)
+        count, gross, fees, net = self.db.query(
+            func.count(PublisherPayoutItem.id),
+            func.coalesce(func.sum(PublisherPayoutItem.gross_amount), 0),
+            func.coalesce(func.sum(PublisherPayoutItem.platform_fee), 0),
+            func.coalesce(func.sum(PublisherPayoutItem.net_amount), 0),
+        ).filter(PublisherPayoutItem.batch_id == batch.id).one()
+
+        batch.total_payouts = count
+        batch.total_gross_amount = gross
+        batch.total_platform_fees = fees
+        batch.total_net_amount = net
+        batch.pending_count = count
 
         self.db.commit()
 
-        return items
+        return len(rows)
 
     def approve_batch(
         self,
@@ -494,47 +550,115 @@ class PayoutService:
     def process_batch(
         self,
         batch_id: str,
+        max_workers: Optional[int] = None,
+        session_factory: Optional[Callable[[], Session]] = None,
     ) -> PayoutBatch:
         """
         Process a payout batch.
 
+        Items are processed concurrently by up to max_workers workers
+        (default PAYOUT_PROCESS_WORKERS), each item in its own short
+        transaction on its own session. The commit of an item is its
+        checkpoint: calling this again on a batch left "processing" by a
+        crash resumes with the items not completed or failed yet. Each
+        item carries an idempotency key and its ledger entry is written
+        once, so an item interrupted mid-way can safely be processed again.
+
         In production, this would integrate with payment providers.
         """
-        batch = self.get_payout_batch(batch_id)
+        batch = self.db.query(PayoutBatch).filter(PayoutBatch.batch_id == batch_id).first()
         if not batch:
             raise ValueError(f"Batch {batch_id} not found")
 
-        if batch.status != "pending":
+        if batch.status not in ("pending", "processing"):
             raise ValueError(f"Batch must be pending, current: {batch.status}")
 
-        batch.status = "processing"
-        batch.started_at = datetime.utcnow()
+        if batch.status == "pending":
+            batch.status = "processing"
+            batch.started_at = datetime.utcnow()
+            self.db.commit()
+
+        item_ids = [
+            item_id for (item_id,) in self.db.query(PublisherPayoutItem.id).filter(
+                PublisherPayoutItem.batch_id == batch.id,
+                PublisherPayoutItem.status.in_(("pending", "processing")),
+            ).order_by(PublisherPayoutItem.id)
+        ]
+        # The workers' transactions must not wait on this session
         self.db.commit()
 
-        success_count = 0
-        failed_count = 0
-        errors = []
-
-        for item in batch.payouts:
-            try:
-                # Process individual payout
-                self._process_payout_item(item)
-                item.status = "completed"
-                item.processed_at = datetime.utcnow()
-                success_count += 1
-            except Exception as e:
-                item.status = "failed"
-                item.last_error = str(e)
-                item.retry_count += 1
-                failed_count += 1
-                errors.append({
-                    "publisher_id": item.publisher_id,
-                    "error": str(e),
-                })
+        workers = settings.PAYOUT_PROCESS_WORKERS if max_workers is None else max_workers
+        if workers <= 1 or len(item_ids) <= 1:
+            for item_id in item_ids:
+                self._run_payout_item(self.db, item_id)
+        else:
+            if session_factory is None:
+                from app.db.base import SessionLocal
+                session_factory = SessionLocal
+
+            def run(item_id: int) -> None:
+                db = session_factory()
+                try:
+                    PayoutService(db)._run_payout_item(db, item_id)
+                finally:
+                    db.close()
+
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="payouts") as executor:
+                for future in [executor.submit(run, item_id) for item_id in item_ids]:
+                    future.result()
+
+        return self._finish_batch(batch)
+
+    def _run_payout_item(self, db: Session, item_id: int) -> None:
+        """Claim, process and checkpoint one payout item on db."""
+        claimed = db.query(PublisherPayoutItem).filter(
+            PublisherPayoutItem.id == item_id,
+            PublisherPayoutItem.status.in_(("pending", "processing")),
+        ).update({"status": "processing"}, synchronize_session=False)
+        db.commit()
+        if not claimed:
+            return
+
+        item = db.query(PublisherPayoutItem).filter(PublisherPayoutItem.id == item_id).one()
+        try:
+            # Process individual payout
+            PayoutService(db)._process_payout_item(item)
+            item.status = "completed"
+            item.processed_at = datetime.utcnow()
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Payout item {item_id} failed: {e}")
+            db.query(PublisherPayoutItem).filter(PublisherPayoutItem.id == item_id).update({
+                "status": "failed",
+                "last_error": str(e),
+                "retry_count": func.coalesce(PublisherPayoutItem.retry_count, 0) + 1,
+            }, synchronize_session=False)
+            db.commit()
+
+    def _finish_batch(self, batch: PayoutBatch) -> PayoutBatch:
+        """Record the outcome of a processed batch."""
+        counts = dict(
+            self.db.query(PublisherPayoutItem.status, func.count(PublisherPayoutItem.id)).filter(
+                PublisherPayoutItem.batch_id == batch.id,
+            ).group_by(PublisherPayoutItem.status).all()
+        )
+        success_count = counts.get("completed", 0)
+        failed_count = counts.get("failed", 0)
+
+        errors = [
+            {"publisher_id": publisher_id, "error": error}
+            for publisher_id, error in self.db.query(
+                PublisherPayoutItem.publisher_id, PublisherPayoutItem.last_error
+            ).filter(
+                PublisherPayoutItem.batch_id == batch.id,
+                PublisherPayoutItem.status == "failed",
+            ).order_by(PublisherPayoutItem.publisher_id)
+        ]
 
         batch.success_count = success_count
         batch.failed_count = failed_count
-        batch.pending_count = 0
+        batch.pending_count = counts.get("pending", 0) + counts.get("processing", 0)
         batch.error_summary = errors if errors else None
 
         if failed_count == 0:
@@ -554,9 +678,21 @@ class PayoutService:
         """
         Process a single payout item.
 
-        This is a stub - in production would integrate with Stripe/PayPal.
+        This is a stub - in production would integrate with Stripe/PayPal,
+        passing item.idempotency_key with the transfer.
         """
-        balance = self.get_or_create_balance(item.publisher_id)
+        # Locked so concurrent balance changes of the publisher don't interleave
+        balance = self.db.query(PublisherBalance).filter(
+            PublisherBalance.publisher_id == item.publisher_id
+        ).with_for_update().populate_existing().first() or self.get_or_create_balance(item.publisher_id)
+
+        # Already paid by an earlier, interrupted run
+        paid = self.db.query(BalanceTransaction.id).filter(
+            BalanceTransaction.reference_type == "payout_item",
+            BalanceTransaction.reference_id == item.id,
+        ).first()
+        if paid:
+            return
 
         if balance.available_balance < item.net_amount:
             raise ValueError("Insufficient balance")
@@ -583,6 +719,7 @@ class PayoutService:
         self.db.add(transaction)
 
         # In production: Call Stripe Connect or PayPal Payouts
+        # with idempotency_key=item.idempotency_key
         # item.stripe_transfer_id = stripe_result.id
         # item.stripe_payout_id = stripe_result.payout_id
 
@@ -603,8 +740,9 @@ class PayoutService:
         batch.processing_notes = reason
 
         # Mark all items as cancelled
-        for item in batch.payouts:
-            item.status = "cancelled"
+        self.db.query(PublisherPayoutItem).filter(
+            PublisherPayoutItem.batch_id == batch.id
+        ).update({"status": "cancelled"}, synchronize_session="fetch")
 
         self.db.commit()
         self.db.refresh(batch)
@@ -0,0 +1,317 @@
+"""
+Publisher API Key Authentication
+
+Hot path behind CI uploads and analytics pollers:
+
+- Key hashes resolve to immutable publisher principals cached in process.
+  Unknown keys are cached too, for PUBLISHER_API_KEY_NEGATIVE_TTL. Key
+  rotation and status changes invalidate every process (see
+  CacheGeneration)
+- Each key is rate limited by a token bucket of PUBLISHER_API_KEY_RATE_LIMIT
+  requests per minute
+- Last-used timestamps are buffered in memory and written in periodic
+  batched UPDATEs
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+from app.core.cache import CacheGeneration
+from app.core.config import settings
+
+from ..models.publisher import Publisher
+
+logger = logging.getLogger(__name__)
+
+
+def hash_api_key(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class PublisherPrincipal:
+    """Immutable view of the publisher an API key belongs to."""
+
+    id: int
+    user_id: int
+    slug: str
+    status: str
+
+    @property
+    def can_publish(self) -> bool:
+        return self.status == "active"
+
+
+class ApiKeyRejected(Exception):
+    """An API key request was refused (invalid key, inactive publisher or rate limit)."""
+
+    def __init__(self, reason: str, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def load_principal(db: Session, key_hash: str) -> Optional[PublisherPrincipal]:
+    """Principal of a key hash read from the database, or None if no publisher has it."""
+    row = db.query(
+        Publisher.id, Publisher.user_id, Publisher.slug, Publisher.status,
+    ).filter(Publisher.api_key_hash == key_hash).first()
+    if row is None:
+        return None
+    return PublisherPrincipal(id=row.id, user_id=row.user_id, slug=row.slug, status=row.status)
+
+
+# -------------------------------------------------------------------------
+# Key Cache
+# -------------------------------------------------------------------------
+
+
+class ApiKeyCache:
+    """
+    Process-wide cache of key hash -> principal.
+
+    Invalid keys live in their own bounded map, so a flood of bad keys
+    can't evict valid ones.
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        negative_ttl: Optional[float] = None,
+        max_size: Optional[int] = None,
+    ):
+        self.ttl = settings.PUBLISHER_API_KEY_CACHE_TTL if ttl is None else ttl
+        self.negative_ttl = settings.PUBLISHER_API_KEY_NEGATIVE_TTL if negative_ttl is None else negative_ttl
+        self.max_size = settings.PUBLISHER_API_KEY_CACHE_SIZE if max_size is None else max_size
+        self._lock = threading.Lock()
+        self._valid: Dict[str, Tuple[Any, float, PublisherPrincipal]] = {}
+        self._invalid: Dict[str, Tuple[Any, float]] = {}
+        self.generation = CacheGeneration("publisher_api_keys")
+
+    def get(self, db: Session, key_hash: str) -> Optional[PublisherPrincipal]:
+        """Principal of a key hash, or None if the key is unknown."""
+        token = self.generation.token()
+        now = time.monotonic()
+        entry = self._valid.get(key_hash)
+        if entry is not None and entry[0] == token and now - entry[1] < self.ttl:
+            return entry[2]
+        miss = self._invalid.get(key_hash)
+        if miss is not None and miss[0] == token and now - miss[1] < self.negative_ttl:
+            return None
+
+        principal = load_principal(db, key_hash)
+        with self._lock:
+            if principal is None:
+                self._store(self._invalid, key_hash, (token, now))
+                self._valid.pop(key_hash, None)
+            else:
+                self._store(self._valid, key_hash, (token, now, principal))
+                self._invalid.pop(key_hash, None)
+        return principal
+
+    def _store(self, entries: Dict[str, Any], key_hash: str, entry: Any) -> None:
+        if key_hash not in entries and len(entries) >= self.max_size:
+            # Drop the oldest entry
+            entries.pop(next(iter(entries)), None)
+        entries[key_hash] = entry
+
+    def invalidate(self) -> None:
+        """Reload every key here and in other processes (key rotated or publisher status changed)."""
+        self.generation.bump()
+
+    def clear(self) -> None:
+        """Drop this process's entries."""
+        with self._lock:
+            self._valid.clear()
+            self._invalid.clear()
+
+
+api_key_cache = ApiKeyCache()
+
+
+# -------------------------------------------------------------------------
+# Rate Limiting
+# -------------------------------------------------------------------------
+
+
+class ApiKeyRateLimiter:
+    """
+    Per-key token buckets, refilled continuously at limit per minute.
+
+    Limits apply per process; buckets of idle keys are dropped oldest
+    first once max_size keys are tracked.
+    """
+
+    def __init__(self, limit: Optional[int] = None, max_size: Optional[int] = None):
+        self.limit = settings.PUBLISHER_API_KEY_RATE_LIMIT if limit is None else limit
+        self.max_size = settings.PUBLISHER_API_KEY_CACHE_SIZE if max_size is None else max_size
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, List[float]] = {}  # key hash -> [tokens, updated at]
+
+    def acquire(self, key_hash: str) -> float:
+        """Take one request from the key's bucket; 0 if allowed, else seconds until allowed."""
+        if self.limit <= 0:
+            return 0.0
+        rate = self.limit / 60.0
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.pop(key_hash, None)
+            if bucket is None:
+                if len(self._buckets) >= self.max_size:
+                    self._buckets.pop(next(iter(self._buckets)), None)
+                bucket = [float(self.limit), now]
+            else:
+                bucket[0] = min(float(self.limit), bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+            # Re-inserted so the least recently used bucket is dropped first
+            self._buckets[key_hash] = bucket
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / rate
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+api_key_rate_limiter = ApiKeyRateLimiter()
+
+
+# -------------------------------------------------------------------------
+# Last-Used Buffer
+# -------------------------------------------------------------------------
+
+
+class ApiKeyUsageBuffer:
+    """Last-used timestamps collected in memory and written in batches."""
+
+    def __init__(self, flush_interval: Optional[float] = None):
+        self.flush_interval = (
+            settings.PUBLISHER_API_KEY_USAGE_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        )
+        self._lock = threading.Lock()
+        self._used: Dict[int, datetime] = {}  # publisher id -> last used at
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, publisher_id: int, used_at: Optional[datetime] = None) -> None:
+        used_at = used_at or datetime.utcnow()
+        with self._lock:
+            previous = self._used.get(publisher_id)
+            if previous is None or used_at > previous:
+                self._used[publisher_id] = used_at
+
+    @property
+    def pending(self) -> int:
+        """Publishers whose last use isn't written yet."""
+        with self._lock:
+            return len(self._used)
+
+    def flush(self, db: Optional[Session] = None) -> int:
+        """
+        Write buffered timestamps and commit.
+
+        Uses its own session when db is None. On failure the entries are
+        put back and retried on the next flush. Returns the number of
+        publishers updated.
+        """
+        with self._lock:
+            used, self._used = self._used, {}
+        if not used:
+            return 0
+
+        own_session = db is None
+        if own_session:
+            from app.db.base import SessionLocal
+            db = SessionLocal()
+        try:
+            table = Publisher.__table__
+            db.execute(
+                update(table)
+                .where(table.c.id == bindparam("publisher_id"))
+                .values(api_key_last_used_at=bindparam("used_at")),
+                [
+                    {"publisher_id": publisher_id, "used_at": used_at}
+                    for publisher_id, used_at in sorted(used.items())
+                ],
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            self._restore(used)
+            logger.error(f"API key usage flush failed ({len(used)} publishers): {e}")
+            return 0
+        finally:
+            if own_session:
+                db.close()
+
+        return len(used)
+
+    def _restore(self, used: Dict[int, datetime]) -> None:
+        with self._lock:
+            for publisher_id, used_at in used.items():
+                if publisher_id not in self._used or used_at > self._used[publisher_id]:
+                    self._used[publisher_id] = used_at
+
+    def start(self) -> None:
+        """Flush periodically in a background thread."""
+        if self._thread is not None or self.flush_interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="api-key-usage", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and write what's left."""
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"API key usage flusher error: {e}")
+
+
+api_key_usage_buffer = ApiKeyUsageBuffer()
+
+
+# -------------------------------------------------------------------------
+# Authentication
+# -------------------------------------------------------------------------
+
+
+def authenticate_api_key(db: Session, api_key: str, require_active: bool = True) -> PublisherPrincipal:
+    """
+    Publisher principal of an API key.
+
+    Raises:
+        ApiKeyRejected: reason "invalid_key", "publisher_inactive" or
+            "rate_limited" (with retry_after seconds)
+    """
+    key_hash = hash_api_key(api_key)
+    principal = api_key_cache.get(db, key_hash)
+    if principal is None:
+        raise ApiKeyRejected("invalid_key", "Invalid API key")
+    if require_active and not principal.can_publish:
+        raise ApiKeyRejected("publisher_inactive", f"Publisher account is {principal.status}")
+
+    retry_after = api_key_rate_limiter.acquire(key_hash)
+    if retry_after:
+        raise ApiKeyRejected("rate_limited", "API key rate limit exceeded", retry_after=retry_after)
+
+    api_key_usage_buffer.record(principal.id)
+    return principal
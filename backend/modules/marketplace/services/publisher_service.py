@@ -4,19 +4,31 @@ Publisher Service
 Handles publisher registration, profile management, and analytics.
 """
 
+import logging
 import secrets
-import hashlib
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta
 from decimal import Decimal
 from typing import Any, Dict, List, Optional
 
-from sqlalchemy import and_, func, or_
+from sqlalchemy import and_, case, func, or_, select, union
 from sqlalchemy.orm import Session, joinedload
 
 from app.models.user import User
 from ..models.publisher import Publisher, PublisherStats, PublisherPayout, PublisherInvitation
 from ..models.module import MarketplaceModule
 from ..models.license import Order
+from .publisher_auth import PublisherPrincipal, api_key_cache, hash_api_key
+
+logger = logging.getLogger(__name__)
+
+# Periods stored as rollups next to the all-time row
+STATS_ROLLUP_PERIODS = ("day", "month")
+
+CENT = Decimal("0.01")
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min)
 
 
 class PublisherService:
@@ -198,6 +210,7 @@ class PublisherService:
         publisher.suspended_at = None
 
         self.db.commit()
+        api_key_cache.invalidate()
         self.db.refresh(publisher)
         return publisher
 
@@ -212,6 +225,8 @@ class PublisherService:
         publisher.suspended_at = datetime.utcnow()
 
         self.db.commit()
+        # Keys of a suspended publisher stop working immediately
+        api_key_cache.invalidate()
         self.db.refresh(publisher)
         return publisher
 
@@ -226,15 +241,21 @@ class PublisherService:
             raise ValueError("Publisher not found")
 
         api_key = secrets.token_urlsafe(32)
-        publisher.api_key_hash = hashlib.sha256(api_key.encode()).hexdigest()
+        publisher.api_key_hash = hash_api_key(api_key)
 
         self.db.commit()
+        # The previous key stops working immediately
+        api_key_cache.invalidate()
         return api_key
 
-    def verify_api_key(self, api_key: str) -> Optional[Publisher]:
-        """Verify API key and return publisher."""
-        key_hash = hashlib.sha256(api_key.encode()).hexdigest()
-        return self.db.query(Publisher).filter(Publisher.api_key_hash == key_hash).first()
+    def verify_api_key(self, api_key: str) -> Optional[PublisherPrincipal]:
+        """
+        Verify API key and return its publisher (cached, see publisher_auth).
+
+        Request authentication goes through authenticate_api_key, which
+        also applies rate limits and records the key's last use.
+        """
+        return api_key_cache.get(self.db, hash_api_key(api_key))
 
     # -------------------------------------------------------------------------
     # Payment Settings
@@ -279,71 +300,294 @@ class PublisherService:
             )
         ).first()
 
+    def get_stats_history(
+        self,
+        publisher_id: int,
+        period: str = "day",
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> List[PublisherStats]:
+        """Get precomputed daily or monthly rollups, oldest first."""
+        query = self.db.query(PublisherStats).filter(
+            PublisherStats.publisher_id == publisher_id,
+            PublisherStats.period == period,
+        )
+        if start:
+            query = query.filter(PublisherStats.period_start >= _day_start(start))
+        if end:
+            query = query.filter(PublisherStats.period_start <= _day_start(end))
+        return query.order_by(PublisherStats.period_start).all()
+
     def recalculate_stats(self, publisher_id: int) -> PublisherStats:
         """Recalculate all statistics for a publisher."""
-        from ..models.review import ModuleReview
-        from ..models.analytics import ModuleDownload
+        self.refresh_stats([publisher_id])
+        return self.get_stats(publisher_id, "all")
 
-        # Get counts
-        total_modules = self.db.query(func.count(MarketplaceModule.id)).filter(
-            MarketplaceModule.publisher_id == publisher_id
-        ).scalar()
+    def refresh_stats(
+        self,
+        publisher_ids: Optional[List[int]] = None,
+        calculated_at: Optional[datetime] = None,
+    ) -> int:
+        """
+        Recalculate all-time statistics in one grouped pass.
 
-        published_modules = self.db.query(func.count(MarketplaceModule.id)).filter(
-            and_(
-                MarketplaceModule.publisher_id == publisher_id,
-                MarketplaceModule.status == "published",
-            )
-        ).scalar()
-
-        total_downloads = self.db.query(func.sum(MarketplaceModule.download_count)).filter(
-            MarketplaceModule.publisher_id == publisher_id
-        ).scalar() or 0
-
-        # Get revenue from orders
-        from sqlalchemy import text
-        revenue_query = """
-            SELECT COALESCE(SUM(oi.total_price), 0)
-            FROM marketplace_order_items oi
-            JOIN marketplace_orders o ON o.id = oi.order_id
-            JOIN marketplace_modules m ON m.id = oi.module_id
-            WHERE m.publisher_id = :publisher_id
-            AND o.payment_status = 'completed'
+        Args:
+            publisher_ids: Publishers to refresh (all when None)
+            calculated_at: Timestamp stored on the rows (defaults to now)
+
+        Returns:
+            Number of publishers refreshed
         """
-        total_revenue = self.db.execute(
-            text(revenue_query),
-            {"publisher_id": publisher_id}
-        ).scalar() or Decimal("0.00")
+        from ..models.license import OrderItem
+        from ..models.module import ModuleVersion
+
+        def scoped(query, column):
+            return query if publisher_ids is None else query.filter(column.in_(publisher_ids))
+
+        publishers = scoped(
+            self.db.query(Publisher.id, Publisher.commission_rate), Publisher.id
+        ).all()
+
+        modules = {
+            row.publisher_id: row
+            for row in scoped(
+                self.db.query(
+                    MarketplaceModule.publisher_id,
+                    func.count(MarketplaceModule.id).label("total_modules"),
+                    func.sum(case((MarketplaceModule.status == "published", 1), else_=0)).label("published_modules"),
+                    func.sum(MarketplaceModule.download_count).label("total_downloads"),
+                    func.sum(MarketplaceModule.view_count).label("total_views"),
+                    func.avg(MarketplaceModule.average_rating).label("average_rating"),
+                    func.sum(MarketplaceModule.rating_count).label("total_reviews"),
+                ),
+                MarketplaceModule.publisher_id,
+            ).group_by(MarketplaceModule.publisher_id)
+        }
 
-        # Get average rating
-        avg_rating = self.db.query(func.avg(MarketplaceModule.average_rating)).filter(
-            and_(
-                MarketplaceModule.publisher_id == publisher_id,
-                MarketplaceModule.average_rating.isnot(None),
+        versions = dict(
+            scoped(
+                self.db.query(MarketplaceModule.publisher_id, func.count(ModuleVersion.id))
+                .join(ModuleVersion, ModuleVersion.module_id == MarketplaceModule.id),
+                MarketplaceModule.publisher_id,
+            ).group_by(MarketplaceModule.publisher_id).all()
+        )
+
+        revenue = dict(
+            scoped(
+                self.db.query(MarketplaceModule.publisher_id, func.sum(OrderItem.total_price))
+                .join(OrderItem, OrderItem.module_id == MarketplaceModule.id)
+                .join(Order, Order.id == OrderItem.order_id)
+                .filter(Order.payment_status == "completed"),
+                MarketplaceModule.publisher_id,
+            ).group_by(MarketplaceModule.publisher_id).all()
+        )
+
+        existing = {
+            stats.publisher_id: stats
+            for stats in scoped(
+                self.db.query(PublisherStats).filter(PublisherStats.period == "all"),
+                PublisherStats.publisher_id,
             )
-        ).scalar()
+        }
 
-        total_reviews = self.db.query(func.sum(MarketplaceModule.rating_count)).filter(
-            MarketplaceModule.publisher_id == publisher_id
-        ).scalar() or 0
+        calculated_at = calculated_at or datetime.utcnow()
+        for publisher_id, commission_rate in publishers:
+            stats = existing.get(publisher_id)
+            if not stats:
+                stats = PublisherStats(publisher_id=publisher_id, period="all")
+                self.db.add(stats)
+
+            row = modules.get(publisher_id)
+            total_revenue = Decimal(str(revenue.get(publisher_id) or 0)).quantize(CENT)
+            net_rate = Decimal("100.00") - (commission_rate or Decimal("0.00"))
+
+            stats.total_modules = row.total_modules if row else 0
+            stats.published_modules = (row.published_modules or 0) if row else 0
+            stats.total_versions = versions.get(publisher_id, 0)
+            stats.total_downloads = (row.total_downloads or 0) if row else 0
+            stats.total_views = (row.total_views or 0) if row else 0
+            stats.total_revenue = total_revenue
+            stats.total_earnings = (total_revenue * net_rate / 100).quantize(CENT)
+            stats.average_rating = (
+                Decimal(str(row.average_rating)).quantize(CENT)
+                if row and row.average_rating is not None else None
+            )
+            stats.total_reviews = (row.total_reviews or 0) if row else 0
+            stats.calculated_at = calculated_at
 
-        # Update or create stats
-        stats = self.get_stats(publisher_id, "all")
-        if not stats:
-            stats = PublisherStats(publisher_id=publisher_id, period="all")
-            self.db.add(stats)
+        self.db.commit()
+        return len(publishers)
+
+    def rollup_stats(
+        self,
+        period: str,
+        period_start: date,
+        publisher_ids: Optional[List[int]] = None,
+        calculated_at: Optional[datetime] = None,
+    ) -> int:
+        """
+        Store daily or monthly statistics of all publishers in one pass.
 
-        stats.total_modules = total_modules
-        stats.published_modules = published_modules
-        stats.total_downloads = total_downloads
-        stats.total_revenue = total_revenue
-        stats.average_rating = avg_rating
-        stats.total_reviews = total_reviews
-        stats.calculated_at = datetime.utcnow()
+        Rows are only kept for publishers with activity in the period.
+
+        Args:
+            period: "day" or "month"
+            period_start: Any date in the period
+            publisher_ids: Publishers to roll up (all when None)
+            calculated_at: Timestamp stored on the rows (defaults to now)
+
+        Returns:
+            Number of rollup rows written
+        """
+        from ..models.analytics import ModuleDownload, ModuleView
+        from ..models.license import OrderItem
+        from ..models.review import ModuleReview
+
+        if period not in STATS_ROLLUP_PERIODS:
+            raise ValueError(f"Unknown statistics period: {period}")
+
+        if period == "month":
+            start = period_start.replace(day=1)
+            end = (start + timedelta(days=32)).replace(day=1)
+        else:
+            start, end = period_start, period_start + timedelta(days=1)
+
+        def grouped(query):
+            if publisher_ids is not None:
+                query = query.filter(MarketplaceModule.publisher_id.in_(publisher_ids))
+            return dict(query.group_by(MarketplaceModule.publisher_id).all())
+
+        downloads = grouped(
+            self.db.query(MarketplaceModule.publisher_id, func.count(ModuleDownload.id))
+            .join(ModuleDownload, ModuleDownload.module_id == MarketplaceModule.id)
+            .filter(ModuleDownload.download_date >= start, ModuleDownload.download_date < end)
+        )
+        views = grouped(
+            self.db.query(MarketplaceModule.publisher_id, func.count(ModuleView.id))
+            .join(ModuleView, ModuleView.module_id == MarketplaceModule.id)
+            .filter(ModuleView.view_date >= start, ModuleView.view_date < end)
+        )
+        revenue = grouped(
+            self.db.query(MarketplaceModule.publisher_id, func.sum(OrderItem.total_price))
+            .join(OrderItem, OrderItem.module_id == MarketplaceModule.id)
+            .join(Order, Order.id == OrderItem.order_id)
+            .filter(
+                Order.payment_status == "completed",
+                Order.completed_at >= _day_start(start),
+                Order.completed_at < _day_start(end),
+            )
+        )
+        reviews = grouped(
+            self.db.query(MarketplaceModule.publisher_id, func.count(ModuleReview.id))
+            .join(ModuleReview, ModuleReview.module_id == MarketplaceModule.id)
+            .filter(
+                ModuleReview.created_at >= _day_start(start),
+                ModuleReview.created_at < _day_start(end),
+            )
+        )
+
+        query = self.db.query(PublisherStats).filter(
+            PublisherStats.period == period,
+            PublisherStats.period_start == _day_start(start),
+        )
+        if publisher_ids is not None:
+            query = query.filter(PublisherStats.publisher_id.in_(publisher_ids))
+        existing = {stats.publisher_id: stats for stats in query}
+
+        # Publishers whose activity disappeared (e.g. refunds) are zeroed
+        active = set(downloads) | set(views) | set(revenue) | set(reviews) | set(existing)
+        calculated_at = calculated_at or datetime.utcnow()
+        for publisher_id in active:
+            stats = existing.get(publisher_id)
+            if not stats:
+                stats = PublisherStats(
+                    publisher_id=publisher_id,
+                    period=period,
+                    period_start=_day_start(start),
+                    period_end=_day_start(end),
+                )
+                self.db.add(stats)
+
+            stats.downloads_this_period = downloads.get(publisher_id, 0)
+            stats.views_this_period = views.get(publisher_id, 0)
+            stats.revenue_this_period = Decimal(str(revenue.get(publisher_id) or 0)).quantize(CENT)
+            stats.reviews_this_period = reviews.get(publisher_id, 0)
+            stats.calculated_at = calculated_at
 
         self.db.commit()
-        self.db.refresh(stats)
-        return stats
+        return len(active)
+
+    def refresh_stats_incremental(self, since: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Refresh statistics of publishers with activity since the last run.
+
+        The all-time rows of active publishers are recalculated, and their
+        daily and monthly rollups are rebuilt for every day since then. The
+        last run is the newest daily rollup; without one every publisher is
+        refreshed and today is rolled up.
+
+        Args:
+            since: Activity cutoff (defaults to the last run)
+
+        Returns:
+            Summary with the cutoff, publisher count and days rolled up
+        """
+        started_at = datetime.utcnow()
+        if since is None:
+            since = self.db.query(func.max(PublisherStats.calculated_at)).filter(
+                PublisherStats.period == "day"
+            ).scalar()
+
+        if since is None:
+            publisher_ids = None
+            days = [started_at.date()]
+        else:
+            publisher_ids = self._active_publisher_ids(since)
+            days = [
+                since.date() + timedelta(days=offset)
+                for offset in range((started_at.date() - since.date()).days + 1)
+            ]
+
+        refreshed = 0
+        if publisher_ids != []:
+            refreshed = self.refresh_stats(publisher_ids, calculated_at=started_at)
+            for day in days:
+                self.rollup_stats("day", day, publisher_ids, calculated_at=started_at)
+            for month in sorted({day.replace(day=1) for day in days}):
+                self.rollup_stats("month", month, publisher_ids, calculated_at=started_at)
+
+        logger.info(f"Refreshed statistics of {refreshed} publishers since {since}")
+        return {
+            "since": since.isoformat() if since else None,
+            "publishers": refreshed,
+            "days": len(days) if refreshed else 0,
+        }
+
+    def _active_publisher_ids(self, since: datetime) -> List[int]:
+        """Publishers whose modules, downloads, views, reviews or sales changed since a time."""
+        from ..models.analytics import ModuleDownload, ModuleView
+        from ..models.license import OrderItem
+        from ..models.module import ModuleVersion
+        from ..models.review import ModuleReview
+
+        publisher_id = MarketplaceModule.publisher_id
+        sources = [
+            select(publisher_id).where(
+                or_(MarketplaceModule.created_at >= since, MarketplaceModule.updated_at >= since)
+            ),
+            select(publisher_id).join(ModuleVersion, ModuleVersion.module_id == MarketplaceModule.id)
+            .where(ModuleVersion.created_at >= since),
+            select(publisher_id).join(ModuleDownload, ModuleDownload.module_id == MarketplaceModule.id)
+            .where(ModuleDownload.created_at >= since),
+            select(publisher_id).join(ModuleView, ModuleView.module_id == MarketplaceModule.id)
+            .where(ModuleView.created_at >= since),
+            select(publisher_id).join(ModuleReview, ModuleReview.module_id == MarketplaceModule.id)
+            .where(or_(ModuleReview.created_at >= since, ModuleReview.updated_at >= since)),
+            select(publisher_id).join(OrderItem, OrderItem.module_id == MarketplaceModule.id)
+            .join(Order, Order.id == OrderItem.order_id)
+            .where(or_(Order.created_at >= since, Order.updated_at >= since)),
+        ]
+        return sorted(self.db.scalars(union(*sources)))
 
     # -------------------------------------------------------------------------
     # Payouts
@@ -456,6 +700,17 @@ class PublisherService:
         ).limit(limit).all()
 
 
+def refresh_publisher_stats() -> Dict[str, Any]:
+    """Scheduled job: refresh publisher statistics incrementally in its own session."""
+    from app.db.base import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return PublisherService(db).refresh_stats_incremental()
+    finally:
+        db.close()
+
+
 def get_publisher_service(db: Session) -> PublisherService:
     """Get publisher service instance."""
     return PublisherService(db)
@@ -5,10 +5,11 @@ Review and rating management operations.
 """
 
 import logging
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 
-from sqlalchemy import func, and_, or_
+from sqlalchemy import case, func, and_, or_
 from sqlalchemy.orm import Session, joinedload
 
 from ..models.review import (
@@ -23,6 +24,39 @@ from ..models.license import License
 
 logger = logging.getLogger(__name__)
 
+# Optional per-aspect ratings (ModuleReview.rating_<name>)
+DETAIL_RATINGS = ("ease_of_use", "features", "documentation", "support", "value")
+
+
+def _dialect_insert(db: Session, table):
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        return pg_insert(table)
+    from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+    return sqlite_insert(table)
+
+
+@dataclass(frozen=True)
+class RatingContribution:
+    """What one review adds to its module's rating summary."""
+
+    rating: int
+    verified: bool
+    details: Tuple[Optional[int], ...]  # By DETAIL_RATINGS; None when not rated
+    created_at: Optional[datetime]
+
+    @classmethod
+    def of(cls, review: ModuleReview) -> Optional["RatingContribution"]:
+        """Contribution of a review as it is now; None unless published."""
+        if review.status != "published":
+            return None
+        return cls(
+            rating=review.rating,
+            verified=bool(review.verified_purchase),
+            details=tuple(getattr(review, f"rating_{name}") or None for name in DETAIL_RATINGS),
+            created_at=review.created_at,
+        )
+
 
 class ReviewService:
     """Service for managing reviews and ratings."""
@@ -91,7 +125,7 @@ class ReviewService:
         self.db.flush()
 
         # Update rating summary
-        self._update_rating_summary(module_id)
+        self._apply_rating_change(module_id, None, RatingContribution.of(review))
 
         self.db.commit()
         self.db.refresh(review)
@@ -119,6 +153,8 @@ class ReviewService:
         if not review:
             raise ValueError("Review not found or not owned by user")
 
+        before = RatingContribution.of(review)
+
         # Store original content if first edit
         if not review.is_edited:
             review.original_content = review.content
@@ -150,9 +186,8 @@ class ReviewService:
         review.edited_at = datetime.utcnow()
         review.updated_by = user_id
 
-        # Update rating summary if rating changed
-        if rating is not None:
-            self._update_rating_summary(review.module_id)
+        # Update rating summary if ratings changed
+        self._apply_rating_change(review.module_id, before, RatingContribution.of(review))
 
         self.db.commit()
         self.db.refresh(review)
@@ -170,10 +205,11 @@ class ReviewService:
             return False
 
         module_id = review.module_id
+        before = RatingContribution.of(review)
         self.db.delete(review)
 
         # Update rating summary
-        self._update_rating_summary(module_id)
+        self._apply_rating_change(module_id, before, None)
 
         self.db.commit()
         return True
@@ -454,7 +490,9 @@ class ReviewService:
             review.reported_count += 1
             # Auto-hide if too many reports
             if review.reported_count >= 5:
+                before = RatingContribution.of(review)
                 review.status = "reported"
+                self._apply_rating_change(review.module_id, before, None)
 
         self.db.commit()
         self.db.refresh(report)
@@ -481,10 +519,12 @@ class ReviewService:
         # Apply resolution to review
         review = self.db.query(ModuleReview).get(report.review_id)
         if review and resolution in ("removed", "hidden"):
+            before = RatingContribution.of(review)
             review.status = resolution
             review.moderated_by = moderator_id
             review.moderated_at = datetime.utcnow()
             review.moderation_notes = notes
+            self._apply_rating_change(review.module_id, before, None)
 
         self.db.commit()
         self.db.refresh(report)
@@ -494,77 +534,83 @@ class ReviewService:
     # Rating Summary
     # ==========================================================================
 
-    def _update_rating_summary(self, module_id: int):
-        """Recalculate and update rating summary for a module."""
-        # Get all published reviews
-        reviews = self.db.query(ModuleReview).filter(
-            ModuleReview.module_id == module_id,
-            ModuleReview.status == "published",
-        ).all()
+    def _apply_rating_change(
+        self,
+        module_id: int,
+        old: Optional[RatingContribution],
+        new: Optional[RatingContribution],
+    ) -> None:
+        """
+        Adjust a module's rating summary for one review going from old to new.
+
+        The summary row is locked until commit, so concurrent review
+        changes on a module apply their deltas one after the other.
+        """
+        if old == new:
+            return
 
-        summary = self.db.query(RatingSummary).filter(
-            RatingSummary.module_id == module_id,
-        ).first()
+        summary = self._lock_rating_summary(module_id)
 
         if not summary:
-            summary = RatingSummary(module_id=module_id)
-            self.db.add(summary)
-
-        if not reviews:
-            summary.average_rating = 0
-            summary.total_reviews = 0
-            summary.verified_reviews = 0
-            summary.rating_5 = 0
-            summary.rating_4 = 0
-            summary.rating_3 = 0
-            summary.rating_2 = 0
-            summary.rating_1 = 0
-        else:
-            # Calculate averages
-            total_rating = sum(r.rating for r in reviews)
-            summary.total_reviews = len(reviews)
-            summary.average_rating = int((total_rating / len(reviews)) * 100)
-
-            summary.verified_reviews = sum(1 for r in reviews if r.verified_purchase)
-
-            # Distribution
-            summary.rating_5 = sum(1 for r in reviews if r.rating == 5)
-            summary.rating_4 = sum(1 for r in reviews if r.rating == 4)
-            summary.rating_3 = sum(1 for r in reviews if r.rating == 3)
-            summary.rating_2 = sum(1 for r in reviews if r.rating == 2)
-            summary.rating_1 = sum(1 for r in reviews if r.rating == 1)
-
-            # Detailed averages
-            ease_ratings = [r.rating_ease_of_use for r in reviews if r.rating_ease_of_use]
-            if ease_ratings:
-                summary.avg_ease_of_use = int((sum(ease_ratings) / len(ease_ratings)) * 100)
-
-            feature_ratings = [r.rating_features for r in reviews if r.rating_features]
-            if feature_ratings:
-                summary.avg_features = int((sum(feature_ratings) / len(feature_ratings)) * 100)
-
-            doc_ratings = [r.rating_documentation for r in reviews if r.rating_documentation]
-            if doc_ratings:
-                summary.avg_documentation = int((sum(doc_ratings) / len(doc_ratings)) * 100)
-
-            support_ratings = [r.rating_support for r in reviews if r.rating_support]
-            if support_ratings:
-                summary.avg_support = int((sum(support_ratings) / len(support_ratings)) * 100)
-
-            value_ratings = [r.rating_value for r in reviews if r.rating_value]
-            if value_ratings:
-                summary.avg_value = int((sum(value_ratings) / len(value_ratings)) * 100)
-
-            # Last review
-            summary.last_review_at = max(r.created_at for r in reviews)
-
+            # Create the row; a concurrent creator wins the conflict and we
+            # wait on its lock, then apply our delta to the row it built
+            self.db.flush()
+            created = self.db.execute(
+                _dialect_insert(self.db, RatingSummary.__table__)
+                .values(module_id=module_id, recalculated_at=datetime.utcnow())
+                .on_conflict_do_nothing(index_elements=["module_id"])
+            ).rowcount
+            if created:
+                # Fill the new row from the reviews, this change included
+                self._rebuild_rating_summaries([module_id])
+                return
+            summary = self._lock_rating_summary(module_id)
+
+        for contribution, sign in ((old, -1), (new, 1)):
+            if contribution is None:
+                continue
+            summary.total_reviews = (summary.total_reviews or 0) + sign
+            summary.rating_sum = (summary.rating_sum or 0) + sign * contribution.rating
+            if contribution.verified:
+                summary.verified_reviews = (summary.verified_reviews or 0) + sign
+            bucket = f"rating_{contribution.rating}"
+            setattr(summary, bucket, (getattr(summary, bucket) or 0) + sign)
+            for name, value in zip(DETAIL_RATINGS, contribution.details):
+                if value:
+                    setattr(summary, f"{name}_sum", (getattr(summary, f"{name}_sum") or 0) + sign * value)
+                    setattr(summary, f"{name}_count", (getattr(summary, f"{name}_count") or 0) + sign)
+
+        if new is not None:
+            if new.created_at and (not summary.last_review_at or new.created_at > summary.last_review_at):
+                summary.last_review_at = new.created_at
+        elif old.created_at == summary.last_review_at:
+            # The latest review went away
+            self.db.flush()
+            summary.last_review_at = self.db.query(func.max(ModuleReview.created_at)).filter(
+                ModuleReview.module_id == module_id,
+                ModuleReview.status == "published",
+            ).scalar()
+
+        self._derive_rating_fields(summary, self.db.query(MarketplaceModule).get(module_id))
+
+    def _lock_rating_summary(self, module_id: int) -> Optional[RatingSummary]:
+        return self.db.query(RatingSummary).filter(
+            RatingSummary.module_id == module_id,
+        ).with_for_update().populate_existing().first()
+
+    def _derive_rating_fields(self, summary: RatingSummary, module: Optional[MarketplaceModule]) -> None:
+        """Compute averages from the running totals and copy them to the module."""
+        total = summary.total_reviews or 0
+        summary.average_rating = (summary.rating_sum or 0) * 100 // total if total else 0
+        for name in DETAIL_RATINGS:
+            count = getattr(summary, f"{name}_count") or 0
+            average = (getattr(summary, f"{name}_sum") or 0) * 100 // count if count else None
+            setattr(summary, f"avg_{name}", average)
         summary.recalculated_at = datetime.utcnow()
 
-        # Also update module cached rating
-        module = self.db.query(MarketplaceModule).get(module_id)
         if module:
             module.average_rating = summary.average_rating / 100 if summary.average_rating else None
-            module.rating_count = summary.total_reviews
+            module.rating_count = total
             module.rating_distribution = {
                 "5": summary.rating_5,
                 "4": summary.rating_4,
@@ -573,6 +619,75 @@ class ReviewService:
                 "1": summary.rating_1,
             }
 
+    def rebuild_rating_summaries(self, module_ids: Optional[List[int]] = None) -> int:
+        """
+        Recompute rating summaries from the published reviews.
+
+        Repairs drift in the running totals. Rebuilds every module with
+        reviews or a summary when module_ids is None.
+
+        Returns:
+            Number of summaries written
+        """
+        count = self._rebuild_rating_summaries(module_ids)
+        self.db.commit()
+        logger.info(f"Rebuilt {count} rating summaries")
+        return count
+
+    def _rebuild_rating_summaries(self, module_ids: Optional[List[int]] = None) -> int:
+        # One aggregate query for all modules
+        columns = [
+            ModuleReview.module_id,
+            func.count(ModuleReview.id),
+            func.coalesce(func.sum(ModuleReview.rating), 0),
+            func.count(case((ModuleReview.verified_purchase == True, 1))),
+            func.max(ModuleReview.created_at),
+        ]
+        columns.extend(func.count(case((ModuleReview.rating == n, 1))) for n in range(1, 6))
+        for name in DETAIL_RATINGS:
+            column = getattr(ModuleReview, f"rating_{name}")
+            columns.append(func.coalesce(func.sum(case((column > 0, column))), 0))
+            columns.append(func.count(case((column > 0, 1))))
+
+        query = self.db.query(*columns).filter(ModuleReview.status == "published")
+        summaries_query = self.db.query(RatingSummary)
+        if module_ids is not None:
+            query = query.filter(ModuleReview.module_id.in_(module_ids))
+            summaries_query = summaries_query.filter(RatingSummary.module_id.in_(module_ids))
+        aggregates = {row[0]: row for row in query.group_by(ModuleReview.module_id)}
+
+        summaries = {
+            summary.module_id: summary
+            for summary in summaries_query.with_for_update().populate_existing()
+        }
+        targets = set(aggregates) | set(summaries) | set(module_ids or ())
+        modules = {
+            module.id: module
+            for module in self.db.query(MarketplaceModule).filter(MarketplaceModule.id.in_(targets))
+        } if targets else {}
+
+        for module_id in targets:
+            summary = summaries.get(module_id)
+            if summary is None:
+                summary = RatingSummary(module_id=module_id)
+                self.db.add(summary)
+
+            row = aggregates.get(module_id)
+            if row is None:
+                row = (module_id, 0, 0, 0, None) + (0,) * (5 + 2 * len(DETAIL_RATINGS))
+            (
+                _, summary.total_reviews, summary.rating_sum, summary.verified_reviews,
+                summary.last_review_at, summary.rating_1, summary.rating_2, summary.rating_3,
+                summary.rating_4, summary.rating_5,
+            ) = row[:10]
+            for index, name in enumerate(DETAIL_RATINGS):
+                setattr(summary, f"{name}_sum", row[10 + 2 * index])
+                setattr(summary, f"{name}_count", row[11 + 2 * index])
+
+            self._derive_rating_fields(summary, modules.get(module_id))
+
+        return len(targets)
+
     def get_rating_summary(self, module_id: int) -> Optional[RatingSummary]:
         """Get rating summary for a module."""
         return self.db.query(RatingSummary).filter(
@@ -614,6 +729,8 @@ class ReviewService:
         if not review:
             raise ValueError("Review not found")
 
+        before = RatingContribution.of(review)
+
         if action == "approve":
             review.status = "published"
         elif action == "hide":
@@ -628,8 +745,7 @@ class ReviewService:
         review.moderation_notes = notes
 
         # Update rating summary if status changed
-        if action in ("hide", "remove"):
-            self._update_rating_summary(review.module_id)
+        self._apply_rating_change(review.module_id, before, RatingContribution.of(review))
 
         self.db.commit()
         self.db.refresh(review)
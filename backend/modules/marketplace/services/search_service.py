@@ -0,0 +1,396 @@
+"""
+Marketplace Search
+
+Ranked module search, facet counts and autocomplete:
+
+- On PostgreSQL, text matches use the weighted search_vector (name A;
+  summary, tags and keywords B; description C) plus trigram indexes on
+  the module names for typo tolerance. Other databases fall back to
+  substring matches with the same field weights
+- Text relevance is blended with downloads and rating (see RANK_*)
+- The total and category/price/rating facet counts come from one
+  grouped query
+- Autocomplete reads a per-process suggestion index, rebuilt every
+  MARKETPLACE_SUGGESTION_TTL seconds or when a module is published
+"""
+
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Float, and_, case, cast, desc, func, literal, or_
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.cache import CacheGeneration
+from app.core.config import settings
+
+from ..models.module import MarketplaceModule
+
+# Score = text relevance * (1 + download and rating boosts)
+RANK_DOWNLOAD_WEIGHT = 0.5
+RANK_RATING_WEIGHT = 0.5
+DOWNLOAD_HALF_SATURATION = 1000  # Downloads at which the download boost is half its weight
+RATING_PRIOR_COUNT = 10  # Reviews before a rating counts fully
+
+# Substring fallback field weights (ts_rank defaults for A/B/C)
+_FIELD_WEIGHTS = (1.0, 0.4, 0.2)
+
+# (band, upper price bound); a band holds prices below its bound
+PRICE_BANDS: Tuple[Tuple[str, Optional[int]], ...] = (
+    ("free", 0),
+    ("under_50", 50),
+    ("50_to_200", 200),
+    ("200_plus", None),
+)
+RATING_BANDS = (4, 3, 2, 1)  # "n" counts modules rated n and up
+
+_TERM = re.compile(r"[^\W_]+")
+
+
+def search_terms(query: Optional[str]) -> List[str]:
+    """Lowercase words of a query (underscores split words, as in technical names)."""
+    return _TERM.findall((query or "").lower())
+
+
+@dataclass
+class SearchResult:
+    """A page of ranked modules with the total and facet counts."""
+
+    modules: List[MarketplaceModule]
+    total: int
+    facets: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+
+def _price_band():
+    price = func.coalesce(MarketplaceModule.price, 0)
+    whens = [(price <= 0, PRICE_BANDS[0][0])]
+    whens += [(price < bound, band) for band, bound in PRICE_BANDS[1:] if bound is not None]
+    return case(*whens, else_=PRICE_BANDS[-1][0])
+
+
+def _rating_band():
+    rating = MarketplaceModule.average_rating
+    return case(*[(rating >= band, band) for band in RATING_BANDS], else_=None)
+
+
+def _quality_boost():
+    """Download and rating boosts; ratings with few reviews are damped."""
+    downloads = cast(func.coalesce(MarketplaceModule.download_count, 0), Float)
+    reviews = cast(func.coalesce(MarketplaceModule.rating_count, 0), Float)
+    rating = cast(func.coalesce(MarketplaceModule.average_rating, 0), Float)
+    return (
+        1
+        + RANK_DOWNLOAD_WEIGHT * downloads / (downloads + DOWNLOAD_HALF_SATURATION)
+        + RANK_RATING_WEIGHT * (rating / 5) * reviews / (reviews + RATING_PRIOR_COUNT)
+    )
+
+
+class MarketplaceSearch:
+    """Module search over published modules."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # -------------------------------------------------------------------------
+    # Text matching
+    # -------------------------------------------------------------------------
+
+    def _text_match(self, terms: List[str]):
+        """(filter, relevance) of the query terms for the session's database."""
+        if self.db.get_bind().dialect.name == "postgresql":
+            return self._tsvector_match(terms)
+        return self._substring_match(terms)
+
+    def _tsvector_match(self, terms: List[str]):
+        """
+        Full-text match on search_vector, each term as a prefix, or a
+        trigram word match on the names (typos).
+        """
+        module = MarketplaceModule
+        text = " ".join(terms)
+        tsquery = func.to_tsquery("english", " & ".join(f"{term}:*" for term in terms))
+        match = or_(
+            module.search_vector.op("@@")(tsquery),
+            literal(text).op("<%")(module.display_name),
+            literal(text).op("<%")(module.technical_name),
+        )
+        relevance = func.ts_rank_cd(module.search_vector, tsquery, 32) + func.greatest(
+            func.word_similarity(text, module.display_name),
+            func.word_similarity(text, module.technical_name),
+        )
+        return match, relevance
+
+    def _substring_match(self, terms: List[str]):
+        """Every term in some field; relevance by the best field each term is in."""
+        module = MarketplaceModule
+        a_weight, b_weight, c_weight = _FIELD_WEIGHTS
+        matches = []
+        scores = []
+        for term in terms:
+            pattern = f"%{term}%"
+            in_name = or_(module.display_name.ilike(pattern), module.technical_name.ilike(pattern))
+            in_summary = module.short_description.ilike(pattern)
+            in_description = func.coalesce(module.description, "").ilike(pattern)
+            matches.append(or_(in_name, in_summary, in_description))
+            scores.append(case(
+                (in_name, a_weight), (in_summary, b_weight), (in_description, c_weight), else_=0.0,
+            ))
+        return and_(*matches), sum(scores[1:], scores[0]) / len(terms)
+
+    # -------------------------------------------------------------------------
+    # Search
+    # -------------------------------------------------------------------------
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        category_id: Optional[int] = None,
+        license_type: Optional[str] = None,
+        price_band: Optional[str] = None,
+        publisher_id: Optional[int] = None,
+        tags: Optional[List[str]] = None,
+        min_rating: Optional[float] = None,
+        min_downloads: Optional[int] = None,
+        fastvue_version: Optional[str] = None,
+        sort_by: str = "relevance",
+        limit: int = 20,
+        offset: int = 0,
+        with_facets: bool = True,
+    ) -> SearchResult:
+        """
+        Search published modules.
+
+        Facet counts ignore the facet's own selection (category_id,
+        price_band) so the alternatives stay visible; all other filters
+        narrow every count.
+        """
+        module = MarketplaceModule
+        filters = [module.status == "published"]
+        relevance = literal(1.0)
+
+        terms = search_terms(query)
+        if terms:
+            match, relevance = self._text_match(terms)
+            filters.append(match)
+
+        if license_type:
+            filters.append(module.license_type == license_type)
+        if publisher_id:
+            filters.append(module.publisher_id == publisher_id)
+        if tags:
+            # Module must have all specified tags
+            filters.extend(module.tags.contains([tag]) for tag in tags)
+        if min_rating:
+            filters.append(module.average_rating >= min_rating)
+        if min_downloads:
+            filters.append(module.download_count >= min_downloads)
+        if fastvue_version:
+            filters.append(module.fastvue_versions.contains([fastvue_version]))
+
+        facets, total = self._facets(filters, category_id, price_band)
+
+        selected = list(filters)
+        if category_id:
+            selected.append(module.category_id == category_id)
+        if price_band:
+            selected.append(_price_band() == price_band)
+
+        modules = self.db.query(module).filter(*selected).order_by(
+            *self._order(sort_by, relevance)
+        ).options(
+            joinedload(module.publisher),
+            joinedload(module.category),
+        ).offset(offset).limit(limit).all()
+
+        return SearchResult(modules=modules, total=total, facets=facets if with_facets else {})
+
+    def _order(self, sort_by: str, relevance) -> List[Any]:
+        module = MarketplaceModule
+        if sort_by == "downloads":
+            order = [desc(module.download_count)]
+        elif sort_by == "rating":
+            order = [desc(module.average_rating)]
+        elif sort_by == "newest":
+            order = [desc(module.published_at)]
+        elif sort_by == "updated":
+            order = [desc(module.updated_at)]
+        elif sort_by == "name":
+            order = [module.display_name]
+        else:
+            order = [desc(relevance * _quality_boost())]
+        # Stable pages
+        return order + [module.id]
+
+    def _facets(
+        self,
+        filters: List[Any],
+        category_id: Optional[int],
+        price_band: Optional[str],
+    ) -> Tuple[Dict[str, Dict[str, int]], int]:
+        """Facet counts and the total, from one query grouped by every facet."""
+        module = MarketplaceModule
+        price = _price_band().label("price_band")
+        rating = _rating_band().label("rating_band")
+        rows = self.db.query(
+            module.category_id, price, rating, func.count(module.id),
+        ).filter(*filters).group_by(module.category_id, price, rating).all()
+
+        categories: Dict[str, int] = defaultdict(int)
+        prices: Dict[str, int] = dict.fromkeys((band for band, _ in PRICE_BANDS), 0)
+        ratings: Dict[str, int] = dict.fromkeys((str(band) for band in RATING_BANDS), 0)
+        total = 0
+        for row_category, row_price, row_rating, count in rows:
+            in_category = not category_id or row_category == category_id
+            in_price = not price_band or row_price == price_band
+            if in_price and row_category is not None:
+                categories[str(row_category)] += count
+            if in_category:
+                prices[row_price] += count
+            if in_category and in_price:
+                total += count
+                for band in RATING_BANDS:
+                    if row_rating is not None and row_rating >= band:
+                        ratings[str(band)] += count
+
+        return {"category": dict(categories), "price": prices, "rating": ratings}, total
+
+    # -------------------------------------------------------------------------
+    # Autocomplete
+    # -------------------------------------------------------------------------
+
+    def suggest(self, prefix: str, limit: int = 10) -> List["Suggestion"]:
+        """Most downloaded module names, tags and keywords with a word starting with prefix."""
+        return suggestion_cache.get(self.db).lookup(prefix, limit)
+
+
+def get_search_service(db: Session) -> MarketplaceSearch:
+    """Factory function for MarketplaceSearch."""
+    return MarketplaceSearch(db)
+
+
+# -------------------------------------------------------------------------
+# Suggestion Index
+# -------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    """An autocomplete entry: a module name (with its slug) or a tag/keyword."""
+
+    text: str
+    kind: str  # module, tag
+    weight: int  # Downloads of the module, or of the modules with the tag
+    slug: Optional[str] = None
+
+
+class SuggestionIndex:
+    """
+    Immutable prefix index of suggestions.
+
+    Each suggestion is keyed from every word on ("sale plus", "plus"), so
+    a prefix matches any word; keys are sorted and searched by bisection.
+    """
+
+    _MEMO_PREFIX_LENGTH = 2  # Short prefixes match many keys: their results are memoized
+
+    def __init__(self, suggestions: List[Suggestion]):
+        self.suggestions = suggestions
+        entries = []
+        for i, suggestion in enumerate(suggestions):
+            words = suggestion.text.lower().split()
+            entries.extend((" ".join(words[start:]), i) for start in range(len(words)))
+        entries.sort()
+        self._keys = [key for key, _ in entries]
+        self._ids = [i for _, i in entries]
+        self._memo: Dict[Tuple[str, int], List[Suggestion]] = {}
+
+    def __len__(self) -> int:
+        return len(self.suggestions)
+
+    def lookup(self, prefix: str, limit: int = 10) -> List[Suggestion]:
+        prefix = " ".join(prefix.lower().split())
+        if not prefix or limit <= 0:
+            return []
+        memoize = len(prefix) <= self._MEMO_PREFIX_LENGTH
+        if memoize and (prefix, limit) in self._memo:
+            return self._memo[(prefix, limit)]
+
+        start = bisect_left(self._keys, prefix)
+        end = bisect_left(self._keys, prefix + "\uffff", start)
+        ids = sorted(set(self._ids[start:end]))
+        result = [
+            self.suggestions[i]
+            for i in heapq.nlargest(limit, ids, key=lambda i: self.suggestions[i].weight)
+        ]
+        if memoize:
+            self._memo[(prefix, limit)] = result
+        return result
+
+
+def build_suggestions(db: Session) -> List[Suggestion]:
+    """Suggestions of published modules, read in one query."""
+    module = MarketplaceModule
+    names: List[Suggestion] = []
+    tags: Dict[str, List[Any]] = {}  # lowercase tag -> [text, weight]
+    rows = db.query(
+        module.display_name, module.slug, module.tags, module.keywords, module.download_count,
+    ).filter(module.status == "published")
+    for display_name, slug, module_tags, keywords, downloads in rows:
+        downloads = downloads or 0
+        names.append(Suggestion(text=display_name, kind="module", weight=downloads, slug=slug))
+        for tag in {*(module_tags or []), *(keywords or [])}:
+            if not isinstance(tag, str) or not tag.strip():
+                continue
+            entry = tags.setdefault(tag.strip().lower(), [tag.strip(), 0])
+            entry[1] += downloads
+    return names + [Suggestion(text=text, kind="tag", weight=weight) for text, weight in tags.values()]
+
+
+class SuggestionCache:
+    """
+    Process-wide suggestion index, rebuilt after ttl seconds or invalidate().
+
+    While one thread rebuilds, others keep serving the previous index.
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = settings.MARKETPLACE_SUGGESTION_TTL if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._index: Optional[SuggestionIndex] = None
+        self._token: Any = None
+        self._built_at = float("-inf")
+        self.generation = CacheGeneration("marketplace_suggestions")
+
+    def get(self, db: Session) -> SuggestionIndex:
+        token = self.generation.token()
+        index = self._index
+        if index is not None and self._token == token and time.monotonic() - self._built_at < self.ttl:
+            return index
+
+        if not self._lock.acquire(blocking=index is None):
+            return index
+        try:
+            if self._index is None or self._token != token or time.monotonic() - self._built_at >= self.ttl:
+                self._index = SuggestionIndex(build_suggestions(db))
+                self._token = token
+                self._built_at = time.monotonic()
+            return self._index
+        finally:
+            self._lock.release()
+
+    def invalidate(self) -> None:
+        """Rebuild here and in other processes (a module was published or changed)."""
+        self.generation.bump()
+
+    def clear(self) -> None:
+        """Drop this process's index."""
+        with self._lock:
+            self._index = None
+
+
+suggestion_cache = SuggestionCache()
@@ -6,13 +6,10 @@ Code signing, verification, and security scanning operations.
 
 import hashlib
 import logging
-import os
-import re
 import secrets
-import zipfile
 from datetime import datetime, timedelta
 from io import BytesIO
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Tuple, BinaryIO
 
 from sqlalchemy import func
 from sqlalchemy.orm import Session
@@ -26,6 +23,7 @@ from ..models.security import (
 )
 from ..models.module import ModuleVersion, MarketplaceModule
 from ..models.publisher import Publisher
+from .package_ingestion import SCANNER_VERSION, scan_package, store_package
 
 logger = logging.getLogger(__name__)
 
@@ -359,96 +357,88 @@ class SecurityService:
 
         return scan
 
+    def attach_package(self, scan_id: str, fileobj: BinaryIO) -> SecurityScan:
+        """
+        Stream a module package into the package store for a scan.
+
+        Raises:
+            ValueError: scan not found
+            PackageTooLarge: the package exceeds MODULE_UPLOAD_MAX_SIZE
+        """
+        scan = self.get_scan(scan_id)
+        if not scan:
+            raise ValueError("Scan not found")
+
+        package = store_package(fileobj)
+        scan.package_path = package.path
+        scan.package_sha256 = package.sha256
+        scan.package_size = package.size
+        scan.status = "pending"
+        self.db.commit()
+        self.db.refresh(scan)
+
+        return scan
+
+    def fail_scan(self, scan_id: str, error: str) -> bool:
+        """
+        Mark an unfinished scan as failed.
+
+        Used when the scan job dies outside run_security_scan() (timeout,
+        worker error); finished scans are left untouched.
+        """
+        updated = (
+            self.db.query(SecurityScan)
+            .filter(
+                SecurityScan.scan_id == scan_id,
+                SecurityScan.status.in_(("pending", "running")),
+            )
+            .update(
+                {
+                    SecurityScan.status: "failed",
+                    SecurityScan.result: "failed",
+                    SecurityScan.risk_score: 100,
+                    SecurityScan.error_message: error,
+                    SecurityScan.completed_at: datetime.utcnow(),
+                },
+                synchronize_session=False,
+            )
+        )
+        self.db.commit()
+        return bool(updated)
+
     def run_security_scan(
         self,
         scan_id: str,
-        module_content: bytes,
+        module_content: Optional[bytes] = None,
     ) -> SecurityScan:
         """
         Run security scan on module content.
 
-        This performs various checks:
+        Scans module_content when given, else the package attached with
+        attach_package(). This performs various checks:
         - Dangerous code patterns
-        - Dependency vulnerabilities (basic)
         - Manifest validation
         - File type restrictions
         """
-        scan = self.db.query(SecurityScan).filter(
-            SecurityScan.scan_id == scan_id,
-        ).first()
-
-        if not scan:
-            raise ValueError("Scan not found")
+        if module_content is not None:
+            scan = self.attach_package(scan_id, BytesIO(module_content))
+        else:
+            scan = self.get_scan(scan_id)
+            if not scan:
+                raise ValueError("Scan not found")
+        if not scan.package_path:
+            raise ValueError("Scan has no package")
 
         scan.status = "running"
         scan.started_at = datetime.utcnow()
+        scan.scanner_version = SCANNER_VERSION
         self.db.commit()
 
-        findings = []
         start_time = datetime.utcnow()
 
         try:
-            # Parse ZIP file
-            with zipfile.ZipFile(BytesIO(module_content)) as zf:
-                # Check for dangerous file types
-                dangerous_extensions = ['.exe', '.dll', '.so', '.dylib', '.bat', '.cmd', '.ps1', '.sh']
-                for name in zf.namelist():
-                    ext = os.path.splitext(name)[1].lower()
-                    if ext in dangerous_extensions:
-                        findings.append({
-                            "type": "dangerous_file",
-                            "severity": "high",
-                            "message": f"Potentially dangerous file type: {name}",
-                            "location": name,
-                            "recommendation": "Remove executable files from the module",
-                        })
-
-                # Scan Python files for dangerous patterns
-                dangerous_patterns = [
-                    (r'\bexec\s*\(', "exec() call", "high"),
-                    (r'\beval\s*\(', "eval() call", "high"),
-                    (r'\b__import__\s*\(', "Dynamic import", "medium"),
-                    (r'\bos\.system\s*\(', "os.system() call", "high"),
-                    (r'\bsubprocess\.\w+\s*\(', "subprocess usage", "medium"),
-                    (r'\bpickle\.loads?\s*\(', "pickle usage (unsafe deserialization)", "high"),
-                    (r'\brequests?\.(get|post|put|delete)\s*\(', "HTTP request", "info"),
-                    (r'(password|secret|api_key|token)\s*=\s*["\'][^"\']+["\']', "Hardcoded secret", "critical"),
-                ]
-
-                for name in zf.namelist():
-                    if name.endswith('.py'):
-                        try:
-                            content = zf.read(name).decode('utf-8', errors='ignore')
-                            for pattern, desc, severity in dangerous_patterns:
-                                matches = re.finditer(pattern, content, re.IGNORECASE)
-                                for match in matches:
-                                    # Get line number
-                                    line_num = content[:match.start()].count('\n') + 1
-                                    findings.append({
-                                        "type": "code_pattern",
-                                        "severity": severity,
-                                        "message": f"Potentially dangerous pattern: {desc}",
-                                        "location": f"{name}:{line_num}",
-                                        "recommendation": f"Review usage of {desc}",
-                                    })
-                        except Exception:
-                            pass
-
-                # Check for __manifest__.py
-                manifest_found = False
-                for name in zf.namelist():
-                    if name.endswith('__manifest__.py'):
-                        manifest_found = True
-                        break
-
-                if not manifest_found:
-                    findings.append({
-                        "type": "manifest",
-                        "severity": "high",
-                        "message": "Missing __manifest__.py file",
-                        "location": "/",
-                        "recommendation": "Add a __manifest__.py file with module metadata",
-                    })
+            result = scan_package(self.db, scan.package_path)
+            findings = result["findings"]
 
             # Count by severity
             severity_counts = {"critical": 0, "high": 0, "medium": 0, "low": 0, "info": 0}
@@ -481,6 +471,7 @@ class SecurityService:
             scan.status = "completed"
 
         except Exception as e:
+            self.db.rollback()
             scan.status = "failed"
             scan.error_message = str(e)
             scan.result = "failed"
@@ -496,6 +487,12 @@ class SecurityService:
         logger.info(f"Security scan {scan_id[:8]}... completed with result: {scan.result}")
         return scan
 
+    def get_scan(self, scan_id: str) -> Optional[SecurityScan]:
+        """Get a security scan by its scan ID."""
+        return self.db.query(SecurityScan).filter(
+            SecurityScan.scan_id == scan_id,
+        ).first()
+
     def get_scan_results(self, version_id: int) -> List[SecurityScan]:
         """Get all security scans for a module version."""
         return self.db.query(SecurityScan).filter(
@@ -619,3 +616,34 @@ class SecurityService:
 def get_security_service(db: Session) -> SecurityService:
     """Factory function for SecurityService."""
     return SecurityService(db)
+
+
+def run_package_scan(scan_id: str) -> Dict[str, Any]:
+    """
+    Background job: scan a queued package in its own session.
+
+    Returns a summary (not the findings) so task results stay small.
+    """
+    from app.db.base import SessionLocal
+
+    db = SessionLocal()
+    try:
+        scan = SecurityService(db).run_security_scan(scan_id)
+        return {
+            "scan_id": scan_id,
+            "status": scan.status,
+            "result": scan.result,
+        }
+    finally:
+        db.close()
+
+
+def mark_package_scan_failed(scan_id: str, error: Optional[str]) -> None:
+    """Failure callback for run_package_scan (timeouts, worker errors)."""
+    from app.db.base import SessionLocal
+
+    db = SessionLocal()
+    try:
+        SecurityService(db).fail_scan(scan_id, error or "Security scan failed")
+    finally:
+        db.close()
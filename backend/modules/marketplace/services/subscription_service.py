@@ -15,10 +15,15 @@ from typing import Any, Dict, List, Optional, Tuple
 import uuid
 import logging
 
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, func
 
+from modules.base.models.sequence import Sequence
+from modules.base.services.sequence_service import SEQUENCE_MODE_STRICT, SequenceService
+
 from ..models.subscription import (
+    BillingRun,
     SubscriptionPlan,
     Subscription,
     SubscriptionInvoice,
@@ -32,9 +37,13 @@ from ..models.subscription import (
     InvoiceStatus,
 )
 from ..models.license import License
+from .usage_ingestion import upsert_usage
 
 logger = logging.getLogger(__name__)
 
+# Gap-free invoice numbers (INV-<year>-00001, reset yearly)
+INVOICE_SEQUENCE_CODE = "marketplace.subscription.invoice"
+
 
 class SubscriptionService:
     """
@@ -563,54 +572,14 @@ class SubscriptionService:
         if not subscription:
             raise ValueError(f"Subscription {subscription_id} not found")
 
-        plan = subscription.plan
-
-        # Build line items
-        line_items = []
-
-        # Base subscription
-        line_items.append({
-            "description": f"{plan.name}",
-            "quantity": 1,
-            "unit_price": float(subscription.unit_price),
-            "amount": float(subscription.unit_price),
-            "type": "subscription"
-        })
-
-        # Add metered usage if applicable
-        usage_amount = Decimal("0.00")
-        if include_usage and plan.is_metered:
-            usage_items, usage_total = self._calculate_usage_charges(subscription)
-            line_items.extend(usage_items)
-            usage_amount = usage_total
-
-        subtotal = subscription.unit_price + usage_amount
-        discount_amount = subtotal * (subscription.discount_percent / 100)
-        total = subtotal - discount_amount
+        usage_records = []
+        if include_usage:
+            usage_records = self._unbilled_usage([subscription.id]).get(subscription.id, [])
+        values = self._invoice_values(subscription, subscription.plan, usage_records)
 
         # Generate invoice number
-        invoice_number = self._generate_invoice_number()
-
-        invoice = SubscriptionInvoice(
-            invoice_number=invoice_number,
-            subscription_id=subscription_id,
-            user_id=subscription.user_id,
-            company_id=subscription.company_id,
-            period_start=subscription.current_period_start,
-            period_end=subscription.current_period_end,
-            line_items=line_items,
-            subtotal=subtotal,
-            discount_amount=discount_amount,
-            total=total,
-            amount_due=total,
-            currency=subscription.currency,
-            status=InvoiceStatus.PENDING.value,
-            issue_date=date.today(),
-            due_date=date.today() + timedelta(days=14),
-            billing_name=subscription.billing_name,
-            billing_email=subscription.billing_email,
-            billing_address=subscription.billing_address,
-        )
+        values["invoice_number"] = self._generate_invoice_number()
+        invoice = SubscriptionInvoice(**values)
 
         self.db.add(invoice)
         self.db.commit()
@@ -800,42 +769,31 @@ class SubscriptionService:
         period_start = period_start or subscription.current_period_start
         period_end = period_end or subscription.current_period_end
 
-        # Check if record exists for this period
-        existing = self.db.query(SubscriptionUsage).filter(
+        # Added in the database, so concurrent reports never lose an update
+        now = datetime.utcnow()
+        upsert_usage(self.db, [{
+            "subscription_id": subscription_id,
+            "metric": metric,
+            "period_start": period_start,
+            "period_end": period_end,
+            "quantity": Decimal(str(quantity)),
+            "unit_price": plan.metered_unit_price,
+            "included_quantity": Decimal(plan.metered_included or 0),
+            "recorded_at": now,
+        }])
+        usage = self.db.query(SubscriptionUsage).filter(
             and_(
                 SubscriptionUsage.subscription_id == subscription_id,
                 SubscriptionUsage.metric == metric,
                 SubscriptionUsage.period_start == period_start,
                 SubscriptionUsage.period_end == period_end,
             )
-        ).first()
-
-        if existing:
-            # Update existing record
-            existing.quantity = existing.quantity + quantity
-            self.db.commit()
-            self.db.refresh(existing)
-            return existing
-
-        # Create new record
-        usage = SubscriptionUsage(
-            subscription_id=subscription_id,
-            metric=metric,
-            period_start=period_start,
-            period_end=period_end,
-            quantity=quantity,
-            unit_price=plan.metered_unit_price,
-            included_quantity=Decimal(plan.metered_included or 0),
-        )
-
-        self.db.add(usage)
-        self.db.commit()
-        self.db.refresh(usage)
+        ).populate_existing().one()
 
         # Update subscription usage summary
-        current_usage = subscription.current_usage or {}
+        current_usage = dict(subscription.current_usage or {})
         current_usage[metric] = float(usage.quantity)
-        current_usage["last_updated"] = datetime.utcnow().isoformat()
+        current_usage["last_updated"] = now.isoformat()
         subscription.current_usage = current_usage
         self.db.commit()
 
@@ -1103,13 +1061,63 @@ class SubscriptionService:
         return cycle_days.get(billing_cycle, 30)
 
     def _generate_invoice_number(self) -> str:
-        """Generate a unique invoice number."""
-        year = date.today().year
-        # Get count of invoices this year
-        count = self.db.query(func.count(SubscriptionInvoice.id)).filter(
-            SubscriptionInvoice.invoice_number.like(f"INV-{year}-%")
-        ).scalar()
-        return f"INV-{year}-{(count or 0) + 1:05d}"
+        """Allocate the next invoice number (see _next_invoice_numbers)."""
+        return self._next_invoice_numbers(1)[0]
+
+    def _next_invoice_numbers(self, count: int) -> List[str]:
+        """
+        Allocate consecutive invoice numbers from the invoice sequence.
+
+        Numbers are taken under the sequence row lock in the current
+        transaction: they are gap-free and only used once it commits, and
+        concurrent callers wait for it to commit.
+        """
+        sequences = SequenceService(self.db)
+        numbers = sequences.next_n(INVOICE_SEQUENCE_CODE, count, mode=SEQUENCE_MODE_STRICT)
+        if not numbers:
+            self.ensure_invoice_sequence()
+            numbers = sequences.next_n(INVOICE_SEQUENCE_CODE, count, mode=SEQUENCE_MODE_STRICT)
+        return numbers
+
+    def ensure_invoice_sequence(self) -> None:
+        """
+        Create the invoice sequence if missing.
+
+        It continues after the invoices already numbered this year. Created
+        in a short transaction of its own.
+        """
+        session = Session(bind=self.db.get_bind())
+        try:
+            if session.query(Sequence.id).filter(Sequence.code == INVOICE_SEQUENCE_CODE).first():
+                return
+
+            year = date.today().year
+            last_number = session.query(SubscriptionInvoice.invoice_number).filter(
+                SubscriptionInvoice.invoice_number.like(f"INV-{year}-%")
+            ).order_by(
+                func.length(SubscriptionInvoice.invoice_number).desc(),
+                SubscriptionInvoice.invoice_number.desc(),
+            ).first()
+            number_next = int(last_number[0].rsplit("-", 1)[1]) + 1 if last_number else 1
+
+            session.add(Sequence(
+                code=INVOICE_SEQUENCE_CODE,
+                name="Subscription Invoices",
+                prefix="INV-%(year)s-",
+                padding=5,
+                module_name="marketplace",
+                reset_period="year",
+                number_next=number_next,
+                number_increment=1,
+                last_reset_date=datetime.utcnow(),
+                is_active=True,
+            ))
+            session.commit()
+        except IntegrityError:
+            # Created concurrently
+            session.rollback()
+        finally:
+            session.close()
 
     def _create_subscription_license(self, subscription: Subscription) -> License:
         """Create a license for a subscription."""
@@ -1163,19 +1171,39 @@ class SubscriptionService:
         self, subscription: Subscription
     ) -> Tuple[List[Dict], Decimal]:
         """Calculate usage charges for metered billing."""
-        usage_records = self.db.query(SubscriptionUsage).filter(
+        records = self._unbilled_usage([subscription.id]).get(subscription.id, [])
+        return self._usage_line_items(subscription, records)
+
+    def _unbilled_usage(self, subscription_ids: List[int]) -> Dict[int, List[SubscriptionUsage]]:
+        """Unbilled usage records of several subscriptions, in one query."""
+        if not subscription_ids:
+            return {}
+
+        usage: Dict[int, List[SubscriptionUsage]] = {}
+        for record in self.db.query(SubscriptionUsage).filter(
             and_(
-                SubscriptionUsage.subscription_id == subscription.id,
-                SubscriptionUsage.period_start >= subscription.current_period_start,
-                SubscriptionUsage.period_end <= subscription.current_period_end,
+                SubscriptionUsage.subscription_id.in_(subscription_ids),
                 SubscriptionUsage.billed == False,
             )
-        ).all()
+        ).order_by(SubscriptionUsage.id):
+            usage.setdefault(record.subscription_id, []).append(record)
+        return usage
 
+    @staticmethod
+    def _usage_line_items(
+        subscription: Subscription,
+        usage_records: List[SubscriptionUsage],
+    ) -> Tuple[List[Dict], Decimal]:
+        """Line items for the unbilled usage within the current period."""
         line_items = []
         total = Decimal("0.00")
 
         for record in usage_records:
+            if (
+                record.period_start < subscription.current_period_start
+                or record.period_end > subscription.current_period_end
+            ):
+                continue
             billable = max(
                 Decimal("0"),
                 record.quantity - (record.included_quantity or Decimal("0"))
@@ -1193,6 +1221,60 @@ class SubscriptionService:
 
         return line_items, total
 
+    def _invoice_values(
+        self,
+        subscription: Subscription,
+        plan: SubscriptionPlan,
+        usage_records: List[SubscriptionUsage],
+    ) -> Dict[str, Any]:
+        """
+        Column values of the invoice for a subscription's current period.
+
+        The invoice number is left to the caller.
+        """
+        # Build line items
+        line_items = []
+
+        # Base subscription
+        line_items.append({
+            "description": f"{plan.name}",
+            "quantity": 1,
+            "unit_price": float(subscription.unit_price),
+            "amount": float(subscription.unit_price),
+            "type": "subscription"
+        })
+
+        # Add metered usage if applicable
+        usage_amount = Decimal("0.00")
+        if plan.is_metered and usage_records:
+            usage_items, usage_total = self._usage_line_items(subscription, usage_records)
+            line_items.extend(usage_items)
+            usage_amount = usage_total
+
+        subtotal = subscription.unit_price + usage_amount
+        discount_amount = subtotal * ((subscription.discount_percent or Decimal("0")) / 100)
+        total = subtotal - discount_amount
+
+        return {
+            "subscription_id": subscription.id,
+            "user_id": subscription.user_id,
+            "company_id": subscription.company_id,
+            "period_start": subscription.current_period_start,
+            "period_end": subscription.current_period_end,
+            "line_items": line_items,
+            "subtotal": subtotal,
+            "discount_amount": discount_amount,
+            "total": total,
+            "amount_due": total,
+            "currency": subscription.currency,
+            "status": InvoiceStatus.PENDING.value,
+            "issue_date": date.today(),
+            "due_date": date.today() + timedelta(days=14),
+            "billing_name": subscription.billing_name,
+            "billing_email": subscription.billing_email,
+            "billing_address": subscription.billing_address,
+        }
+
     def _mark_usage_billed(self, subscription_id: int, invoice_id: int):
         """Mark usage records as billed."""
         self.db.query(SubscriptionUsage).filter(
@@ -1267,125 +1349,42 @@ class SubscriptionService:
 
     # ==================== Batch Operations ====================
 
-    def process_renewals(self) -> List[Tuple[Subscription, SubscriptionInvoice]]:
+    def process_renewals(self, **options) -> BillingRun:
         """
         Process all subscriptions due for renewal.
 
+        Runs (or resumes) today's checkpointed "renewals" billing run;
+        options are passed to BillingRunService.run.
+
         Returns:
-            List of (subscription, invoice) tuples for renewed subscriptions
+            The billing run
         """
-        today = date.today()
-
-        # Find subscriptions that need renewal
-        due_subscriptions = self.db.query(Subscription).filter(
-            and_(
-                Subscription.status.in_([
-                    SubscriptionStatus.ACTIVE.value,
-                    SubscriptionStatus.TRIALING.value,
-                ]),
-                Subscription.current_period_end <= today,
-                Subscription.auto_renew == True,
-                Subscription.cancel_at_period_end == False,
-            )
-        ).all()
-
-        results = []
-        for subscription in due_subscriptions:
-            try:
-                renewed, invoice = self.renew_subscription(subscription.id)
-                results.append((renewed, invoice))
-            except Exception as e:
-                logger.error(
-                    f"Failed to renew subscription {subscription.subscription_id}: {e}"
-                )
-                # Mark as past due
-                subscription.status = SubscriptionStatus.PAST_DUE.value
-                self.db.commit()
-                self._log_event(
-                    subscription.id,
-                    "payment_failed",
-                    {"error": str(e)},
-                    triggered_by="system"
-                )
-
-        return results
+        from .billing_run_service import BillingRunService
+        return BillingRunService(self.db).run("renewals", **options)
 
-    def process_expired_trials(self) -> List[Subscription]:
+    def process_expired_trials(self, **options) -> BillingRun:
         """
         Process expired trial subscriptions.
 
+        Runs (or resumes) today's "trials" billing run.
+
         Returns:
-            List of subscriptions that were transitioned from trial
+            The billing run
         """
-        today = date.today()
+        from .billing_run_service import BillingRunService
+        return BillingRunService(self.db).run("trials", **options)
 
-        trial_subscriptions = self.db.query(Subscription).filter(
-            and_(
-                Subscription.status == SubscriptionStatus.TRIALING.value,
-                Subscription.trial_end <= today,
-            )
-        ).all()
-
-        results = []
-        for subscription in trial_subscriptions:
-            self._log_event(subscription.id, "trial_ended", {}, triggered_by="system")
-
-            if subscription.auto_renew:
-                # Transition to active and generate invoice
-                subscription.status = SubscriptionStatus.ACTIVE.value
-                subscription.current_period_start = subscription.trial_end
-                subscription.current_period_end = self._calculate_period_end(
-                    subscription.trial_end,
-                    subscription.billing_cycle
-                )
-                self.db.commit()
-
-                self.generate_invoice(subscription.id)
-                self._log_event(
-                    subscription.id, "activated",
-                    {"from_trial": True},
-                    triggered_by="system"
-                )
-            else:
-                # Cancel subscription
-                subscription.status = SubscriptionStatus.EXPIRED.value
-                self.db.commit()
-                self._log_event(
-                    subscription.id, "expired",
-                    {"reason": "trial_not_converted"},
-                    triggered_by="system"
-                )
-
-            results.append(subscription)
-
-        return results
-
-    def mark_overdue_invoices(self) -> List[SubscriptionInvoice]:
-        """Mark pending invoices past due date as overdue."""
-        today = date.today()
-
-        overdue_invoices = self.db.query(SubscriptionInvoice).filter(
-            and_(
-                SubscriptionInvoice.status == InvoiceStatus.PENDING.value,
-                SubscriptionInvoice.due_date < today,
-            )
-        ).all()
-
-        for invoice in overdue_invoices:
-            invoice.status = InvoiceStatus.OVERDUE.value
+    def mark_overdue_invoices(self, **options) -> BillingRun:
+        """
+        Mark pending invoices past due date as overdue.
 
-            # Mark subscription as past due
-            if invoice.subscription:
-                invoice.subscription.status = SubscriptionStatus.PAST_DUE.value
-                self._log_event(
-                    invoice.subscription.id,
-                    "payment_failed",
-                    {"invoice_id": invoice.id, "reason": "overdue"},
-                    triggered_by="system"
-                )
+        Runs (or resumes) today's "overdue" billing run.
 
-        self.db.commit()
-        return overdue_invoices
+        Returns:
+            The billing run
+        """
+        from .billing_run_service import BillingRunService
+        return BillingRunService(self.db).run("overdue", **options)
 
 
 def get_subscription_service(db: Session) -> SubscriptionService:
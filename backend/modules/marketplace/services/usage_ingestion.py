@@ -0,0 +1,387 @@
+"""
+Metered Usage Ingestion
+
+Usage events are accepted in bulk, buffered in memory and written by a
+flusher every USAGE_FLUSH_INTERVAL seconds (earlier once USAGE_FLUSH_SIZE
+events are pending), in one transaction per flush:
+
+1. The events' idempotency keys are inserted with ON CONFLICT DO NOTHING;
+   events whose key is already known are retries and dropped.
+2. The remaining events are summed per (subscription, metric, period) and
+   added with INSERT ... ON CONFLICT DO UPDATE SET
+   quantity = quantity + excluded.quantity, so concurrent writers never
+   lose an update.
+
+An event is acknowledged once the flush holding it has committed
+(ingest(..., wait=True)). Events of a failed flush stay buffered for the
+next one, and events lost with a process were never acknowledged: the
+client sends them again. Delivery is at-least-once, and the idempotency
+keys make every event count once.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+from ..models.subscription import (
+    Subscription,
+    SubscriptionPlan,
+    SubscriptionUsage,
+    UsageEventKey,
+)
+
+logger = logging.getLogger(__name__)
+
+# Seconds between purges of expired idempotency keys
+KEY_PURGE_INTERVAL = 3600
+
+
+@dataclass(frozen=True)
+class UsageEvent:
+    """A usage report of a metered subscription."""
+
+    subscription_id: int
+    metric: str
+    quantity: Decimal
+    idempotency_key: str
+    period_start: Optional[date] = None
+    period_end: Optional[date] = None
+
+
+@dataclass(frozen=True)
+class _PendingEvent:
+    """An accepted event with its period and pricing resolved."""
+
+    subscription_id: int
+    metric: str
+    period_start: date
+    period_end: date
+    quantity: Decimal
+    unit_price: Optional[Decimal]
+    included_quantity: Decimal
+    received_at: datetime
+
+    @property
+    def usage_key(self) -> Tuple[int, str, date, date]:
+        return (self.subscription_id, self.metric, self.period_start, self.period_end)
+
+
+class _FlushTicket:
+    """Completion of the flush that writes a set of buffered events."""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self.error: Optional[Exception] = None
+
+    def finish(self, error: Optional[Exception] = None) -> None:
+        self.error = error
+        self._done.set()
+
+    def wait(self, timeout: float) -> None:
+        if not self._done.wait(timeout):
+            raise TimeoutError("Usage events were not flushed in time")
+        if self.error is not None:
+            raise self.error
+
+
+def _dialect_insert(db: Session, table):
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        return pg_insert(table)
+    from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+    return sqlite_insert(table)
+
+
+def upsert_usage(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """
+    Add usage quantities atomically, creating the usage rows as needed.
+
+    Rows carry subscription_id, metric, period_start, period_end,
+    quantity, unit_price, included_quantity and recorded_at. Not committed.
+    """
+    if not rows:
+        return
+
+    table = SubscriptionUsage.__table__
+    stmt = _dialect_insert(db, table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["subscription_id", "metric", "period_start", "period_end"],
+        set_={
+            "quantity": table.c.quantity + stmt.excluded.quantity,
+            "recorded_at": stmt.excluded.recorded_at,
+        },
+    )
+    # Same order in every writer, so concurrent flushes can't deadlock
+    rows = sorted(rows, key=lambda row: (
+        row["subscription_id"], row["metric"], row["period_start"], row["period_end"]
+    ))
+    db.execute(stmt, [dict(row, billed=False) for row in rows])
+
+
+class UsageBuffer:
+    """
+    Usage events collected in memory and written in batches.
+
+    Example:
+        usage_buffer.ingest(db, [
+            UsageEvent(subscription_id=7, metric="api_calls", quantity=Decimal(1),
+                       idempotency_key="evt_01H..."),
+        ])
+    """
+
+    def __init__(
+        self,
+        flush_interval: Optional[float] = None,
+        flush_size: Optional[int] = None,
+    ):
+        self.flush_interval = settings.USAGE_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.flush_size = settings.USAGE_FLUSH_SIZE if flush_size is None else flush_size
+        self._lock = threading.Lock()
+        self._events: Dict[Tuple[int, str], _PendingEvent] = {}  # (subscription id, key) -> event
+        self._ticket = _FlushTicket()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_purge = 0.0
+
+    @property
+    def pending(self) -> int:
+        """Buffered events not written yet."""
+        with self._lock:
+            return len(self._events)
+
+    def ingest(
+        self,
+        db: Session,
+        events: List[UsageEvent],
+        user_id: Optional[int] = None,
+        wait: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Accept usage events.
+
+        Events are resolved against their subscriptions in one query: the
+        subscription must exist (and belong to user_id, if given) and have
+        a metered plan. Periods default to the current period.
+
+        Args:
+            db: Session used to resolve the subscriptions
+            events: Usage events
+            user_id: Only accept events of this user's subscriptions
+            wait: Return once the accepted events are committed. Without a
+                running flusher (scripts, tests) they are flushed in db.
+
+        Returns:
+            {"accepted": count, "rejected": [{"index", "idempotency_key", "error"}]}
+        """
+        accepted, rejected = self._resolve(db, events, user_id)
+
+        with self._lock:
+            for key, event in accepted:
+                # Repeated keys within the buffer count once
+                self._events.setdefault(key, event)
+            ticket = self._ticket
+            full = len(self._events) >= self.flush_size
+
+        if accepted and wait:
+            if self._thread is None:
+                self.flush(db)
+            else:
+                self._wake.set()
+            ticket.wait(timeout=self.flush_interval * 2 + 30)
+        elif full:
+            self._wake.set()
+
+        return {"accepted": len(accepted), "rejected": rejected}
+
+    def _resolve(
+        self,
+        db: Session,
+        events: List[UsageEvent],
+        user_id: Optional[int],
+    ) -> Tuple[List[Tuple[Tuple[int, str], _PendingEvent]], List[Dict[str, Any]]]:
+        subscription_ids = {event.subscription_id for event in events}
+        subscriptions = {
+            row.id: row
+            for row in db.execute(
+                select(
+                    Subscription.id,
+                    Subscription.user_id,
+                    Subscription.current_period_start,
+                    Subscription.current_period_end,
+                    SubscriptionPlan.is_metered,
+                    SubscriptionPlan.metered_unit_price,
+                    SubscriptionPlan.metered_included,
+                ).join(
+                    SubscriptionPlan, SubscriptionPlan.id == Subscription.plan_id
+                ).where(Subscription.id.in_(subscription_ids))
+            )
+        } if subscription_ids else {}
+
+        received_at = datetime.utcnow()
+        accepted = []
+        rejected = []
+        for index, event in enumerate(events):
+            subscription = subscriptions.get(event.subscription_id)
+            if subscription is None or (user_id is not None and subscription.user_id != user_id):
+                error = f"Subscription {event.subscription_id} not found"
+            elif not subscription.is_metered:
+                error = "Subscription plan does not support metered billing"
+            elif not event.idempotency_key:
+                error = "Missing idempotency key"
+            else:
+                error = None
+
+            if error:
+                rejected.append({"index": index, "idempotency_key": event.idempotency_key, "error": error})
+                continue
+
+            accepted.append(((event.subscription_id, event.idempotency_key), _PendingEvent(
+                subscription_id=event.subscription_id,
+                metric=event.metric,
+                period_start=event.period_start or subscription.current_period_start,
+                period_end=event.period_end or subscription.current_period_end,
+                quantity=Decimal(str(event.quantity)),
+                unit_price=subscription.metered_unit_price,
+                included_quantity=Decimal(subscription.metered_included or 0),
+                received_at=received_at,
+            )))
+
+        return accepted, rejected
+
+    def flush(self, db: Optional[Session] = None) -> int:
+        """
+        Write buffered events and commit.
+
+        Uses its own session when db is None. On failure the events are
+        put back and retried on the next flush. Returns the number of
+        events counted (retries of known events excluded).
+        """
+        with self._lock:
+            events, self._events = self._events, {}
+            ticket, self._ticket = self._ticket, _FlushTicket()
+        if not events:
+            ticket.finish()
+            return 0
+
+        own_session = db is None
+        if own_session:
+            from app.db.base import SessionLocal
+            db = SessionLocal()
+        try:
+            counted = self._write(db, events)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            self._restore(events)
+            ticket.finish(e)
+            logger.error(f"Usage flush failed ({len(events)} events): {e}")
+            return 0
+        finally:
+            if own_session:
+                db.close()
+
+        ticket.finish()
+        logger.debug(f"Usage flushed: {counted} of {len(events)} events counted")
+        return counted
+
+    @staticmethod
+    def _write(db: Session, events: Dict[Tuple[int, str], _PendingEvent]) -> int:
+        keys_table = UsageEventKey.__table__
+        new_keys = {
+            (subscription_id, key)
+            for subscription_id, key in db.execute(
+                _dialect_insert(db, keys_table)
+                .on_conflict_do_nothing(index_elements=["subscription_id", "idempotency_key"])
+                .returning(keys_table.c.subscription_id, keys_table.c.idempotency_key),
+                [
+                    {"subscription_id": subscription_id, "idempotency_key": key, "received_at": event.received_at}
+                    for (subscription_id, key), event in sorted(events.items(), key=lambda item: item[0])
+                ],
+            )
+        }
+
+        totals: Dict[Tuple[int, str, date, date], Dict[str, Any]] = {}
+        for key in new_keys:
+            event = events[key]
+            row = totals.get(event.usage_key)
+            if row is None:
+                totals[event.usage_key] = {
+                    "subscription_id": event.subscription_id,
+                    "metric": event.metric,
+                    "period_start": event.period_start,
+                    "period_end": event.period_end,
+                    "quantity": event.quantity,
+                    "unit_price": event.unit_price,
+                    "included_quantity": event.included_quantity,
+                    "recorded_at": event.received_at,
+                }
+            else:
+                row["quantity"] += event.quantity
+                row["recorded_at"] = max(row["recorded_at"], event.received_at)
+
+        upsert_usage(db, list(totals.values()))
+        return len(new_keys)
+
+    def _restore(self, events: Dict[Tuple[int, str], _PendingEvent]) -> None:
+        with self._lock:
+            for key, event in events.items():
+                self._events.setdefault(key, event)
+
+    def purge_keys(self, db: Optional[Session] = None, older_than_days: Optional[int] = None) -> int:
+        """Delete idempotency keys past their retention; returns the count."""
+        days = settings.USAGE_EVENT_KEY_RETENTION_DAYS if older_than_days is None else older_than_days
+        own_session = db is None
+        if own_session:
+            from app.db.base import SessionLocal
+            db = SessionLocal()
+        try:
+            result = db.execute(
+                delete(UsageEventKey).where(UsageEventKey.received_at < datetime.utcnow() - timedelta(days=days))
+            )
+            db.commit()
+            return result.rowcount
+        finally:
+            if own_session:
+                db.close()
+
+    def start(self) -> None:
+        """Flush periodically in a background thread."""
+        if self._thread is not None or self.flush_interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="usage-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and write what's left."""
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            self._wake.set()
+            thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+                if time.monotonic() - self._last_purge > KEY_PURGE_INTERVAL:
+                    self._last_purge = time.monotonic()
+                    self.purge_keys()
+            except Exception as e:
+                logger.error(f"Usage flusher error: {e}")
+
+
+usage_buffer = UsageBuffer()
@@ -30,7 +30,7 @@ from app.models import User, Company, Role, Permission
 
 # SQLite doesn't support JSONB, so we need to compile it as JSON
 from sqlalchemy.dialects import postgresql
-from sqlalchemy import JSON
+from sqlalchemy import JSON, Computed
 
 # Register a type adapter to compile JSONB as JSON for SQLite
 from sqlalchemy.ext.compiler import compiles
@@ -40,6 +40,18 @@ def compile_jsonb_sqlite(element, compiler, **kw):
     return compiler.visit_JSON(JSON(), **kw)
 
 
+# Generated full-text columns (never written by the ORM) are plain text
+@compiles(postgresql.TSVECTOR, "sqlite")
+def compile_tsvector_sqlite(element, compiler, **kw):
+    return "TEXT"
+
+
+# Generated column expressions use PostgreSQL functions; SQLite leaves them NULL
+@compiles(Computed, "sqlite")
+def compile_computed_sqlite(element, compiler, **kw):
+    return ""
+
+
 # =============================================================================
 # DATABASE FIXTURES
 # =============================================================================
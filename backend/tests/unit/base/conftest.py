@@ -0,0 +1,74 @@
+"""
+Base module test fixtures.
+
+Base module models are imported lazily, once the shared test database
+exists, and created on a separate in-memory database: importing them
+registers their tables on the shared metadata.
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models import User
+
+
+def create_base_tables(engine, *models):
+    tables = [User.__table__] + [model.__table__ for model in models]
+    User.metadata.create_all(engine, tables=tables)
+
+
+@pytest.fixture
+def db():
+    from modules.base.models.computed_field import ComputedFieldDefinition
+    from modules.base.models.model_hook import ModelHookDefinition
+    from modules.base.models.report import ReportDefinition, ReportExecution
+    from modules.base.models.sequence import Sequence, SequenceDateRange
+
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    create_base_tables(
+        engine,
+        ComputedFieldDefinition,
+        ModelHookDefinition,
+        ReportDefinition,
+        ReportExecution,
+        Sequence,
+        SequenceDateRange,
+    )
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _user(db, username, is_superuser=False):
+    user = User(
+        email=f"{username}@example.com",
+        username=username,
+        hashed_password="x",
+        is_active=True,
+        is_superuser=is_superuser,
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def user(db):
+    return _user(db, "owner")
+
+
+@pytest.fixture
+def other_user(db):
+    return _user(db, "other")
+
+
+@pytest.fixture
+def superuser(db):
+    return _user(db, "root", is_superuser=True)
@@ -0,0 +1,232 @@
+"""
+Automation Rule Tests
+
+Tests for record-triggered rules dispatched from the in-memory rule
+index: lookups, "changed" conditions, batched record updates and
+rebuilding the index after rules change.
+"""
+
+import pytest
+from sqlalchemy import Column, Integer, String, event, update
+from sqlalchemy.orm import DeclarativeBase
+
+MODEL = "Ticket"
+
+
+class TicketBase(DeclarativeBase):
+    pass
+
+
+class Ticket(TicketBase):
+    __tablename__ = "test_automation_tickets"
+
+    id = Column(Integer, primary_key=True)
+    state = Column(String(20), default="new")
+    priority = Column(Integer, default=0)
+    owner = Column(String(50), nullable=True)
+    note = Column(String(200), nullable=True)
+
+
+@pytest.fixture
+def index():
+    from modules.base.services.automation_index import automation_index
+
+    automation_index.invalidate()
+    yield automation_index
+    automation_index.invalidate()
+
+
+@pytest.fixture
+def tickets(db, index):
+    from modules.base.models.server_action import AutomationRule, ServerAction
+    from tests.unit.base.conftest import create_base_tables
+
+    create_base_tables(db.get_bind(), AutomationRule, ServerAction)
+    TicketBase.metadata.create_all(db.get_bind())
+
+    db.add(ServerAction(
+        name="Escalate", code="escalate", model_name=MODEL, action_type="update_record",
+        update_values={"owner": "support", "note": "$record.state"},
+    ))
+    db.add_all([
+        AutomationRule(
+            name="Urgent", code="urgent", model_name=MODEL, trigger="on_write", sequence=20,
+            domain=[{"field": "priority", "operator": ">=", "value": 5}],
+            action_code="escalate",
+        ),
+        AutomationRule(
+            name="State changed", code="state_changed", model_name=MODEL, trigger="on_write",
+            sequence=10, domain=[{"field": "state", "operator": "changed"}],
+            python_code="record.note = 'state ' + record.state",
+        ),
+        AutomationRule(
+            name="Created", code="created", model_name=MODEL, trigger="on_create",
+            python_code="record.note = 'created'",
+        ),
+        AutomationRule(
+            name="Disabled", code="disabled", model_name=MODEL, trigger="on_write",
+            python_code="record.note = 'disabled'", is_active=False,
+        ),
+        AutomationRule(
+            name="Nightly", code="nightly", model_name=MODEL, trigger="on_time",
+            time_field="id", python_code="record.note = 'nightly'",
+        ),
+        AutomationRule(
+            name="Broken", code="broken", model_name=MODEL, trigger="on_delete",
+            python_code="record.note =",
+        ),
+    ])
+    records = [Ticket(priority=1), Ticket(priority=5), Ticket(priority=9, state="open")]
+    db.add_all(records)
+    db.commit()
+    return records
+
+
+@pytest.fixture
+def service(db):
+    from modules.base.services.automation_service import AutomationService
+
+    return AutomationService(db)
+
+
+def _codes(rules):
+    return [rule.code for rule in rules]
+
+
+def _rule_model():
+    from modules.base.models.server_action import AutomationRule
+
+    return AutomationRule
+
+
+class TestRuleIndex:
+    def test_rules_by_model_and_trigger(self, db, index, tickets):
+        assert _codes(index.get_rules(db, MODEL, "on_write")) == ["state_changed", "urgent"]
+        assert _codes(index.get_rules(db, MODEL, "on_create")) == ["created"]
+        # Time-based rules run from the scheduler; invalid code is skipped
+        assert index.get_rules(db, MODEL, "on_time") == []
+        assert index.get_rules(db, MODEL, "on_delete") == []
+        assert index.get_rules(db, "Other", "on_write") == []
+
+    def test_built_once(self, db, index, tickets):
+        statements = []
+        event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args))
+        rules = index.get_rules(db, MODEL, "on_write")
+        statements.clear()
+
+        assert index.get_rules(db, MODEL, "on_write") == rules
+        assert index.get_rules(db, "Other", "on_create") == []
+        assert statements == []
+
+    def test_matches_interpreted_domain(self, db, index, tickets):
+        rule = db.query(_rule_model()).filter_by(code="urgent").one()
+        indexed = index.get_rules(db, MODEL, "on_write")[1]
+
+        assert [indexed.matches(t, {}) for t in tickets] == [
+            rule.evaluate_domain(t, {}) for t in tickets
+        ]
+        assert [indexed.matches(t, {}) for t in tickets] == [False, True, True]
+
+
+class TestTriggers:
+    def test_skips_rules_whose_watched_fields_did_not_change(self, service, tickets):
+        results = service.trigger_write(tickets[0], {"priority": (0, 1)})
+
+        assert results == []
+        assert tickets[0].note is None
+
+    def test_runs_rules_whose_watched_fields_changed(self, service, tickets):
+        results = service.trigger_write(tickets[0], {"state": ("new", "open")})
+
+        assert [r["rule"] for r in results] == ["state_changed"]
+        assert tickets[0].note == "state new"
+
+    def test_changed_fields_by_name(self, service, tickets):
+        service.trigger_write_many(tickets, ["owner"])
+        assert [t.note for t in tickets] == [None, "new", "open"]
+
+    def test_bulk_update_action_committed_once(self, db, service, tickets, monkeypatch):
+        commits = []
+        commit = db.commit
+        monkeypatch.setattr(db, "commit", lambda: (commits.append(1), commit()))
+        loaded = []
+        get_action = service._get_action
+        monkeypatch.setattr(
+            service, "_get_action", lambda *args: loaded.append(args) or get_action(*args)
+        )
+
+        results = service.trigger_write_many(tickets, {"priority": (0, 9)})
+
+        assert results == [{"rule": "urgent", "records_count": 2, "status": "success"}]
+        assert len(commits) == 1
+        assert len(loaded) == 1
+        db.expire_all()
+        assert [(t.owner, t.note) for t in tickets] == [
+            (None, None), ("support", "new"), ("support", "open"),
+        ]
+
+    def test_bulk_matches_per_record(self, db, service, tickets):
+        from modules.base.models.server_action import ServerAction
+
+        action = db.query(ServerAction).filter_by(code="escalate").one()
+        service.execute_actions(action, tickets[:2])
+        bulk = [(t.owner, t.note) for t in tickets[:2]]
+
+        for ticket in tickets[:2]:
+            ticket.owner = ticket.note = None
+        db.commit()
+        for ticket in tickets[:2]:
+            service.execute_action(action, ticket)
+
+        assert [(t.owner, t.note) for t in tickets[:2]] == bulk
+
+
+class TestIndexInvalidation:
+    def test_rebuilt_after_rule_edit(self, db, service, index, tickets):
+        assert _codes(index.get_rules(db, MODEL, "on_write")) == ["state_changed", "urgent"]
+
+        rule = db.query(_rule_model()).filter_by(code="urgent").one()
+        rule.domain = [{"field": "priority", "operator": ">=", "value": 9}]
+        db.commit()
+
+        results = service.trigger_write_many(tickets, {"priority": (0, 9)})
+        assert results[0]["records_count"] == 1
+
+    def test_runtime_fields_keep_index(self, db, index, tickets):
+        from datetime import datetime, timezone
+
+        rules = index.get_rules(db, MODEL, "on_write")
+        token = index.generation.token()
+
+        rule = db.query(_rule_model()).filter_by(code="nightly").one()
+        rule.last_run = datetime.now(timezone.utc)
+        db.commit()
+
+        assert index.generation.token() == token
+        assert index.get_rules(db, MODEL, "on_write") is rules
+
+    def test_rolled_back_edit_keeps_index(self, db, index, tickets):
+        token = index.generation.token()
+
+        rule = db.query(_rule_model()).filter_by(code="urgent").one()
+        rule.is_active = False
+        db.flush()
+        db.rollback()
+        db.commit()
+
+        assert index.generation.token() == token
+
+    def test_rebuilt_after_bump_in_other_process(self, db, index, tickets, monkeypatch):
+        remote = ["1"]
+        monkeypatch.setattr(index.generation, "check_interval", 0)
+        monkeypatch.setattr(index.generation, "_read_remote", lambda: remote[0])
+        assert _codes(index.get_rules(db, MODEL, "on_create")) == ["created"]
+
+        # Written without the ORM, as another process would
+        model = _rule_model()
+        db.execute(update(model).where(model.code == "created").values(is_active=False))
+        db.commit()
+        assert _codes(index.get_rules(db, MODEL, "on_create")) == ["created"]
+
+        remote[0] = "2"
+        assert index.get_rules(db, MODEL, "on_create") == []
@@ -0,0 +1,166 @@
+"""
+Computed Field Tests
+
+Tests for the compiled-expression LRU, set-based aggregate recomputation
+and reloading of cached definitions after they change.
+"""
+
+import pytest
+from sqlalchemy import Column, Float, ForeignKey, Integer, insert
+from sqlalchemy.orm import DeclarativeBase
+
+
+class OrderBase(DeclarativeBase):
+    pass
+
+
+class Order(OrderBase):
+    __tablename__ = "test_computed_orders"
+
+    id = Column(Integer, primary_key=True)
+    amount_total = Column(Float, default=0)
+    line_count = Column(Integer, default=0)
+    amount_doubled = Column(Float, default=0)
+
+
+class OrderLine(OrderBase):
+    __tablename__ = "test_computed_order_lines"
+
+    id = Column(Integer, primary_key=True)
+    order_id = Column(Integer, ForeignKey("test_computed_orders.id"))
+    price = Column(Float, default=0)
+
+
+@pytest.fixture
+def registry():
+    from modules.base.services.computed_field_engine import definition_registry
+
+    definition_registry.invalidate()
+    yield definition_registry
+    definition_registry.invalidate()
+
+
+@pytest.fixture
+def orders(db, registry):
+    from modules.base.models.computed_field import ComputedFieldDefinition
+
+    OrderBase.metadata.create_all(db.get_bind())
+    correlated = [{"field": "order_id", "operator": "=", "value": "$record.id"}]
+    db.add_all([
+        ComputedFieldDefinition(
+            name="amount_total", model_name="Order", compute_type="aggregate",
+            aggregate_function="sum", aggregate_field="price", aggregate_model="OrderLine",
+            aggregate_domain=correlated, store=True,
+        ),
+        ComputedFieldDefinition(
+            name="line_count", model_name="Order", compute_type="aggregate",
+            aggregate_function="count", aggregate_field="id", aggregate_model="OrderLine",
+            aggregate_domain=correlated, store=True,
+        ),
+        ComputedFieldDefinition(
+            name="amount_doubled", model_name="Order", compute_type="python",
+            expression="record.amount_total * 2", depends=["amount_total"], store=True,
+        ),
+    ])
+    records = [Order(), Order(), Order()]
+    db.add_all(records)
+    db.flush()
+    db.add_all([
+        OrderLine(order_id=records[0].id, price=10),
+        OrderLine(order_id=records[0].id, price=5),
+        OrderLine(order_id=records[1].id, price=7),
+    ])
+    db.commit()
+    return records
+
+
+@pytest.fixture
+def service(db):
+    from modules.base.services.computed_field_service import ComputedFieldService
+
+    service = ComputedFieldService(db)
+    service._model_cache.update({"Order": Order, "OrderLine": OrderLine})
+    return service
+
+
+def _per_record(service, order, function, field):
+    return service.compute_aggregate(
+        function, "OrderLine", field,
+        [{"field": "order_id", "operator": "=", "value": order.id}],
+    )
+
+
+def _definition_model():
+    from modules.base.models.computed_field import ComputedFieldDefinition
+
+    return ComputedFieldDefinition
+
+
+class TestCompiledExpressions:
+    def test_compiled_once_per_expression(self):
+        from modules.base.services.computed_field_engine import compile_expression, evaluate_expression
+
+        compile_expression.cache_clear()
+        code = compile_expression("record + 1")
+
+        assert compile_expression("record + 1") is code
+        assert evaluate_expression(code, 41) == 42
+        assert compile_expression.cache_info().hits == 1
+
+
+class TestSetBasedAggregates:
+    def test_batch_matches_per_record(self, db, service, orders):
+        service.recompute_batch(orders, ["amount_total", "line_count"])
+
+        assert [(o.amount_total, o.line_count) for o in orders] == [
+            (_per_record(service, o, "sum", "price"), _per_record(service, o, "count", "id"))
+            for o in orders
+        ]
+        assert [o.amount_total for o in orders] == [15, 7, 0]
+
+    def test_stored_matches_per_record(self, db, service, orders):
+        assert service.recompute_stored("Order", batch_size=2) == 3
+        db.expire_all()
+
+        assert [(o.amount_total, o.line_count, o.amount_doubled) for o in orders] == [
+            (15, 2, 30), (7, 1, 14), (0, 0, 0),
+        ]
+
+    def test_line_change_updates_affected_parents_only(self, db, service, orders):
+        service.recompute_stored("Order")
+        line = db.query(OrderLine).filter(OrderLine.price == 7).one()
+        line.order_id = orders[2].id
+
+        recomputed = service.recompute_dependents(line, ["order_id"])
+        db.expire_all()
+
+        assert "Order.amount_total" in recomputed
+        assert [(o.amount_total, o.amount_doubled) for o in orders] == [(15, 30), (0, 0), (7, 14)]
+
+
+class TestDefinitionCache:
+    def test_reloaded_after_commit(self, db, registry, orders):
+        assert registry.get_definition(db, "Order", "amount_doubled").store
+
+        definition = db.query(_definition_model()).filter_by(name="amount_doubled").one()
+        definition.store = False
+        db.commit()
+
+        assert not registry.get_definition(db, "Order", "amount_doubled").store
+
+    def test_reloaded_after_bump_in_other_process(self, db, registry, orders, monkeypatch):
+        remote = ["1"]
+        monkeypatch.setattr(registry.generation, "check_interval", 0)
+        monkeypatch.setattr(registry.generation, "_read_remote", lambda: remote[0])
+        assert registry.get_definition(db, "Order", "line_total") is None
+
+        # Written without the ORM, as another process would
+        db.execute(insert(_definition_model().__table__).values(
+            name="line_total", model_name="Order", compute_type="python",
+            expression="1", depends=[], aggregate_domain=[], is_active=True,
+        ))
+        db.commit()
+        assert registry.get_definition(db, "Order", "line_total") is None
+
+        remote[0] = "2"
+        assert registry.get_definition(db, "Order", "line_total") is not None
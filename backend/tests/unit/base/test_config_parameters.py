@@ -0,0 +1,120 @@
+"""
+Configuration Parameter Tests
+
+Tests for parameter lookups served from cached per-company snapshots and
+rebuilding the snapshots after parameters change.
+"""
+
+import pytest
+from sqlalchemy import update
+
+
+@pytest.fixture
+def snapshots():
+    from modules.base.services.config_snapshot import config_cache
+
+    config_cache.invalidate()
+    yield config_cache
+    config_cache.invalidate()
+
+
+@pytest.fixture
+def service(db, snapshots):
+    from modules.base.models.config_parameter import ConfigParameter
+    from modules.base.services.config_parameter_service import ConfigParameterService
+    from tests.unit.base.conftest import create_base_tables
+
+    create_base_tables(db.get_bind(), ConfigParameter)
+    service = ConfigParameterService(db)
+    service.bulk_set_params(
+        {"mail.host": "smtp.example.com", "mail.port": 25, "mail.tls": True},
+        module_name="mail",
+    )
+    service.set_param("mail.sender", "north@example.com", module_name="mail", company_id=1)
+    service.set_param("ui.theme", {"color": "blue"}, module_name="ui")
+    db.commit()
+    return service
+
+
+class TestLookup:
+    @pytest.mark.parametrize("company_id", [None, 1, 2])
+    def test_matches_database_lookup(self, db, service, company_id):
+        from modules.base.models.config_parameter import ConfigParameter
+
+        for key in ("mail.host", "mail.port", "mail.tls", "mail.sender", "ui.theme", "missing"):
+            assert service.get_param(key, "default", company_id) == ConfigParameter.get_param(
+                db, key, "default", company_id
+            )
+
+    def test_company_parameters_visible_to_company_only(self, service):
+        assert service.get_param("mail.sender", company_id=1) == "north@example.com"
+        assert service.get_param("mail.sender", company_id=2) is None
+        assert service.get_param("mail.sender") is None
+        assert service.get_param("mail.port", company_id=1) == 25
+
+    def test_module_config(self, db, service):
+        from modules.base.models.config_parameter import ConfigParameter
+
+        for company_id in (None, 1, 2):
+            assert service.get_module_config("mail", company_id) == ConfigParameter.get_module_params(
+                db, "mail", company_id
+            )
+        assert service.get_module_config("mail", company_id=1) == {
+            "mail.host": "smtp.example.com",
+            "mail.port": 25,
+            "mail.tls": True,
+            "mail.sender": "north@example.com",
+        }
+        assert service.get_module_config("mail") == {
+            "mail.host": "smtp.example.com", "mail.port": 25, "mail.tls": True,
+        }
+
+    def test_json_values_copied(self, service):
+        service.get_param("ui.theme")["color"] = "red"
+
+        assert service.get_snapshot().get("ui.theme") == {"color": "blue"}
+
+
+class TestInvalidation:
+    def test_uncommitted_changes_visible_to_own_session(self, db, service):
+        service.set_param("mail.port", 2525)
+        assert service.get_param("mail.port") == 2525
+
+        db.rollback()
+        assert service.get_param("mail.port") == 25
+
+    def test_rebuilt_after_commit(self, db, service):
+        snapshot = service.get_snapshot(1)
+
+        service.set_param("mail.sender", "sales@example.com", company_id=1)
+        db.commit()
+
+        assert service.get_param("mail.sender", company_id=1) == "sales@example.com"
+        assert snapshot.get("mail.sender") == "north@example.com"
+
+    def test_rebuilt_after_bulk_delete(self, db, service):
+        service.delete_module_params("mail")
+        db.commit()
+
+        assert service.get_module_config("mail", company_id=1) == {}
+        assert service.get_param("ui.theme") == {"color": "blue"}
+
+    def test_rebuilt_after_bump_in_other_process(self, db, service, snapshots, monkeypatch):
+        from modules.base.models.config_parameter import ConfigParameter
+
+        remote = ["1"]
+        monkeypatch.setattr(snapshots.generation, "check_interval", 0)
+        monkeypatch.setattr(snapshots.generation, "_read_remote", lambda: remote[0])
+        assert service.get_param("mail.host") == "smtp.example.com"
+
+        # Written without the ORM, as another process would
+        db.execute(
+            update(ConfigParameter)
+            .where(ConfigParameter.key == "mail.host")
+            .values(value="relay.example.com")
+        )
+        db.commit()
+        assert service.get_param("mail.host") == "smtp.example.com"
+
+        remote[0] = "2"
+        assert service.get_param("mail.host") == "relay.example.com"
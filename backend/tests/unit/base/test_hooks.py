@@ -0,0 +1,130 @@
+"""
+Stored Hook Tests
+
+Tests for loading stored hook definitions into the hook registry, the
+one-step swap that keeps static hooks, and reloads after changes.
+"""
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+
+@pytest.fixture
+def loader(db, monkeypatch):
+    from modules.base.models.model_hook import hook_registry
+    from modules.base.services import hook_service
+
+    loader = hook_service.StoredHookLoader(hook_registry)
+    monkeypatch.setattr(hook_service, "stored_hooks", loader)
+    monkeypatch.setattr(hook_registry, "_refresher", loader.refresh)
+    monkeypatch.setattr(hook_registry, "_hooks", {})
+    # Background reloads open their own session on the test database
+    monkeypatch.setattr("app.db.base.SessionLocal", sessionmaker(bind=db.get_bind()))
+    return loader
+
+
+def _definition(db, name, code, event="before_create", sequence=10, module_name="sale"):
+    from modules.base.models.model_hook import ModelHookDefinition
+
+    definition = ModelHookDefinition(
+        name=name, model_name="sale.Order", module_name=module_name, event=event,
+        python_code=code, sequence=sequence, is_active=True,
+    )
+    db.add(definition)
+    db.commit()
+    return definition
+
+
+def _run(db, event="before_create"):
+    from modules.base.models.model_hook import HookEvent, hook_registry
+
+    record = type("Order", (), {"log": None})()
+    record.log = []
+    hook_registry.execute_hooks("sale.Order", HookEvent(event), record, {"db": db})
+    return record.log
+
+
+def _static(record, context):
+    record.log.append("static")
+
+
+class TestLoad:
+    def test_stored_and_static_hooks_ordered_by_priority(self, db, loader):
+        from modules.base.models.model_hook import HookEvent, hook_registry
+
+        hook_registry.register("sale.Order", HookEvent.BEFORE_CREATE, _static, priority=5)
+        _definition(db, "late", "record.log.append('late')", sequence=20)
+        _definition(db, "early", "record.log.append('early')", sequence=1)
+
+        assert loader.load(db) == 2
+        assert _run(db) == ["early", "static", "late"]
+
+    def test_module_filter(self, db, loader):
+        _definition(db, "sale_hook", "record.log.append('sale')")
+        _definition(db, "crm_hook", "record.log.append('crm')", module_name="crm")
+
+        assert loader.load(db, "crm") == 1
+        assert _run(db) == ["crm"]
+        assert loader.load(db, "sale") == 1
+        assert sorted(_run(db)) == ["crm", "sale"]
+
+    def test_broken_definition_skipped(self, db, loader):
+        _definition(db, "broken", "record.log.append(")
+        _definition(db, "ok", "record.log.append('ok')")
+
+        assert loader.load(db) == 1
+        assert _run(db) == ["ok"]
+
+
+class TestReload:
+    def test_swap_keeps_static_hooks_and_old_map(self, db, loader):
+        from modules.base.models.model_hook import HookEvent, hook_registry
+
+        hook_registry.register("sale.Order", HookEvent.BEFORE_CREATE, _static)
+        definition = _definition(db, "stored", "record.log.append('v1')")
+        loader.load(db)
+        old_map = hook_registry._hooks
+
+        definition.python_code = "record.log.append('v2')"
+        db.commit()
+
+        assert hook_registry._hooks is not old_map
+        assert [h["name"].rsplit(":", 1)[1] for h in old_map["sale.Order:before_create"]] == ["_static", "stored"]
+        assert _run(db) == ["static", "v2"]
+
+    def test_commit_reloads_before_next_lookup(self, db, loader, monkeypatch):
+        definition = _definition(db, "stored", "record.log.append('v1')")
+        loader.load(db)
+        monkeypatch.setattr(
+            loader, "_reload_in_background", lambda: pytest.fail("lookup started a reload")
+        )
+
+        definition.is_active = False
+        db.commit()
+
+        assert _run(db) == []
+        _definition(db, "added", "record.log.append('added')")
+        assert _run(db) == ["added"]
+
+    def test_change_elsewhere_loaded_in_background(self, db, loader):
+        from modules.base.models.model_hook import ModelHookDefinition
+
+        _definition(db, "stored", "record.log.append('v1')")
+        loader.load(db)
+
+        # Another process edits the definition and bumps the generation
+        db.query(ModelHookDefinition).update({"python_code": "record.log.append('v2')"})
+        db.commit()
+        loader.invalidate()
+
+        assert _run(db) == ["v1"]  # The lookup doesn't wait for the reload
+        loader._reloading.join(5)
+        assert not loader.is_stale()
+        assert _run(db) == ["v2"]
+
+    def test_unloaded_loader_never_reloads(self, db, loader):
+        _definition(db, "stored", "record.log.append('v1')")
+        loader.invalidate()
+
+        assert _run(db) == []
+        assert loader._reloading is None
@@ -0,0 +1,165 @@
+"""
+Record Rule Tests
+
+Tests for compiled and cached record rules: global and group rules,
+per-company domains, batch access checks and reloading after rules or
+a user's roles change.
+"""
+
+import pytest
+from sqlalchemy import Column, Integer, String, update
+from sqlalchemy.orm import DeclarativeBase
+
+
+class DocumentBase(DeclarativeBase):
+    pass
+
+
+class Document(DocumentBase):
+    __tablename__ = "test_record_rule_documents"
+
+    id = Column(Integer, primary_key=True)
+    company_id = Column(Integer, nullable=True)
+    state = Column(String(20), default="draft")
+
+
+@pytest.fixture
+def rules():
+    from modules.base.services.record_rule_engine import rule_cache
+
+    rule_cache.invalidate()
+    yield rule_cache
+    rule_cache.invalidate()
+
+
+@pytest.fixture
+def documents(db, user, rules):
+    from app.models.company import Company
+    from app.models.role import Role
+    from app.models.user_company_role import UserCompanyRole
+    from modules.base.models.record_rule import RecordRule, RuleScope
+    from tests.unit.base.conftest import create_base_tables
+
+    create_base_tables(db.get_bind(), Company, Role, UserCompanyRole, RecordRule)
+    DocumentBase.metadata.create_all(db.get_bind())
+
+    db.add_all([Company(id=1, name="North", code="N"), Company(id=2, name="South", code="S")])
+    db.add(Role(id=1, name="Manager", codename="manager"))
+    db.add_all([
+        RecordRule(
+            name="Own company", model_name="Document", scope=RuleScope.COMPANY,
+            domain=[{"field": "company_id", "operator": "=", "value": "$user.current_company_id"}],
+        ),
+        RecordRule(
+            name="Managers see posted", model_name="Document", scope=RuleScope.GROUP, role_id=1,
+            domain=[{"field": "state", "operator": "in", "value": ["posted"]}],
+            apply_write=False, apply_create=False, apply_delete=False,
+        ),
+    ])
+    records = [
+        Document(company_id=1, state="draft"),
+        Document(company_id=1, state="posted"),
+        Document(company_id=2, state="posted"),
+        Document(company_id=None, state="draft"),
+    ]
+    db.add_all(records)
+    user.current_company_id = 1
+    db.commit()
+    return records
+
+
+@pytest.fixture
+def service(db):
+    from modules.base.services.record_rule_service import RecordRuleService
+
+    return RecordRuleService(db)
+
+
+def _allowed(db, service, user, documents, operation="read"):
+    """IDs allowed for a user; query filtering and both checks must agree."""
+    queried = {
+        d.id for d in service.apply_rules(db.query(Document), Document, user, operation)
+    }
+    batch = service.check_access_many(documents, user, operation)
+    single = {d.id: service.check_access(d, user, operation) for d in documents}
+
+    assert {k for k, allowed in batch.items() if allowed} == queried
+    assert {k for k, allowed in single.items() if allowed} == queried
+    return queried
+
+
+def _grant_manager(db, user):
+    from app.models.user_company_role import UserCompanyRole
+
+    db.add(UserCompanyRole(user_id=user.id, company_id=1, role_id=1))
+    db.commit()
+    db.expire(user, ["company_roles"])
+
+
+class TestRuleEvaluation:
+    def test_global_rule_filters_by_company(self, db, service, user, documents):
+        assert _allowed(db, service, user, documents) == {1, 2}
+
+    def test_group_rule_applies_to_role_members(self, db, service, user, documents):
+        _grant_manager(db, user)
+
+        assert _allowed(db, service, user, documents) == {2}
+        assert _allowed(db, service, user, documents, "write") == {1, 2}
+
+    def test_company_domain_bound_per_user(self, db, service, user, other_user, documents, rules):
+        other_user.current_company_id = 2
+        db.commit()
+        assert _allowed(db, service, other_user, documents) == {3}
+        criteria = rules.get_criteria(db, Document, "Document", "read", frozenset())
+
+        assert _allowed(db, service, user, documents) == {1, 2}
+        assert rules.get_criteria(db, Document, "Document", "read", frozenset()) is criteria
+
+    def test_missing_company_matches_null(self, db, service, user, documents):
+        user.current_company_id = None
+        db.commit()
+
+        assert _allowed(db, service, user, documents) == {4}
+
+    def test_superuser_bypasses_rules(self, db, service, superuser, documents):
+        assert _allowed(db, service, superuser, documents) == {1, 2, 3, 4}
+
+    def test_unsaved_record_checked_in_python(self, service, user, documents):
+        draft = Document(company_id=2)
+
+        assert service.check_access_many([draft], user, "create") == {draft: False}
+
+
+class TestRuleCache:
+    def test_reloaded_after_rule_edit(self, db, service, user, documents):
+        from modules.base.models.record_rule import RecordRule
+
+        assert _allowed(db, service, user, documents) == {1, 2}
+
+        rule = db.query(RecordRule).filter_by(name="Own company").one()
+        rule.domain = [{"field": "state", "operator": "=", "value": "draft"}]
+        db.commit()
+
+        assert _allowed(db, service, user, documents) == {1, 4}
+
+    def test_reloaded_after_bump_in_other_process(self, db, service, user, documents, rules, monkeypatch):
+        from modules.base.models.record_rule import RecordRule
+
+        remote = ["1"]
+        monkeypatch.setattr(rules.generation, "check_interval", 0)
+        monkeypatch.setattr(rules.generation, "_read_remote", lambda: remote[0])
+        assert _allowed(db, service, user, documents) == {1, 2}
+
+        # Written without the ORM, as another process would
+        db.execute(update(RecordRule).where(RecordRule.name == "Own company").values(is_active=False))
+        db.commit()
+        assert _allowed(db, service, user, documents) == {1, 2}
+
+        remote[0] = "2"
+        assert _allowed(db, service, user, documents) == {1, 2, 3, 4}
+
+    def test_role_change_applies_immediately(self, db, service, user, documents):
+        assert _allowed(db, service, user, documents) == {1, 2}
+
+        _grant_manager(db, user)
+        assert _allowed(db, service, user, documents) == {2}
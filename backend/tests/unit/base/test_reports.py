@@ -0,0 +1,271 @@
+"""
+Report Tests
+
+Tests for the compiled-template LRU, the rendered-output cache and its
+reuse by ReportService, and the queued ("render now, download later")
+execution path.
+"""
+
+import asyncio
+import os
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+
+@pytest.fixture
+def reporting():
+    from modules.base.services import report_engine
+
+    return report_engine
+
+
+@pytest.fixture
+def output_cache(reporting, tmp_path, monkeypatch):
+    cache = reporting.ReportOutputCache(tmp_path / "reports", ttl=60, retention=600)
+    monkeypatch.setattr(reporting, "_output_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def report(db):
+    from modules.base.models.report import ReportDefinition
+
+    report = ReportDefinition(
+        name="Report List",
+        code="report_list",
+        model_name="base.ReportDefinition",
+        output_format="csv",
+    )
+    db.add(report)
+    db.commit()
+    return report
+
+
+class TestTemplateCache:
+    def test_compiles_once_per_source(self, reporting):
+        from jinja2 import Environment
+
+        cache = reporting.TemplateCache(Environment, max_size=8)
+
+        assert cache.get("r", "{{ x }}").render(x=1) == "1"
+        assert cache.get("r", "{{ x }}") is cache.get("r", "{{ x }}")
+        assert cache.get("r", "<{{ x }}>").render(x=2) == "<2>"
+        assert (cache.hits, cache.misses) == (2, 2)
+
+    def test_least_recently_used_evicted(self, reporting):
+        from jinja2 import Environment
+
+        cache = reporting.TemplateCache(Environment, max_size=2)
+        a = cache.get("a", "a")
+        cache.get("b", "b")
+        cache.get("a", "a")
+        cache.get("c", "c")
+
+        assert cache.get("a", "a") is a
+        assert cache.misses == 3
+        cache.get("b", "b")
+        assert cache.misses == 4
+
+
+class TestOutputCache:
+    def test_key_covers_version_parameters_and_data(self, reporting):
+        make_key = reporting.ReportOutputCache.make_key
+        key = make_key("r", "v1", "csv", [2, 1], {"a": 1}, "d1")
+
+        assert key == make_key("r", "v1", "csv", [1, 2], {"a": 1}, "d1")
+        assert key != make_key("r", "v2", "csv", [1, 2], {"a": 1}, "d1")
+        assert key != make_key("r", "v1", "csv", [1, 2], {"a": 2}, "d1")
+        assert key != make_key("r", "v1", "csv", [1, 2], {"a": 1}, "d2")
+        assert key != make_key("r", "v1", "pdf", [1, 2], {"a": 1}, "d1")
+
+    def _store(self, cache, key, age=0):
+        temp = cache.temp_path("csv")
+        temp.write_text("a,b\n")
+        path = cache.store(temp, key, "csv")
+        if age:
+            past = time.time() - age
+            os.utime(path, (past, past))
+        return path
+
+    def test_entries_expire_after_ttl(self, output_cache):
+        path = self._store(output_cache, "fresh")
+        self._store(output_cache, "stale", age=120)
+
+        assert output_cache.get("fresh", "csv") == path
+        assert output_cache.get("stale", "csv") is None
+
+    def test_disabled_cache_keeps_outputs_for_download(self, reporting, tmp_path):
+        cache = reporting.ReportOutputCache(tmp_path, ttl=0, retention=600)
+        path = self._store(cache, "k")
+
+        assert cache.get("k", "csv") is None
+        assert cache.purge_expired() == 0
+        assert path.exists()
+
+    def test_store_purges_past_retention(self, output_cache):
+        kept = self._store(output_cache, "kept", age=120)
+        old = self._store(output_cache, "old", age=1200)
+        output_cache._last_purge = 0
+
+        self._store(output_cache, "new")
+
+        assert kept.exists()
+        assert not old.exists()
+
+
+class TestRenderedOutputReuse:
+    @pytest.fixture
+    def service(self, db, output_cache, monkeypatch):
+        from modules.base.services.report_service import ReportService
+
+        service = ReportService(db)
+        service.loads = []
+        get_record_data = service._get_record_data
+        monkeypatch.setattr(
+            service, "_get_record_data",
+            lambda *args: service.loads.append(args) or get_record_data(*args),
+        )
+        return service
+
+    def test_hit_does_not_load_records(self, service, report):
+        first = service.render_report(report.code, [report.id])
+        second = service.render_report(report.code, [report.id])
+
+        assert (first["cached"], second["cached"]) == (False, True)
+        assert second["file_path"] == first["file_path"]
+        assert len(service.loads) == 1
+
+    def test_rendered_again_after_records_change(self, db, service, report):
+        from modules.base.models.report import ReportDefinition
+
+        other = ReportDefinition(name="Other", code="other", model_name="base.ReportDefinition")
+        db.add(other)
+        db.commit()
+        first = service.render_report(report.code, [report.id, other.id])
+
+        other.name = "Renamed"
+        db.commit()
+        second = service.render_report(report.code, [report.id, other.id])
+
+        assert not second["cached"]
+        assert second["file_path"] != first["file_path"]
+        with open(second["file_path"]) as f:
+            assert "Renamed" in f.read()
+
+    def test_render_time_values_never_reused(self, db, service):
+        from modules.base.models.report import ReportDefinition
+
+        report = ReportDefinition(
+            name="Stamped", code="stamped", model_name="base.ReportDefinition",
+            output_format="html", template_content="{{ report.name }} at {{ now }}",
+        )
+        db.add(report)
+        db.commit()
+
+        first = service.render_report(report.code, [report.id])
+        second = service.render_report(report.code, [report.id])
+
+        assert (first["cached"], second["cached"]) == (False, False)
+        assert second["file_path"] != first["file_path"]
+
+
+class TestQueuedExecution:
+    @pytest.fixture
+    def app(self, db, user, monkeypatch):
+        from app.api.deps import get_current_active_user, get_db
+        from modules.base.api import reports
+
+        submitted = []
+        monkeypatch.setattr(
+            reports.task_manager, "submit_task",
+            lambda func, **kwargs: submitted.append((func, kwargs)),
+        )
+
+        app = FastAPI()
+        app.include_router(reports.router)
+        app.dependency_overrides[get_db] = lambda: db
+        app.dependency_overrides[get_current_active_user] = lambda: app.state.user
+        app.state.user = user
+        app.state.submitted = submitted
+        return app
+
+    @pytest.fixture
+    async def client(self, app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://testserver"
+        ) as client:
+            yield client
+
+    async def _queue(self, app, client, report):
+        response = await client.post(
+            f"/reports/{report.code}/render-async", json={"record_ids": [report.id]}
+        )
+        assert response.status_code == 202
+        execution_id = response.json()["id"]
+
+        (func, kwargs), = app.state.submitted
+        assert kwargs["args"] == (execution_id,)
+        assert kwargs["on_failure"].__name__ == "mark_report_execution_failed"
+        return execution_id
+
+    async def test_queue_then_download(self, app, client, db, report, output_cache):
+        from modules.base.services.report_service import ReportService
+
+        execution_id = await self._queue(app, client, report)
+        assert (await client.get(f"/reports/executions/{execution_id}/download")).status_code == 409
+
+        ReportService(db).run_execution(execution_id)
+        response = await client.get(f"/reports/executions/{execution_id}/download")
+
+        assert response.status_code == 200
+        assert "Report List" in response.text
+        assert (await client.get(f"/reports/executions/{execution_id}")).json()["status"] == "completed"
+
+    async def test_other_users_get_404(self, app, client, db, report, other_user, superuser, output_cache):
+        from modules.base.services.report_service import ReportService
+
+        execution_id = await self._queue(app, client, report)
+        ReportService(db).run_execution(execution_id)
+
+        app.state.user = other_user
+        assert (await client.get(f"/reports/executions/{execution_id}/download")).status_code == 404
+        assert (await client.get(f"/reports/executions/{execution_id}")).status_code == 404
+
+        app.state.user = superuser
+        assert (await client.get(f"/reports/executions/{execution_id}/download")).status_code == 200
+
+    def test_failure_marks_unfinished_execution(self, db, report):
+        from modules.base.services.report_service import ReportService
+
+        service = ReportService(db)
+        execution = service.queue_report(report.code, [report.id])
+
+        assert service.fail_execution(execution.id, "Task timed out after 120 seconds")
+        db.refresh(execution)
+        assert (execution.status, execution.error_message) == ("failed", "Task timed out after 120 seconds")
+
+        execution.status = "completed"
+        db.commit()
+        assert not service.fail_execution(execution.id, "late")
+        db.refresh(execution)
+        assert execution.status == "completed"
+
+
+async def test_task_timeout_runs_failure_callback():
+    from app.core.background_tasks import BackgroundTaskManager
+
+    failures = []
+    manager = BackgroundTaskManager()
+    manager.submit_task(
+        time.sleep, args=(0.5,), max_retries=0, timeout=0.05,
+        on_failure=lambda *args: failures.append(args),
+    )
+    for _ in range(50):
+        if failures:
+            break
+        await asyncio.sleep(0.02)
+
+    assert failures == [(0.5, "Task timed out after 0.05 seconds")]
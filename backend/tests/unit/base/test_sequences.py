@@ -0,0 +1,148 @@
+"""
+Sequence Tests
+
+Tests for strict (gap-less, row-locked) and fast (block-reserved)
+sequence allocation, and gap-free numbering across processes.
+"""
+
+import multiprocessing
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+
+@pytest.fixture
+def sequences(db):
+    from modules.base.services.sequence_service import SequenceService, clear_reserved_blocks
+
+    clear_reserved_blocks()
+    service = SequenceService(db)
+    service.create_sequence("test.order", "Orders", prefix="SO-", padding=4)
+    yield service
+    clear_reserved_blocks()
+
+
+class TestStrict:
+    def test_committed_numbers_kept(self, db, sequences):
+        assert sequences.next_by_code("test.order", mode="strict") == "SO-0001"
+        db.commit()
+        assert sequences.next_by_code("test.order", mode="strict", commit=True) == "SO-0002"
+        db.rollback()
+
+        assert sequences.next_by_code("test.order", mode="strict") == "SO-0003"
+
+    def test_uncommitted_numbers_released_on_rollback(self, db, sequences):
+        assert sequences.next_by_code("test.order", mode="strict") == "SO-0001"
+        db.rollback()
+
+        assert sequences.next_n("test.order", 3, mode="strict") == ["SO-0001", "SO-0002", "SO-0003"]
+        db.rollback()
+        assert sequences.next_by_id(sequences.get_sequence("test.order").id, mode="strict") == "SO-0001"
+
+    def test_date_range_numbers_per_year(self, db, sequences):
+        sequence = sequences.get_sequence("test.order")
+        sequence.use_date_range = True
+        db.commit()
+
+        assert sequences.next_n("test.order", 2, date=datetime(2025, 6, 1), mode="strict") == ["SO-0001", "SO-0002"]
+        assert sequences.next_by_code("test.order", date=datetime(2026, 1, 5), mode="strict") == "SO-0001"
+        assert sequences.next_by_code("test.order", date=datetime(2025, 12, 31), mode="strict") == "SO-0003"
+
+    def test_unknown_mode(self, sequences):
+        with pytest.raises(ValueError):
+            sequences.next_by_code("test.order", mode="eventual")
+
+
+class TestFast:
+    def test_numbers_served_from_reserved_block(self, db, sequences, monkeypatch):
+        from app.core.config import settings
+        from modules.base.models.sequence import Sequence
+
+        monkeypatch.setattr(settings, "SEQUENCE_BLOCK_SIZE", 10)
+
+        numbers = [sequences.next_by_code("test.order", mode="fast") for _ in range(12)]
+
+        assert numbers == [f"SO-{n:04d}" for n in range(1, 13)]
+        db.expire_all()
+        assert db.query(Sequence).filter(Sequence.code == "test.order").one().number_next == 21
+
+    def test_dropped_block_leaves_gap(self, sequences, monkeypatch):
+        from app.core.config import settings
+        from modules.base.services.sequence_service import clear_reserved_blocks
+
+        monkeypatch.setattr(settings, "SEQUENCE_BLOCK_SIZE", 10)
+        assert sequences.next_by_code("test.order", mode="fast") == "SO-0001"
+
+        clear_reserved_blocks(sequences.get_sequence("test.order").id)
+
+        assert sequences.next_by_code("test.order", mode="fast") == "SO-0011"
+
+    def test_locks_keyed_by_sequence_id(self, sequences):
+        from modules.base.services import sequence_service
+
+        sequences.next_by_code("test.order", mode="fast")
+        sequence_id = sequences.get_sequence("test.order").id
+
+        assert sequence_service._get_sequence_lock(sequence_id) is sequence_service._get_sequence_lock(sequence_id)
+        assert list(sequence_service._sequence_locks) == [sequence_id]
+
+
+def _file_engine(path):
+    """SQLite engine whose transactions take the write lock up front (like FOR UPDATE)."""
+    engine = create_engine(f"sqlite:///{path}", connect_args={"timeout": 60})
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return engine
+
+
+def _allocate_in_process(path, count):
+    """Worker process: allocate count numbers, one committed transaction each."""
+    from modules.base.services.sequence_service import SequenceService
+
+    engine = _file_engine(path)
+    db = sessionmaker(bind=engine)()
+    try:
+        return [
+            SequenceService(db).next_by_code("bench.order", mode="strict", commit=True)
+            for _ in range(count)
+        ]
+    finally:
+        db.close()
+        engine.dispose()
+
+
+@pytest.mark.slow
+def test_strict_numbers_gap_free_across_processes(tmp_path):
+    from modules.base.models.sequence import Sequence, SequenceDateRange
+    from modules.base.services.sequence_service import SequenceService
+    from tests.unit.base.conftest import create_base_tables
+
+    path = tmp_path / "sequences.db"
+    engine = _file_engine(path)
+    create_base_tables(engine, Sequence, SequenceDateRange)
+    db = sessionmaker(bind=engine)()
+    SequenceService(db).create_sequence("bench.order", "Bench", prefix="B-", padding=6)
+    db.close()
+    engine.dispose()
+
+    processes, per_process = 4, 250
+    started = time.perf_counter()
+    with multiprocessing.get_context("spawn").Pool(processes) as pool:
+        results = pool.starmap(_allocate_in_process, [(str(path), per_process)] * processes)
+    elapsed = time.perf_counter() - started
+
+    numbers = sorted(number for result in results for number in result)
+    assert numbers == [f"B-{n:06d}" for n in range(1, processes * per_process + 1)]
+    # Each worker's numbers increase in allocation order
+    assert all(result == sorted(result) for result in results)
+    assert elapsed < 60
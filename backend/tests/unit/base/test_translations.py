@@ -0,0 +1,153 @@
+"""
+Translation Catalog Tests
+
+Tests for catalog lookups along the language fallback chain, reloading
+catalogs after translations change and the versioned catalog endpoint.
+"""
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import insert
+
+
+@pytest.fixture
+def catalogs():
+    from modules.base.services.translation_catalog import translation_catalogs
+
+    translation_catalogs.invalidate()
+    yield translation_catalogs
+    translation_catalogs.invalidate()
+
+
+@pytest.fixture
+def service(db, catalogs):
+    from modules.base.models.translation import IrTranslation, Language
+    from modules.base.services.translation_service import TranslationService
+    from tests.unit.base.conftest import create_base_tables
+
+    create_base_tables(db.get_bind(), Language, IrTranslation)
+    service = TranslationService(db)
+    service.create_language("fr", "French")
+    service.create_language("fr_CA", "French (Canada)")
+    service.bulk_set_translations([
+        {"source": "Hello", "value": "Bonjour", "name": "app.hello", "module_name": "app"},
+        {"source": "Bye", "value": "Au revoir", "name": "app.bye", "module_name": "app"},
+        {"source": "Save", "value": "Enregistrer", "name": "crm.save", "module_name": "crm"},
+        {"source": "Name", "value": "Nom", "name": "res.partner,name", "type": "model", "res_id": 1},
+    ], "fr")
+    service.bulk_set_translations([
+        {"source": "Hello", "value": "Allo", "name": "app.hello", "module_name": "app"},
+        {"source": "Save", "value": "", "name": "crm.save", "module_name": "crm"},
+    ], "fr_CA")
+    db.commit()
+    return service
+
+
+class TestLookup:
+    def test_matches_database_lookup(self, db, service):
+        from modules.base.models.translation import IrTranslation
+
+        for lang, name, source in [
+            ("fr", "app.hello", "Hello"),
+            ("fr", "crm.save", "Save"),
+            ("fr_CA", "app.hello", "Hello"),
+            ("fr", "app.missing", "Missing"),
+            ("de", "app.hello", "Hello"),
+        ]:
+            assert service.translate(source, lang, name=name) == IrTranslation.translate(
+                db, source, lang, name=name
+            )
+
+    def test_falls_back_to_base_language(self, service):
+        assert service.translate("Bye", "fr_CA", name="app.bye") == "Au revoir"
+        # Untranslated entries don't shadow the fallback
+        assert service.translate("Save", "fr_CA", name="crm.save") == "Enregistrer"
+        assert service.translate("Hello", "fr_CA", name="app.hello") == "Allo"
+
+    def test_record_translations_read_from_database(self, service):
+        assert service.translate("Name", "fr", type="model", name="res.partner,name", res_id=1) == "Nom"
+        assert service.translate("Name", "fr", type="model", name="res.partner,name") == "Name"
+
+    def test_module_catalogs(self, service):
+        assert service.get_catalog("fr", "crm").by_name() == {"crm.save": "Enregistrer"}
+        assert service.get_catalog("fr", "unknown").by_name() == {}
+        assert service.get_catalog("fr").get("code", "app.bye") == "Au revoir"
+
+
+class TestInvalidation:
+    def test_reloaded_after_commit(self, db, service):
+        version = service.get_catalog("fr").version
+
+        service.set_translation("Bye", "Salut", "fr", name="app.bye", module_name="app")
+        db.commit()
+
+        assert service.translate("Bye", "fr_CA", name="app.bye") == "Salut"
+        assert service.get_catalog("fr").version != version
+
+    def test_reloaded_after_bulk_delete(self, db, service):
+        service.delete_module_translations("app")
+        db.commit()
+
+        assert service.translate("Hello", "fr_CA", name="app.hello") == "Hello"
+
+    def test_reloaded_after_bump_in_other_process(self, db, service, catalogs, monkeypatch):
+        from modules.base.models.translation import IrTranslation
+
+        remote = ["1"]
+        generation = catalogs._language_generation("fr")
+        monkeypatch.setattr(generation, "check_interval", 0)
+        monkeypatch.setattr(generation, "_read_remote", lambda: remote[0])
+        assert service.translate("Open", "fr", name="app.open") == "Open"
+
+        # Written without the ORM, as another process would
+        db.execute(insert(IrTranslation).values(
+            lang="fr", type="code", name="app.open", source="Open", value="Ouvrir",
+        ))
+        db.commit()
+        assert service.translate("Open", "fr", name="app.open") == "Open"
+
+        remote[0] = "2"
+        assert service.translate("Open", "fr", name="app.open") == "Ouvrir"
+
+
+class TestCatalogEndpoint:
+    @pytest.fixture
+    async def client(self, db, user, service):
+        from app.api.deps import get_current_active_user, get_db
+        from modules.base.api import translations
+
+        app = FastAPI()
+        app.include_router(translations.router)
+        app.dependency_overrides[get_db] = lambda: db
+        app.dependency_overrides[get_current_active_user] = lambda: user
+
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://testserver"
+        ) as client:
+            yield client
+
+    async def test_merges_fallback_languages(self, client):
+        response = await client.get("/translations/catalog/fr_CA")
+
+        assert response.status_code == 200
+        assert response.json()["messages"] == {
+            "app.hello": "Allo",
+            "app.bye": "Au revoir",
+            "crm.save": "Enregistrer",
+        }
+
+    async def test_not_modified_until_catalog_changes(self, client, db, service):
+        etag = (await client.get("/translations/catalog/fr_CA")).headers["etag"]
+
+        response = await client.get("/translations/catalog/fr_CA", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+
+        service.set_translation("Bye", "Salut", "fr", name="app.bye", module_name="app")
+        db.commit()
+
+        response = await client.get("/translations/catalog/fr_CA", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert response.json()["messages"]["app.bye"] == "Salut"
@@ -0,0 +1,205 @@
+"""
+Workflow Engine Tests
+
+Tests for available transitions evaluated from compiled, cached
+workflows, the batch endpoint and reloading after workflow changes.
+"""
+
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import update
+
+MODEL = "sale.Order"
+
+STATES = [
+    {"code": "draft", "name": "Draft", "is_start": True},
+    {"code": "confirmed", "name": "Confirmed"},
+    {"code": "done", "name": "Done", "is_end": True},
+    {"code": "cancel", "name": "Cancelled", "is_end": True},
+]
+
+
+@pytest.fixture
+def registry():
+    from modules.base.services.workflow_engine import workflow_registry
+
+    workflow_registry.invalidate()
+    yield workflow_registry
+    workflow_registry.invalidate()
+
+
+@pytest.fixture
+def service(db, registry):
+    from modules.base.models.workflow import WorkflowDefinition, WorkflowState, WorkflowTransition
+    from modules.base.services.workflow_service import WorkflowService
+    from tests.unit.base.conftest import create_base_tables
+
+    create_base_tables(db.get_bind(), WorkflowDefinition, WorkflowTransition, WorkflowState)
+    service = WorkflowService(db)
+    workflow = service.create_workflow("Orders", "sale.order", MODEL, STATES)
+    for sequence, (code, from_state, to_state, options) in enumerate([
+        ("confirm", "draft", "confirmed", {"condition_domain": [["amount", ">", 0]]}),
+        ("cancel", "draft", "cancel", {"required_groups": ["manager"]}),
+        ("approve", "draft", "confirmed", {"condition_code": "record.amount < 1000"}),
+        ("broken", "draft", "done", {"condition_code": "record.amount <"}),
+        ("compare", "draft", "cancel", {"condition_domain": [["amount", ">", "x"]]}),
+        ("finish", "confirmed", "done", {}),
+    ]):
+        service.create_transition(
+            workflow.id, code.title(), code, from_state, to_state, sequence=sequence, **options
+        )
+    for res_id in (1, 2, 3):
+        service.initialize_state(workflow.id, MODEL, res_id)
+    service.initialize_state(workflow.id, MODEL, 4, "confirmed")
+    db.commit()
+    return service
+
+
+def _legacy_available(service, res_id, record, user_groups):
+    """Transition codes as the interpreted (pre-compilation) evaluator chose them."""
+    from modules.base.models.workflow import WorkflowState
+
+    operators = {
+        "=": lambda a, e: a == e, "!=": lambda a, e: a != e,
+        "in": lambda a, e: a in e, "not in": lambda a, e: a not in e,
+        ">": lambda a, e: a > e, ">=": lambda a, e: a >= e,
+        "<": lambda a, e: a < e, "<=": lambda a, e: a <= e,
+    }
+
+    def domain_ok(domain):
+        try:
+            return all(
+                operators[op](getattr(record, field, None), value)
+                for field, op, value in domain if op in operators
+            )
+        except Exception:
+            return False
+
+    def condition_ok(code):
+        try:
+            return bool(eval(code, {"__builtins__": {}}, {"record": record}))
+        except Exception:
+            return False
+
+    state = WorkflowState.get_for_record(service.db, MODEL, res_id)
+    codes = []
+    for t in service.get_transitions(state.workflow_id, from_state=state.current_state):
+        if t.required_groups and not any(g in (user_groups or []) for g in t.required_groups):
+            continue
+        if t.condition_domain and record and not domain_ok(t.condition_domain):
+            continue
+        if t.condition_code and record and not condition_ok(t.condition_code):
+            continue
+        codes.append(t.code)
+    return codes
+
+
+def _codes(transitions):
+    return [t["code"] for t in transitions]
+
+
+def _transition_model():
+    from modules.base.models.workflow import WorkflowTransition
+
+    return WorkflowTransition
+
+
+class TestAvailableTransitions:
+    @pytest.mark.parametrize("user_groups", [None, ["manager"], ["viewer"]])
+    @pytest.mark.parametrize("amount", [None, 0, 500, 5000])
+    def test_matches_interpreted_evaluation(self, service, amount, user_groups):
+        record = SimpleNamespace(amount=amount)
+
+        for res_id in (1, 4):
+            assert _codes(service.get_available_transitions(
+                MODEL, res_id, user_groups=user_groups, record=record,
+            )) == _legacy_available(service, res_id, record, user_groups)
+
+    def test_without_record_only_groups_apply(self, service):
+        assert _codes(service.get_available_transitions(MODEL, 1)) == [
+            "confirm", "approve", "broken", "compare",
+        ]
+
+    def test_many_matches_single(self, service):
+        records = {1: SimpleNamespace(amount=0), 2: SimpleNamespace(amount=500)}
+
+        result = service.get_available_transitions_many(
+            MODEL, [1, 2, 3, 4, 99], user_groups=["manager"], records=records,
+        )
+
+        assert result == {
+            res_id: service.get_available_transitions(
+                MODEL, res_id, user_groups=["manager"], record=records.get(res_id),
+            )
+            for res_id in (1, 2, 3, 4, 99)
+        }
+        assert result[99] == []
+
+
+class TestRegistryInvalidation:
+    def test_reloaded_after_commit(self, db, service):
+        transition = db.query(_transition_model()).filter_by(code="finish").one()
+        service.update_transition(transition.id, from_state="draft")
+        db.commit()
+
+        assert _codes(service.get_available_transitions(MODEL, 4)) == []
+        assert "finish" in _codes(service.get_available_transitions(MODEL, 1))
+
+    def test_reloaded_after_bump_in_other_process(self, db, service, registry, monkeypatch):
+        remote = ["1"]
+        monkeypatch.setattr(registry.generation, "check_interval", 0)
+        monkeypatch.setattr(registry.generation, "_read_remote", lambda: remote[0])
+        assert _codes(service.get_available_transitions(MODEL, 4)) == ["finish"]
+
+        # Written without the ORM, as another process would
+        model = _transition_model()
+        db.execute(update(model).where(model.code == "finish").values(is_active=False))
+        db.commit()
+        assert _codes(service.get_available_transitions(MODEL, 4)) == ["finish"]
+
+        remote[0] = "2"
+        assert _codes(service.get_available_transitions(MODEL, 4)) == []
+
+
+class TestAvailableEndpoint:
+    @pytest.fixture
+    def app(self, db, user, service):
+        from app.api.deps import get_current_active_user, get_db
+        from modules.base.api import workflows
+
+        app = FastAPI()
+        app.include_router(workflows.router)
+        app.dependency_overrides[get_db] = lambda: db
+        app.dependency_overrides[get_current_active_user] = lambda: app.state.user
+        app.state.user = user
+        return app
+
+    @pytest.fixture
+    async def client(self, app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://testserver"
+        ) as client:
+            yield client
+
+    async def test_transitions_per_record(self, app, client, superuser):
+        response = await client.post(f"/workflows/state/{MODEL}/available", json={"res_ids": [1, 4, 99]})
+
+        assert response.status_code == 200
+        body = response.json()
+        assert [t["code"] for t in body["1"]] == ["confirm", "approve", "broken", "compare"]
+        assert [t["code"] for t in body["4"]] == ["finish"]
+        assert body["99"] == []
+
+        app.state.user = superuser
+        response = await client.post(f"/workflows/state/{MODEL}/available", json={"res_ids": [1]})
+        assert "cancel" not in [t["code"] for t in response.json()["1"]]
+
+    async def test_rejects_oversized_batch(self, client):
+        response = await client.post(
+            f"/workflows/state/{MODEL}/available", json={"res_ids": list(range(1001))}
+        )
+
+        assert response.status_code == 422
@@ -0,0 +1,173 @@
+"""
+Cache Generation Tests
+
+Tests for the cross-process invalidation counter used by in-process
+caches (automation rule index, etc.) and for invalidating them when a
+session that changed their rows commits.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import Column, Integer, String, create_engine, inspect, update
+from sqlalchemy.orm import DeclarativeBase, Session
+from sqlalchemy.pool import StaticPool
+
+from app.core import cache as cache_module
+from app.core.cache import CacheGeneration, CommitInvalidation
+
+
+class ItemBase(DeclarativeBase):
+    pass
+
+
+class Item(ItemBase):
+    __tablename__ = "test_commit_invalidation_items"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(50))
+    hits = Column(Integer, default=0)
+
+
+# Listeners are registered for the life of the process, so share one
+invalidated = []
+item_invalidation = CommitInvalidation("test_items", lambda session, keys: invalidated.append(keys))
+item_invalidation.watch(
+    Item, key=lambda item: item.name, updated=lambda item: inspect(item).attrs.name.history.has_changes()
+)
+
+
+class _FakeRedis:
+    """Minimal stand-in for the Redis commands CacheGeneration uses."""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def incr(self, key):
+        value = int(self.values.get(key, 0)) + 1
+        self.values[key] = str(value)
+        return value
+
+
+@pytest.fixture
+def fake_redis():
+    redis = _FakeRedis()
+    with patch.object(cache_module.RedisCache, "client", new=redis), \
+            patch.object(cache_module.settings, "CACHE_ENABLED", True):
+        yield redis
+
+
+class TestCacheGeneration:
+    def test_bump_changes_local_token(self, fake_redis):
+        generation = CacheGeneration("test", check_interval=60)
+        before = generation.token()
+
+        generation.bump()
+
+        assert generation.token() != before
+
+    def test_remote_bump_seen_after_check_interval(self, fake_redis):
+        here = CacheGeneration("shared", check_interval=0)
+        there = CacheGeneration("shared", check_interval=0)
+        token = here.token()
+
+        there.bump()
+
+        assert fake_redis.values["cache_generation:shared"] == "1"
+        assert here.token() != token
+
+    def test_remote_reads_are_throttled(self, fake_redis):
+        generation = CacheGeneration("throttled", check_interval=60)
+        generation.token()
+        fake_redis.get = MagicMock(return_value="5")
+
+        generation.token()
+        generation.token()
+
+        fake_redis.get.assert_not_called()
+
+    def test_redis_errors_keep_last_known_generation(self, fake_redis):
+        generation = CacheGeneration("flaky", check_interval=0)
+        fake_redis.values["cache_generation:flaky"] = "3"
+        token = generation.token()
+
+        fake_redis.get = MagicMock(side_effect=ConnectionError("down"))
+        fake_redis.incr = MagicMock(side_effect=ConnectionError("down"))
+
+        assert generation.token() == token
+        generation.bump()
+        assert generation.token() != token
+
+    def test_disabled_cache_uses_local_generation_only(self):
+        with patch.object(cache_module.settings, "CACHE_ENABLED", False):
+            generation = CacheGeneration("local", check_interval=0)
+            token = generation.token()
+            assert token == (0, None)
+
+            generation.bump()
+
+            assert generation.token() == (1, None)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    ItemBase.metadata.create_all(engine)
+    invalidated.clear()
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+class TestCommitInvalidation:
+    def test_watched_changes_invalidate_on_commit(self, session):
+        session.add_all([Item(name="a"), Item(name="b")])
+        session.flush()
+        assert invalidated == []
+        assert item_invalidation.has_pending(session)
+
+        session.commit()
+
+        assert invalidated == [{"a", "b"}]
+        assert not item_invalidation.has_pending(session)
+
+    def test_ignored_updates_dont_invalidate(self, session):
+        item = Item(name="a")
+        session.add(item)
+        session.commit()
+        invalidated.clear()
+
+        item.hits = 5
+        session.commit()
+        assert invalidated == []
+
+        session.delete(item)
+        session.commit()
+        assert invalidated == [{"a"}]
+
+    def test_rolled_back_changes_forgotten(self, session):
+        session.add(Item(name="a"))
+        session.flush()
+        item_invalidation.mark(session)
+        session.rollback()
+
+        session.commit()
+
+        assert invalidated == []
+        assert not item_invalidation.has_pending(session)
+
+    def test_mark_covers_bulk_updates(self, session):
+        session.add(Item(name="a"))
+        session.commit()
+        invalidated.clear()
+
+        session.execute(update(Item).values(hits=1))
+        item_invalidation.mark(session)
+        session.commit()
+
+        assert invalidated == [{None}]
@@ -0,0 +1,135 @@
+"""
+Logging Pipeline Tests
+
+Tests for the non-blocking queue handler, JSON formatting, request-id
+correlation and request log sampling.
+"""
+
+import json
+import logging
+import queue
+
+import pytest
+
+from app.core.context import request_context
+from app.core.logging import (
+    JsonFormatter,
+    LogSampler,
+    NonBlockingQueueHandler,
+    RequestContextFilter,
+)
+
+
+def _make_record(msg="hello %s", args=("world",), **extra):
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, msg, args, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+class TestNonBlockingQueueHandler:
+    """Tests for NonBlockingQueueHandler."""
+
+    def test_drops_when_queue_full(self):
+        """Test records are dropped and counted instead of blocking."""
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=2))
+
+        for _ in range(5):
+            handler.emit(_make_record())
+
+        stats = handler.stats()
+        assert stats["queued"] == 2
+        assert stats["dropped"] == 3
+        assert stats["dropped_by_level"] == {"INFO": 3}
+
+    def test_prepare_interpolates_message(self):
+        """Test prepared records carry the rendered message and no args."""
+        handler = NonBlockingQueueHandler(queue.Queue())
+
+        prepared = handler.prepare(_make_record())
+
+        assert prepared.msg == "hello world"
+        assert prepared.args is None
+
+    def test_prepare_renders_exception(self):
+        """Test tracebacks are rendered before crossing threads."""
+        handler = NonBlockingQueueHandler(queue.Queue())
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            import sys
+            record = logging.LogRecord(
+                "test", logging.ERROR, __file__, 1, "failed", (), sys.exc_info()
+            )
+
+        prepared = handler.prepare(record)
+
+        assert prepared.exc_info is None
+        assert "ValueError: boom" in prepared.exc_text
+
+
+class TestStructuredFormatting:
+    """Tests for RequestContextFilter and JsonFormatter."""
+
+    def test_request_id_from_context(self):
+        """Test the filter attaches the current request ID."""
+        record = _make_record()
+        with request_context(user_id=7, request_id="req-123"):
+            RequestContextFilter().filter(record)
+
+        assert record.request_id == "req-123"
+        assert record.user_id == 7
+
+    def test_explicit_request_id_wins(self):
+        """Test an explicit extra request_id is not overwritten."""
+        record = _make_record(request_id="explicit")
+        with request_context(request_id="from-context"):
+            RequestContextFilter().filter(record)
+
+        assert record.request_id == "explicit"
+
+    def test_json_output_includes_extra_fields(self):
+        """Test JSON records include message, correlation and extra fields."""
+        record = _make_record(request_id="req-1", status_code=200, duration_ms=1.5)
+
+        payload = json.loads(JsonFormatter().format(record))
+
+        assert payload["message"] == "hello world"
+        assert payload["request_id"] == "req-1"
+        assert payload["status_code"] == 200
+        assert payload["duration_ms"] == 1.5
+        assert payload["level"] == "INFO"
+
+
+class TestLogSampler:
+    """Tests for LogSampler."""
+
+    def test_errors_always_logged(self):
+        """Test error and slow responses bypass sampling."""
+        sampler = LogSampler(default_rate=0.0)
+
+        assert sampler.should_log("/api/v1/users", 500)
+        assert sampler.should_log("/api/v1/users", 404)
+        assert sampler.should_log("/api/v1/users", 200, slow=True)
+
+    def test_success_sampled_out(self):
+        """Test successful requests are dropped at rate 0."""
+        sampler = LogSampler(default_rate=0.0)
+
+        assert not sampler.should_log("/api/v1/users", 200)
+        assert sampler.sampled_out == 1
+
+    def test_longest_prefix_wins(self):
+        """Test the most specific route rate is used."""
+        sampler = LogSampler.from_config(
+            1.0, "/api/v1=0.5,/api/v1/inbox=0.0, bad-entry ,/x=nan?"
+        )
+
+        assert sampler.rate_for("/api/v1/inbox/items") == 0.0
+        assert sampler.rate_for("/api/v1/users") == 0.5
+        assert sampler.rate_for("/health") == 1.0
+
+    @pytest.mark.parametrize("rate", [-1, 2])
+    def test_rates_clamped(self, rate):
+        """Test out-of-range rates are clamped to [0, 1]."""
+        assert 0.0 <= LogSampler(default_rate=rate).default_rate <= 1.0
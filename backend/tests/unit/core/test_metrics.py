@@ -0,0 +1,146 @@
+"""
+Metrics Tests
+
+Tests for the metrics registry, Prometheus rendering, SQL instrumentation
+and the /metrics endpoint.
+"""
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from app.core.metrics import (
+    MetricsRegistry,
+    RequestDBStats,
+    _request_db_stats,
+    instrument_engine,
+)
+
+
+class TestMetricsRegistry:
+    """Tests for MetricsRegistry and metric types."""
+
+    def test_counter_render(self):
+        """Test counters render with labels."""
+        reg = MetricsRegistry()
+        counter = reg.counter("test_total", "Test counter", ("result",))
+        counter.inc(result="hit")
+        counter.inc(2, result="hit")
+
+        output = reg.render()
+
+        assert "# TYPE test_total counter" in output
+        assert 'test_total{result="hit"} 3' in output
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histogram buckets, count and sum."""
+        reg = MetricsRegistry()
+        hist = reg.histogram("test_seconds", "Test histogram", buckets=(0.1, 1.0))
+        hist.observe(0.05)
+        hist.observe(0.5)
+        hist.observe(5)
+
+        output = reg.render()
+
+        assert 'test_seconds_bucket{le="0.1"} 1' in output
+        assert 'test_seconds_bucket{le="1"} 2' in output
+        assert 'test_seconds_bucket{le="+Inf"} 3' in output
+        assert "test_seconds_count 3" in output
+        assert hist.count() == 3
+        assert hist.sum() == pytest.approx(5.55)
+
+    def test_register_is_idempotent(self):
+        """Test registering the same name returns the existing metric."""
+        reg = MetricsRegistry()
+        first = reg.gauge("test_gauge", "Gauge")
+
+        assert reg.gauge("test_gauge", "Gauge") is first
+        with pytest.raises(ValueError):
+            reg.counter("test_gauge", "Counter")
+
+    def test_label_mismatch_rejected(self):
+        """Test wrong label names raise."""
+        counter = MetricsRegistry().counter("test_total", "Test", ("a",))
+
+        with pytest.raises(ValueError):
+            counter.inc(b="x")
+
+    def test_failing_collector_does_not_break_render(self):
+        """Test a broken collector is skipped."""
+        reg = MetricsRegistry()
+
+        def broken():
+            raise RuntimeError("boom")
+            yield  # pragma: no cover
+
+        reg.register_collector(broken)
+        reg.counter("ok_total", "Still rendered").inc()
+
+        assert "ok_total 1" in reg.render()
+
+
+class TestEngineInstrumentation:
+    """Tests for per-request SQL statement tracking."""
+
+    def test_statements_counted_per_request(self):
+        """Test statements executed in a request context are accumulated."""
+        engine = create_engine(
+            "sqlite:///:memory:",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        instrument_engine(engine)
+        instrument_engine(engine)  # second call is a no-op
+
+        stats = RequestDBStats()
+        token = _request_db_stats.set(stats)
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
+        finally:
+            _request_db_stats.reset(token)
+
+        assert stats.statements == 2
+        assert stats.duration >= 0
+        engine.dispose()
+
+
+@pytest.mark.api
+class TestMetricsEndpoint:
+    """Tests for GET /metrics"""
+
+    async def test_metrics_exposition(self, admin_client):
+        """Request metrics are exposed with the route template label"""
+        await admin_client.get("/api/v1/users/")
+
+        response = await admin_client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert "fastvue_http_request_duration_seconds_bucket" in body
+        assert 'route="/api/v1/users/"' in body
+        assert "fastvue_http_requests_in_flight" in body
+        assert "fastvue_websocket_connections" in body
+        assert "fastvue_background_tasks_pending" in body
+
+    async def test_anonymous_rejected_without_token(self, async_client):
+        """/metrics is not public when METRICS_TOKEN is unset"""
+        response = await async_client.get("/metrics")
+
+        assert response.status_code == 401
+
+    async def test_regular_user_rejected(self, authenticated_client):
+        response = await authenticated_client.get("/metrics")
+
+        assert response.status_code == 403
+
+    async def test_scraper_token(self, async_client, monkeypatch):
+        from app.core.config import settings
+
+        monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+
+        assert (await async_client.get("/metrics")).status_code == 401
+        response = await async_client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+        assert response.status_code == 200
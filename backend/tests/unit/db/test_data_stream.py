@@ -0,0 +1,246 @@
+"""
+Unit tests for streaming module data dump/load.
+Covers NDJSON round-trips and batched, idempotent upserts.
+"""
+
+import io
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import (
+    Column,
+    Date,
+    DateTime,
+    Integer,
+    LargeBinary,
+    MetaData,
+    Numeric,
+    String,
+    Table,
+    create_engine,
+    event,
+    insert,
+    select,
+)
+
+from app.db import data_stream
+
+
+@pytest.fixture
+def tables():
+    metadata = MetaData()
+    items = Table(
+        "items",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("name", String(50)),
+        Column("price", Numeric(10, 2)),
+        Column("created_at", DateTime),
+        Column("day", Date),
+        Column("payload", LargeBinary),
+    )
+    return metadata, items
+
+
+def _engine(metadata):
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    return engine
+
+
+def _rows(count):
+    return [
+        {
+            "id": i,
+            "name": f"item {i}",
+            "price": Decimal("1.25") * i,
+            "created_at": datetime(2024, 1, 1, 12, 0, i % 60),
+            "day": date(2024, 1, 1 + i % 28),
+            "payload": bytes([i % 256, 0, 255]),
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def _dump(engine, table, **kwargs):
+    buffer = io.StringIO()
+    with engine.connect() as conn:
+        counts = data_stream.dump_tables(conn, [table], buffer, header={"module_name": "demo"}, **kwargs)
+    buffer.seek(0)
+    return buffer, counts
+
+
+def _load(engine, table, buffer, **kwargs):
+    buffer.seek(0)
+    with engine.begin() as conn:
+        header = data_stream.read_header(buffer)
+        stats = data_stream.load_batches(
+            conn,
+            data_stream.iter_dump_batches(buffer, batch_size=500),
+            lambda name: table if name == table.name else None,
+            **kwargs,
+        )
+    return header, stats
+
+
+class TestDumpAndLoad:
+    """Tests for NDJSON round-trips"""
+
+    def test_round_trip_preserves_rows(self, tables):
+        """Test that dumping and loading reproduces every row exactly"""
+        metadata, items = tables
+        source = _engine(metadata)
+        with source.begin() as conn:
+            conn.execute(insert(items), _rows(5000))
+
+        progress = []
+        buffer, counts = _dump(source, items, chunk_size=1000, progress=lambda t, n: progress.append(n))
+        assert counts == {"items": 5000}
+        assert progress == [1000, 2000, 3000, 4000, 5000]
+
+        target = _engine(metadata)
+        header, stats = _load(target, items, buffer)
+        assert header["module_name"] == "demo"
+        assert stats["imported"] == {"items": 5000}
+
+        query = select(items).order_by(items.c.id)
+        with source.connect() as a, target.connect() as b:
+            assert a.execute(query).all() == b.execute(query).all()
+
+    def test_reload_is_idempotent(self, tables):
+        """Test that loading the same dump twice skips existing rows"""
+        metadata, items = tables
+        source = _engine(metadata)
+        with source.begin() as conn:
+            conn.execute(insert(items), _rows(1200))
+        buffer, _ = _dump(source, items)
+
+        target = _engine(metadata)
+        _load(target, items, buffer)
+        _, stats = _load(target, items, buffer)
+
+        assert stats["imported"] == {"items": 0}
+        assert stats["skipped"] == {"items": 1200}
+
+    def test_load_issues_batched_statements(self, tables):
+        """Test that a load runs a bounded number of statements, not one per row"""
+        metadata, items = tables
+        source = _engine(metadata)
+        with source.begin() as conn:
+            conn.execute(insert(items), _rows(2000))
+        buffer, _ = _dump(source, items)
+
+        target = _engine(metadata)
+        statements = []
+        event.listen(target, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        _load(target, items, buffer)
+
+        # 4 batches of 500: one key lookup + one insert each
+        assert len(statements) <= 10
+
+
+class TestUpsertRows:
+    """Tests for conflict resolution in upsert_rows"""
+
+    def _seed(self, tables):
+        metadata, items = tables
+        engine = _engine(metadata)
+        with engine.begin() as conn:
+            conn.execute(insert(items), [{"id": 1, "name": "old"}, {"id": 2, "name": "keep"}])
+        return engine, items
+
+    def test_update(self, tables):
+        engine, items = self._seed(tables)
+        with engine.begin() as conn:
+            result = data_stream.upsert_rows(
+                conn, items, [{"id": 1, "name": "new"}, {"id": 3, "name": "added"}], "update"
+            )
+            names = dict(conn.execute(select(items.c.id, items.c.name)).all())
+
+        assert result == (1, 0, 1)
+        assert names == {1: "new", 2: "keep", 3: "added"}
+
+    def test_replace(self, tables):
+        engine, items = self._seed(tables)
+        with engine.begin() as conn:
+            result = data_stream.upsert_rows(conn, items, [{"id": 2, "name": "replaced"}], "replace")
+            name = conn.execute(select(items.c.name).where(items.c.id == 2)).scalar()
+
+        assert result == (1, 0, 0)
+        assert name == "replaced"
+
+    def test_error(self, tables):
+        engine, items = self._seed(tables)
+        with engine.begin() as conn:
+            with pytest.raises(ValueError, match="items:1 already exists"):
+                data_stream.upsert_rows(conn, items, [{"id": 1, "name": "dup"}], "error")
+
+    def test_rows_without_key_are_inserted(self, tables):
+        engine, items = self._seed(tables)
+        with engine.begin() as conn:
+            result = data_stream.upsert_rows(conn, items, [{"name": "auto id"}], "skip")
+            count = len(conn.execute(select(items)).all())
+
+        assert result == (1, 0, 0)
+        assert count == 3
+
+    def test_legacy_records_are_decoded(self, tables):
+        """Test that {model: [records]} data with ISO strings loads into typed columns"""
+        metadata, items = tables
+        engine = _engine(metadata)
+        data = {"items": [{"id": 1, "created_at": "2024-05-01T10:00:00", "price": 9.5, "unknown": 1}]}
+
+        with engine.begin() as conn:
+            stats = data_stream.load_batches(
+                conn, data_stream.iter_record_batches(data), lambda name: items,
+            )
+            row = conn.execute(select(items)).one()
+
+        assert stats["imported"] == {"items": 1}
+        assert row.created_at == datetime(2024, 5, 1, 10, 0)
+        assert row.price == Decimal("9.50")
+
+
+class TestJSONDocuments:
+    """Incremental reading/writing of {"name": [...]} documents."""
+
+    DOCUMENT = {
+        "_meta": {"version": "1.0"},
+        "users": [{"email": "a@example.com", "tags": [1, 2]}, {"email": "b@example.com"}],
+        "numbers": [1, 22, 3.5e3, -1e-2, True, None],
+        "empty": [],
+    }
+
+    @pytest.mark.parametrize("buffer_size", [1, 3, 64, 1 << 16])
+    def test_items_streamed_in_document_order(self, buffer_size):
+        import json
+
+        fh = io.StringIO(json.dumps(self.DOCUMENT, indent=2))
+        items = list(data_stream.iter_json_items(fh, buffer_size=buffer_size))
+
+        assert items == [
+            ("users", {"email": "a@example.com", "tags": [1, 2]}),
+            ("users", {"email": "b@example.com"}),
+            *[("numbers", value) for value in self.DOCUMENT["numbers"]],
+        ]
+
+    def test_malformed_document_raises(self):
+        import json
+
+        with pytest.raises(json.JSONDecodeError):
+            list(data_stream.iter_json_items(io.StringIO('{"users": [{"a": 1} {"b": 2}]}')))
+
+    def test_writer_matches_json_dump(self):
+        import json
+
+        out = io.StringIO()
+        counts = data_stream.write_json_sections(out, [
+            ("_meta", self.DOCUMENT["_meta"]),
+            ("users", iter(self.DOCUMENT["users"])),
+            ("empty", iter([])),
+        ])
+
+        expected = {k: self.DOCUMENT[k] for k in ("_meta", "users", "empty")}
+        assert out.getvalue() == json.dumps(expected, indent=2)
+        assert counts == {"users": 2, "empty": 0}
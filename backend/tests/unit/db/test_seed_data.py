@@ -0,0 +1,134 @@
+"""
+Unit tests for bulk seed data loading and export.
+Covers reference resolution, idempotent reloads, out-of-order sections
+and export/load round-trips.
+"""
+
+import io
+import json
+
+import pytest
+from sqlalchemy import event, func, select
+
+from app.db import seed_data
+from app.db.seed_data import SeedLoader, export_seed_data
+from app.models.company import Company
+from app.models.group import Group, GroupPermission, UserGroup
+from app.models.permission import Permission
+from app.models.role import Role
+from app.models.user import User
+from app.models.user_company_role import RolePermission, UserCompanyRole
+
+
+SEED = {
+    "_meta": {"version": "1.0.0"},
+    "companies": [
+        {"id": 1, "name": "Seed HQ", "code": "SEED_HQ"},
+        {"id": 2, "name": "Seed Branch", "code": "SEED_BR", "parent_company_code": "SEED_HQ"},
+    ],
+    # Roles reference permissions that only appear later in the file
+    "roles": [
+        {"name": "Seed Editor", "permissions": ["seed.read", "seed.write"], "company_code": "SEED_HQ"},
+    ],
+    "permissions": [
+        {"name": "seed.read", "category": "user", "action": "read"},
+        {"name": "seed.write", "category": "user", "action": "update"},
+    ],
+    "users": [
+        {"email": f"seed{i}@example.com", "username": f"seed{i}", "password": "secret",
+         "current_company_code": "SEED_BR"}
+        for i in range(3)
+    ],
+    "groups": [
+        {"name": "Seed Team", "company_code": "SEED_HQ",
+         "users": ["seed0@example.com", "seed1@example.com", "missing@example.com"],
+         "permissions": ["seed.read"]},
+    ],
+    "user_company_roles": [
+        {"user_email": "seed0@example.com", "company_code": "SEED_HQ", "role_name": "Seed Editor", "is_default": True},
+    ],
+}
+
+
+@pytest.fixture(autouse=True)
+def fast_hash(monkeypatch):
+    monkeypatch.setattr(seed_data, "get_password_hash", lambda password: f"hashed:{password}")
+
+
+def _load(db_session, document, **kwargs):
+    kwargs.setdefault("hash_workers", 1)
+    with SeedLoader(db_session.connection(), **kwargs) as loader:
+        return loader.load(io.StringIO(json.dumps(document)))
+
+
+def _count(db_session, model):
+    return db_session.execute(select(func.count()).select_from(model)).scalar()
+
+
+class TestSeedLoader:
+    def test_loads_records_and_references(self, db_session):
+        stats = _load(db_session, SEED)
+
+        assert stats == {
+            "companies": 2, "permissions": 2, "roles": 1, "users": 3,
+            "groups": 1, "user_company_roles": 1,
+        }
+        hq, branch = (db_session.query(Company).filter_by(code=code).one() for code in ("SEED_HQ", "SEED_BR"))
+        assert branch.parent_company_id == hq.id
+
+        user = db_session.query(User).filter_by(email="seed0@example.com").one()
+        assert user.current_company_id == branch.id
+        assert user.hashed_password == "hashed:secret"
+
+        role = db_session.query(Role).filter_by(name="Seed Editor").one()
+        assert role.codename == "seed_editor"
+        assert sorted(rp.permission.name for rp in role.permissions) == ["seed.read", "seed.write"]
+
+        group = db_session.query(Group).filter_by(name="Seed Team").one()
+        assert sorted(ug.user.email for ug in group.users) == ["seed0@example.com", "seed1@example.com"]
+        assert [gp.permission.name for gp in group.permissions] == ["seed.read"]
+
+        assert db_session.query(UserCompanyRole).filter_by(user_id=user.id, role_id=role.id).count() == 1
+
+    def test_reload_skips_existing_records(self, db_session):
+        _load(db_session, SEED)
+        counts = [_count(db_session, m) for m in (User, RolePermission, UserGroup, GroupPermission, UserCompanyRole)]
+
+        stats = _load(db_session, SEED)
+
+        assert all(count == 0 for count in stats.values())
+        assert [_count(db_session, m) for m in (User, RolePermission, UserGroup, GroupPermission, UserCompanyRole)] == counts
+
+    def test_inserts_in_batches(self, db_session):
+        document = {"users": [
+            {"email": f"bulk{i}@example.com", "username": f"bulk{i}", "password": "x"} for i in range(250)
+        ]}
+        statements = []
+        connection = db_session.connection()
+        listener = lambda *args: statements.append(args[2])
+        event.listen(connection, "before_cursor_execute", listener)
+        try:
+            stats = _load(db_session, document, batch_size=100)
+        finally:
+            event.remove(connection, "before_cursor_execute", listener)
+
+        assert stats == {"users": 250}
+        inserts = [s for s in statements if s.lstrip().upper().startswith("INSERT INTO USERS")]
+        assert 3 <= len(inserts) <= 6
+
+    def test_export_round_trip(self, db_session):
+        _load(db_session, SEED)
+        out = io.StringIO()
+
+        counts = export_seed_data(db_session.connection(), out, meta={"version": "1.0"})
+        document = json.loads(out.getvalue())
+
+        assert counts["permissions"] == _count(db_session, Permission)
+        role = next(r for r in document["roles"] if r["name"] == "Seed Editor")
+        assert sorted(role["permissions"]) == ["seed.read", "seed.write"]
+        group = next(g for g in document["groups"] if g["name"] == "Seed Team")
+        assert sorted(group["users"]) == ["seed0@example.com", "seed1@example.com"]
+        branch = next(c for c in document["companies"] if c["code"] == "SEED_BR")
+        assert branch["parent_company_code"] == "SEED_HQ"
+        permission = next(p for p in document["permissions"] if p["name"] == "seed.read")
+        assert (permission["category"], permission["action"]) == ("user", "read")
@@ -0,0 +1,85 @@
+"""
+Marketplace test fixtures.
+
+Marketplace models are imported lazily, once the shared test database
+exists, and created on a separate in-memory database: importing them
+registers their tables on the shared metadata.
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Tables created for marketplace tests (model names)
+MARKETPLACE_TABLES = (
+    "MarketplaceModule",
+    "License",
+    "LicenseActivation",
+    "ModuleReview",
+    "ReviewVote",
+    "ReviewComment",
+    "ReviewReport",
+    "RatingSummary",
+    "Publisher",
+    "Order",
+    "OrderItem",
+    "PayoutBatch",
+    "PublisherPayoutItem",
+    "PayoutAdjustment",
+    "PublisherBalance",
+    "BalanceTransaction",
+    "SubscriptionPlan",
+    "Subscription",
+    "SubscriptionInvoice",
+    "SubscriptionUsage",
+    "SubscriptionEvent",
+    "BillingRun",
+    "PublisherStats",
+    "ModuleVersion",
+    "ModuleDownload",
+    "ModuleView",
+    "UsageEventKey",
+    "SecurityScan",
+    "PackageFileScan",
+    "MarketplaceCategory",
+)
+
+
+def create_marketplace_tables(engine):
+    from modules.base.models.sequence import Sequence, SequenceDateRange
+    from modules.marketplace import models
+
+    tables = [getattr(models, name).__table__ for name in MARKETPLACE_TABLES]
+    tables += [Sequence.__table__, SequenceDateRange.__table__]
+    models.License.metadata.create_all(engine, tables=tables)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    create_marketplace_tables(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def module(db):
+    from modules.marketplace.models import MarketplaceModule
+
+    module = MarketplaceModule(
+        publisher_id=1,
+        technical_name="sale_plus",
+        display_name="Sale Plus",
+        slug="sale-plus",
+        short_description="Sales extensions",
+    )
+    db.add(module)
+    db.commit()
+    return module
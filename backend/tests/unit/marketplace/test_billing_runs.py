@@ -0,0 +1,261 @@
+"""
+Billing Run Tests
+
+Tests for checkpointed, chunked billing runs and gap-free invoice
+numbering.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+TODAY = date.today()
+YEAR = TODAY.year
+
+
+@pytest.fixture
+def billing(db):
+    from modules.marketplace.services.billing_run_service import BillingRunService
+    return BillingRunService(db)
+
+
+@pytest.fixture
+def plan(db):
+    from modules.marketplace.models import SubscriptionPlan
+
+    plan = SubscriptionPlan(code="pro", name="Pro Monthly", tier="pro", billing_cycle="monthly", price=Decimal("20.00"))
+    db.add(plan)
+    db.commit()
+    return plan
+
+
+def _subscriptions(db, plan, count, **values):
+    """Insert subscriptions whose period ended yesterday; returns their IDs."""
+    from modules.marketplace.models import Subscription
+
+    row = {
+        "plan_id": plan.id,
+        "status": "active",
+        "billing_cycle": "monthly",
+        "current_period_start": TODAY - timedelta(days=31),
+        "current_period_end": TODAY - timedelta(days=1),
+        "unit_price": Decimal("20.00"),
+        "auto_renew": True,
+        "cancel_at_period_end": False,
+        "discount_percent": Decimal("0.00"),
+    }
+    row.update(values)
+    start = db.query(Subscription).count()
+    rows = [dict(row, subscription_id=f"sub_{start + i:016d}") for i in range(count)]
+    ids = list(db.scalars(insert(Subscription).returning(Subscription.id), rows))
+    db.commit()
+    return ids
+
+
+def _invoice_numbers(db):
+    from modules.marketplace.models import SubscriptionInvoice
+    return sorted(number for (number,) in db.query(SubscriptionInvoice.invoice_number))
+
+
+class TestRenewals:
+    def test_due_subscriptions_renewed_and_invoiced(self, db, billing, plan):
+        from modules.marketplace.models import Subscription, SubscriptionEvent
+
+        due = _subscriptions(db, plan, 3)
+        trialing = _subscriptions(db, plan, 1, status="trialing")
+        later = _subscriptions(db, plan, 1, current_period_end=TODAY + timedelta(days=3))
+
+        run = billing.run("renewals", chunk_size=2, max_workers=1)
+
+        assert (run.status, run.processed_count, run.invoice_count, run.failed_count) == ("completed", 4, 4, 0)
+        assert run.cursor == trialing[0]
+        assert _invoice_numbers(db) == [f"INV-{YEAR}-{n:05d}" for n in range(1, 5)]
+        renewed = db.query(Subscription).filter(Subscription.id.in_(due + trialing)).all()
+        assert {s.current_period_end for s in renewed} == {TODAY + timedelta(days=29)}
+        assert {s.status for s in renewed} == {"active"}
+        assert db.get(Subscription, later[0]).current_period_end == TODAY + timedelta(days=3)
+        events = [e for (e,) in db.query(SubscriptionEvent.event_type).order_by(SubscriptionEvent.id)]
+        assert events.count("renewed") == 4 and events.count("trial_ended") == 1
+
+        # Nothing is due any more
+        assert billing.run("renewals", max_workers=1).processed_count == 0
+
+    def test_metered_usage_is_billed(self, db, billing, plan):
+        from modules.marketplace.models import SubscriptionInvoice, SubscriptionUsage
+
+        plan.is_metered = True
+        db.commit()
+        (subscription_id,) = _subscriptions(db, plan, 1)
+        db.add(SubscriptionUsage(
+            subscription_id=subscription_id,
+            metric="api_calls",
+            period_start=TODAY + timedelta(days=1),
+            period_end=TODAY + timedelta(days=2),
+            quantity=Decimal("150"),
+            included_quantity=Decimal("100"),
+            unit_price=Decimal("0.10"),
+        ))
+        db.commit()
+
+        billing.run("renewals", max_workers=1)
+
+        invoice = db.query(SubscriptionInvoice).one()
+        usage = db.query(SubscriptionUsage).one()
+        assert invoice.total == Decimal("25.00")
+        assert (usage.billed, usage.invoice_id) == (True, invoice.id)
+
+    def test_failing_subscription_only_fails_itself(self, db, billing, plan, monkeypatch):
+        from modules.marketplace.models import Subscription
+        from modules.marketplace.services.subscription_service import SubscriptionService
+
+        ids = _subscriptions(db, plan, 4)
+        invoice_values = SubscriptionService._invoice_values
+
+        def failing(service, subscription, *args):
+            if subscription.id == ids[1]:
+                raise ValueError("no billing address")
+            return invoice_values(service, subscription, *args)
+
+        monkeypatch.setattr(SubscriptionService, "_invoice_values", failing)
+
+        run = billing.run("renewals", chunk_size=10, max_workers=1)
+
+        assert (run.processed_count, run.failed_count) == (3, 1)
+        assert run.error_summary == [{"id": ids[1], "error": "no billing address"}]
+        assert db.get(Subscription, ids[1]).status == "past_due"
+        assert _invoice_numbers(db) == [f"INV-{YEAR}-{n:05d}" for n in range(1, 4)]
+
+    def test_interrupted_run_resumes_after_checkpoint(self, db, billing, plan, monkeypatch):
+        from modules.marketplace.services.billing_run_service import BillingRunService
+
+        ids = _subscriptions(db, plan, 5)
+        process_chunk = BillingRunService._process_chunk
+        calls = []
+
+        def crash_on_second_chunk(service, *args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError("worker lost")
+            return process_chunk(service, *args)
+
+        monkeypatch.setattr(BillingRunService, "_process_chunk", crash_on_second_chunk)
+        with pytest.raises(RuntimeError):
+            billing.run("renewals", chunk_size=2, max_workers=1)
+
+        run = billing.list_runs("renewals")[0]
+        assert (run.status, run.cursor, run.processed_count) == ("failed", ids[1], 2)
+
+        run = billing.resume_run(run.run_id, max_workers=1)
+
+        assert (run.status, run.processed_count, run.invoice_count) == ("completed", 5, 5)
+        assert calls[2][2] == ids[2:4]
+        assert _invoice_numbers(db) == [f"INV-{YEAR}-{n:05d}" for n in range(1, 6)]
+
+    def test_run_executing_elsewhere_is_not_taken_over(self, db, billing, plan):
+        from datetime import datetime
+
+        from app.core.config import settings
+        from modules.marketplace.models import BillingRun
+
+        _subscriptions(db, plan, 3)
+        run = BillingRun(kind="renewals", run_date=TODAY, status="running", cursor=0, chunk_size=2,
+                         heartbeat_at=datetime.utcnow())
+        db.add(run)
+        db.commit()
+
+        with pytest.raises(ValueError, match="another process"):
+            billing.run("renewals", max_workers=1)
+        with pytest.raises(ValueError, match="another process"):
+            billing.resume_run(run.run_id, max_workers=1)
+        assert db.get(BillingRun, run.id).processed_count == 0
+
+        # The process stopped checkpointing: the lease has expired
+        run.heartbeat_at = datetime.utcnow() - timedelta(seconds=settings.BILLING_RUN_LEASE + 1)
+        db.commit()
+        resumed = billing.run("renewals", max_workers=1)
+
+        assert (resumed.id, resumed.status, resumed.processed_count) == (run.id, "completed", 3)
+
+
+class TestInvoiceNumbers:
+    def test_sequence_continues_existing_numbers(self, db, plan):
+        from modules.marketplace.models import SubscriptionInvoice
+        from modules.marketplace.services.subscription_service import SubscriptionService
+
+        (subscription_id,) = _subscriptions(db, plan, 1)
+        for number in (7, 12):
+            db.add(SubscriptionInvoice(
+                invoice_number=f"INV-{YEAR}-{number:05d}",
+                subscription_id=subscription_id,
+                period_start=TODAY,
+                period_end=TODAY,
+                subtotal=Decimal("1"),
+                total=Decimal("1"),
+                amount_due=Decimal("1"),
+                due_date=TODAY,
+            ))
+        db.commit()
+
+        invoice = SubscriptionService(db).generate_invoice(subscription_id)
+
+        assert invoice.invoice_number == f"INV-{YEAR}-00013"
+
+
+class TestTrialsAndOverdue:
+    def test_expired_trials(self, db, billing, plan):
+        from modules.marketplace.models import Subscription
+
+        converting, expiring = _subscriptions(db, plan, 2, status="trialing", trial_end=TODAY)
+        db.get(Subscription, expiring).auto_renew = False
+        db.commit()
+
+        run = billing.run("trials", max_workers=1)
+
+        assert (run.processed_count, run.invoice_count) == (2, 1)
+        assert db.get(Subscription, converting).status == "active"
+        assert db.get(Subscription, converting).current_period_start == TODAY
+        assert db.get(Subscription, expiring).status == "expired"
+
+    def test_overdue_invoices(self, db, billing, plan):
+        from modules.marketplace.models import Subscription, SubscriptionInvoice
+        from modules.marketplace.services.subscription_service import SubscriptionService
+
+        (subscription_id,) = _subscriptions(db, plan, 1, current_period_end=TODAY + timedelta(days=3))
+        invoice = SubscriptionService(db).generate_invoice(subscription_id)
+        invoice.due_date = TODAY - timedelta(days=1)
+        db.commit()
+
+        run = SubscriptionService(db).mark_overdue_invoices(max_workers=1)
+
+        assert run.processed_count == 1
+        assert db.get(SubscriptionInvoice, invoice.id).status == "overdue"
+        assert db.get(Subscription, subscription_id).status == "past_due"
+
+
+@pytest.mark.slow
+def test_renews_100k_subscriptions(tmp_path):
+    from modules.marketplace.models import Subscription, SubscriptionInvoice, SubscriptionPlan
+    from modules.marketplace.services.billing_run_service import BillingRunService
+    from tests.unit.marketplace.conftest import create_marketplace_tables
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'billing.db'}", connect_args={"timeout": 60})
+    create_marketplace_tables(engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    plan = SubscriptionPlan(code="pro", name="Pro Monthly", tier="pro", billing_cycle="monthly", price=Decimal("20"))
+    db.add(plan)
+    db.commit()
+    _subscriptions(db, plan, 100_000)
+
+    run = BillingRunService(db).run("renewals", chunk_size=1000, max_workers=2, session_factory=factory)
+
+    assert (run.status, run.processed_count, run.invoice_count, run.failed_count) == ("completed", 100_000, 100_000, 0)
+    assert run.items_per_second > 0
+    assert db.query(Subscription).filter(Subscription.current_period_end <= TODAY).count() == 0
+    numbers = {number for (number,) in db.query(SubscriptionInvoice.invoice_number)}
+    assert numbers == {f"INV-{YEAR}-{n:05d}" for n in range(1, 100_001)}
+    db.close()
+    engine.dispose()
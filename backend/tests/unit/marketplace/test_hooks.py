@@ -0,0 +1,54 @@
+"""
+Marketplace Hook Tests
+
+Tests that the marketplace's background workers are started and stopped
+through module registry hooks.
+"""
+
+import pytest
+
+
+class RecordingRegistry:
+    def __init__(self):
+        self.hooks = {}
+
+    def register_hook(self, event, callback):
+        self.hooks.setdefault(event, []).append(callback)
+
+
+@pytest.fixture
+def hooks():
+    # Imported once the test database exists: importing the marketplace
+    # registers its tables on the shared metadata
+    from modules.marketplace import hooks
+    registry = RecordingRegistry()
+    hooks.register_hooks(registry)
+    return registry.hooks
+
+
+def test_license_heartbeats_flushed_with_app(hooks):
+    from modules.marketplace.services.license_verification import heartbeat_buffer
+
+    assert heartbeat_buffer.start in hooks["startup"]
+    assert heartbeat_buffer.stop in hooks["shutdown"]
+
+
+
+def test_usage_events_flushed_with_app(hooks):
+    from modules.marketplace.services.usage_ingestion import usage_buffer
+
+    assert usage_buffer.start in hooks["startup"]
+    assert usage_buffer.stop in hooks["shutdown"]
+
+
+def test_api_key_usage_flushed_with_app(hooks):
+    from modules.marketplace.services.publisher_auth import api_key_usage_buffer
+
+    assert api_key_usage_buffer.start in hooks["startup"]
+    assert api_key_usage_buffer.stop in hooks["shutdown"]
+
+
+def test_scan_pool_shut_down_with_app(hooks):
+    from modules.marketplace.services.package_ingestion import shutdown_scan_pool
+
+    assert shutdown_scan_pool in hooks["shutdown"]
@@ -0,0 +1,169 @@
+"""
+License Verification Tests
+
+Tests for cached license snapshots, buffered heartbeat bookkeeping and
+offline license tokens.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+
+@pytest.fixture
+def lv():
+    # Imported once the test database exists: importing the marketplace
+    # registers its tables on the shared metadata
+    from modules.marketplace.services import license_verification
+    return license_verification
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(lv):
+    lv.license_cache.clear()
+
+
+@pytest.fixture
+def service(db):
+    from modules.marketplace.services.license_service import LicenseService
+    return LicenseService(db)
+
+
+@pytest.fixture
+def license(service, module):
+    return service.create_license(user_id=1, module_id=module.id, license_type="purchase", max_instances=2)
+
+
+@pytest.fixture
+def buffer(lv, monkeypatch):
+    buffer = lv.HeartbeatBuffer(flush_interval=0)
+    monkeypatch.setattr("modules.marketplace.services.license_service.heartbeat_buffer", buffer)
+    return buffer
+
+
+def _count_queries(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+class TestVerification:
+    def test_repeated_checks_are_served_from_cache(self, db, service, license, buffer):
+        first = service.verify_license(license.license_key, "instance-0001")
+        # Activating the instance reloads the snapshot once
+        service.verify_license(license.license_key, "instance-0001")
+        statements = _count_queries(db)
+
+        for _ in range(20):
+            result = service.verify_license(license.license_key, "instance-0001")
+
+        assert result["valid"] is True
+        assert result["activation_id"] == first["activation_id"]
+        assert result["module_name"] == "sale_plus"
+        assert statements == []
+
+    def test_heartbeats_flushed_in_one_batch(self, db, service, license, buffer):
+        from modules.marketplace.models import LicenseActivation
+
+        for _ in range(5):
+            service.verify_license(license.license_key, "instance-0001")
+        assert buffer.pending == 5
+
+        assert buffer.flush(db) == 1
+
+        activation = db.query(LicenseActivation).one()
+        db.refresh(activation)
+        db.refresh(license)
+        assert activation.check_count == 5
+        assert activation.last_check is not None
+        assert license.last_verified_at is not None
+        assert buffer.pending == 0
+
+    def test_unknown_key(self, service, buffer):
+        result = service.verify_license("XXXX-XXXX-XXXX-XXXX", "instance-0001")
+
+        assert result == {"valid": False, "error": "invalid_license", "message": "License key not found"}
+
+    def test_cancel_invalidates_snapshot(self, service, license, buffer):
+        service.verify_license(license.license_key, "instance-0001")
+
+        service.cancel_license(license.id)
+
+        result = service.verify_license(license.license_key, "instance-0001")
+        assert result["error"] == "license_inactive"
+
+    def test_extension_is_seen_immediately(self, service, license, buffer):
+        service.extend_license(license.id, new_expiry=datetime.utcnow() - timedelta(days=1))
+        assert service.verify_license(license.license_key, "instance-0001")["error"] == "license_expired"
+
+        service.extend_license(license.id, new_expiry=datetime.utcnow() + timedelta(days=30))
+
+        assert service.verify_license(license.license_key, "instance-0001")["valid"] is True
+
+    def test_activation_slots_follow_deactivation(self, service, license, buffer):
+        service.verify_license(license.license_key, "instance-0001")
+        service.verify_license(license.license_key, "instance-0002")
+        assert service.verify_license(license.license_key, "instance-0003")["error"] == "max_instances_reached"
+
+        service.deactivate_license(license.license_key, "instance-0001")
+
+        assert service.verify_license(license.license_key, "instance-0003")["valid"] is True
+        assert service.verify_license(license.license_key, "instance-0001")["error"] == "max_instances_reached"
+
+
+class TestHeartbeatBuffer:
+    def test_failed_flush_keeps_entries(self, lv, db):
+        buffer = lv.HeartbeatBuffer(flush_interval=0)
+        buffer.record(license_id=1, activation_id=7)
+        buffer.record(license_id=1, activation_id=7)
+
+        def fail(*args, **kwargs):
+            raise RuntimeError("database unavailable")
+
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(buffer, "_write", fail)
+            assert buffer.flush(db) == 0
+
+        assert buffer.pending == 2
+
+
+class TestOfflineTokens:
+    @pytest.fixture
+    def signer(self, lv, monkeypatch):
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        pem = key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ).decode("ascii")
+        signer = lv.LicenseTokenSigner(private_key=pem, algorithm="RS256", ttl=3600)
+        monkeypatch.setattr("modules.marketplace.services.license_service.license_token_signer", signer)
+        return signer
+
+    def test_valid_result_carries_token(self, service, license, buffer, signer):
+        result = service.verify_license(license.license_key, "instance-0001")
+
+        claims = signer.decode(result["token"])
+        assert claims["sub"] == license.license_key
+        assert claims["iid"] == "instance-0001"
+        assert claims["mod"] == "sale_plus"
+
+    def test_token_does_not_outlive_license(self, service, license, buffer, signer):
+        expires_at = datetime.utcnow() + timedelta(minutes=5)
+        service.extend_license(license.id, new_expiry=expires_at)
+
+        result = service.verify_license(license.license_key, "instance-0001")
+
+        assert datetime.fromisoformat(result["token_expires_at"]) <= expires_at
+
+    def test_disabled_without_key(self, lv, service, license, buffer, monkeypatch):
+        monkeypatch.setattr(
+            "modules.marketplace.services.license_service.license_token_signer",
+            lv.LicenseTokenSigner(private_key=""),
+        )
+
+        assert "token" not in service.verify_license(license.license_key, "instance-0001")
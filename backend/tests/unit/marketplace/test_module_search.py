@@ -0,0 +1,247 @@
+"""
+Module Search Tests
+
+Tests for ranked search, single-query facet counts and cached prefix
+autocomplete.
+"""
+
+import time
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+
+@pytest.fixture
+def search(db):
+    from modules.marketplace.services.search_service import MarketplaceSearch, suggestion_cache
+
+    suggestion_cache.clear()
+    yield MarketplaceSearch(db)
+    suggestion_cache.clear()
+
+
+def _module(name, summary, category_id=None, price=None, rating=None, reviews=0, downloads=0,
+            description=None, tags=None, status="published"):
+    from modules.marketplace.models import MarketplaceModule
+
+    technical_name = name.lower().replace(" ", "_")
+    return MarketplaceModule(
+        publisher_id=1, technical_name=technical_name, display_name=name,
+        slug=technical_name.replace("_", "-"), short_description=summary, description=description,
+        category_id=category_id, license_type="paid" if price else "free",
+        price=Decimal(price) if price else None,
+        average_rating=Decimal(rating) if rating else None, rating_count=reviews,
+        download_count=downloads, tags=tags or [], status=status,
+    )
+
+
+@pytest.fixture
+def catalog(db):
+    from modules.marketplace.models import MarketplaceCategory, Publisher
+
+    db.add(Publisher(id=1, user_id=1, display_name="Acme", slug="acme"))
+    db.add_all([
+        MarketplaceCategory(id=1, name="Accounting", slug="accounting"),
+        MarketplaceCategory(id=2, name="Sales", slug="sales"),
+    ])
+    modules = [
+        _module("Invoice Pro", "Professional invoicing", 1, "99", "4.8", 40, 5000, tags=["billing"]),
+        _module("Invoice Lite", "Simple invoicing", 1, None, "3.5", 4, 200, tags=["billing"]),
+        _module("Sales Dashboard", "Charts for sales teams", 2, "30", "4.2", 12, 900,
+                description="Includes invoice totals"),
+        _module("Quote Builder", "Quotes and orders", 2, "250", None, 0, 50, tags=["Billing", "quotes"]),
+        _module("Invoice Draft", "Unpublished", 1, status="draft"),
+    ]
+    db.add_all(modules)
+    db.commit()
+    return {m.technical_name: m for m in modules}
+
+
+def suggestion_cache_token():
+    from modules.marketplace.services.search_service import suggestion_cache
+
+    return suggestion_cache.generation.token()
+
+
+def _names(result):
+    return [m.technical_name for m in result.modules]
+
+
+class TestRanking:
+    def test_name_matches_rank_above_description_matches(self, search, catalog):
+        result = search.search("invoice")
+
+        assert _names(result) == ["invoice_pro", "invoice_lite", "sales_dashboard"]
+        assert result.total == 3
+
+    def test_terms_are_prefixes_and_all_required(self, search, catalog):
+        assert _names(search.search("invoic pro")) == ["invoice_pro"]
+        assert _names(search.search("sales_dash")) == ["sales_dashboard"]
+        assert search.search("invoice quotes").total == 0
+
+    def test_popularity_orders_browsing(self, search, catalog):
+        assert _names(search.search()) == ["invoice_pro", "sales_dashboard", "invoice_lite", "quote_builder"]
+
+    def test_module_service_compatibility(self, db, search, catalog):
+        from modules.marketplace.services.module_service import ModuleService
+
+        modules, total = ModuleService(db).search_modules(query="invoice", sort_by="name", limit=2)
+
+        assert [m.technical_name for m in modules] == ["invoice_lite", "invoice_pro"]
+        assert total == 3
+
+    def test_postgresql_uses_tsvector_and_trigrams(self, search):
+        from sqlalchemy.dialects import postgresql
+
+        match, relevance = search._tsvector_match(["invoic", "pro"])
+        compiled = match.compile(dialect=postgresql.dialect())
+        sql = str(compiled).replace("%%", "%")
+
+        assert "marketplace_modules.search_vector @@ to_tsquery(" in sql
+        assert " <% marketplace_modules.display_name" in sql
+        assert {"english", "invoic:* & pro:*", "invoic pro"} <= set(compiled.params.values())
+        assert "ts_rank_cd" in str(relevance.compile(dialect=postgresql.dialect()))
+
+
+class TestFacets:
+    def test_counts(self, search, catalog):
+        result = search.search()
+
+        assert result.facets == {
+            "category": {"1": 2, "2": 2},
+            "price": {"free": 1, "under_50": 1, "50_to_200": 1, "200_plus": 1},
+            "rating": {"4": 2, "3": 3, "2": 3, "1": 3},
+        }
+
+    def test_selection_keeps_alternatives_visible(self, search, catalog):
+        result = search.search(category_id=1, price_band="free")
+
+        assert _names(result) == ["invoice_lite"]
+        assert result.total == 1
+        assert result.facets["category"] == {"1": 1}
+        assert result.facets["price"] == {"free": 1, "under_50": 0, "50_to_200": 1, "200_plus": 0}
+        assert result.facets["rating"]["3"] == 1
+
+    def test_filters_narrow_counts(self, search, catalog):
+        result = search.search("invoice", min_rating=4)
+
+        assert result.total == 2
+        assert result.facets["category"] == {"1": 1, "2": 1}
+
+
+class TestSuggestions:
+    def test_prefix_of_any_word_by_downloads(self, search, catalog):
+        suggestions = search.suggest("inv")
+
+        assert [(s.text, s.slug) for s in suggestions] == [
+            ("Invoice Pro", "invoice-pro"), ("Invoice Lite", "invoice-lite")
+        ]
+        assert [s.text for s in search.suggest("board")] == []
+        assert [s.text for s in search.suggest("dash")] == ["Sales Dashboard"]
+
+    def test_tags_merged_across_modules(self, search, catalog):
+        (tag,) = [s for s in search.suggest("bil") if s.kind == "tag"]
+
+        assert (tag.text.lower(), tag.weight) == ("billing", 5250)
+
+    def test_cached_until_publish(self, db, search, catalog):
+        from sqlalchemy import event
+
+        from modules.marketplace.services.module_service import ModuleService
+
+        search.suggest("inv")
+        statements = []
+        event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+        assert len(search.suggest("invoice l")) == 1
+        assert statements == []
+
+        draft = catalog["invoice_draft"]
+        draft.status = "pending"
+        db.commit()
+        ModuleService(db).approve_module(draft.id, reviewer_id=1)
+
+        assert "Invoice Draft" in [s.text for s in search.suggest("inv")]
+
+    def test_rebuilt_after_update_and_delete(self, db, search, catalog):
+        from modules.marketplace.services.module_service import ModuleService
+
+        service = ModuleService(db)
+        lite = catalog["invoice_lite"]
+        search.suggest("inv")
+
+        service.update_module(lite.id, publisher_id=1, display_name="Invoice Basic")
+        assert "Invoice Basic" in [s.text for s in search.suggest("inv")]
+
+        service.delete_module(lite.id, publisher_id=1)
+        assert "Invoice Basic" not in [s.text for s in search.suggest("inv")]
+
+    def test_rebuilt_after_deprecation(self, db, search, catalog):
+        from modules.marketplace.models import ModuleVersion
+        from modules.marketplace.services.module_service import ModuleService
+
+        pro = catalog["invoice_pro"]
+        db.add(ModuleVersion(module_id=pro.id, version="1.0.0", zip_file_url="s3://pro.zip"))
+        db.commit()
+        token = suggestion_cache_token()
+
+        ModuleService(db).deprecate_version(pro.id, "1.0.0", publisher_id=1)
+
+        assert suggestion_cache_token() != token
+
+
+@pytest.mark.slow
+def test_search_100k_modules(tmp_path):
+    from modules.marketplace.models import MarketplaceModule, Publisher
+    from modules.marketplace.services.search_service import MarketplaceSearch, SuggestionCache
+    from tests.unit.marketplace.conftest import create_marketplace_tables
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    create_marketplace_tables(engine)
+    db = sessionmaker(bind=engine)()
+    db.add(Publisher(id=1, user_id=1, display_name="Acme", slug="acme"))
+    words = ["invoice", "stock", "payroll", "crm", "report", "shipping", "pos", "helpdesk"]
+    db.execute(MarketplaceModule.__table__.insert(), [
+        {
+            "publisher_id": 1,
+            "technical_name": f"{words[i % 8]}_{i}",
+            "display_name": f"{words[i % 8].title()} Suite {i}",
+            "slug": f"{words[i % 8]}-{i}",
+            "short_description": f"{words[(i * 7) % 8]} tools",
+            "category_id": i % 20,
+            "license_type": "free" if i % 3 else "paid",
+            "price": None if i % 3 else Decimal(i % 400),
+            "average_rating": Decimal(i % 5) + 1,
+            "rating_count": i % 50,
+            "download_count": (i * 7919) % 100_000,
+            "status": "published",
+            "tags": [words[(i * 3) % 8]],
+        }
+        for i in range(100_000)
+    ])
+    db.commit()
+    search = MarketplaceSearch(db)
+
+    # Names (every 8th module) or summaries (another 8th) mention payroll
+    result = search.search("payroll suite")
+    assert result.total == 25_000
+    assert all("payroll" in m.technical_name for m in result.modules)
+    assert sum(result.facets["category"].values()) == result.total
+
+    cache = SuggestionCache(ttl=300)
+    index = cache.get(db)
+    assert len(index) == 100_008
+    started = time.perf_counter()
+    for prefix in ("i", "in", "inv", "pay", "payroll suite 1", "s", "crm"):
+        assert index.lookup(prefix, 10)
+    assert time.perf_counter() - started < 1.0
+    # Memoized short prefixes and exact ranges answer without scanning
+    started = time.perf_counter()
+    for _ in range(1000):
+        index.lookup("s", 10)
+        index.lookup("payroll suite 99", 10)
+    assert time.perf_counter() - started < 1.0
+
+    db.close()
+    engine.dispose()
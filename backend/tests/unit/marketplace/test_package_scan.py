@@ -0,0 +1,197 @@
+"""
+Package Scan Tests
+
+Tests for streamed package storage, single-pass source scanning,
+content-hash caching of per-file findings and pooled scans.
+"""
+
+import hashlib
+import io
+import os
+import zipfile
+
+import pytest
+
+RISKY_SOURCE = (
+    "import os\n"
+    "\n"
+    "os.system('ls'); eval(x)\n"
+    "API_KEY = 'x'\n"
+    "token = 'abc123'\n"
+)
+
+
+def _package(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for name, content in files.items():
+            zf.writestr(name, content)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def ingestion(tmp_path, monkeypatch):
+    from app.core.config import settings
+    from modules.marketplace.services import package_ingestion
+
+    monkeypatch.setattr(settings, "MODULE_UPLOAD_DIR", str(tmp_path / "packages"))
+    monkeypatch.setattr(settings, "PACKAGE_SCAN_WORKERS", 0)
+    return package_ingestion
+
+
+@pytest.fixture
+def service(db, ingestion, module):
+    from modules.marketplace.models import ModuleVersion
+    from modules.marketplace.services.security_service import SecurityService
+
+    db.add(ModuleVersion(id=1, module_id=module.id, version="1.0.0", zip_file_url="s3://sale_plus/1.0.0.zip"))
+    db.commit()
+    return SecurityService(db)
+
+
+class TestStorePackage:
+    def test_streamed_to_content_address(self, ingestion, monkeypatch):
+        monkeypatch.setattr(ingestion, "CHUNK_SIZE", 7)
+        content = _package({"sale_plus/__manifest__.py": "{}"})
+
+        package = ingestion.store_package(io.BytesIO(content))
+
+        assert package.sha256 == hashlib.sha256(content).hexdigest()
+        assert package.size == len(content)
+        assert os.path.basename(package.path) == f"{package.sha256}.zip"
+        with open(package.path, "rb") as f:
+            assert f.read() == content
+
+    def test_oversized_upload_rejected(self, ingestion):
+        from app.core.config import settings
+
+        with pytest.raises(ingestion.PackageTooLarge):
+            ingestion.store_package(io.BytesIO(b"x" * 100), max_size=64)
+
+        assert os.listdir(settings.MODULE_UPLOAD_DIR) == []
+
+
+def test_single_pass_scan(ingestion):
+    findings = ingestion.scan_source(RISKY_SOURCE)
+
+    assert [(f["line"], f["message"].split(": ")[1], f["severity"]) for f in findings] == [
+        (3, "os.system() call", "high"),
+        (3, "eval() call", "high"),
+        (4, "Hardcoded secret", "critical"),
+        (5, "Hardcoded secret", "critical"),
+    ]
+
+
+class TestSecurityScan:
+    def test_findings_and_result(self, service):
+        scan = service.create_security_scan(1)
+        content = _package({
+            "sale_plus/models.py": RISKY_SOURCE,
+            "sale_plus/bin/setup.sh": "#!/bin/sh",
+        })
+
+        scan = service.run_security_scan(scan.scan_id, content)
+
+        assert (scan.status, scan.result, scan.risk_score) == ("completed", "failed", 100)
+        assert (scan.critical_count, scan.high_count) == (2, 4)
+        assert [f["location"] for f in scan.findings] == [
+            "sale_plus/bin/setup.sh",
+            "sale_plus/models.py:3",
+            "sale_plus/models.py:3",
+            "sale_plus/models.py:4",
+            "sale_plus/models.py:5",
+            "/",
+        ]
+        assert scan.package_sha256 == hashlib.sha256(content).hexdigest()
+
+    def test_unchanged_files_served_from_cache(self, db, service, ingestion, monkeypatch):
+        from modules.marketplace.models import PackageFileScan
+
+        scanned = []
+        scan_members = ingestion._scan_members
+        monkeypatch.setattr(
+            ingestion, "_scan_members",
+            lambda path, names, deadline=None: scanned.extend(names) or scan_members(path, names, deadline),
+        )
+        files = {
+            "sale_plus/__manifest__.py": "{'name': 'Sale Plus'}",
+            "sale_plus/__init__.py": "",
+            "sale_plus/models/__init__.py": "",
+            "sale_plus/models/sale.py": RISKY_SOURCE,
+        }
+        service.run_security_scan(service.create_security_scan(1).scan_id, _package(files))
+        assert len(scanned) == 3  # Both empty __init__.py files share one scan
+        del scanned[:]
+
+        files["sale_plus/models/sale.py"] += "exec(code)\n"
+        files["sale_plus/README.md"] = "docs"
+        scan = service.run_security_scan(service.create_security_scan(1).scan_id, _package(files))
+
+        assert scanned == ["sale_plus/models/sale.py"]
+        assert db.query(PackageFileScan).count() == 4
+        assert scan.findings[-1]["location"] == "sale_plus/models/sale.py:6"
+
+    def test_attached_package_scanned_later(self, db, service):
+        scan = service.create_security_scan(1)
+        service.attach_package(scan.scan_id, io.BytesIO(_package({"m/__manifest__.py": "{}"})))
+        assert service.get_scan(scan.scan_id).status == "pending"
+
+        scan = service.run_security_scan(scan.scan_id)
+
+        assert (scan.status, scan.result, scan.findings) == ("completed", "passed", [])
+
+    def test_corrupt_package_fails_scan(self, service):
+        scan = service.create_security_scan(1)
+
+        scan = service.run_security_scan(scan.scan_id, b"not a zip")
+
+        assert (scan.status, scan.result) == ("failed", "failed")
+        assert scan.error_message
+
+    def test_timeout_fails_inline_scan(self, service, monkeypatch):
+        from app.core.config import settings
+
+        monkeypatch.setattr(settings, "PACKAGE_SCAN_TIMEOUT", -1)
+        scan = service.create_security_scan(1)
+
+        scan = service.run_security_scan(scan.scan_id, _package({"m/models.py": RISKY_SOURCE}))
+
+        assert (scan.status, scan.result, scan.error_message) == ("failed", "failed", "Package scan timed out")
+
+    def test_failure_marks_unfinished_scan(self, service):
+        scan = service.create_security_scan(1)
+        service.attach_package(scan.scan_id, io.BytesIO(_package({"m/__manifest__.py": "{}"})))
+
+        assert service.fail_scan(scan.scan_id, "Task timed out after 300 seconds")
+        scan = service.get_scan(scan.scan_id)
+        service.db.refresh(scan)
+        assert (scan.status, scan.result, scan.risk_score) == ("failed", "failed", 100)
+        assert scan.error_message == "Task timed out after 300 seconds"
+
+        scan.status = "completed"
+        service.db.commit()
+        assert not service.fail_scan(scan.scan_id, "late")
+
+    def test_unknown_scan(self, service):
+        with pytest.raises(ValueError):
+            service.run_security_scan("missing", b"")
+
+
+def test_pooled_scan_matches_inline(ingestion, tmp_path, monkeypatch):
+    from app.core.config import settings
+
+    archive = tmp_path / "module.zip"
+    archive.write_bytes(_package({f"m/file_{i}.py": RISKY_SOURCE * (i + 1) for i in range(4)}))
+    with zipfile.ZipFile(archive) as zf:
+        infos = zf.infolist()
+    inline = ingestion._scan_files(str(archive), infos)
+
+    monkeypatch.setattr(settings, "PACKAGE_SCAN_WORKERS", 2)
+    monkeypatch.setattr(ingestion, "_SCAN_BATCH_BYTES", 1)
+    try:
+        pooled = ingestion._scan_files(str(archive), infos, timeout=60)
+    finally:
+        ingestion.shutdown_scan_pool(wait=True)
+
+    assert pooled == inline
+    assert len(pooled["m/file_3.py"]) == 16
@@ -0,0 +1,191 @@
+"""
+Payout Batch Tests
+
+Tests for set-based batch population and per-item, resumable payout
+processing.
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+PERIOD = (date(2026, 1, 1), date(2026, 1, 31))
+
+
+@pytest.fixture
+def service(db):
+    from modules.marketplace.services.payout_service import PayoutService
+    return PayoutService(db)
+
+
+def _publisher(db, publisher_id, available, method="stripe"):
+    from modules.marketplace.models import Publisher, PublisherBalance
+
+    db.add(Publisher(
+        id=publisher_id,
+        user_id=publisher_id,
+        display_name=f"Publisher {publisher_id}",
+        slug=f"publisher-{publisher_id}",
+        payout_method=method,
+        stripe_account_id=f"acct_{publisher_id}",
+        paypal_email=f"p{publisher_id}@example.com",
+    ))
+    db.add(PublisherBalance(publisher_id=publisher_id, available_balance=Decimal(available)))
+    db.commit()
+
+
+def _sale(db, order_id, module, amount, completed_at=datetime(2026, 1, 10)):
+    from modules.marketplace.models import Order, OrderItem
+
+    db.add(Order(
+        id=order_id,
+        order_number=f"ORD-{order_id}",
+        user_id=1,
+        subtotal=Decimal(amount),
+        total=Decimal(amount),
+        status="completed",
+        completed_at=completed_at,
+    ))
+    db.add(OrderItem(
+        order_id=order_id,
+        module_id=module.id,
+        module_name=module.display_name,
+        module_technical_name=module.technical_name,
+        license_type="purchase",
+        unit_price=Decimal(amount),
+        total_price=Decimal(amount),
+    ))
+    db.commit()
+
+
+@pytest.fixture
+def sales(db, module):
+    """Publisher 1 owns the shared module, publisher 2 a module of its own."""
+    from modules.marketplace.models import MarketplaceModule
+
+    other = MarketplaceModule(
+        publisher_id=2,
+        technical_name="stock_plus",
+        display_name="Stock Plus",
+        slug="stock-plus",
+        short_description="Stock extensions",
+    )
+    db.add(other)
+    db.commit()
+
+    _publisher(db, 1, "120.00")
+    _publisher(db, 2, "80.00", method="paypal")
+    _publisher(db, 3, "10.00")
+    _sale(db, 1, module, "40.00")
+    _sale(db, 2, module, "60.00")
+    _sale(db, 3, other, "25.00")
+    _sale(db, 4, other, "99.00", completed_at=datetime(2026, 2, 3))
+    return other
+
+
+def _approved_batch(service):
+    batch = service.create_payout_batch(*PERIOD)
+    service.populate_batch_items(batch)
+    return service.approve_batch(batch.batch_id, approved_by=9)
+
+
+class TestPopulate:
+    def test_items_per_eligible_publisher(self, db, service, module, sales):
+        batch = service.create_payout_batch(*PERIOD)
+
+        assert service.populate_batch_items(batch) == 2
+
+        items = {item.publisher_id: item for item in batch.payouts}
+        assert set(items) == {1, 2}
+        assert items[1].order_ids == [1, 2]
+        assert items[1].module_breakdown == [{"module_id": module.id, "amount": 100.0, "count": 2}]
+        assert items[2].order_ids == [3]
+        assert (items[2].payout_method, items[2].payout_destination) == ("paypal", "p2@example.com")
+        assert items[1].idempotency_key == f"payout:{batch.batch_id}:1"
+        assert (batch.total_payouts, batch.total_net_amount, batch.total_gross_amount) == (
+            2, Decimal("200.00"), Decimal("200.00")
+        )
+
+    def test_repopulating_skips_existing_items(self, db, service, sales):
+        batch = service.create_payout_batch(*PERIOD)
+        service.populate_batch_items(batch)
+
+        assert service.populate_batch_items(batch) == 0
+        assert batch.total_payouts == 2
+
+    def test_publisher_calculation_only_counts_own_sales(self, service, module, sales):
+        payout = service.calculate_publisher_payout(1, *PERIOD)
+
+        assert payout["gross_amount"] == 100.0
+        assert payout["order_ids"] == [1, 2]
+        assert service.calculate_publisher_payout(2, *PERIOD)["gross_amount"] == 25.0
+
+
+class TestProcess:
+    def test_process_pays_each_item_once(self, db, service, sales):
+        from modules.marketplace.models import BalanceTransaction, PublisherBalance
+
+        batch = _approved_batch(service)
+
+        batch = service.process_batch(batch.batch_id, max_workers=1)
+
+        assert (batch.status, batch.success_count, batch.failed_count, batch.pending_count) == ("completed", 2, 0, 0)
+        balances = dict(db.query(PublisherBalance.publisher_id, PublisherBalance.available_balance))
+        assert balances == {1: Decimal("0.00"), 2: Decimal("0.00"), 3: Decimal("10.00")}
+        assert db.query(BalanceTransaction).count() == 2
+
+    def test_failed_item_does_not_roll_back_others(self, db, service, sales):
+        from modules.marketplace.models import PublisherBalance
+
+        batch = _approved_batch(service)
+        db.query(PublisherBalance).filter(PublisherBalance.publisher_id == 2).update(
+            {"available_balance": Decimal("5.00")}
+        )
+        db.commit()
+
+        batch = service.process_batch(batch.batch_id, max_workers=1)
+
+        assert (batch.status, batch.success_count, batch.failed_count) == ("completed", 1, 1)
+        assert batch.error_summary == [{"publisher_id": 2, "error": "Insufficient balance"}]
+        balance = db.query(PublisherBalance).filter(PublisherBalance.publisher_id == 1).one()
+        assert balance.available_balance == Decimal("0.00")
+
+    def test_interrupted_batch_resumes(self, db, service, sales):
+        from modules.marketplace.models import BalanceTransaction, PublisherPayoutItem
+
+        batch = _approved_batch(service)
+        # Crash after the first item was paid but before it was marked completed
+        first = db.query(PublisherPayoutItem).filter(PublisherPayoutItem.publisher_id == 1).one()
+        service._process_payout_item(first)
+        first.status = "processing"
+        batch.status = "processing"
+        db.commit()
+
+        batch = service.process_batch(batch.batch_id, max_workers=1)
+
+        assert (batch.status, batch.success_count, batch.failed_count) == ("completed", 2, 0)
+        assert db.query(BalanceTransaction).filter(BalanceTransaction.reference_id == first.id).count() == 1
+
+    def test_concurrent_workers(self, tmp_path):
+        from modules.marketplace import models
+        from modules.marketplace.services.payout_service import PayoutService
+        from tests.unit.marketplace.conftest import create_marketplace_tables
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'payouts.db'}", connect_args={"timeout": 30})
+        create_marketplace_tables(engine)
+        factory = sessionmaker(bind=engine)
+        db = factory()
+        for publisher_id in range(1, 7):
+            _publisher(db, publisher_id, "75.00")
+        service = PayoutService(db)
+
+        batch = _approved_batch(service)
+        batch = service.process_batch(batch.batch_id, max_workers=3, session_factory=factory)
+
+        assert (batch.status, batch.success_count, batch.failed_count) == ("completed", 6, 0)
+        assert db.query(models.BalanceTransaction).count() == 6
+        db.close()
+        engine.dispose()
@@ -0,0 +1,123 @@
+"""
+Publisher API Key Tests
+
+Tests for cached API key authentication, per-key rate limits and
+batched last-used timestamps.
+"""
+
+import pytest
+from sqlalchemy import event
+
+
+@pytest.fixture
+def auth(monkeypatch):
+    from modules.marketplace.services import publisher_auth
+
+    publisher_auth.api_key_cache.clear()
+    monkeypatch.setattr(publisher_auth, "api_key_rate_limiter", publisher_auth.ApiKeyRateLimiter(limit=0))
+    monkeypatch.setattr(publisher_auth, "api_key_usage_buffer", publisher_auth.ApiKeyUsageBuffer(flush_interval=0))
+    return publisher_auth
+
+
+@pytest.fixture
+def service(db):
+    from modules.marketplace.services.publisher_service import PublisherService
+    return PublisherService(db)
+
+
+@pytest.fixture
+def api_key(db, service):
+    from modules.marketplace.models import Publisher
+
+    db.add(Publisher(id=1, user_id=7, display_name="Acme", slug="acme", status="active"))
+    db.commit()
+    return service.generate_api_key(1)
+
+
+def _count_queries(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+class TestAuthenticate:
+    def test_repeated_requests_served_from_cache(self, db, auth, api_key):
+        principal = auth.authenticate_api_key(db, api_key)
+        statements = _count_queries(db)
+
+        for _ in range(20):
+            assert auth.authenticate_api_key(db, api_key) == principal
+
+        assert (principal.id, principal.user_id, principal.slug) == (1, 7, "acme")
+        assert statements == []
+
+    def test_invalid_keys_cached_negatively(self, db, auth, api_key):
+        statements = _count_queries(db)
+
+        for _ in range(5):
+            with pytest.raises(auth.ApiKeyRejected) as exc:
+                auth.authenticate_api_key(db, "not-a-key")
+
+        assert exc.value.reason == "invalid_key"
+        assert len(statements) == 1
+
+    def test_rotated_key_rejected_immediately(self, db, auth, service, api_key):
+        auth.authenticate_api_key(db, api_key)
+
+        new_key = service.generate_api_key(1)
+
+        with pytest.raises(auth.ApiKeyRejected):
+            auth.authenticate_api_key(db, api_key)
+        assert auth.authenticate_api_key(db, new_key).id == 1
+        assert service.verify_api_key(new_key).id == 1
+
+    def test_suspended_publisher_rejected(self, db, auth, service, api_key):
+        auth.authenticate_api_key(db, api_key)
+
+        service.suspend_publisher(1, "chargebacks")
+
+        with pytest.raises(auth.ApiKeyRejected) as exc:
+            auth.authenticate_api_key(db, api_key)
+        assert exc.value.reason == "publisher_inactive"
+        assert auth.authenticate_api_key(db, api_key, require_active=False).status == "suspended"
+
+
+class TestRateLimit:
+    def test_per_key_limit(self, db, auth, api_key, monkeypatch):
+        monkeypatch.setattr(auth, "api_key_rate_limiter", auth.ApiKeyRateLimiter(limit=3))
+
+        for _ in range(3):
+            auth.authenticate_api_key(db, api_key)
+        with pytest.raises(auth.ApiKeyRejected) as exc:
+            auth.authenticate_api_key(db, api_key)
+
+        assert exc.value.reason == "rate_limited"
+        assert 0 < exc.value.retry_after <= 20
+        # Other keys have their own bucket
+        assert auth.api_key_rate_limiter.acquire("other") == 0
+
+    def test_bucket_refills(self, auth, monkeypatch):
+        limiter = auth.ApiKeyRateLimiter(limit=60)
+        clock = [1000.0]
+        monkeypatch.setattr(auth.time, "monotonic", lambda: clock[0])
+
+        for _ in range(60):
+            assert limiter.acquire("key") == 0
+        assert limiter.acquire("key") == pytest.approx(1.0)
+
+        clock[0] += 2
+        assert limiter.acquire("key") == 0
+
+
+def test_last_used_written_in_batches(db, auth, api_key):
+    from modules.marketplace.models import Publisher
+
+    for _ in range(10):
+        auth.authenticate_api_key(db, api_key)
+    assert auth.api_key_usage_buffer.pending == 1
+    assert db.get(Publisher, 1).api_key_last_used_at is None
+
+    assert auth.api_key_usage_buffer.flush(db) == 1
+
+    db.expire_all()
+    assert db.get(Publisher, 1).api_key_last_used_at is not None
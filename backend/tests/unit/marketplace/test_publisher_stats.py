@@ -0,0 +1,189 @@
+"""
+Publisher Statistics Tests
+
+Tests for grouped all-time statistics, daily/monthly rollups and
+incremental refresh.
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+TODAY = date.today()
+
+
+@pytest.fixture
+def service(db):
+    from modules.marketplace.services.publisher_service import PublisherService
+    return PublisherService(db)
+
+
+@pytest.fixture
+def catalog(db, module):
+    """Publisher 1 owns sale_plus and a draft, publisher 2 one module, publisher 3 none."""
+    from modules.marketplace.models import MarketplaceModule, ModuleVersion, Publisher
+
+    for publisher_id in (1, 2, 3):
+        db.add(Publisher(
+            id=publisher_id,
+            user_id=publisher_id,
+            display_name=f"Publisher {publisher_id}",
+            slug=f"publisher-{publisher_id}",
+            commission_rate=Decimal("20.00"),
+        ))
+    module.status = "published"
+    module.download_count = 100
+    module.view_count = 400
+    module.average_rating = Decimal("4.00")
+    module.rating_count = 3
+    draft = MarketplaceModule(
+        publisher_id=1, technical_name="sale_draft", display_name="Sale Draft",
+        slug="sale-draft", short_description="Draft", download_count=5, average_rating=Decimal("5.00"),
+        rating_count=1,
+    )
+    other = MarketplaceModule(
+        publisher_id=2, technical_name="stock_plus", display_name="Stock Plus",
+        slug="stock-plus", short_description="Stock", status="published", download_count=7,
+    )
+    db.add_all([draft, other])
+    db.flush()
+    db.add_all([
+        ModuleVersion(module_id=module.id, version="1.0.0", zip_file_url="s3://sale_plus/1.0.0.zip"),
+        ModuleVersion(module_id=module.id, version="1.1.0", zip_file_url="s3://sale_plus/1.1.0.zip"),
+    ])
+    db.commit()
+    return {"sale_plus": module, "sale_draft": draft, "stock_plus": other}
+
+
+def _sale(db, order_id, module, amount, completed_at, payment_status="completed"):
+    from modules.marketplace.models import Order, OrderItem
+
+    db.add(Order(
+        id=order_id, order_number=f"ORD-{order_id}", user_id=1,
+        subtotal=Decimal(amount), total=Decimal(amount),
+        status="completed", payment_status=payment_status, completed_at=completed_at,
+    ))
+    db.add(OrderItem(
+        order_id=order_id, module_id=module.id, module_name=module.display_name,
+        module_technical_name=module.technical_name, license_type="purchase",
+        unit_price=Decimal(amount), total_price=Decimal(amount),
+    ))
+    db.commit()
+
+
+def _activity(db, module, day, downloads=0, views=0):
+    from modules.marketplace.models import ModuleDownload, ModuleView
+
+    db.add_all([ModuleDownload(module_id=module.id, download_date=day) for _ in range(downloads)])
+    db.add_all([ModuleView(module_id=module.id, view_date=day) for _ in range(views)])
+    db.commit()
+
+
+class TestAllTime:
+    def test_grouped_refresh_covers_every_publisher(self, db, service, catalog):
+        _sale(db, 1, catalog["sale_plus"], "40.00", datetime.utcnow())
+        _sale(db, 2, catalog["sale_plus"], "60.00", datetime.utcnow(), payment_status="refunded")
+
+        assert service.refresh_stats() == 3
+
+        first, second, third = (service.get_stats(publisher_id) for publisher_id in (1, 2, 3))
+        assert (first.total_modules, first.published_modules, first.total_versions) == (2, 1, 2)
+        assert (first.total_downloads, first.total_views, first.total_reviews) == (105, 400, 4)
+        assert first.average_rating == Decimal("4.50")
+        assert (first.total_revenue, first.total_earnings) == (Decimal("40.00"), Decimal("32.00"))
+        assert (second.total_modules, second.total_downloads, second.average_rating) == (1, 7, None)
+        assert (third.total_modules, third.total_revenue) == (0, Decimal("0.00"))
+
+    def test_recalculate_single_publisher(self, db, service, catalog):
+        stats = service.recalculate_stats(2)
+
+        assert (stats.publisher_id, stats.total_downloads) == (2, 7)
+        assert service.get_stats(1) is None
+
+    def test_top_publishers_read_precomputed_stats(self, db, service, catalog):
+        from modules.marketplace.models import Publisher
+
+        db.query(Publisher).update({"status": "active"})
+        service.refresh_stats()
+
+        assert [p.id for p in service.get_top_publishers()] == [1, 2, 3]
+
+
+class TestRollups:
+    def test_daily_and_monthly_rollups(self, db, service, catalog):
+        yesterday = TODAY - timedelta(days=1)
+        _activity(db, catalog["sale_plus"], TODAY, downloads=3, views=5)
+        _activity(db, catalog["sale_draft"], TODAY, downloads=1)
+        _activity(db, catalog["stock_plus"], yesterday, downloads=2)
+        _sale(db, 1, catalog["sale_plus"], "40.00", datetime.combine(TODAY, datetime.min.time()))
+
+        assert service.rollup_stats("day", TODAY) == 1
+        service.rollup_stats("month", TODAY)
+
+        (day,) = service.get_stats_history(1, "day")
+        assert (day.downloads_this_period, day.views_this_period, day.revenue_this_period) == (
+            4, 5, Decimal("40.00")
+        )
+        assert service.get_stats_history(2, "day") == []
+        (month,) = service.get_stats_history(1, "month")
+        assert month.period_start == datetime(TODAY.year, TODAY.month, 1)
+
+    def test_rollup_rewrite_is_idempotent(self, db, service, catalog):
+        from modules.marketplace.models import ModuleDownload, PublisherStats
+
+        _activity(db, catalog["stock_plus"], TODAY, downloads=2)
+        service.rollup_stats("day", TODAY)
+        db.query(ModuleDownload).delete()
+        db.commit()
+
+        service.rollup_stats("day", TODAY)
+
+        (day,) = service.get_stats_history(2, "day")
+        assert day.downloads_this_period == 0
+        assert db.query(PublisherStats).count() == 1
+
+    def test_unknown_period(self, service):
+        with pytest.raises(ValueError):
+            service.rollup_stats("week", TODAY)
+
+
+class TestIncremental:
+    def test_only_active_publishers_refreshed(self, db, service, catalog):
+        from modules.marketplace.models import MarketplaceModule, ModuleVersion
+
+        first = service.refresh_stats_incremental()
+        assert first["publishers"] == 3
+
+        an_hour_ago = datetime.utcnow() - timedelta(hours=1)
+        db.query(MarketplaceModule).update({"created_at": an_hour_ago, "updated_at": an_hour_ago})
+        db.query(ModuleVersion).update({"created_at": an_hour_ago})
+        db.commit()
+        since = datetime.utcnow() - timedelta(minutes=1)
+        _activity(db, catalog["stock_plus"], TODAY, downloads=2)
+
+        result = service.refresh_stats_incremental(since=since)
+
+        assert result["publishers"] == 1
+        assert service.get_stats_history(2, "day")[0].downloads_this_period == 2
+        assert service.get_stats(2).calculated_at > service.get_stats(1).calculated_at
+
+    def test_no_activity_touches_nothing(self, db, service, catalog):
+        result = service.refresh_stats_incremental(since=datetime.utcnow() + timedelta(minutes=1))
+
+        assert result["publishers"] == 0
+        assert service.get_stats(1) is None
+
+
+def test_publisher_analytics_grouped(db, catalog):
+    from modules.marketplace.services.analytics_service import AnalyticsService
+
+    _activity(db, catalog["sale_plus"], TODAY, downloads=3, views=2)
+    _activity(db, catalog["stock_plus"], TODAY, downloads=4)
+
+    analytics = AnalyticsService(db).get_publisher_analytics(1)
+
+    assert (analytics["total_downloads"], analytics["total_views"]) == (3, 2)
+    assert [(m["technical_name"], m["downloads"]) for m in analytics["modules"]] == [
+        ("sale_plus", 3), ("sale_draft", 0)
+    ]
@@ -0,0 +1,136 @@
+"""
+Review Rating Summary Tests
+
+Tests for incrementally maintained rating summaries and their rebuild
+from the reviews.
+"""
+
+import pytest
+from sqlalchemy import event
+
+
+@pytest.fixture
+def service(db):
+    from modules.marketplace.services.review_service import ReviewService
+    return ReviewService(db)
+
+
+@pytest.fixture
+def summary(db, module):
+    from modules.marketplace.models import RatingSummary
+    from modules.marketplace.services.module_service import ModuleService
+
+    ModuleService(db)._initialize_rating_summary(module.id)
+    return db.query(RatingSummary).filter(RatingSummary.module_id == module.id).one()
+
+
+def _review(service, module, user_id, rating, **detailed):
+    return service.create_review(
+        module_id=module.id,
+        user_id=user_id,
+        rating=rating,
+        detailed_ratings=detailed or None,
+    )
+
+
+def _snapshot(summary):
+    """Fields a rebuild must agree with."""
+    skipped = {"id", "created_at", "updated_at", "recalculated_at"}
+    return {c.name: getattr(summary, c.name) for c in summary.__table__.columns if c.name not in skipped}
+
+
+class TestIncrementalSummary:
+    def test_create_update_delete(self, db, service, module, summary):
+        first = _review(service, module, 1, 5, ease_of_use=4)
+        _review(service, module, 2, 4, ease_of_use=2, value=5)
+
+        db.refresh(summary)
+        assert (summary.total_reviews, summary.average_rating) == (2, 450)
+        assert (summary.rating_5, summary.rating_4) == (1, 1)
+        assert (summary.avg_ease_of_use, summary.avg_value) == (300, 500)
+
+        service.update_review(first.id, 1, rating=2, detailed_ratings={"ease_of_use": 1})
+        db.refresh(summary)
+        assert (summary.rating_5, summary.rating_2, summary.average_rating) == (0, 1, 300)
+        assert summary.avg_ease_of_use == 150
+
+        service.delete_review(first.id, 1)
+        db.refresh(summary)
+        db.refresh(module)
+        assert (summary.total_reviews, summary.average_rating, summary.avg_ease_of_use) == (1, 400, 200)
+        assert float(module.average_rating) == 4.0
+        assert module.rating_distribution == {"5": 0, "4": 1, "3": 0, "2": 0, "1": 0}
+
+    def test_moderation_removes_and_restores(self, db, service, module, summary):
+        review = _review(service, module, 1, 1)
+        _review(service, module, 2, 5)
+
+        service.moderate_review(review.id, moderator_id=9, action="hide")
+        db.refresh(summary)
+        assert (summary.total_reviews, summary.average_rating) == (1, 500)
+
+        service.moderate_review(review.id, moderator_id=9, action="approve")
+        db.refresh(summary)
+        assert (summary.total_reviews, summary.average_rating) == (2, 300)
+
+    def test_edit_does_not_scan_reviews(self, db, service, module, summary):
+        from modules.marketplace.models import ModuleReview
+
+        reviews = [_review(service, module, user_id, 3) for user_id in range(1, 21)]
+        statements = []
+        event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        service.update_review(reviews[0].id, 1, rating=4)
+
+        table = ModuleReview.__table__.name
+        assert not any(f"{table}.module_id = ?" in s for s in statements)
+        db.refresh(summary)
+        assert summary.rating_sum == 61
+
+    def test_missing_summary_is_built(self, db, service, module):
+        from modules.marketplace.models import RatingSummary
+
+        _review(service, module, 1, 4)
+        _review(service, module, 2, 2)
+
+        summary = db.query(RatingSummary).filter(RatingSummary.module_id == module.id).one()
+        assert (summary.total_reviews, summary.average_rating) == (2, 300)
+
+    def test_summary_created_concurrently_gets_delta(self, db, service, module, summary, monkeypatch):
+        _review(service, module, 1, 4)
+        # Another writer creates the row between our lookup and our insert
+        lock = service._lock_rating_summary
+        calls = []
+        monkeypatch.setattr(
+            service, "_lock_rating_summary",
+            lambda module_id: lock(module_id) if calls.append(module_id) or len(calls) > 1 else None,
+        )
+        monkeypatch.setattr(
+            service, "_rebuild_rating_summaries",
+            lambda module_ids=None: pytest.fail("summary rebuilt instead of updated"),
+        )
+
+        _review(service, module, 2, 2)
+
+        db.refresh(summary)
+        assert (summary.total_reviews, summary.average_rating) == (2, 300)
+        assert calls == [module.id, module.id]
+
+
+class TestRebuild:
+    def test_rebuild_matches_incremental(self, db, service, module, summary):
+        first = _review(service, module, 1, 5, features=5, support=3)
+        _review(service, module, 2, 3, features=1)
+        _review(service, module, 3, 4)
+        service.update_review(first.id, 1, rating=4)
+        service.moderate_review(first.id, moderator_id=9, action="remove")
+        db.refresh(summary)
+        expected = _snapshot(summary)
+
+        summary.rating_sum = 999
+        summary.total_reviews = 42
+        db.commit()
+
+        assert service.rebuild_rating_summaries() == 1
+        db.refresh(summary)
+        assert _snapshot(summary) == expected
@@ -0,0 +1,152 @@
+"""
+Usage Ingestion Tests
+
+Tests for buffered metered-usage ingestion with idempotency keys and
+atomic usage upserts.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+TODAY = date.today()
+
+
+@pytest.fixture
+def buffer():
+    from modules.marketplace.services.usage_ingestion import UsageBuffer
+    return UsageBuffer(flush_interval=0, flush_size=100)
+
+
+@pytest.fixture
+def subscription_ids(db):
+    """A metered subscription of user 1 and a flat-rate one of user 2."""
+    from modules.marketplace.models import Subscription, SubscriptionPlan
+
+    metered = SubscriptionPlan(
+        code="api", name="API", tier="pro", billing_cycle="monthly", price=Decimal("10"),
+        is_metered=True, metered_unit_price=Decimal("0.01"), metered_included=1000,
+    )
+    flat = SubscriptionPlan(code="pro", name="Pro", tier="pro", billing_cycle="monthly", price=Decimal("20"))
+    db.add_all([metered, flat])
+    db.flush()
+    subscriptions = [
+        Subscription(
+            subscription_id=f"sub_{user_id}",
+            user_id=user_id,
+            plan_id=plan.id,
+            status="active",
+            billing_cycle="monthly",
+            current_period_start=TODAY,
+            current_period_end=TODAY + timedelta(days=30),
+            unit_price=plan.price,
+        )
+        for user_id, plan in ((1, metered), (2, flat))
+    ]
+    db.add_all(subscriptions)
+    db.commit()
+    return [s.id for s in subscriptions]
+
+
+def _event(subscription_id, key, quantity=1, metric="api_calls"):
+    from modules.marketplace.services.usage_ingestion import UsageEvent
+    return UsageEvent(subscription_id=subscription_id, metric=metric, quantity=Decimal(quantity), idempotency_key=key)
+
+
+def _quantities(db):
+    from modules.marketplace.models import SubscriptionUsage
+    db.expire_all()
+    return dict(db.query(SubscriptionUsage.metric, SubscriptionUsage.quantity))
+
+
+class TestIngest:
+    def test_events_aggregated_into_usage_rows(self, db, buffer, subscription_ids):
+        from modules.marketplace.models import SubscriptionUsage
+
+        metered = subscription_ids[0]
+        events = [_event(metered, f"evt_{i}") for i in range(50)] + [_event(metered, "gb_1", 3, "storage_gb")]
+
+        result = buffer.ingest(db, events)
+
+        assert result == {"accepted": 51, "rejected": []}
+        assert buffer.pending == 0
+        assert _quantities(db) == {"api_calls": Decimal("50"), "storage_gb": Decimal("3")}
+        usage = db.query(SubscriptionUsage).filter(SubscriptionUsage.metric == "api_calls").one()
+        assert (usage.period_start, usage.unit_price, usage.included_quantity) == (
+            TODAY, Decimal("0.01"), Decimal("1000")
+        )
+
+    def test_retried_events_count_once(self, db, buffer, subscription_ids):
+        metered = subscription_ids[0]
+        buffer.ingest(db, [_event(metered, "evt_1", 5), _event(metered, "evt_1", 5)])
+
+        # Retry of an acknowledged batch, plus one new event
+        buffer.ingest(db, [_event(metered, "evt_1", 5), _event(metered, "evt_2", 2)])
+
+        assert _quantities(db) == {"api_calls": Decimal("7")}
+
+    def test_invalid_events_rejected(self, db, buffer, subscription_ids):
+        metered, flat = subscription_ids
+
+        result = buffer.ingest(db, [
+            _event(metered, "evt_1"),
+            _event(flat, "evt_2"),
+            _event(999, "evt_3"),
+            _event(metered, ""),
+        ], user_id=1)
+
+        assert result["accepted"] == 1
+        assert [(r["index"], r["error"]) for r in result["rejected"]] == [
+            (1, f"Subscription {flat} not found"),
+            (2, "Subscription 999 not found"),
+            (3, "Missing idempotency key"),
+        ]
+        assert buffer.ingest(db, [_event(flat, "evt_2")])["rejected"][0]["error"] == (
+            "Subscription plan does not support metered billing"
+        )
+
+
+class TestFlush:
+    def test_failed_flush_keeps_events(self, db, buffer, subscription_ids, monkeypatch):
+        from modules.marketplace.services import usage_ingestion
+
+        metered = subscription_ids[0]
+
+        def failing(db, rows):
+            raise RuntimeError("database unavailable")
+
+        monkeypatch.setattr(usage_ingestion, "upsert_usage", failing)
+        with pytest.raises(RuntimeError):
+            buffer.ingest(db, [_event(metered, "evt_1"), _event(metered, "evt_2")])
+        assert buffer.pending == 2
+        assert _quantities(db) == {}
+
+        monkeypatch.undo()
+        assert buffer.flush(db) == 2
+        assert _quantities(db) == {"api_calls": Decimal("2")}
+
+    def test_flushes_add_to_existing_usage(self, db, buffer, subscription_ids):
+        from modules.marketplace.services.subscription_service import SubscriptionService
+
+        metered = subscription_ids[0]
+        SubscriptionService(db).record_usage(metered, "api_calls", Decimal("10"))
+        buffer.ingest(db, [_event(metered, "evt_1", 4)], wait=False)
+        buffer.ingest(db, [_event(metered, "evt_2", 6)], wait=False)
+        assert buffer.pending == 2
+
+        buffer.flush(db)
+        usage = SubscriptionService(db).record_usage(metered, "api_calls", Decimal("1"))
+
+        assert usage.quantity == Decimal("21")
+        assert _quantities(db) == {"api_calls": Decimal("21")}
+
+    def test_purge_expired_keys(self, db, buffer, subscription_ids):
+        from modules.marketplace.models import UsageEventKey
+
+        metered = subscription_ids[0]
+        buffer.ingest(db, [_event(metered, "evt_1")])
+
+        assert buffer.purge_keys(db, older_than_days=1) == 0
+        assert buffer.purge_keys(db, older_than_days=-1) == 1
+        assert db.query(UsageEventKey).count() == 0
@@ -312,3 +312,109 @@ class TestRegistry:
         # base should come before auth and app
         assert load_order.index("base") < load_order.index("auth")
         assert load_order.index("auth") < load_order.index("app")
+
+
+class TestManifestIndex:
+    """Tests for the persisted manifest index and level-based loading."""
+
+    def _make_module(self, root, name, depends=()):
+        module = root / name
+        module.mkdir()
+        (module / "__init__.py").write_text("")
+        manifest = {"name": name.title(), "version": "1.0.0", "depends": list(depends)}
+        (module / "__manifest__.py").write_text(str(manifest))
+        return module
+
+    @pytest.fixture
+    def registry(self):
+        registry = ModuleRegistry()
+        registry.reset()
+        return registry
+
+    def test_index_reused_across_loaders(self, tmp_path, registry):
+        """A second loader reads unchanged manifests from the index."""
+        addons = tmp_path / "addons"
+        addons.mkdir()
+        self._make_module(addons, "alpha")
+        index_path = tmp_path / "index.json"
+
+        first = ModuleLoader([addons], registry, index_path=index_path)
+        first.discover_modules()
+        first.load_manifest(first.get_module_path("alpha"))
+        assert first.index_stats == {"hits": 0, "misses": 1}
+        assert first.save_manifest_index() is True
+
+        second = ModuleLoader([addons], registry, index_path=index_path)
+        second.discover_modules()
+        manifest = second.load_manifest(second.get_module_path("alpha"))
+        assert manifest["name"] == "Alpha"
+        assert second.index_stats == {"hits": 1, "misses": 0}
+
+    def test_index_invalidated_on_change(self, tmp_path, registry):
+        """Editing a manifest forces a re-parse."""
+        addons = tmp_path / "addons"
+        addons.mkdir()
+        module = self._make_module(addons, "alpha")
+        index_path = tmp_path / "index.json"
+
+        first = ModuleLoader([addons], registry, index_path=index_path)
+        first.discover_modules()
+        first.load_manifest(module)
+        first.save_manifest_index()
+
+        (module / "__manifest__.py").write_text(
+            str({"name": "Alpha Two", "version": "2.0.0", "depends": []})
+        )
+
+        second = ModuleLoader([addons], registry, index_path=index_path)
+        second.discover_modules()
+        manifest = second.load_manifest(module)
+        assert manifest["version"] == "2.0.0"
+        assert second.index_stats["misses"] == 1
+
+    def test_corrupt_index_ignored(self, tmp_path, registry):
+        """A corrupt index file falls back to parsing manifests."""
+        addons = tmp_path / "addons"
+        addons.mkdir()
+        module = self._make_module(addons, "alpha")
+        index_path = tmp_path / "index.json"
+        index_path.write_text("{not json")
+
+        loader = ModuleLoader([addons], registry, index_path=index_path)
+        loader.discover_modules()
+        assert loader.load_manifest(module)["name"] == "Alpha"
+
+    def test_resolve_load_levels(self, tmp_path, registry):
+        """Independent modules share a level; dependents come later."""
+        addons = tmp_path / "addons"
+        addons.mkdir()
+        self._make_module(addons, "core")
+        self._make_module(addons, "left", ["core"])
+        self._make_module(addons, "right", ["core"])
+        self._make_module(addons, "top", ["left", "right"])
+
+        loader = ModuleLoader([addons], registry)
+        loader.discover_modules()
+        for name in ("core", "left", "right", "top"):
+            path = loader.get_module_path(name)
+            registry.register(name, loader.validate_manifest(loader.load_manifest(path)), path)
+
+        assert registry.resolve_load_levels() == [["core"], ["left", "right"], ["top"]]
+
+    def test_load_all_modules_records_timings(self, tmp_path, registry, monkeypatch):
+        """Parallel loading keeps dependency levels and records timings."""
+        addons = tmp_path / "fvaddons"
+        addons.mkdir()
+        (addons / "__init__.py").write_text("")
+        self._make_module(addons, "core")
+        self._make_module(addons, "left", ["core"])
+        self._make_module(addons, "right", ["core"])
+        monkeypatch.syspath_prepend(str(tmp_path))
+
+        loader = ModuleLoader([addons], registry, max_workers=4)
+        loaded = loader.load_all_modules()
+
+        assert [m.name for m in loaded] == ["core", "left", "right"]
+        assert loader.timings["core"].level == 0
+        assert loader.timings["left"].level == 1
+        assert loader.timings["right"].total >= 0
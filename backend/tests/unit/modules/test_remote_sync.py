@@ -0,0 +1,141 @@
+"""
+Remote Module Sync Tests
+
+Tests for incremental, content-hashed syncing of remote modules and
+atomic installs, using local directories as NFS and S3 stand-ins.
+"""
+
+import os
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+def _write_module(root: Path, name: str, version: str = "1.0.0", files: dict = None) -> Path:
+    module = root / name
+    module.mkdir(parents=True, exist_ok=True)
+    (module / "__init__.py").write_text("")
+    (module / "__manifest__.py").write_text(str({"name": name, "version": version}))
+    for relative_path, content in (files or {}).items():
+        path = module / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    return module
+
+
+@pytest.fixture
+def rms():
+    # Imported once the test database exists: importing modules.base
+    # registers its tables on the shared metadata
+    from modules.base.services import remote_module_service
+    return remote_module_service
+
+
+@pytest.fixture
+def service(tmp_path, rms):
+    return rms.RemoteModuleService(MagicMock(), local_cache_dir=tmp_path / "cache", max_workers=4)
+
+
+class TestNFSSync:
+    @pytest.fixture
+    def remote(self, tmp_path, service):
+        remote = tmp_path / "nfs"
+        _write_module(remote, "sale", files={"models/order.py": "A = 1\n", "data/view.xml": "<odoo/>"})
+        service.add_remote_source("nfs", "nfs", {"mount_path": str(remote)})
+        return remote
+
+    def test_first_sync_transfers_all_files(self, service, remote, rms):
+        result = service.sync_module("sale")
+
+        assert result["status"] == "synced"
+        assert result["transferred"] == 4
+        local = service.get_local_module_path("sale")
+        assert (local / "models" / "order.py").read_text() == "A = 1\n"
+        assert (local / rms.SYNC_MANIFEST).exists()
+
+    def test_resync_transfers_only_changed_files(self, service, remote):
+        service.sync_module("sale")
+        (remote / "sale" / "models" / "order.py").write_text("A = 2\n")
+        (remote / "sale" / "data" / "view.xml").unlink()
+
+        result = service.sync_module("sale")
+
+        assert (result["transferred"], result["unchanged"], result["removed"]) == (1, 2, 1)
+        local = service.get_local_module_path("sale")
+        assert (local / "models" / "order.py").read_text() == "A = 2\n"
+        assert not (local / "data" / "view.xml").exists()
+
+    def test_unchanged_module_is_not_reinstalled(self, service, remote):
+        service.sync_module("sale")
+        target = os.readlink(service.local_cache_dir / "sale")
+
+        result = service.sync_module("sale")
+
+        assert result["message"] == "Already up-to-date"
+        assert result["transferred"] == 0
+        assert os.readlink(service.local_cache_dir / "sale") == target
+
+    def test_force_transfers_everything(self, service, remote):
+        service.sync_module("sale")
+
+        result = service.sync_module("sale", force=True)
+
+        assert (result["transferred"], result["unchanged"]) == (4, 0)
+
+    def test_install_swaps_versions_atomically(self, service, remote):
+        service.sync_module("sale")
+        first = (service.local_cache_dir / "sale").resolve()
+        (remote / "sale" / "models" / "order.py").write_text("A = 2\n")
+
+        service.sync_module("sale")
+
+        link = service.local_cache_dir / "sale"
+        assert link.is_symlink()
+        assert link.resolve() != first
+        # Readers holding the previous version can still finish
+        assert (first / "models" / "order.py").read_text() == "A = 1\n"
+
+    def test_legacy_cache_directory_is_replaced(self, service, remote):
+        _write_module(service.local_cache_dir, "sale", version="0.9.0")
+
+        result = service.sync_module("sale")
+
+        assert result["status"] == "synced"
+        assert (service.local_cache_dir / "sale").is_symlink()
+
+
+class TestS3Sync:
+    @pytest.fixture
+    def store(self, tmp_path, service):
+        store = tmp_path / "objects"
+        _write_module(store / "modules" / "addons", "crm", files={"models/lead.py": "B = 1\n"})
+        _write_module(store / "modules" / "addons", "stock")
+        service.add_remote_source("s3", "s3", {
+            "bucket": "modules",
+            "prefix": "addons/",
+            "endpoint": f"file://{store}",
+        })
+        return store
+
+    def test_discovers_and_syncs_from_object_store(self, service, store):
+        results = service.sync_all_modules()
+
+        assert set(results) == {"crm", "stock"}
+        assert all(r["status"] == "synced" for r in results.values())
+        assert (service.get_local_module_path("crm") / "models" / "lead.py").read_text() == "B = 1\n"
+
+    def test_changed_objects_detected_by_etag(self, service, store):
+        service.sync_all_modules()
+        (store / "modules" / "addons" / "crm" / "models" / "lead.py").write_text("B = 2\n")
+
+        results = service.sync_all_modules()
+
+        assert results["crm"]["transferred"] == 1
+        assert results["stock"]["transferred"] == 0
+
+    def test_sync_all_discovers_once(self, service, store):
+        with patch.object(service, "discover_remote_modules", wraps=service.discover_remote_modules) as discover:
+            service.sync_all_modules()
+
+        assert discover.call_count == 1